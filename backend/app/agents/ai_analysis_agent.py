@@ -9,6 +9,7 @@ This agent performs AI-powered analysis and recommendations:
 - Job description analysis
 """
 
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -19,6 +20,12 @@ from app.agents.data_retrieval_agent import get_data_retrieval_agent
 
 logger = logging.getLogger(__name__)
 
+# Jobs scoring below this with the rule-based matcher are not sent to the LLM
+BATCH_MATCH_MIN_SCORE = 30
+
+# Jobs per batch prompt; chunks are sent concurrently
+BATCH_MATCH_CHUNK_SIZE = 20
+
 
 class AIAnalysisAgent(BaseAgent):
     """Agent for AI-powered analysis and recommendations"""
@@ -60,6 +67,13 @@ class AIAnalysisAgent(BaseAgent):
                     parameters.get("user_skills"),
                     parameters.get("job_requirements")
                 )
+            elif action == "analyze_skill_matches_batch":
+                result = await self.analyze_skill_matches_batch(
+                    parameters.get("user_skills"),
+                    parameters.get("jobs", []),
+                    min_score=parameters.get("min_score", BATCH_MATCH_MIN_SCORE),
+                    chunk_size=parameters.get("chunk_size", BATCH_MATCH_CHUNK_SIZE)
+                )
             elif action == "generate_career_recommendations":
                 result = await self.generate_career_recommendations(
                     parameters.get("user_profile")
@@ -121,8 +135,8 @@ Candidate Skills:
 {self._format_skills(user_skills)}
 
 Job Requirements:
-Required Skills: {job_requirements.get('required_skills', [])}
-Preferred Skills: {job_requirements.get('preferred_skills', [])}
+Required Skills: {job_requirements.get('required_skills') or []}
+Preferred Skills: {job_requirements.get('preferred_skills') or []}
 Job Title: {job_requirements.get('title', 'N/A')}
 Industry: {job_requirements.get('industry', 'N/A')}
 
@@ -137,9 +151,9 @@ Provide a detailed analysis including:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "match_score": "number (0-100)",
                     "matched_required_skills": "array of strings",
                     "matched_preferred_skills": "array of strings",
@@ -159,6 +173,109 @@ Format as JSON."""
             # Fallback to rule-based matching
             return self._fallback_skill_match(user_skills, job_requirements)
     
+    async def analyze_skill_matches_batch(
+        self,
+        user_skills: List[Dict[str, Any]],
+        jobs: List[Dict[str, Any]],
+        min_score: int = BATCH_MATCH_MIN_SCORE,
+        chunk_size: int = BATCH_MATCH_CHUNK_SIZE
+    ) -> List[Dict[str, Any]]:
+        """
+        Score one candidate against many jobs
+        
+        Every job is scored with the rule-based matcher first; only jobs
+        reaching min_score are sent to the LLM, chunk_size jobs per prompt,
+        with all chunks in flight at once. Jobs that were pruned, or whose
+        chunk failed, keep their rule-based result.
+        
+        Args:
+            user_skills: Candidate skills
+            jobs: Job requirements (title, required_skills, preferred_skills, industry)
+            min_score: Rule-based score (0-100) needed for LLM analysis
+            chunk_size: Jobs per LLM prompt
+            
+        Returns:
+            One analysis per job, in the order given
+        """
+        results = []
+        for job in jobs:
+            fallback = self._fallback_skill_match(user_skills, job)
+            results.append({**fallback, "scored_by": "rule_based"})
+        
+        if not self.ai_client.is_available():
+            return results
+        
+        candidates = [i for i, result in enumerate(results) if result["match_score"] >= min_score]
+        chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+        
+        analyses = await asyncio.gather(
+            *[self._analyze_skill_match_chunk(user_skills, jobs, chunk) for chunk in chunks],
+            return_exceptions=True
+        )
+        
+        for chunk, analysis in zip(chunks, analyses):
+            if isinstance(analysis, Exception):
+                logger.error(f"Batch skill match failed for {len(chunk)} jobs: {analysis}")
+                continue
+            
+            for match in analysis.get("matches", []):
+                index = match.pop("job_index", None)
+                if index in chunk:
+                    results[index] = {**results[index], **match, "scored_by": "ai"}
+        
+        logger.info(
+            f"Batch skill match: {len(jobs)} jobs, {len(candidates)} sent to AI in {len(chunks)} prompts"
+        )
+        return results
+    
+    async def _analyze_skill_match_chunk(
+        self,
+        user_skills: List[Dict[str, Any]],
+        jobs: List[Dict[str, Any]],
+        indexes: List[int]
+    ) -> Dict[str, Any]:
+        """Score a chunk of jobs for one candidate in a single prompt"""
+        job_lines = "\n\n".join(
+            f"""Job {i}:
+Required Skills: {jobs[i].get('required_skills') or []}
+Preferred Skills: {jobs[i].get('preferred_skills') or []}
+Job Title: {jobs[i].get('title', 'N/A')}
+Industry: {jobs[i].get('industry', 'N/A')}"""
+            for i in indexes
+        )
+        
+        prompt = f"""Analyze the skill match between a candidate and each of the following job postings.
+
+Candidate Skills:
+{self._format_skills(user_skills)}
+
+{job_lines}
+
+For every job, provide:
+1. job_index (the number after "Job")
+2. Overall match score (0-100)
+3. Matched required skills
+4. Missing required skills
+5. Recommendation (Strong Match / Good Match / Weak Match / Not Recommended)
+
+Format as JSON."""
+
+        return await self.ai_client.generate_structured_output_async(
+            prompt=prompt,
+            output_schema={
+                "matches": [
+                    {
+                        "job_index": "integer",
+                        "match_score": "number (0-100)",
+                        "matched_required_skills": "array of strings",
+                        "missing_required_skills": "array of strings",
+                        "recommendation": "string"
+                    }
+                ]
+            },
+            cache_site="skill_match_batch"
+        )
+    
     async def generate_career_recommendations(
         self,
         user_profile: Dict[str, Any]
@@ -187,9 +304,9 @@ Provide comprehensive career recommendations including:
 
 Format as JSON."""
 
-            recommendations = await self.ai_client.generate_structured_output(
+            recommendations = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "progression_score": "number (0-10)",
                     "recommended_roles": "array of objects with: title, description, required_skills, timeline, salary_range",
                     "skills_to_develop": "array of strings",
@@ -227,9 +344,9 @@ Provide a structured learning path including:
 
 Format as JSON."""
 
-            learning_path = await self.ai_client.generate_structured_output(
+            learning_path = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "skill_gaps": "array of strings",
                     "learning_modules": "array of objects with: name, description, skills_covered, duration, priority",
                     "resources": "array of objects with: title, type, url, cost",
@@ -266,9 +383,9 @@ Provide comprehensive analysis including:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "quality_score": "number (0-100)",
                     "strengths": "array of strings",
                     "weaknesses": "array of strings",
@@ -310,9 +427,9 @@ Provide optimization suggestions including:
 
 Format as JSON."""
 
-            optimization = await self.ai_client.generate_structured_output(
+            optimization = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "improved_title": "string",
                     "enhanced_description": "string",
                     "must_have_requirements": "array of strings",
@@ -355,9 +472,9 @@ Provide salary prediction including:
 
 Format as JSON."""
 
-            prediction = await self.ai_client.generate_structured_output(
+            prediction = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "min_salary": "number",
                     "max_salary": "number",
                     "average_salary": "number",
@@ -398,9 +515,9 @@ Provide comprehensive analysis including:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "trajectory_score": "number (0-10)",
                     "progression_pattern": "string",
                     "key_achievements": "array of strings",
@@ -464,8 +581,8 @@ Format as JSON."""
             for skill in user_skills
         }
         
-        required = set(s.lower() for s in job_requirements.get('required_skills', []))
-        preferred = set(s.lower() for s in job_requirements.get('preferred_skills', []))
+        required = set(s.lower() for s in job_requirements.get('required_skills') or [])
+        preferred = set(s.lower() for s in job_requirements.get('preferred_skills') or [])
         
         matched_required = user_skill_names & required
         matched_preferred = user_skill_names & preferred
@@ -13,11 +13,12 @@ This agent handles analytics and insights:
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from collections import Counter
 
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentStatus
 from app.core.ai_client import get_ai_client
+from app.core.cache import single_flight
 from app.agents.data_retrieval_agent import get_data_retrieval_agent
+from app.services.skill_demand_index import get_skill_demand_index
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,7 @@ class AnalyticsAgent(BaseAgent):
         )
         self.ai_client = get_ai_client()
         self.data_agent = get_data_retrieval_agent()
+        self.demand_index = get_skill_demand_index()
         
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -122,30 +124,10 @@ class AnalyticsAgent(BaseAgent):
     ) -> Dict[str, Any]:
         """Analyze skills gap in the market"""
         try:
-            # Fetch job postings to understand demand
-            filters = {}
-            if industry:
-                filters["industry"] = industry
-            if location:
-                filters["location"] = location
-            
-            jobs = await self.data_agent.fetch_job_postings(filters)
-            
-            # Extract required skills from jobs
-            all_required_skills = []
-            all_preferred_skills = []
-            
-            for job in jobs:
-                all_required_skills.extend(job.get("required_skills", []))
-                all_preferred_skills.extend(job.get("preferred_skills", []))
-            
-            # Count skill frequencies
-            required_counter = Counter(all_required_skills)
-            preferred_counter = Counter(all_preferred_skills)
-            
-            # Get top skills in demand
-            top_required = required_counter.most_common(10)
-            top_preferred = preferred_counter.most_common(10)
+            # Demand counts over all active postings, maintained incrementally
+            demand = await self._get_demand_index()
+            top_required = await demand.top("required", 10, industry=industry, location=location)
+            top_preferred = await demand.top("preferred", 10, industry=industry, location=location)
             
             # AI-powered gap analysis
             prompt = f"""Analyze the skills gap in the market.
@@ -168,9 +150,9 @@ Provide analysis:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "critical_gaps": "array of objects with: skill, demand_level, gap_severity",
                     "emerging_trends": "array of strings",
                     "obsolete_skills": "array of strings",
@@ -199,23 +181,23 @@ Format as JSON."""
     ) -> Dict[str, Any]:
         """Generate market trends report"""
         try:
-            # Fetch recent job postings
-            jobs = await self.data_agent.fetch_job_postings({
-                "industry": industry,
-                "limit": 100
-            })
-            
-            # Analyze trends
-            industries = Counter([job.get("industry") for job in jobs if job.get("industry")])
-            locations = Counter([job.get("location") for job in jobs if job.get("location")])
-            employment_types = Counter([job.get("employment_type") for job in jobs if job.get("employment_type")])
+            demand = await self._get_demand_index()
             
             return {
                 "timeframe": timeframe,
-                "total_jobs": len(jobs),
-                "top_industries": [{"industry": ind, "count": count} for ind, count in industries.most_common(5)],
-                "top_locations": [{"location": loc, "count": count} for loc, count in locations.most_common(5)],
-                "employment_types": [{"type": et, "count": count} for et, count in employment_types.most_common()],
+                "total_jobs": await demand.job_count(industry=industry),
+                "top_industries": [
+                    {"industry": ind, "count": count}
+                    for ind, count in await demand.top("industry", 5, industry=industry)
+                ],
+                "top_locations": [
+                    {"location": loc, "count": count}
+                    for loc, count in await demand.top("location", 5, industry=industry)
+                ],
+                "employment_types": [
+                    {"type": et, "count": count}
+                    for et, count in await demand.top("employment_type", None, industry=industry)
+                ],
                 "growth_rate": "+15%",  # Placeholder
                 "generated_at": datetime.utcnow().isoformat()
             }
@@ -280,9 +262,9 @@ Analyze:
 
 Format as JSON."""
 
-            insights = await self.ai_client.generate_structured_output(
+            insights = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "workforce_size": "number",
                     "skills_distribution": "object with industry: skill_count",
                     "employment_rate": "number (percentage)",
@@ -291,7 +273,10 @@ Format as JSON."""
                     "education_levels": "array of objects with: level, percentage",
                     "key_challenges": "array of strings",
                     "recommendations": "array of strings"
-                }
+                },
+                # Fixed prompt; the answer only needs refreshing a few times a day
+                cache_ttl=6 * 3600,
+                cache_site="workforce_insights"
             )
             
             return {
@@ -327,9 +312,9 @@ Predict:
 
 Format as JSON."""
 
-            predictions = await self.ai_client.generate_structured_output(
+            predictions = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "hiring_volume_trend": "string (increasing/decreasing/stable)",
                     "expected_growth_rate": "number (percentage)",
                     "hot_job_roles": "array of strings",
@@ -394,38 +379,34 @@ Format as JSON."""
     ) -> Dict[str, Any]:
         """Generate detailed skill demand report"""
         try:
-            # Fetch job postings
-            jobs = await self.data_agent.fetch_job_postings({
-                "industry": industry,
-                "limit": 200
-            })
+            demand = await self._get_demand_index()
+            total_jobs = await demand.job_count(industry=industry)
+            top_skills = await demand.top("skills", 20, industry=industry)
             
-            # Extract and analyze skills
-            all_skills = []
-            for job in jobs:
-                all_skills.extend(job.get("required_skills", []))
-                all_skills.extend(job.get("preferred_skills", []))
+            skill_categories = {
+                "technical": ["python", "java", "aws", "sql"],
+                "soft_skills": ["communication", "leadership", "teamwork"],
+                "management": ["project management", "agile", "scrum"]
+            }
             
-            skill_counter = Counter(all_skills)
-            top_skills = skill_counter.most_common(20)
+            category_counts = {}
+            for category, names in skill_categories.items():
+                counts = await demand.counts("skills_lower", names, industry=industry)
+                category_counts[category] = sum(counts.values())
             
             return {
                 "industry": industry or "All Industries",
-                "total_jobs_analyzed": len(jobs),
-                "total_unique_skills": len(skill_counter),
+                "total_jobs_analyzed": total_jobs,
+                "total_unique_skills": await demand.unique_count("skills", industry=industry),
                 "top_skills": [
                     {
                         "skill": skill,
                         "demand_count": count,
-                        "demand_percentage": round((count / len(jobs)) * 100, 1)
+                        "demand_percentage": round((count / total_jobs) * 100, 1) if total_jobs else 0.0
                     }
                     for skill, count in top_skills
                 ],
-                "skill_categories": {
-                    "technical": len([s for s in all_skills if s.lower() in ["python", "java", "aws", "sql"]]),
-                    "soft_skills": len([s for s in all_skills if s.lower() in ["communication", "leadership", "teamwork"]]),
-                    "management": len([s for s in all_skills if s.lower() in ["project management", "agile", "scrum"]])
-                },
+                "skill_categories": category_counts,
                 "generated_at": datetime.utcnow().isoformat()
             }
             
@@ -453,9 +434,9 @@ Provide:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "min_salary": "number",
                     "max_salary": "number",
                     "average_salary": "number",
@@ -479,6 +460,22 @@ Format as JSON."""
             logger.error(f"Error analyzing salary trends: {e}")
             return {"error": str(e)}
     
+    async def _get_demand_index(self):
+        """
+        Skill demand index, built from all active postings on a cold start
+        
+        Afterwards postings are kept current by their writers and
+        reconciled by app.worker, so requests only read.
+        """
+        if not await self.demand_index.is_built():
+            # Concurrent first requests in this process share one build;
+            # other processes wait on the index's rebuild lock
+            await single_flight.do(
+                "skill_demand_index:rebuild",
+                lambda: self.demand_index.ensure_built(self.data_agent.iter_active_job_postings)
+            )
+        return self.demand_index
+    
     def _fallback_workforce_insights(self) -> Dict[str, Any]:
         """Fallback workforce insights"""
         return {
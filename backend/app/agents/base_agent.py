@@ -7,12 +7,11 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 import logging
 import json
+import uuid
 from enum import Enum
 
-from anthropic import Anthropic
-from openai import OpenAI
-
-from app.core.config import settings
+from app.core.job_queue import AGENT_TASK_LOG_TOPIC, get_job_queue
+from app.core.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,8 @@ class AgentStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     PAUSED = "paused"
+    BUSY = "busy"
+    ERROR = "error"
 
 
 class AgentCapability(str, Enum):
@@ -36,6 +37,18 @@ class AgentCapability(str, Enum):
     DEPLOYMENT = "deployment"
     MONITORING = "monitoring"
     SECURITY = "security"
+    AI_ANALYSIS = "ai_analysis"
+    ANALYTICS = "analytics"
+    CACHING = "caching"
+    DATA_RETRIEVAL = "data_retrieval"
+    DATA_TRANSFORMATION = "data_transformation"
+    DOCUMENT_PROCESSING = "document_processing"
+    EMAIL = "email"
+    NOTIFICATION = "notification"
+    RECOMMENDATIONS = "recommendations"
+    SKILL_MATCHING = "skill_matching"
+    SMS = "sms"
+    VERIFICATION = "verification"
 
 
 class BaseAgent(ABC):
@@ -69,9 +82,8 @@ class BaseAgent(ABC):
         self.last_execution = None
         self.execution_count = 0
         
-        # Initialize LLM clients
-        self.anthropic_client = Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        # Shared per-process LLM gateway (pooled clients, concurrency and token budgets)
+        self.llm = get_llm_gateway()
         
         logger.info(f"Agent initialized: {self.name} ({self.agent_id})")
     
@@ -142,7 +154,7 @@ class BaseAgent(ABC):
         temperature: float = 0.7
     ) -> str:
         """
-        Call LLM (Anthropic Claude or OpenAI)
+        Call LLM (Anthropic Claude, falling back to OpenAI) via the gateway
         
         Args:
             prompt: User prompt
@@ -153,43 +165,13 @@ class BaseAgent(ABC):
         Returns:
             LLM response text
         """
-        try:
-            # Use Anthropic Claude by default
-            if self.anthropic_client and "claude" in self.model.lower():
-                messages = [{"role": "user", "content": prompt}]
-                
-                response = self.anthropic_client.messages.create(
-                    model=self.model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    system=system_prompt or "",
-                    messages=messages
-                )
-                
-                return response.content[0].text
-            
-            # Fallback to OpenAI
-            elif self.openai_client:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = self.openai_client.chat.completions.create(
-                    model=self.model if "gpt" in self.model.lower() else "gpt-4",
-                    messages=messages,
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-                
-                return response.choices[0].message.content
-            
-            else:
-                raise ValueError("No LLM client available")
-                
-        except Exception as e:
-            logger.error(f"LLM call failed: {str(e)}")
-            raise
+        return await self.llm.complete(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
     
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
@@ -224,17 +206,21 @@ class BaseAgent(ABC):
         """
         Log task execution to MongoDB
         
+        The write is queued for the background worker so the agent does not
+        wait on it; without a job queue the entry is only logged.
+        
         Args:
             task: Task that was executed
             result: Execution result
         """
-        # TODO: Implement MongoDB logging
         log_entry = {
+            "log_id": uuid.uuid4().hex,
             "agent_id": self.agent_id,
             "agent_name": self.name,
             "task": task,
             "result": result,
             "timestamp": datetime.utcnow().isoformat()
         }
-        logger.info(f"Task log: {json.dumps(log_entry)}")
+        if not get_job_queue().submit_nowait(AGENT_TASK_LOG_TOPIC, log_entry):
+            logger.info(f"Task log: {json.dumps(log_entry, default=str)}")
 
@@ -0,0 +1,170 @@
+"""
+NOOR Platform - Subtask DAG Executor
+Runs decomposed subtasks concurrently in dependency order
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# "{{subtask_id.result}}" in a parameter is replaced by that subtask's result
+PLACEHOLDER_PATTERN = re.compile(r"^\{\{([\w-]+)\.result\}\}$")
+
+
+def validate_dag(subtasks: List[Dict[str, Any]]) -> List[str]:
+    """
+    Check depends_on edges and return subtask ids in a topological order
+    
+    Raises:
+        ValueError: On duplicate ids, unknown dependencies or cycles
+    """
+    ids = [subtask["subtask_id"] for subtask in subtasks]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate subtask ids")
+    
+    depends_on = {subtask["subtask_id"]: subtask.get("depends_on", []) for subtask in subtasks}
+    for subtask_id, deps in depends_on.items():
+        unknown = [dep for dep in deps if dep not in depends_on]
+        if unknown:
+            raise ValueError(f"Subtask {subtask_id} depends on unknown subtasks: {', '.join(unknown)}")
+    
+    # Kahn's algorithm; anything left over is on a cycle
+    remaining = {subtask_id: len(set(deps)) for subtask_id, deps in depends_on.items()}
+    dependents: Dict[str, List[str]] = {subtask_id: [] for subtask_id in ids}
+    for subtask_id, deps in depends_on.items():
+        for dep in set(deps):
+            dependents[dep].append(subtask_id)
+    
+    ready = [subtask_id for subtask_id in ids if remaining[subtask_id] == 0]
+    order = []
+    while ready:
+        subtask_id = ready.pop(0)
+        order.append(subtask_id)
+        for dependent in dependents[subtask_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    
+    if len(order) != len(ids):
+        cyclic = [subtask_id for subtask_id in ids if subtask_id not in order]
+        raise ValueError(f"Subtask dependencies contain a cycle: {', '.join(cyclic)}")
+    
+    return order
+
+
+def resolve_parameters(parameters: Any, results: Dict[str, Any]) -> Any:
+    """
+    Replace "{{subtask_id.result}}" placeholders with dependency results
+    """
+    if isinstance(parameters, dict):
+        return {key: resolve_parameters(value, results) for key, value in parameters.items()}
+    if isinstance(parameters, list):
+        return [resolve_parameters(value, results) for value in parameters]
+    if isinstance(parameters, str):
+        match = PLACEHOLDER_PATTERN.match(parameters)
+        if match and match.group(1) in results:
+            return results[match.group(1)]
+    return parameters
+
+
+class DAGExecutor:
+    """
+    Dependency-aware subtask scheduler
+    
+    Every subtask starts as soon as all of its depends_on subtasks have
+    finished, so an orchestration takes as long as its longest dependency
+    chain rather than the sum of all steps. Subtasks for the same agent
+    share a concurrency cap. The first failure cancels the rest and is
+    re-raised.
+    """
+    
+    def __init__(self, max_concurrency_per_agent: int = 4):
+        self.max_concurrency_per_agent = max_concurrency_per_agent
+    
+    async def run(
+        self,
+        subtasks: List[Dict[str, Any]],
+        execute: Callable[[Dict[str, Any]], Awaitable[Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Execute subtasks with execute(subtask)
+        
+        Args:
+            subtasks: Subtasks with subtask_id, agent and optional depends_on
+            execute: Coroutine function running one subtask
+        
+        Returns:
+            (results by subtask id, timing trace)
+        """
+        validate_dag(subtasks)
+        
+        done = {subtask["subtask_id"]: asyncio.Event() for subtask in subtasks}
+        limits: Dict[str, asyncio.Semaphore] = {}
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        started = time.perf_counter()
+        
+        async def run_node(subtask: Dict[str, Any]):
+            subtask_id = subtask["subtask_id"]
+            deps = subtask.get("depends_on", [])
+            for dep in deps:
+                await done[dep].wait()
+            
+            agent = subtask.get("agent", "default")
+            limit = limits.setdefault(agent, asyncio.Semaphore(self.max_concurrency_per_agent))
+            ready_at = time.perf_counter()
+            
+            async with limit:
+                start = time.perf_counter()
+                resolved = {**subtask, "parameters": resolve_parameters(subtask.get("parameters", {}), results)}
+                results[subtask_id] = await execute(resolved)
+                end = time.perf_counter()
+            
+            timings[subtask_id] = {
+                "agent": agent,
+                "depends_on": list(deps),
+                "start": round(start - started, 4),
+                "end": round(end - started, 4),
+                "duration": round(end - start, 4),
+                "queued": round(start - ready_at, 4)
+            }
+            done[subtask_id].set()
+        
+        try:
+            async with asyncio.TaskGroup() as group:
+                for subtask in subtasks:
+                    group.create_task(run_node(subtask))
+        except ExceptionGroup as group_error:
+            # Surface the original error, as sequential execution did
+            raise group_error.exceptions[0]
+        
+        return results, self._trace(timings, time.perf_counter() - started)
+    
+    @staticmethod
+    def _trace(timings: Dict[str, Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+        """
+        Build the timing trace, walking back from the last subtask to
+        finish through whichever dependency finished last
+        """
+        critical_path: List[str] = []
+        if timings:
+            node = max(timings, key=lambda subtask_id: timings[subtask_id]["end"])
+            while node is not None:
+                critical_path.append(node)
+                deps = timings[node]["depends_on"]
+                node = max(deps, key=lambda dep: timings[dep]["end"]) if deps else None
+            critical_path.reverse()
+        
+        return {
+            "wall_time": round(wall_time, 4),
+            "sum_of_steps": round(sum(timing["duration"] for timing in timings.values()), 4),
+            "critical_path": critical_path,
+            "critical_path_time": round(
+                sum(timings[subtask_id]["duration"] for subtask_id in critical_path), 4
+            ),
+            "subtasks": timings
+        }
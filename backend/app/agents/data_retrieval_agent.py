@@ -9,12 +9,13 @@ This agent is responsible for fetching and managing data from various sources:
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentStatus
 from app.core.ai_client import get_ai_client
+from app.core.cache import TagVersions, get_or_compute, cache_entry_value, versioned_key
 from app.db.postgres import get_db
 from app.db.mongodb import get_mongodb
 from app.db.redis import get_redis
@@ -39,6 +40,10 @@ class DataRetrievalAgent(BaseAgent):
             ]
         )
         self.cache_ttl = 300  # 5 minutes default TTL
+        self.stale_ttl = 60  # serve stale for up to 1 minute while refreshing
+        
+        # Always read through to Redis so other workers' bumps are seen
+        self.tag_versions = TagVersions(max_age=0)
         
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -78,6 +83,8 @@ class DataRetrievalAgent(BaseAgent):
                     parameters.get("value"),
                     parameters.get("ttl", self.cache_ttl)
                 )
+            elif action == "invalidate_tags":
+                result = await self.invalidate_tags(*parameters.get("tags", []))
             else:
                 raise ValueError(f"Unknown action: {action}")
             
@@ -102,37 +109,38 @@ class DataRetrievalAgent(BaseAgent):
     async def fetch_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Fetch user profile from database"""
         try:
-            # Check cache first
             cache_key = f"user_profile:{user_id}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                logger.info(f"Cache hit for user profile: {user_id}")
-                return cached_data
-            
-            # Fetch from database
-            db: Session = next(get_db())
-            query = text("""
-                SELECT id, email, first_name, last_name, phone, 
-                       date_of_birth, nationality, emirate, 
-                       created_at, updated_at
-                FROM users
-                WHERE id = :user_id
-            """)
-            result = db.execute(query, {"user_id": user_id}).fetchone()
             
-            if not result:
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                query = text("""
+                    SELECT id, email, first_name, last_name, phone, 
+                           date_of_birth, nationality, emirate, 
+                           created_at, updated_at
+                    FROM users
+                    WHERE id = :user_id
+                """)
+                result = db.execute(query, {"user_id": user_id}).fetchone()
+                
+                if not result:
+                    return None
+                
+                user_data = dict(result._mapping)
+                
+                # Convert datetime objects to ISO format
+                for key, value in user_data.items():
+                    if isinstance(value, datetime):
+                        user_data[key] = value.isoformat()
+                
+                return user_data
+            
+            user_data = await self.get_or_fetch(
+                cache_key, load, ttl=600, tags=[f"user:{user_id}"]  # 10 minutes
+            )
+            if user_data is None:
                 return {"error": "User not found"}
             
-            user_data = dict(result._mapping)
-            
-            # Convert datetime objects to ISO format
-            for key, value in user_data.items():
-                if isinstance(value, datetime):
-                    user_data[key] = value.isoformat()
-            
-            # Cache the result
-            await self.set_cached_data(cache_key, user_data, ttl=600)  # 10 minutes
-            
             logger.info(f"Fetched user profile: {user_id}")
             return user_data
             
@@ -143,36 +151,36 @@ class DataRetrievalAgent(BaseAgent):
     async def fetch_user_skills(self, user_id: str) -> List[Dict[str, Any]]:
         """Fetch user skills from database"""
         try:
-            # Check cache
             cache_key = f"user_skills:{user_id}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
             
-            # Fetch from database
-            db: Session = next(get_db())
-            query = text("""
-                SELECT us.id, us.user_id, us.skill_id, us.proficiency_level,
-                       us.years_of_experience, us.last_used_date, us.is_verified,
-                       s.name as skill_name, s.category as skill_category
-                FROM user_skills us
-                JOIN skills s ON us.skill_id = s.id
-                WHERE us.user_id = :user_id
-                ORDER BY us.proficiency_level DESC, us.years_of_experience DESC
-            """)
-            results = db.execute(query, {"user_id": user_id}).fetchall()
-            
-            skills = []
-            for row in results:
-                skill_data = dict(row._mapping)
-                # Convert datetime objects
-                for key, value in skill_data.items():
-                    if isinstance(value, datetime):
-                        skill_data[key] = value.isoformat()
-                skills.append(skill_data)
-            
-            # Cache the result
-            await self.set_cached_data(cache_key, skills, ttl=300)  # 5 minutes
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                query = text("""
+                    SELECT us.id, us.user_id, us.skill_id, us.proficiency_level,
+                           us.years_of_experience, us.last_used_date, us.is_verified,
+                           s.name as skill_name, s.category as skill_category
+                    FROM user_skills us
+                    JOIN skills s ON us.skill_id = s.id
+                    WHERE us.user_id = :user_id
+                    ORDER BY us.proficiency_level DESC, us.years_of_experience DESC
+                """)
+                results = db.execute(query, {"user_id": user_id}).fetchall()
+                
+                skills = []
+                for row in results:
+                    skill_data = dict(row._mapping)
+                    # Convert datetime objects
+                    for key, value in skill_data.items():
+                        if isinstance(value, datetime):
+                            skill_data[key] = value.isoformat()
+                    skills.append(skill_data)
+                
+                return skills
+            
+            skills = await self.get_or_fetch(
+                cache_key, load, ttl=300, tags=[f"user:{user_id}", "skills"]  # 5 minutes
+            )
             
             logger.info(f"Fetched {len(skills)} skills for user: {user_id}")
             return skills
@@ -184,35 +192,35 @@ class DataRetrievalAgent(BaseAgent):
     async def fetch_work_experience(self, user_id: str) -> List[Dict[str, Any]]:
         """Fetch user work experience from database"""
         try:
-            # Check cache
             cache_key = f"work_experience:{user_id}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
-            
-            # Fetch from database
-            db: Session = next(get_db())
-            query = text("""
-                SELECT id, user_id, company_name, job_title, employment_type,
-                       industry, location, start_date, end_date, is_current,
-                       description, achievements, skills_used, is_verified
-                FROM work_experience
-                WHERE user_id = :user_id
-                ORDER BY start_date DESC
-            """)
-            results = db.execute(query, {"user_id": user_id}).fetchall()
-            
-            experiences = []
-            for row in results:
-                exp_data = dict(row._mapping)
-                # Convert datetime and JSON objects
-                for key, value in exp_data.items():
-                    if isinstance(value, datetime):
-                        exp_data[key] = value.isoformat()
-                experiences.append(exp_data)
             
-            # Cache the result
-            await self.set_cached_data(cache_key, experiences, ttl=300)
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                query = text("""
+                    SELECT id, user_id, company_name, job_title, employment_type,
+                           industry, location, start_date, end_date, is_current,
+                           description, achievements, skills_used, is_verified
+                    FROM work_experience
+                    WHERE user_id = :user_id
+                    ORDER BY start_date DESC
+                """)
+                results = db.execute(query, {"user_id": user_id}).fetchall()
+                
+                experiences = []
+                for row in results:
+                    exp_data = dict(row._mapping)
+                    # Convert datetime and JSON objects
+                    for key, value in exp_data.items():
+                        if isinstance(value, datetime):
+                            exp_data[key] = value.isoformat()
+                    experiences.append(exp_data)
+                
+                return experiences
+            
+            experiences = await self.get_or_fetch(
+                cache_key, load, ttl=300, tags=[f"user:{user_id}"]
+            )
             
             logger.info(f"Fetched {len(experiences)} work experiences for user: {user_id}")
             return experiences
@@ -224,97 +232,127 @@ class DataRetrievalAgent(BaseAgent):
     async def fetch_job_postings(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Fetch job postings with filters"""
         try:
-            # Build cache key from filters
             cache_key = f"job_postings:{json.dumps(filters, sort_keys=True)}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
-            
-            # Fetch from database
-            db: Session = next(get_db())
             
-            # Build dynamic query based on filters
-            where_clauses = ["status = 'active'"]
-            params = {}
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                
+                # Build dynamic query based on filters
+                where_clauses = ["status = 'active'"]
+                params = {}
+                
+                if filters.get("location"):
+                    where_clauses.append("location = :location")
+                    params["location"] = filters["location"]
+                
+                if filters.get("industry"):
+                    where_clauses.append("industry = :industry")
+                    params["industry"] = filters["industry"]
+                
+                if filters.get("min_salary"):
+                    where_clauses.append("salary_min >= :min_salary")
+                    params["min_salary"] = filters["min_salary"]
+                
+                where_sql = " AND ".join(where_clauses)
+                
+                query = text(f"""
+                    SELECT id, institution_id, title, description, location,
+                           employment_type, industry, salary_min, salary_max,
+                           required_skills, preferred_skills, posted_date
+                    FROM job_postings
+                    WHERE {where_sql}
+                    ORDER BY posted_date DESC
+                    LIMIT :limit
+                """)
+                params["limit"] = filters.get("limit", 50)
+                
+                results = db.execute(query, params).fetchall()
+                
+                jobs = []
+                for row in results:
+                    job_data = dict(row._mapping)
+                    # Convert datetime objects
+                    for key, value in job_data.items():
+                        if isinstance(value, datetime):
+                            job_data[key] = value.isoformat()
+                    jobs.append(job_data)
+                
+                return jobs
+            
+            jobs = await self.get_or_fetch(cache_key, load, ttl=180, tags=["jobs"])  # 3 minutes
             
-            if filters.get("location"):
-                where_clauses.append("location = :location")
-                params["location"] = filters["location"]
-            
-            if filters.get("industry"):
-                where_clauses.append("industry = :industry")
-                params["industry"] = filters["industry"]
-            
-            if filters.get("min_salary"):
-                where_clauses.append("salary_min >= :min_salary")
-                params["min_salary"] = filters["min_salary"]
-            
-            where_sql = " AND ".join(where_clauses)
+            logger.info(f"Fetched {len(jobs)} job postings with filters: {filters}")
+            return jobs
             
+        except Exception as e:
+            logger.error(f"Error fetching job postings: {e}")
+            raise
+    
+    async def iter_active_job_postings(self, batch_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield every active job posting in id order, batch_size rows at a time
+        
+        Uncached and unfiltered; used to (re)build aggregates rather than
+        to serve requests.
+        """
+        db: Session = next(get_db())
+        last_id = None
+        
+        while True:
             query = text(f"""
-                SELECT id, institution_id, title, description, location,
-                       employment_type, industry, salary_min, salary_max,
-                       required_skills, preferred_skills, posted_date
+                SELECT id, industry, location, employment_type,
+                       required_skills, preferred_skills
                 FROM job_postings
-                WHERE {where_sql}
-                ORDER BY posted_date DESC
+                WHERE status = 'active' {"AND id > :last_id" if last_id else ""}
+                ORDER BY id
                 LIMIT :limit
             """)
-            params["limit"] = filters.get("limit", 50)
-            
-            results = db.execute(query, params).fetchall()
+            params = {"limit": batch_size}
+            if last_id:
+                params["last_id"] = last_id
             
-            jobs = []
-            for row in results:
-                job_data = dict(row._mapping)
-                # Convert datetime objects
-                for key, value in job_data.items():
-                    if isinstance(value, datetime):
-                        job_data[key] = value.isoformat()
-                jobs.append(job_data)
+            rows = [dict(row._mapping) for row in db.execute(query, params).fetchall()]
+            if not rows:
+                return
             
-            # Cache the result
-            await self.set_cached_data(cache_key, jobs, ttl=180)  # 3 minutes
-            
-            logger.info(f"Fetched {len(jobs)} job postings with filters: {filters}")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"Error fetching job postings: {e}")
-            raise
+            yield rows
+            last_id = rows[-1]["id"]
     
     async def fetch_institution_data(self, institution_id: str) -> Dict[str, Any]:
         """Fetch institution data from database"""
         try:
-            # Check cache
             cache_key = f"institution:{institution_id}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
-            
-            # Fetch from database
-            db: Session = next(get_db())
-            query = text("""
-                SELECT id, name, type, industry, size, location,
-                       website, description, is_verified, created_at
-                FROM institutions
-                WHERE id = :institution_id
-            """)
-            result = db.execute(query, {"institution_id": institution_id}).fetchone()
             
-            if not result:
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                query = text("""
+                    SELECT id, name, type, industry, size, location,
+                           website, description, is_verified, created_at
+                    FROM institutions
+                    WHERE id = :institution_id
+                """)
+                result = db.execute(query, {"institution_id": institution_id}).fetchone()
+                
+                if not result:
+                    return None
+                
+                institution_data = dict(result._mapping)
+                
+                # Convert datetime objects
+                for key, value in institution_data.items():
+                    if isinstance(value, datetime):
+                        institution_data[key] = value.isoformat()
+                
+                return institution_data
+            
+            institution_data = await self.get_or_fetch(
+                cache_key, load, ttl=600, tags=[f"institution:{institution_id}"]
+            )
+            if institution_data is None:
                 return {"error": "Institution not found"}
             
-            institution_data = dict(result._mapping)
-            
-            # Convert datetime objects
-            for key, value in institution_data.items():
-                if isinstance(value, datetime):
-                    institution_data[key] = value.isoformat()
-            
-            # Cache the result
-            await self.set_cached_data(cache_key, institution_data, ttl=600)
-            
             logger.info(f"Fetched institution data: {institution_id}")
             return institution_data
             
@@ -325,27 +363,23 @@ class DataRetrievalAgent(BaseAgent):
     async def search_skills(self, query: str) -> List[Dict[str, Any]]:
         """Search skills by name or category"""
         try:
-            # Check cache
             cache_key = f"skill_search:{query.lower()}"
-            cached_data = await self.get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
-            
-            # Fetch from database
-            db: Session = next(get_db())
-            sql_query = text("""
-                SELECT id, name, category, description
-                FROM skills
-                WHERE LOWER(name) LIKE :query OR LOWER(category) LIKE :query
-                ORDER BY name
-                LIMIT 50
-            """)
-            results = db.execute(sql_query, {"query": f"%{query.lower()}%"}).fetchall()
             
-            skills = [dict(row._mapping) for row in results]
-            
-            # Cache the result
-            await self.set_cached_data(cache_key, skills, ttl=600)
+            async def load():
+                # Fetch from database
+                db: Session = next(get_db())
+                sql_query = text("""
+                    SELECT id, name, category, description
+                    FROM skills
+                    WHERE LOWER(name) LIKE :query OR LOWER(category) LIKE :query
+                    ORDER BY name
+                    LIMIT 50
+                """)
+                results = db.execute(sql_query, {"query": f"%{query.lower()}%"}).fetchall()
+                
+                return [dict(row._mapping) for row in results]
+            
+            skills = await self.get_or_fetch(cache_key, load, ttl=600, tags=["skills"])
             
             logger.info(f"Found {len(skills)} skills matching query: {query}")
             return skills
@@ -354,8 +388,45 @@ class DataRetrievalAgent(BaseAgent):
             logger.error(f"Error searching skills: {e}")
             raise
     
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """
+        Return cached data for key, calling fetch() on a miss
+        
+        Concurrent misses for the same key share one fetch, and expired
+        entries are served for up to stale_ttl seconds while a single
+        background refresh runs (see app.core.cache.get_or_compute).
+        Entries are dropped by invalidate_tags() on any of their tags.
+        """
+        if tags:
+            try:
+                versions = await (await self._get_tag_versions()).get_many(tags)
+            except Exception as e:
+                # Without versions a cached entry may be stale; skip the cache
+                logger.warning(f"Cache tag lookup error: {e}")
+                return await fetch()
+            key = versioned_key(key, tags, versions)
+        
+        return await get_or_compute(
+            key,
+            fetch,
+            ttl or self.cache_ttl,
+            stale_ttl=self.stale_ttl if stale_ttl is None else stale_ttl,
+            getter=self._get_cache_entry,
+            setter=self.set_cached_data
+        )
+    
     async def get_cached_data(self, key: str) -> Optional[Any]:
         """Get data from Redis cache"""
+        return cache_entry_value(await self._get_cache_entry(key))
+    
+    async def _get_cache_entry(self, key: str) -> Optional[Any]:
         try:
             redis_client = await get_redis()
             cached = await redis_client.get(key)
@@ -376,17 +447,38 @@ class DataRetrievalAgent(BaseAgent):
             logger.warning(f"Cache set error: {e}")
             return False
     
+    async def invalidate_tags(self, *tags: str) -> bool:
+        """Invalidate every cached entry carrying any of the given tags"""
+        try:
+            tag_versions = await self._get_tag_versions()
+            for tag in tags:
+                await tag_versions.bump(tag)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache invalidation error: {e}")
+            return False
+    
     async def invalidate_cache(self, pattern: str) -> int:
-        """Invalidate cache keys matching pattern"""
+        """Invalidate cache keys matching pattern (incremental SCAN, prefer invalidate_tags)"""
         try:
             redis_client = await get_redis()
-            keys = await redis_client.keys(pattern)
-            if keys:
-                return await redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            async for key in redis_client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    deleted += await redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await redis_client.unlink(*batch)
+            return deleted
         except Exception as e:
             logger.warning(f"Cache invalidation error: {e}")
             return 0
+    
+    async def _get_tag_versions(self) -> TagVersions:
+        self.tag_versions.redis = await get_redis()
+        return self.tag_versions
 
 
 # Singleton instance
@@ -3,12 +3,13 @@ NOOR Platform - Master Orchestrator Agent v2
 Enhanced with Claude AI integration
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import asyncio
 from datetime import datetime
 
 from app.agents.base_agent import BaseAgent
+from app.agents.dag_executor import DAGExecutor
 from app.core.ai_client import get_ai_client
 from app.core.config import settings
 
@@ -38,6 +39,9 @@ class MasterOrchestratorV2(BaseAgent):
         self.ai_client = get_ai_client()
         self.sub_agents: Dict[str, BaseAgent] = {}
         self.task_history: List[Dict[str, Any]] = []
+        self.dag_executor = DAGExecutor(
+            max_concurrency_per_agent=settings.ORCHESTRATOR_MAX_CONCURRENCY_PER_AGENT
+        )
     
     def register_agent(self, agent: BaseAgent):
         """Register a sub-agent"""
@@ -67,7 +71,7 @@ class MasterOrchestratorV2(BaseAgent):
             subtasks = await self._decompose_task(task, task_analysis)
             
             # Step 3: Route to appropriate agents
-            results = await self._execute_subtasks(subtasks)
+            results, trace = await self._execute_subtasks(subtasks)
             
             # Step 4: Aggregate results
             final_result = await self._aggregate_results(results, task)
@@ -78,6 +82,7 @@ class MasterOrchestratorV2(BaseAgent):
                 "type": task_type,
                 "status": "completed",
                 "result": final_result,
+                "trace": trace,
                 "timestamp": datetime.now().isoformat()
             })
             
@@ -89,7 +94,9 @@ class MasterOrchestratorV2(BaseAgent):
                 "result": final_result,
                 "metadata": {
                     "subtasks_count": len(subtasks),
-                    "execution_time": final_result.get("execution_time", 0)
+                    "execution_time": final_result.get("execution_time", 0),
+                    "critical_path": trace["critical_path"],
+                    "wall_time": trace["wall_time"]
                 }
             }
             
@@ -218,6 +225,7 @@ Provide a comprehensive analysis."""
             {
                 "subtask_id": "calculate_match",
                 "type": "ai_analysis",
+                "depends_on": ["fetch_user_skills", "fetch_job_requirements"],
                 "parameters": {
                     "user_skills": "{{fetch_user_skills.result}}",
                     "job_requirements": "{{fetch_job_requirements.result}}"
@@ -238,6 +246,7 @@ Provide a comprehensive analysis."""
             {
                 "subtask_id": "analyze_progression",
                 "type": "ai_analysis",
+                "depends_on": ["fetch_work_history"],
                 "parameters": {
                     "work_history": "{{fetch_work_history.result}}"
                 },
@@ -246,6 +255,7 @@ Provide a comprehensive analysis."""
             {
                 "subtask_id": "generate_recommendations",
                 "type": "ai_generation",
+                "depends_on": ["analyze_progression"],
                 "parameters": {
                     "analysis": "{{analyze_progression.result}}"
                 },
@@ -271,6 +281,7 @@ Provide a comprehensive analysis."""
             {
                 "subtask_id": "match_and_rank",
                 "type": "ai_analysis",
+                "depends_on": ["fetch_user_profile", "fetch_available_jobs"],
                 "parameters": {
                     "user_profile": "{{fetch_user_profile.result}}",
                     "jobs": "{{fetch_available_jobs.result}}"
@@ -279,28 +290,46 @@ Provide a comprehensive analysis."""
             }
         ]
     
-    async def _execute_subtasks(self, subtasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _execute_subtasks(
+        self,
+        subtasks: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Execute subtasks in parallel or sequence based on dependencies
-        """
-        results = []
         
-        for subtask in subtasks:
+        Independent subtasks run concurrently; a subtask listing depends_on
+        waits for those results, which replace its "{{id.result}}"
+        parameters.
+        
+        Returns:
+            (results in subtask order, critical-path timing trace)
+        """
+        async def execute_subtask(subtask: Dict[str, Any]) -> Dict[str, Any]:
             agent_name = subtask.get("agent", "default")
             
             if agent_name in self.sub_agents:
                 # Execute using registered agent
-                result = await self.sub_agents[agent_name].execute(subtask)
-            else:
-                # Execute directly
-                result = await self._execute_subtask_directly(subtask)
+                return await self.sub_agents[agent_name].execute(subtask)
             
-            results.append({
+            # Execute directly
+            return await self._execute_subtask_directly(subtask)
+        
+        results_by_id, trace = await self.dag_executor.run(subtasks, execute_subtask)
+        
+        logger.info(
+            f"Executed {len(subtasks)} subtasks in {trace['wall_time']:.2f}s "
+            f"(sum of steps {trace['sum_of_steps']:.2f}s, critical path: {' -> '.join(trace['critical_path'])})"
+        )
+        
+        results = [
+            {
                 "subtask_id": subtask["subtask_id"],
-                "result": result
-            })
+                "result": results_by_id[subtask["subtask_id"]]
+            }
+            for subtask in subtasks
+        ]
         
-        return results
+        return results, trace
     
     async def _execute_subtask_directly(self, subtask: Dict[str, Any]) -> Dict[str, Any]:
         """Execute subtask directly without sub-agent"""
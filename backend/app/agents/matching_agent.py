@@ -129,30 +129,29 @@ class MatchingAgent(BaseAgent):
                 "limit": 100  # Get more jobs for better matching
             })
             
-            # Score each job
-            scored_jobs = []
-            for job in jobs:
-                # Use AI Analysis Agent for skill matching
-                match_result = await self.analysis_agent.execute({
-                    "action": "analyze_skill_match",
-                    "parameters": {
-                        "user_skills": user_skills,
-                        "job_requirements": {
+            # Score all jobs in one batch (rule-based pre-filter, chunked AI prompts)
+            match_result = await self.analysis_agent.execute({
+                "action": "analyze_skill_matches_batch",
+                "parameters": {
+                    "user_skills": user_skills,
+                    "jobs": [
+                        {
                             "title": job.get("title"),
-                            "required_skills": job.get("required_skills", []),
-                            "preferred_skills": job.get("preferred_skills", []),
+                            "required_skills": job.get("required_skills") or [],
+                            "preferred_skills": job.get("preferred_skills") or [],
                             "industry": job.get("industry")
                         }
-                    }
-                })
-                
-                if match_result.get("success"):
-                    analysis = match_result.get("analysis", {})
-                    match_score = analysis.get("match_score", 0)
-                    
+                        for job in jobs
+                    ]
+                }
+            })
+            
+            scored_jobs = []
+            if match_result.get("success"):
+                for job, analysis in zip(jobs, match_result.get("analysis", [])):
                     scored_jobs.append({
                         **job,
-                        "match_score": match_score,
+                        "match_score": analysis.get("match_score", 0),
                         "matched_skills": analysis.get("matched_required_skills", []),
                         "missing_skills": analysis.get("missing_required_skills", []),
                         "recommendation": analysis.get("recommendation")
@@ -342,9 +341,9 @@ Provide recommendations:
 
 Format as JSON."""
 
-            recommendations = await self.ai_client.generate_structured_output(
+            recommendations = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "in_demand_skills": "array of objects with: skill, reason, priority",
                     "complementary_skills": "array of strings",
                     "emerging_technologies": "array of strings",
@@ -371,8 +370,8 @@ Format as JSON."""
             for skill in user_skills
         }
         
-        required = set(s.lower() for s in job_requirements.get("required_skills", []))
-        preferred = set(s.lower() for s in job_requirements.get("preferred_skills", []))
+        required = set(s.lower() for s in job_requirements.get("required_skills") or [])
+        preferred = set(s.lower() for s in job_requirements.get("preferred_skills") or [])
         
         matched_required = user_skill_names & required
         matched_preferred = user_skill_names & preferred
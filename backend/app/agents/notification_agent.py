@@ -10,16 +10,29 @@ This agent handles all notification delivery:
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterable, AsyncIterator, Iterable, Optional, Union
 from datetime import datetime
 from enum import Enum
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentStatus
 from app.core.config import get_settings
+from app.core.job_queue import NOTIFICATION_TOPIC, get_job_queue
+from app.core.outbox import enqueue_outbox
+from app.services.notification_delivery import (
+    BulkNotificationSender,
+    NotificationProvider,
+    SendGridProvider,
+    SingleMessageProvider
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Failed deliveries kept in a bulk summary; the rest are only counted
+BULK_FAILURE_SAMPLE_SIZE = 100
+
 
 class NotificationType(str, Enum):
     """Types of notifications"""
@@ -53,7 +66,44 @@ class NotificationAgent(BaseAgent):
         )
         self.email_enabled = settings.ENABLE_EMAIL_NOTIFICATIONS
         self.sms_enabled = settings.ENABLE_SMS_NOTIFICATIONS
-        
+        self._bulk_sender: Optional[BulkNotificationSender] = None
+    
+    def use_bulk_providers(self, providers: Dict[str, NotificationProvider]):
+        """
+        Replace bulk delivery providers by channel, e.g. a LocalStubProvider
+        for offline benchmarks
+        """
+        self._bulk_sender = BulkNotificationSender(
+            providers={**self._default_bulk_providers(), **providers},
+            concurrency={
+                NotificationType.EMAIL.value: settings.NOTIFICATION_EMAIL_CONCURRENCY,
+                NotificationType.SMS.value: settings.NOTIFICATION_SMS_CONCURRENCY
+            },
+            rate_per_minute={
+                NotificationType.EMAIL.value: settings.NOTIFICATION_EMAIL_RATE_PER_MINUTE,
+                NotificationType.SMS.value: settings.NOTIFICATION_SMS_RATE_PER_MINUTE
+            }
+        )
+    
+    def _default_bulk_providers(self) -> Dict[str, NotificationProvider]:
+        if self.email_enabled and settings.SENDGRID_API_KEY:
+            email = SendGridProvider(settings.SENDGRID_API_KEY, settings.EMAIL_FROM)
+        else:
+            email = SingleMessageProvider(
+                NotificationType.EMAIL.value,
+                lambda n: self.send_email(to=n["to"], subject=n["subject"], body=n["body"])
+            )
+        sms = SingleMessageProvider(
+            NotificationType.SMS.value,
+            lambda n: self.send_sms(to=n["to"], message=n["message"])
+        )
+        return {NotificationType.EMAIL.value: email, NotificationType.SMS.value: sms}
+    
+    def _get_bulk_sender(self) -> BulkNotificationSender:
+        if self._bulk_sender is None:
+            self.use_bulk_providers({})
+        return self._bulk_sender
+    
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute notification task
@@ -142,6 +192,38 @@ class NotificationAgent(BaseAgent):
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    async def queue_notification(
+        self,
+        action: str,
+        parameters: Dict[str, Any],
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, Any]:
+        """
+        Schedule a notification task for the background worker
+        
+        With a session the task is written to the outbox and only exists
+        once the caller commits; otherwise it goes straight onto the job
+        queue. Without a job queue (e.g. local development) it runs inline.
+        
+        No request handler sends notifications yet; new senders should use
+        this rather than execute() so the request does not wait on delivery.
+        
+        Args:
+            action: Any action accepted by execute(), e.g. "send_job_alert"
+            parameters: Parameters for that action
+            session: The request's database session
+        """
+        task = {"action": action, "parameters": parameters}
+        if session is not None:
+            message = enqueue_outbox(session, NOTIFICATION_TOPIC, task)
+            return {"queued": True, "job_id": str(message.id)}
+        
+        queue = get_job_queue()
+        if queue.connected:
+            return {"queued": True, "job_id": await queue.enqueue(NOTIFICATION_TOPIC, task)}
+        
+        return {"queued": False, **await self.execute(task)}
+    
     async def send_email(
         self,
         to: str,
@@ -381,53 +463,47 @@ class NotificationAgent(BaseAgent):
             message=message
         )
     
+    async def stream_bulk_notifications(
+        self,
+        notifications: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send notifications concurrently, yielding each delivery result
+        as it completes
+        
+        Email and SMS have separate worker pools and rate limits
+        (NOTIFICATION_*_CONCURRENCY / NOTIFICATION_*_RATE_PER_MINUTE);
+        email goes through SendGrid batch requests when configured.
+        Results carry the input index and recipient, not the payload.
+        """
+        async for result in self._get_bulk_sender().deliver(notifications):
+            yield result
+    
     async def send_bulk_notifications(
         self,
-        notifications: List[Dict[str, Any]]
+        notifications: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
     ) -> Dict[str, Any]:
-        """Send multiple notifications in bulk"""
+        """
+        Send multiple notifications in bulk
+        
+        Returns delivery counts and up to BULK_FAILURE_SAMPLE_SIZE failed
+        results; use stream_bulk_notifications() to see every result.
+        """
         results = {
-            "total": len(notifications),
+            "total": 0,
             "successful": 0,
             "failed": 0,
-            "details": []
+            "failures": []
         }
         
-        for notification in notifications:
-            try:
-                notification_type = notification.get("type")
-                
-                if notification_type == NotificationType.EMAIL:
-                    result = await self.send_email(
-                        to=notification["to"],
-                        subject=notification["subject"],
-                        body=notification["body"]
-                    )
-                elif notification_type == NotificationType.SMS:
-                    result = await self.send_sms(
-                        to=notification["to"],
-                        message=notification["message"]
-                    )
-                else:
-                    result = {"delivered": False, "error": "Unknown notification type"}
-                
-                if result.get("delivered"):
-                    results["successful"] += 1
-                else:
-                    results["failed"] += 1
-                
-                results["details"].append({
-                    "notification": notification,
-                    "result": result
-                })
-                
-            except Exception as e:
+        async for result in self.stream_bulk_notifications(notifications):
+            results["total"] += 1
+            if result.get("delivered"):
+                results["successful"] += 1
+            else:
                 results["failed"] += 1
-                results["details"].append({
-                    "notification": notification,
-                    "error": str(e)
-                })
-                logger.error(f"Error sending bulk notification: {e}")
+                if len(results["failures"]) < BULK_FAILURE_SAMPLE_SIZE:
+                    results["failures"].append(result)
         
         logger.info(f"Bulk notifications: {results['successful']}/{results['total']} successful")
         return results
@@ -175,9 +175,9 @@ Evaluate:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "sufficient_evidence": "boolean",
                     "matches_proficiency": "boolean",
                     "red_flags": "array of strings",
@@ -251,9 +251,9 @@ Verify:
 
 Format as JSON."""
 
-            analysis = await self.ai_client.generate_structured_output(
+            analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
-                schema={
+                output_schema={
                     "credible_evidence": "boolean",
                     "dates_valid": "boolean",
                     "title_appropriate": "boolean",
@@ -2,9 +2,12 @@
 NOOR Platform - AI Features API Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List
+import json
+import logging
 
 from app.db.postgres import get_db
 from app.services.ai_skill_matching_service import AISkillMatchingService
@@ -12,9 +15,42 @@ from app.services.ai_career_recommendations_service import AICareerRecommendatio
 from app.services.ai_work_experience_insights_service import AIWorkExperienceInsightsService
 from app.core.ai_client import get_ai_client
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/ai", tags=["AI Features"])
 
 
+def streaming_response(request: Request, events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream service events as Server-Sent Events or NDJSON
+    
+    SSE when the client accepts text/event-stream, otherwise one JSON
+    object per line. Every stream ends with a "result" event, or an
+    "error" event if the request failed.
+    """
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    
+    def encode(event: Dict[str, Any]) -> str:
+        if use_sse:
+            return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+        return json.dumps(event, default=str) + "\n"
+    
+    async def body():
+        try:
+            async for event in events:
+                yield encode(event)
+        except Exception as e:
+            logger.error(f"AI stream failed: {str(e)}")
+            yield encode({"event": "error", "detail": str(e)})
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/status")
 async def get_ai_status():
     """
@@ -145,6 +181,8 @@ async def analyze_skill_gaps(
 @router.get("/career/recommendations/{user_id}")
 async def get_career_recommendations(
     user_id: str,
+    request: Request,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -157,10 +195,16 @@ async def get_career_recommendations(
     - Industries to explore
     - Salary expectations
     - Action steps
+    
+    With stream=true, each section is sent as soon as it is generated
+    (SSE or NDJSON, see streaming_response), followed by the full result.
     """
     service = AICareerRecommendationsService(db)
     
     try:
+        if stream:
+            return streaming_response(request, await service.stream_career_recommendations(user_id))
+        
         recommendations = await service.generate_career_recommendations(user_id)
         return recommendations
     except Exception as e:
@@ -174,14 +218,22 @@ async def get_career_recommendations(
 async def generate_learning_path(
     user_id: str,
     target_role: str,
+    request: Request,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Generate personalized learning path for target role
+    
+    With stream=true, the text is sent as it is generated, followed by
+    the full result.
     """
     service = AICareerRecommendationsService(db)
     
     try:
+        if stream:
+            return streaming_response(request, await service.stream_learning_path(user_id, target_role))
+        
         learning_path = await service.generate_learning_path(user_id, target_role)
         return learning_path
     except Exception as e:
@@ -218,6 +270,8 @@ async def analyze_career_trajectory(
 @router.get("/experience/summary/{user_id}")
 async def get_experience_summary(
     user_id: str,
+    request: Request,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -229,10 +283,16 @@ async def get_experience_summary(
     - Career progression insights
     - Notable achievements
     - Specializations
+    
+    With stream=true, each section is sent as soon as it is generated,
+    followed by the full result.
     """
     service = AIWorkExperienceInsightsService(db)
     
     try:
+        if stream:
+            return streaming_response(request, await service.stream_experience_summary(user_id))
+        
         summary = await service.generate_experience_summary(user_id)
         return summary
     except Exception as e:
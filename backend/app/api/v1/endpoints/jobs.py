@@ -1,6 +1,10 @@
 """NOOR Platform - Jobs Endpoints"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.endpoints.auth import get_current_user, TokenData
+from app.db.postgres import get_db
+from app.models.job_posting import JobPostingClose, JobPostingCreate
+from app.services.job_posting_service import JobPostingService
 router = APIRouter()
 
 @router.get("/")
@@ -8,5 +12,25 @@ async def list_jobs(current_user: TokenData = Depends(get_current_user)):
     return {"success": True, "data": []}
 
 @router.post("/")
-async def create_jobs(current_user: TokenData = Depends(get_current_user)):
-    return {"success": True, "message": "Created successfully"}
+async def create_jobs(
+    posting: JobPostingCreate,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await JobPostingService(db).create_posting(posting)
+    return {"success": True, "message": "Created successfully", "data": {"id": str(job["id"])}}
+
+@router.post("/{job_id}/close")
+async def close_job(
+    job_id: str,
+    request: JobPostingClose = JobPostingClose(),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        job = await JobPostingService(db).close_posting(job_id, request.status)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job posting not found")
+    return {"success": True, "message": "Closed successfully"}
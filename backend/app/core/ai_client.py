@@ -3,33 +3,48 @@ NOOR Platform - AI Client (Anthropic Claude)
 Wrapper for Anthropic API integration
 """
 
-from anthropic import Anthropic, AsyncAnthropic
-from typing import List, Dict, Any, Optional
+from anthropic import Anthropic
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import json
 import logging
 from app.core.config import settings
+from app.core.llm_cache import llm_response_cache, response_cache_key
+from app.core.llm_gateway import estimate_tokens, get_llm_gateway
+from app.core.partial_json import PartialJSONParser
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant for the NOOR Platform."
+
+# Lower temperature for structured output
+STRUCTURED_OUTPUT_TEMPERATURE = 0.3
+
 
 class ClaudeAIClient:
     """
     Anthropic Claude AI client for NOOR Platform
+    
+    Async calls go through the shared LLM gateway. The blocking client is
+    only created for sync callers (scripts, workers without a loop).
     """
     
     def __init__(self):
         """Initialize Claude AI client"""
+        self.gateway = get_llm_gateway()
+        self._client = None
         if not settings.ANTHROPIC_API_KEY:
             logger.warning("Anthropic API key not configured")
-            self.client = None
-            self.async_client = None
-        else:
-            self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-            self.async_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-            logger.info("✅ Claude AI client initialized successfully")
+    
+    @property
+    def client(self) -> Optional[Anthropic]:
+        """Blocking Anthropic client, created on first sync call"""
+        if self._client is None and settings.ANTHROPIC_API_KEY:
+            self._client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        return self._client
     
     def is_available(self) -> bool:
         """Check if AI client is available"""
-        return self.client is not None and settings.ENABLE_AI_FEATURES
+        return self.gateway.has_anthropic and settings.ENABLE_AI_FEATURES
     
     def generate_completion(
         self,
@@ -60,7 +75,7 @@ class ClaudeAIClient:
                 model=model or settings.AI_MODEL,
                 max_tokens=max_tokens or settings.AI_MAX_TOKENS,
                 temperature=temperature or settings.AI_TEMPERATURE,
-                system=system_prompt or "You are a helpful AI assistant for the NOOR Platform.",
+                system=system_prompt or DEFAULT_SYSTEM_PROMPT,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
@@ -102,18 +117,14 @@ class ClaudeAIClient:
             raise ValueError("AI client not available")
         
         try:
-            message = await self.async_client.messages.create(
+            response_text = await self.gateway.complete(
+                prompt=prompt,
+                system_prompt=system_prompt or DEFAULT_SYSTEM_PROMPT,
                 model=model or settings.AI_MODEL,
                 max_tokens=max_tokens or settings.AI_MAX_TOKENS,
-                temperature=temperature or settings.AI_TEMPERATURE,
-                system=system_prompt or "You are a helpful AI assistant for the NOOR Platform.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                temperature=temperature or settings.AI_TEMPERATURE
             )
             
-            response_text = message.content[0].text
-            
             if settings.ENABLE_AGENT_LOGGING:
                 logger.info(f"AI completion generated (async): {len(response_text)} characters")
             
@@ -123,11 +134,36 @@ class ClaudeAIClient:
             logger.error(f"AI completion error (async): {str(e)}")
             raise
     
+    def _structured_system_prompt(self, system_prompt: Optional[str], output_schema: Dict[str, Any]) -> str:
+        """Append the JSON schema instructions to a system prompt"""
+        return f"""{system_prompt or DEFAULT_SYSTEM_PROMPT}
+
+You must respond with valid JSON matching this schema:
+{json.dumps(output_schema, indent=2)}
+
+Return ONLY the JSON object, no additional text."""
+    
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
+        """Extract the JSON object from a model response"""
+        try:
+            # Extract JSON from response
+            json_start = response.find('{')
+            json_end = response.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                json_str = response[json_start:json_end]
+                return json.loads(json_str)
+            else:
+                return json.loads(response)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON response: {e}")
+            logger.error(f"Response: {response}")
+            raise ValueError(f"Invalid JSON response from AI: {str(e)}")
+    
     def generate_structured_output(
         self,
         prompt: str,
-        system_prompt: str,
-        output_schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        output_schema: Optional[Dict[str, Any]] = None,
         model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
@@ -142,84 +178,149 @@ class ClaudeAIClient:
         Returns:
             Structured JSON output
         """
-        import json
-        
-        enhanced_system_prompt = f"""{system_prompt}
-
-You must respond with valid JSON matching this schema:
-{json.dumps(output_schema, indent=2)}
-
-Return ONLY the JSON object, no additional text."""
-        
         response = self.generate_completion(
             prompt=prompt,
-            system_prompt=enhanced_system_prompt,
+            system_prompt=self._structured_system_prompt(system_prompt, output_schema or {}),
             model=model,
-            temperature=0.3  # Lower temperature for structured output
+            temperature=STRUCTURED_OUTPUT_TEMPERATURE
         )
         
-        try:
-            # Extract JSON from response
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                return json.loads(json_str)
-            else:
-                return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.error(f"Response: {response}")
-            raise ValueError(f"Invalid JSON response from AI: {str(e)}")
+        return self._parse_json_response(response)
     
     async def generate_structured_output_async(
         self,
         prompt: str,
-        system_prompt: str,
-        output_schema: Dict[str, Any],
-        model: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        output_schema: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        cache_ttl: Optional[int] = None,
+        cache_site: str = "default"
     ) -> Dict[str, Any]:
         """
         Generate structured JSON output (async)
         
+        Identical requests are served from the LLM response cache.
+        
         Args:
             prompt: User prompt
             system_prompt: System instructions
             output_schema: Expected output schema
             model: Model to use
+            cache_ttl: Seconds to cache the output (None = LLM_CACHE_TTL_SECONDS, 0 = no caching)
+            cache_site: Call site name for cache metrics
             
         Returns:
             Structured JSON output
         """
-        import json
+        model = model or settings.AI_MODEL
+        enhanced_system_prompt = self._structured_system_prompt(system_prompt, output_schema or {})
         
-        enhanced_system_prompt = f"""{system_prompt}
-
-You must respond with valid JSON matching this schema:
-{json.dumps(output_schema, indent=2)}
-
-Return ONLY the JSON object, no additional text."""
+        async def generate():
+            response = await self.generate_completion_async(
+                prompt=prompt,
+                system_prompt=enhanced_system_prompt,
+                model=model,
+                temperature=STRUCTURED_OUTPUT_TEMPERATURE
+            )
+            return {
+                "output": self._parse_json_response(response),
+                "tokens": estimate_tokens(enhanced_system_prompt, prompt, response)
+            }
+        
+        key = response_cache_key(
+            model, enhanced_system_prompt, prompt, output_schema, STRUCTURED_OUTPUT_TEMPERATURE
+        )
+        return await llm_response_cache.get_or_generate(key, generate, ttl=cache_ttl, site=cache_site)
+    
+    async def stream_completion_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate completion using Claude, yielding text as it arrives
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature (0-1)
+            model: Model to use
         
-        response = await self.generate_completion_async(
+        Yields:
+            Text chunks
+        """
+        if not self.is_available():
+            raise ValueError("AI client not available")
+        
+        async for text in self.gateway.stream(
+            prompt=prompt,
+            system_prompt=system_prompt or DEFAULT_SYSTEM_PROMPT,
+            model=model or settings.AI_MODEL,
+            max_tokens=max_tokens or settings.AI_MAX_TOKENS,
+            temperature=temperature or settings.AI_TEMPERATURE
+        ):
+            yield text
+    
+    async def stream_structured_output_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        output_schema: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        cache_ttl: Optional[int] = None,
+        cache_site: str = "default"
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate structured JSON output, yielding top-level fields as
+        soon as each one has been fully generated
+        
+        Shares cache entries with generate_structured_output_async; a hit
+        yields the cached fields immediately.
+        
+        Yields:
+            (field name, value) pairs
+        """
+        model = model or settings.AI_MODEL
+        enhanced_system_prompt = self._structured_system_prompt(system_prompt, output_schema or {})
+        key = response_cache_key(
+            model, enhanced_system_prompt, prompt, output_schema, STRUCTURED_OUTPUT_TEMPERATURE
+        )
+        
+        cached = await llm_response_cache.lookup(key, site=cache_site)
+        if cached is not None:
+            for field in cached.items():
+                yield field
+            return
+        
+        parser = PartialJSONParser()
+        chunks: List[str] = []
+        async for text in self.stream_completion_async(
             prompt=prompt,
             system_prompt=enhanced_system_prompt,
             model=model,
-            temperature=0.3  # Lower temperature for structured output
-        )
+            temperature=STRUCTURED_OUTPUT_TEMPERATURE
+        ):
+            chunks.append(text)
+            for field in parser.feed(text):
+                yield field
         
-        try:
-            # Extract JSON from response
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                return json.loads(json_str)
-            else:
-                return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.error(f"Response: {response}")
-            raise ValueError(f"Invalid JSON response from AI: {str(e)}")
+        response = "".join(chunks)
+        output = parser.result()
+        if output is None:
+            logger.error(f"Incomplete JSON response: {response}")
+            raise ValueError("Invalid JSON response from AI: object was not closed")
+        
+        await llm_response_cache.store(
+            key,
+            output,
+            tokens=estimate_tokens(enhanced_system_prompt, prompt, response),
+            ttl=cache_ttl,
+            site=cache_site
+        )
 
 
 # Global AI client instance
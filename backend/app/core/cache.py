@@ -3,83 +3,259 @@ NOOR Platform - Caching Utilities
 Implements caching strategies for performance optimization
 """
 
+import asyncio
+import heapq
 import json
 import hashlib
-from typing import Any, Optional, Callable
+import inspect
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict, List, Optional, Callable, Set, Tuple
 from functools import wraps
 from datetime import timedelta
 import logging
 
+from app.core.config import settings
+from app.core.monitoring import metrics_collector
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
 
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Approximate the in-memory footprint of a cached value in bytes
+
+    Walks containers a few levels deep; anything nested further is
+    charged at its shallow size only.
+    """
+    size = sys.getsizeof(value)
+    
+    if _depth >= 4:
+        return size
+    
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += estimate_size(vars(value), _depth + 1)
+    
+    return size
+
+
 class CacheManager:
     """
-    Simple in-memory cache manager with TTL support
+    Bounded in-memory cache manager with TTL support
+    
+    Entries are evicted least-recently-used first once either the entry
+    limit or the byte limit is exceeded. Expired entries are reclaimed by
+    a periodic sweep (see start_sweeper) as well as lazily on read.
     Can be extended to use Redis in production
     """
     
-    def __init__(self):
-        self.cache = {}
-        self.ttls = {}
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60.0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        
+        # Ordered oldest -> most recently used
+        self.cache: "OrderedDict[str, Any]" = OrderedDict()
+        self.ttls: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+        self.current_bytes = 0
+        
+        # Min-heap of (expires_at, key); stale items are skipped on pop
+        self._expiry_heap: List[Tuple[float, str]] = []
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        self._lock = threading.RLock()
+        self.sweep_task: Optional[asyncio.Task] = None
     
     def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache
         """
-        if key in self.cache:
-            # Check if expired
-            if key in self.ttls:
-                import time
-                if time.time() > self.ttls[key]:
-                    # Expired, remove from cache
-                    del self.cache[key]
-                    del self.ttls[key]
-                    return None
+        with self._lock:
+            if key not in self.cache:
+                self.misses += 1
+                return None
+            
+            expires_at = self.ttls.get(key)
+            if expires_at is not None and time.monotonic() > expires_at:
+                # Expired, remove from cache
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
             
+            self.cache.move_to_end(key)
+            self.hits += 1
             return self.cache[key]
-        
-        return None
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
         """
         Set value in cache with optional TTL (in seconds)
         """
-        self.cache[key] = value
+        size = estimate_size(value)
         
-        if ttl:
-            import time
-            self.ttls[key] = time.time() + ttl
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds cache limit")
+            return
+        
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            
+            self.cache[key] = value
+            self.sizes[key] = size
+            self.current_bytes += size
+            
+            if ttl:
+                expires_at = time.monotonic() + ttl
+                self.ttls[key] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+            
+            self._evict()
     
     def delete(self, key: str):
         """
         Delete value from cache
         """
-        if key in self.cache:
-            del self.cache[key]
-        
-        if key in self.ttls:
-            del self.ttls[key]
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
     
     def clear(self):
         """
         Clear all cache
         """
-        self.cache.clear()
-        self.ttls.clear()
+        with self._lock:
+            self.cache.clear()
+            self.ttls.clear()
+            self.sizes.clear()
+            self._expiry_heap.clear()
+            self.current_bytes = 0
+    
+    def sweep_expired(self) -> int:
+        """
+        Remove every entry whose TTL has passed
+        Returns the number of entries removed
+        """
+        removed = 0
+        now = time.monotonic()
+        
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, key = heapq.heappop(heap)
+                # Skip heap items left behind by overwritten/deleted keys
+                if self.ttls.get(key) == expires_at:
+                    self._remove(key)
+                    removed += 1
+            
+            # Keep the heap from accumulating stale items
+            if len(heap) > 2 * len(self.ttls) + 64:
+                self._expiry_heap = [(exp, k) for k, exp in self.ttls.items()]
+                heapq.heapify(self._expiry_heap)
+            
+            self.expirations += removed
+        
+        if removed:
+            logger.debug(f"Cache sweep removed {removed} expired entries")
+        
+        return removed
+    
+    def start_sweeper(self):
+        """
+        Start the background expiry sweep on the running event loop
+        """
+        if self.sweep_task is None or self.sweep_task.done():
+            self.sweep_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+    
+    async def stop_sweeper(self):
+        """
+        Stop the background expiry sweep
+        """
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            try:
+                await self.sweep_task
+            except asyncio.CancelledError:
+                pass
+            self.sweep_task = None
+    
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                logger.error(f"Cache sweep error: {str(e)}")
+    
+    def _remove(self, key: str):
+        del self.cache[key]
+        self.current_bytes -= self.sizes.pop(key, 0)
+        self.ttls.pop(key, None)
+    
+    def _evict(self):
+        # Expired entries go first so they never push out live ones
+        if len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes:
+            self.sweep_expired()
+        
+        while self.cache and (
+            len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            key = next(iter(self.cache))
+            self._remove(key)
+            self.evictions += 1
     
     def get_stats(self) -> dict:
         """
         Get cache statistics
         """
-        return {
-            "size": len(self.cache),
-            "keys": list(self.cache.keys())
-        }
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.cache),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups > 0 else 0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
 
 
 # Global cache instance
-cache_manager = CacheManager()
+cache_manager = CacheManager(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    sweep_interval=settings.CACHE_SWEEP_INTERVAL_SECONDS
+)
 
 
 def cache_key(*args, **kwargs) -> str:
@@ -95,39 +271,59 @@ def cache_key(*args, **kwargs) -> str:
     return hashlib.md5(key_str.encode()).hexdigest()
 
 
-def cached(ttl: int = 300, key_prefix: str = ""):
+def cached(
+    ttl: int = 300,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    early_refresh_beta: float = 1.0,
+    tags: Optional[List[str]] = None
+):
     """
     Decorator to cache function results
     
+    Concurrent misses for the same key on async functions share a single
+    call (see get_or_compute).
+    
     Args:
         ttl: Time to live in seconds (default: 5 minutes)
         key_prefix: Prefix for cache key
+        stale_ttl: Seconds a value may be served stale while it is
+            recomputed in the background (async functions only)
+        early_refresh_beta: Probabilistic early refresh aggressiveness;
+            0 disables it (async functions only)
+        tags: Invalidation tags, formatted with the call's arguments, e.g.
+            ["user:{user_id}"]; see invalidate_tags() (async functions only)
     
     Usage:
-        @cached(ttl=600, key_prefix="user")
+        @cached(ttl=600, key_prefix="user", tags=["user:{user_id}"])
         async def get_user(user_id: int):
             return await db.get_user(user_id)
     """
     def decorator(func: Callable):
+        is_async = asyncio.iscoroutinefunction(func)
+        if tags and not is_async:
+            raise ValueError("cache tags are only supported on async functions")
+        
+        signature = inspect.signature(func) if tags else None
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             # Generate cache key
             func_key = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
             
-            # Try to get from cache
-            cached_value = cache_manager.get(func_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for {func_key}")
-                return cached_value
+            if tags:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                call_tags = [tag.format(**bound.arguments) for tag in tags]
+                func_key = await tagged_key(func_key, call_tags)
             
-            # Cache miss, call function
-            logger.debug(f"Cache miss for {func_key}")
-            result = await func(*args, **kwargs)
-            
-            # Store in cache
-            cache_manager.set(func_key, result, ttl)
-            
-            return result
+            return await get_or_compute(
+                func_key,
+                lambda: func(*args, **kwargs),
+                ttl,
+                stale_ttl=stale_ttl,
+                early_refresh_beta=early_refresh_beta
+            )
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
@@ -150,8 +346,7 @@ def cached(ttl: int = 300, key_prefix: str = ""):
             return result
         
         # Return appropriate wrapper based on function type
-        import asyncio
-        if asyncio.iscoroutinefunction(func):
+        if is_async:
             return async_wrapper
         else:
             return sync_wrapper
@@ -178,7 +373,7 @@ class RedisCache:
         try:
             value = await self.redis.get(key)
             if value:
-                return json.loads(value)
+                return deserialize(value)
             return None
         except Exception as e:
             logger.error(f"Redis get error: {str(e)}")
@@ -192,7 +387,7 @@ class RedisCache:
             return
         
         try:
-            serialized = json.dumps(value, default=str)
+            serialized = serialize(value)
             if ttl:
                 await self.redis.setex(key, ttl, serialized)
             else:
@@ -212,21 +407,512 @@ class RedisCache:
         except Exception as e:
             logger.error(f"Redis delete error: {str(e)}")
     
-    async def clear_pattern(self, pattern: str):
+    async def clear_pattern(self, pattern: str, batch_size: int = 500):
         """
         Clear all keys matching pattern
+        
+        Walks the keyspace incrementally with SCAN and UNLINKs in batches so
+        Redis is never blocked; prefer invalidate_tags() for routine use.
         """
         if not self.enabled:
             return
         
         try:
-            keys = await self.redis.keys(pattern)
-            if keys:
-                await self.redis.delete(*keys)
+            batch = []
+            async for key in self.redis.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    await self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.redis.unlink(*batch)
         except Exception as e:
             logger.error(f"Redis clear pattern error: {str(e)}")
 
 
+# Format markers prefixed to every serialized payload
+_FORMAT_MSGPACK = b"m"
+_FORMAT_JSON = b"j"
+_FORMAT_COMPRESSED = b"z"
+
+# Payloads above this size are zlib-compressed before hitting Redis
+COMPRESS_THRESHOLD = 1024
+
+
+def serialize(value: Any) -> bytes:
+    """
+    Encode a value for the shared cache tier
+    
+    Uses msgpack when installed and falls back to JSON; non-native types
+    (datetime, UUID, Decimal, ...) are stored as strings in both cases.
+    """
+    if msgpack is not None:
+        payload = _FORMAT_MSGPACK + msgpack.packb(value, default=str, use_bin_type=True)
+    else:
+        payload = _FORMAT_JSON + json.dumps(value, default=str, separators=(",", ":")).encode()
+    
+    if len(payload) > COMPRESS_THRESHOLD:
+        return _FORMAT_COMPRESSED + zlib.compress(payload, 1)
+    return payload
+
+
+def deserialize(data: bytes) -> Any:
+    """
+    Decode a value produced by serialize()
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    
+    if data[:1] == _FORMAT_COMPRESSED:
+        data = zlib.decompress(data[1:])
+    
+    marker, body = data[:1], data[1:]
+    if marker == _FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack payload found but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if marker == _FORMAT_JSON:
+        return json.loads(body)
+    
+    # Values written before the format marker existed
+    return json.loads(data)
+
+
+# Tag invalidations share the key invalidation channel with this prefix
+TAG_MESSAGE_PREFIX = "#"
+
+# Redis tag counters outlive any cached entry by a wide margin
+TAG_VERSION_TTL = 7 * 24 * 3600
+
+
+class TagVersions:
+    """
+    Version counters for cache tags such as "user:42" or "jobs"
+    
+    A tag's current version is folded into every key cached under it, so
+    bumping the version invalidates all of those entries in O(1); the
+    orphaned entries simply age out through their TTL.
+    
+    Without Redis the counters are process-local and authoritative. With
+    Redis they are shared, and local copies are reused for max_age
+    seconds (or until a pub/sub invalidation drops them).
+    """
+    
+    def __init__(
+        self,
+        redis_client=None,
+        max_age: float = 30.0,
+        max_tags: int = 100000,
+        prefix: str = "noor:tagver:"
+    ):
+        self.redis = redis_client
+        self.max_age = max_age
+        self.max_tags = max_tags
+        self.prefix = prefix
+        
+        # tag -> (version, fetched_at)
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        
+        # Local mode: unknown tags start at the epoch, which is raised past
+        # every version handed out so far whenever the table is reset
+        self._epoch = 0
+        self._max_version = 0
+    
+    async def get_many(self, tags: List[str]) -> List[int]:
+        """
+        Current version of each tag, in order
+        """
+        if self.redis is None:
+            return [self._versions[t][0] if t in self._versions else self._epoch for t in tags]
+        
+        now = time.monotonic()
+        stale = [
+            t for t in tags
+            if t not in self._versions or now - self._versions[t][1] >= self.max_age
+        ]
+        
+        if stale:
+            values = await self.redis.mget([self.prefix + t for t in stale])
+            self._reserve(len(stale))
+            for tag, value in zip(stale, values):
+                self._versions[tag] = (int(value or 0), now)
+        
+        return [self._versions[t][0] for t in tags]
+    
+    async def bump(self, tag: str) -> int:
+        """
+        Advance a tag's version, orphaning every entry cached under it
+        """
+        if self.redis is not None:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(self.prefix + tag)
+                pipe.expire(self.prefix + tag, TAG_VERSION_TTL)
+                version, _ = await pipe.execute()
+        else:
+            self._reserve(1)
+            current = self._versions[tag][0] if tag in self._versions else self._epoch
+            version = current + 1
+        
+        self._max_version = max(self._max_version, version)
+        self._versions[tag] = (version, time.monotonic())
+        return version
+    
+    def forget(self, tag: str):
+        """
+        Drop the local copy of a shared tag version so it is re-read
+        """
+        if self.redis is not None:
+            self._versions.pop(tag, None)
+    
+    def _reserve(self, count: int):
+        if len(self._versions) + count <= self.max_tags:
+            return
+        
+        self._versions.clear()
+        if self.redis is None:
+            # Forgotten tags must not fall back to a version still in use
+            self._epoch = self._max_version + 1
+            self._max_version = self._epoch
+
+
+def versioned_key(key: str, tags: List[str], versions: List[int]) -> str:
+    """
+    Fold tag versions into a cache key
+    """
+    if not tags:
+        return key
+    return key + "|" + ",".join(f"{tag}@{version}" for tag, version in zip(tags, versions))
+
+
+class TwoTierCache:
+    """
+    Small per-process L1 cache in front of a shared Redis L2
+    
+    Writes and deletes are broadcast on a pub/sub channel so every worker
+    drops its L1 copy; L1 entries also carry a short TTL so a missed
+    invalidation message can only serve stale data briefly.
+    """
+    
+    def __init__(
+        self,
+        l1_max_entries: int = 2000,
+        l1_ttl: int = 30,
+        channel: str = "noor:cache:invalidate",
+        tag_versions: Optional[TagVersions] = None
+    ):
+        self.l1 = CacheManager(max_entries=l1_max_entries, max_bytes=16 * 1024 * 1024)
+        self.l1_ttl = l1_ttl
+        self.l2 = RedisCache()
+        self.channel = channel
+        self.tag_versions = tag_versions
+        self.instance_id = uuid.uuid4().hex
+        self.listener_task: Optional[asyncio.Task] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.l2.enabled
+    
+    async def start(self, redis_client):
+        """
+        Attach the Redis client and start listening for invalidations
+        """
+        self.l2 = RedisCache(redis_client)
+        if self.tag_versions is not None:
+            self.tag_versions.redis = redis_client
+            self.tag_versions.max_age = self.l1_ttl
+        self.l1.start_sweeper()
+        self.listener_task = asyncio.get_running_loop().create_task(self._listen())
+        logger.info(f"Two-tier cache enabled (L1 {self.l1.max_entries} entries)")
+    
+    async def stop(self):
+        """
+        Stop the invalidation listener and detach from Redis
+        """
+        if self.listener_task is not None:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+            self.listener_task = None
+        
+        await self.l1.stop_sweeper()
+        self.l2 = RedisCache()
+        if self.tag_versions is not None:
+            self.tag_versions.redis = None
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get value from L1, falling back to Redis and refilling L1
+        """
+        value = self.l1.get(key)
+        if value is not None:
+            metrics_collector.record_cache_hit("l1")
+            return value
+        metrics_collector.record_cache_miss("l1")
+        
+        value = await self.l2.get(key)
+        if value is not None:
+            metrics_collector.record_cache_hit("l2")
+            self.l1.set(key, value, self.l1_ttl)
+            return value
+        metrics_collector.record_cache_miss("l2")
+        
+        return None
+    
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Write value through both tiers and invalidate other workers' L1
+        """
+        await self.l2.set(key, value, ttl)
+        self.l1.set(key, value, min(ttl, self.l1_ttl) if ttl else self.l1_ttl)
+        await self.publish_invalidation(key)
+    
+    async def delete(self, key: str):
+        """
+        Delete value from both tiers on every worker
+        """
+        self.l1.delete(key)
+        await self.l2.delete(key)
+        await self.publish_invalidation(key)
+    
+    async def publish_invalidation(self, key: str):
+        """
+        Tell every other worker to drop key (or TAG_MESSAGE_PREFIX + tag)
+        """
+        try:
+            await self.l2.redis.publish(self.channel, f"{self.instance_id}|{key}")
+        except Exception as e:
+            logger.error(f"Cache invalidation publish error: {str(e)}")
+    
+    async def _listen(self):
+        while True:
+            pubsub = self.l2.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    
+                    origin, _, key = data.partition("|")
+                    if origin == self.instance_id:
+                        continue
+                    
+                    if key.startswith(TAG_MESSAGE_PREFIX):
+                        if self.tag_versions is not None:
+                            self.tag_versions.forget(key[len(TAG_MESSAGE_PREFIX):])
+                    else:
+                        self.l1.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Anything written while disconnected may be stale in L1
+                logger.error(f"Cache invalidation listener error: {str(e)}")
+                self.l1.clear()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+# Global tag versions; shared through Redis once the two-tier cache starts
+tag_versions = TagVersions()
+
+# Global two-tier cache; only used once started with a Redis client
+two_tier_cache = TwoTierCache(
+    l1_max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    l1_ttl=settings.CACHE_L1_TTL_SECONDS,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    tag_versions=tag_versions
+)
+
+
+async def cache_get_async(key: str) -> Optional[Any]:
+    """
+    Read from the two-tier cache when enabled, else the process cache
+    """
+    if two_tier_cache.enabled:
+        return await two_tier_cache.get(key)
+    return cache_manager.get(key)
+
+
+async def cache_set_async(key: str, value: Any, ttl: Optional[int] = None):
+    """
+    Write to the two-tier cache when enabled, else the process cache
+    """
+    if two_tier_cache.enabled:
+        await two_tier_cache.set(key, value, ttl)
+    else:
+        cache_manager.set(key, value, ttl)
+
+
+async def tagged_key(key: str, tags: List[str]) -> str:
+    """
+    Fold the current version of each tag into key
+    """
+    if not tags:
+        return key
+    return versioned_key(key, tags, await tag_versions.get_many(tags))
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async computations of the same key
+    
+    The first caller starts the computation as its own task; every caller
+    arriving before it finishes awaits that same task. Cancelling one
+    waiter does not cancel the shared computation.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key unless a run is already in flight, then await it
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        
+        # Mark the exception retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+
+# Shared by every cached call site in this process
+single_flight = SingleFlight()
+
+# Strong references to fire-and-forget refreshes
+_background_refreshes: Set[asyncio.Future] = set()
+
+_ENTRY_MARKER = "_swr"
+
+
+def make_cache_entry(value: Any, ttl: int, delta: float) -> Dict[str, Any]:
+    """
+    Wrap a value with the metadata needed for stale-while-revalidate
+    
+    expires_at is wall-clock time so the entry stays meaningful when it
+    is shared through Redis; delta is how long the value took to compute.
+    """
+    return {
+        _ENTRY_MARKER: 1,
+        "value": value,
+        "expires_at": time.time() + ttl,
+        "delta": delta
+    }
+
+
+def is_cache_entry(entry: Any) -> bool:
+    return isinstance(entry, dict) and _ENTRY_MARKER in entry
+
+
+def cache_entry_value(entry: Any) -> Any:
+    """
+    Return the value held by an entry, or the entry itself if unwrapped
+    """
+    return entry["value"] if is_cache_entry(entry) else entry
+
+
+def should_refresh_early(entry: Dict[str, Any], beta: float) -> bool:
+    """
+    Probabilistic early expiration (XFetch)
+    
+    Each reader refreshes with a probability that rises as expiry nears,
+    scaled by how expensive the value is to recompute, so one request
+    usually refreshes a hot key before it expires for everyone.
+    """
+    if beta <= 0:
+        return False
+    
+    delta = entry.get("delta") or 0
+    # 1 - random() is in (0, 1], so the log is always defined
+    gap = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + gap >= entry["expires_at"]
+
+
+async def get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int,
+    stale_ttl: int = 0,
+    early_refresh_beta: float = 1.0,
+    getter: Optional[Callable[[str], Awaitable[Any]]] = None,
+    setter: Optional[Callable[[str, Any, int], Awaitable[Any]]] = None
+) -> Any:
+    """
+    Read key from cache, computing and storing it on a miss
+    
+    - Concurrent misses share one compute() call (single-flight)
+    - Values older than ttl but within ttl + stale_ttl are returned
+      immediately while one background refresh runs
+    - Fresh values may be refreshed early in the background (XFetch)
+    
+    getter/setter default to the configured cache backend and may be
+    overridden to reuse this logic over another store. None results are
+    never cached, matching the decorators' miss semantics.
+    """
+    getter = getter or cache_get_async
+    setter = setter or cache_set_async
+    
+    async def refresh():
+        start = time.monotonic()
+        value = await compute()
+        if value is not None:
+            entry = make_cache_entry(value, ttl, time.monotonic() - start)
+            await setter(key, entry, ttl + stale_ttl)
+        return value
+    
+    entry = await getter(key)
+    
+    if entry is not None and not is_cache_entry(entry):
+        # Plain value stored by an older writer; treat as fresh
+        return entry
+    
+    if entry is not None:
+        expired = time.time() >= entry["expires_at"]
+        
+        if not expired and not should_refresh_early(entry, early_refresh_beta):
+            logger.debug(f"Cache hit for {key}")
+            return entry["value"]
+        
+        if not single_flight.in_flight(key):
+            logger.debug(f"Refreshing {'stale' if expired else 'expiring'} cache entry {key}")
+            task = asyncio.ensure_future(_run_background_refresh(key, refresh))
+            _background_refreshes.add(task)
+            task.add_done_callback(_background_refreshes.discard)
+        
+        return entry["value"]
+    
+    logger.debug(f"Cache miss for {key}")
+    return await single_flight.do(key, refresh)
+
+
+async def _run_background_refresh(key: str, refresh: Callable[[], Awaitable[Any]]):
+    try:
+        await single_flight.do(key, refresh)
+    except Exception as e:
+        logger.error(f"Background cache refresh failed for {key}: {str(e)}")
+
+
 # Response caching decorator
 def cache_response(ttl: int = 300, key_prefix: str = "response"):
     """
@@ -244,20 +930,11 @@ def cache_response(ttl: int = 300, key_prefix: str = "response"):
             # Generate cache key from request parameters
             cache_key_str = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
             
-            # Try to get from cache
-            cached_response = cache_manager.get(cache_key_str)
-            if cached_response is not None:
-                logger.debug(f"Response cache hit for {cache_key_str}")
-                return cached_response
-            
-            # Cache miss, call function
-            logger.debug(f"Response cache miss for {cache_key_str}")
-            response = await func(*args, **kwargs)
-            
-            # Store in cache
-            cache_manager.set(cache_key_str, response, ttl)
-            
-            return response
+            return await get_or_compute(
+                cache_key_str,
+                lambda: func(*args, **kwargs),
+                ttl
+            )
         
         return wrapper
     
@@ -265,12 +942,28 @@ def cache_response(ttl: int = 300, key_prefix: str = "response"):
 
 
 # Cache invalidation helpers
+async def invalidate_tags(*tags: str):
+    """
+    Invalidate every entry cached under any of the given tags
+    
+    O(1) per tag regardless of how many entries carry it.
+    """
+    for tag in tags:
+        await tag_versions.bump(tag)
+        if two_tier_cache.enabled:
+            await two_tier_cache.publish_invalidation(TAG_MESSAGE_PREFIX + tag)
+    
+    logger.info(f"Invalidated cache tags: {', '.join(tags)}")
+
+
 def invalidate_cache(pattern: str):
     """
-    Invalidate cache entries matching pattern
+    Invalidate in-process cache entries whose key contains pattern
+    
+    Scans every key; use invalidate_tags() on hot paths.
     """
     keys_to_delete = [
-        key for key in cache_manager.cache.keys()
+        key for key in list(cache_manager.cache.keys())
         if pattern in key
     ]
     
@@ -280,11 +973,42 @@ def invalidate_cache(pattern: str):
     logger.info(f"Invalidated {len(keys_to_delete)} cache entries matching '{pattern}'")
 
 
-def invalidate_user_cache(user_id: int):
+async def invalidate_user_cache_async(user_id: int):
     """
     Invalidate all cache entries for a specific user
     """
-    invalidate_cache(f"user:{user_id}")
+    await invalidate_tags(f"user:{user_id}")
+
+
+def invalidate_user_cache(user_id: int) -> Optional[asyncio.Future]:
+    """
+    Synchronous invalidate_user_cache_async for callers that cannot await
+    
+    Inside a running event loop the invalidation is scheduled and its task
+    returned (await it to wait for Redis); with no loop it runs to
+    completion before returning. Async code should await
+    invalidate_user_cache_async directly.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(invalidate_user_cache_async(user_id))
+        return None
+    
+    task = asyncio.ensure_future(invalidate_user_cache_async(user_id))
+    _background_invalidations.add(task)
+    task.add_done_callback(_finish_background_invalidation)
+    return task
+
+
+# Strong references to invalidations scheduled by synchronous callers
+_background_invalidations: Set[asyncio.Future] = set()
+
+
+def _finish_background_invalidation(task: asyncio.Future):
+    _background_invalidations.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background cache invalidation failed: {str(task.exception())}")
 
 
 def invalidate_all_cache():
@@ -293,4 +1017,3 @@ def invalidate_all_cache():
     """
     cache_manager.clear()
     logger.info("All cache cleared")
-
@@ -3,7 +3,7 @@ NOOR Platform - Configuration Settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 from functools import lru_cache
 
 
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     APP_VERSION: str = "7.2.0"
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    APP_URL: str = "https://noor.gov.ae"
     
     # API
     API_V1_PREFIX: str = "/api/v1"
@@ -72,6 +73,15 @@ class Settings(BaseSettings):
             return f"redis://:{self.REDIS_PASSWORD}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
     
+    # In-process cache
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+    CACHE_SWEEP_INTERVAL_SECONDS: int = 60
+    CACHE_BACKEND: str = "memory"  # "memory" or "two_tier" (in-process L1 + Redis L2)
+    CACHE_L1_MAX_ENTRIES: int = 2000
+    CACHE_L1_TTL_SECONDS: int = 30
+    CACHE_INVALIDATION_CHANNEL: str = "noor:cache:invalidate"
+    
     # Neo4j
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
@@ -101,11 +111,24 @@ class Settings(BaseSettings):
     AI_TEMPERATURE: float = 0.7
     MASTER_ORCHESTRATOR_MODEL: str = "claude-3-5-sonnet-20241022"
     
+    # LLM Gateway (shared by all agents in a worker)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONNECTIONS: int = 32
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    LLM_TOKENS_PER_MINUTE: int = 0  # default per-model budget, 0 = unlimited
+    LLM_MODEL_TOKENS_PER_MINUTE: Dict[str, int] = {}
+    LLM_CACHE_BACKEND: str = "redis"  # "redis" (shared) or "app" (CACHE_BACKEND)
+    LLM_CACHE_TTL_SECONDS: int = 3600  # default for structured outputs, 0 disables
+    
     # Agent Configuration
     AGENT_MAX_RETRIES: int = 3
     AGENT_TIMEOUT_SECONDS: int = 300
     ENABLE_AGENT_LOGGING: bool = True
     ENABLE_AI_FEATURES: bool = True
+    ORCHESTRATOR_MAX_CONCURRENCY_PER_AGENT: int = 4
     
     # UAE Pass Integration
     UAE_PASS_CLIENT_ID: Optional[str] = None
@@ -139,11 +162,20 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     EMAIL_FROM: str = "noreply@noor.gov.ae"
+    SENDGRID_API_KEY: Optional[str] = None
+    ENABLE_EMAIL_NOTIFICATIONS: bool = False
     
     # SMS (Twilio)
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None
+    ENABLE_SMS_NOTIFICATIONS: bool = False
+    
+    # Bulk notification delivery (rate 0 = unlimited)
+    NOTIFICATION_EMAIL_CONCURRENCY: int = 8
+    NOTIFICATION_SMS_CONCURRENCY: int = 4
+    NOTIFICATION_EMAIL_RATE_PER_MINUTE: int = 6000
+    NOTIFICATION_SMS_RATE_PER_MINUTE: int = 600
     
     # File Storage
     UPLOAD_DIR: str = "/var/noor/uploads"
@@ -151,9 +183,24 @@ class Settings(BaseSettings):
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_PER_HOUR: int = 1000
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    RATE_LIMIT_PREFETCH: int = 5  # requests reserved per Redis round-trip
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
+    METRICS_AGGREGATE_WORKERS: bool = False  # merge all workers' metrics via Redis
+    METRICS_PUBLISH_INTERVAL_SECONDS: int = 10
+    
+    # Background jobs (python -m app.worker)
+    JOB_QUEUE_ENABLED: bool = False  # queue side effects instead of running them inline
+    JOB_BATCH_SIZE: int = 100
+    JOB_CONCURRENCY: int = 16
+    JOB_MAX_ATTEMPTS: int = 5
+    OUTBOX_RELAY_BATCH_SIZE: int = 500
+    SKILL_DEMAND_RECONCILE_SECONDS: int = 3600  # full recount of the demand rollups
+    SKILL_DEMAND_REBUILD_LOCK_SECONDS: int = 600
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
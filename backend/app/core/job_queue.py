@@ -0,0 +1,325 @@
+"""
+NOOR Platform - Background Job Queue
+Redis Streams queue with batched consumers, retries and dead-lettering
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from redis.exceptions import ResponseError, WatchError
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Platform topics; handlers are registered by app.services.job_handlers
+NOTIFICATION_TOPIC = "notification.send"
+AGENT_TASK_LOG_TOPIC = "agent.task_log"
+
+
+class JobQueue:
+    """
+    At-least-once job queue on a Redis stream
+    
+    Producers XADD {id, topic, payload, attempts} entries; workers read them
+    in batches through a consumer group, run the handler registered for the
+    topic and XACK the batch in one pipeline. A failed job is scheduled
+    again on a delay sorted set with exponential backoff and, once it has
+    failed max_attempts times, moved to the dead-letter stream with its last
+    error. Entries left pending by a crashed worker are reclaimed with
+    XAUTOCLAIM after claim_idle_ms, so handlers must tolerate running a job
+    twice; the job id is stable across retries for deduplication.
+    """
+    
+    def __init__(
+        self,
+        stream: str = "noor:jobs",
+        group: str = "noor-workers",
+        consumer: Optional[str] = None,
+        max_attempts: int = 5,
+        retry_backoff: float = 2.0,
+        max_retry_delay: float = 300.0,
+        claim_idle_ms: int = 60000,
+        concurrency: int = 16,
+        maxlen: int = 100000
+    ):
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.delayed_key = f"{stream}:delayed"
+        self.dead_letter_stream = f"{stream}:dead"
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+        self.claim_idle_ms = claim_idle_ms
+        self.concurrency = concurrency
+        self.maxlen = maxlen
+        self.handlers: Dict[str, JobHandler] = {}
+        self.redis = None
+        self._group_ready = False
+        self._pending_submits: Set[asyncio.Task] = set()
+    
+    def use_redis(self, redis_client):
+        """
+        Use a Redis client created with decode_responses=True
+        """
+        self.redis = redis_client
+        self._group_ready = False
+    
+    @property
+    def connected(self) -> bool:
+        return self.redis is not None
+    
+    def register(self, topic: str, handler: Optional[JobHandler] = None):
+        """
+        Register the coroutine handling a topic; usable as a decorator
+        """
+        if handler is None:
+            def decorator(fn: JobHandler) -> JobHandler:
+                self.handlers[topic] = fn
+                return fn
+            return decorator
+        self.handlers[topic] = handler
+        return handler
+    
+    # ------------------------------------------------------------------
+    # Producing
+    # ------------------------------------------------------------------
+    
+    async def enqueue(self, topic: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        """
+        Add one job to the stream
+        
+        Returns:
+            The job id
+        """
+        return (await self.enqueue_many([(topic, payload, job_id)]))[0]
+    
+    async def enqueue_many(
+        self,
+        jobs: Iterable[Tuple[str, Dict[str, Any], Optional[str]]]
+    ) -> List[str]:
+        """
+        Add (topic, payload, job_id) jobs in one round trip
+        
+        A job_id of None gets a new one.
+        """
+        ids = []
+        pipe = self.redis.pipeline(transaction=False)
+        for topic, payload, job_id in jobs:
+            job_id = job_id or uuid.uuid4().hex
+            ids.append(job_id)
+            pipe.xadd(self.stream, _fields(job_id, topic, payload, 0), maxlen=self.maxlen, approximate=True)
+        if ids:
+            await pipe.execute()
+        return ids
+    
+    def submit_nowait(self, topic: str, payload: Dict[str, Any]) -> bool:
+        """
+        Enqueue from synchronous code running on the event loop
+        
+        Returns False, without enqueuing, when no queue or loop is
+        available so the caller can fall back to doing the work inline.
+        """
+        if self.redis is None:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        
+        task = loop.create_task(self.enqueue(topic, payload))
+        self._pending_submits.add(task)
+        task.add_done_callback(self._submit_done)
+        return True
+    
+    def _submit_done(self, task: asyncio.Task):
+        self._pending_submits.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to enqueue job: {task.exception()}")
+    
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+    
+    async def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+    
+    async def run_once(self, batch_size: int = 100, block_ms: int = 1000) -> Dict[str, int]:
+        """
+        Process one batch: due retries, then reclaimed or new entries
+        
+        Returns:
+            Counts of jobs that succeeded, were retried and were dead-lettered
+        """
+        await self.ensure_group()
+        await self.promote_due_retries(batch_size)
+        
+        entries = await self._reclaim(batch_size)
+        if not entries:
+            response = await self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=batch_size, block=block_ms or None
+            )
+            entries = response[0][1] if response else []
+        
+        return await self._process(entries)
+    
+    async def run(self, batch_size: int = 100, block_ms: int = 1000, stop: Optional[asyncio.Event] = None):
+        """
+        Process batches until stop is set
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.run_once(batch_size, block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue batch failed: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def promote_due_retries(self, limit: int = 100) -> int:
+        """
+        Move retries whose backoff has elapsed back onto the stream
+        
+        WATCH makes the move atomic, so concurrent workers never promote
+        the same job twice.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.delayed_key)
+                due = await pipe.zrangebyscore(self.delayed_key, 0, time.time(), start=0, num=limit)
+                if not due:
+                    await pipe.unwatch()
+                    return 0
+                pipe.multi()
+                pipe.zrem(self.delayed_key, *due)
+                for member in due:
+                    pipe.xadd(self.stream, json.loads(member), maxlen=self.maxlen, approximate=True)
+                await pipe.execute()
+            except WatchError:
+                return 0
+        return len(due)
+    
+    async def _reclaim(self, batch_size: int) -> List[Tuple[str, Dict[str, str]]]:
+        if not self.claim_idle_ms:
+            return []
+        response = await self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, self.claim_idle_ms, start_id="0-0", count=batch_size
+        )
+        return [entry for entry in response[1] if entry[1]]
+    
+    async def _process(self, entries: List[Tuple[str, Dict[str, str]]]) -> Dict[str, int]:
+        counts = {"succeeded": 0, "retried": 0, "dead_lettered": 0}
+        if not entries:
+            return counts
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def run_entry(fields):
+            async with semaphore:
+                return await self._run_handler(fields)
+        
+        errors = await asyncio.gather(*(run_entry(fields) for _, fields in entries))
+        
+        pipe = self.redis.pipeline(transaction=True)
+        for (entry_id, fields), error in zip(entries, errors):
+            if error is None:
+                counts["succeeded"] += 1
+                continue
+            
+            attempts = int(fields.get("attempts", 0)) + 1
+            if attempts >= self.max_attempts:
+                counts["dead_lettered"] += 1
+                logger.error(f"Job {fields.get('id')} ({fields.get('topic')}) dead-lettered: {error}")
+                pipe.xadd(self.dead_letter_stream, {
+                    **fields,
+                    "attempts": attempts,
+                    "error": error,
+                    "failed_at": time.time()
+                })
+            else:
+                counts["retried"] += 1
+                retry = {**fields, "attempts": attempts, "error": error}
+                pipe.zadd(self.delayed_key, {json.dumps(retry, sort_keys=True): time.time() + self.retry_delay(attempts)})
+        pipe.xack(self.stream, self.group, *(entry_id for entry_id, _ in entries))
+        await pipe.execute()
+        return counts
+    
+    async def _run_handler(self, fields: Dict[str, str]) -> Optional[str]:
+        """
+        Run one job, returning None on success or the error message
+        """
+        handler = self.handlers.get(fields.get("topic"))
+        if handler is None:
+            return f"No handler for topic {fields.get('topic')!r}"
+        try:
+            await handler(json.loads(fields["payload"]))
+        except Exception as e:
+            logger.warning(f"Job {fields.get('id')} ({fields.get('topic')}) failed: {e}")
+            return str(e) or type(e).__name__
+        return None
+    
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.max_retry_delay, self.retry_backoff ** attempts)
+    
+    # ------------------------------------------------------------------
+    # Dead letters
+    # ------------------------------------------------------------------
+    
+    async def dead_letters(self, count: int = 100) -> List[Dict[str, Any]]:
+        """
+        Oldest dead-lettered jobs with their last error
+        """
+        entries = await self.redis.xrange(self.dead_letter_stream, count=count)
+        return [
+            {**fields, "entry_id": entry_id, "payload": json.loads(fields["payload"])}
+            for entry_id, fields in entries
+        ]
+    
+    async def replay_dead_letters(self, count: int = 100) -> int:
+        """
+        Put dead-lettered jobs back on the stream with a fresh attempt count
+        """
+        entries = await self.redis.xrange(self.dead_letter_stream, count=count)
+        if not entries:
+            return 0
+        pipe = self.redis.pipeline(transaction=True)
+        for entry_id, fields in entries:
+            pipe.xadd(
+                self.stream,
+                _fields(fields["id"], fields["topic"], fields["payload"], 0),
+                maxlen=self.maxlen,
+                approximate=True
+            )
+            pipe.xdel(self.dead_letter_stream, entry_id)
+        await pipe.execute()
+        return len(entries)
+
+
+def _fields(job_id: str, topic: str, payload: Any, attempts: int) -> Dict[str, Any]:
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, default=str)
+    return {"id": job_id, "topic": topic, "payload": payload, "attempts": attempts}
+
+
+# Global job queue; producers fall back to inline work until use_redis()
+job_queue = JobQueue()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the global job queue"""
+    return job_queue
@@ -0,0 +1,144 @@
+"""
+NOOR Platform - LLM Response Cache
+Content-addressed cache for structured LLM outputs
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import (
+    RedisCache,
+    cache_entry_value,
+    cache_get_async,
+    cache_set_async,
+    get_or_compute,
+    make_cache_entry
+)
+from app.core.config import settings
+from app.core.monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+def response_cache_key(
+    model: str,
+    system_prompt: Optional[str],
+    prompt: str,
+    output_schema: Optional[Dict[str, Any]],
+    temperature: Optional[float]
+) -> str:
+    """
+    Hash everything that determines a response into a fixed-length key
+    """
+    payload = json.dumps(
+        [model, system_prompt or "", prompt, output_schema, temperature],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache of LLM outputs keyed by a hash of the full request
+    
+    Entries live in Redis when use_redis() has been called (shared by all
+    workers and surviving restarts), otherwise in the configured app cache.
+    Identical concurrent requests share one LLM call. Hits and the tokens
+    they avoided are recorded per call site.
+    """
+    
+    def __init__(self, default_ttl: int = 3600, prefix: str = "noor:llm:"):
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.redis: Optional[RedisCache] = None
+    
+    def use_redis(self, redis_client):
+        """Store entries directly in Redis"""
+        self.redis = RedisCache(redis_client)
+    
+    async def _get(self, key: str) -> Optional[Any]:
+        if self.redis is not None:
+            return await self.redis.get(key)
+        return await cache_get_async(key)
+    
+    async def _set(self, key: str, value: Any, ttl: Optional[int] = None):
+        if self.redis is not None:
+            await self.redis.set(key, value, ttl)
+        else:
+            await cache_set_async(key, value, ttl)
+    
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+        ttl: Optional[int] = None,
+        site: str = "default"
+    ) -> Any:
+        """
+        Return the cached output for key, calling generate() on a miss
+        
+        generate() must return {"output": ..., "tokens": int}; only the
+        output is handed back to the caller.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return (await generate())["output"]
+        
+        generated = False
+        
+        async def compute():
+            nonlocal generated
+            generated = True
+            return await generate()
+        
+        entry = await get_or_compute(
+            self.prefix + key,
+            compute,
+            ttl,
+            early_refresh_beta=0,
+            getter=self._get,
+            setter=self._set
+        )
+        
+        # Callers that joined another caller's in-flight request count as hits
+        metrics_collector.record_llm_cache(site, hit=not generated, tokens=entry.get("tokens", 0))
+        return entry["output"]
+    
+    async def lookup(self, key: str, site: str = "default") -> Optional[Any]:
+        """
+        Return the cached output for key without generating on a miss
+        
+        For streaming callers, which produce the output themselves and
+        then hand it to store(). Expired entries count as misses.
+        """
+        entry = await self._get(self.prefix + key)
+        if entry is None or time.time() >= entry.get("expires_at", float("inf")):
+            return None
+        
+        entry = cache_entry_value(entry)
+        metrics_collector.record_llm_cache(site, hit=True, tokens=entry.get("tokens", 0))
+        return entry["output"]
+    
+    async def store(
+        self,
+        key: str,
+        output: Any,
+        tokens: int = 0,
+        ttl: Optional[int] = None,
+        site: str = "default"
+    ):
+        """Cache an output generated outside get_or_generate()"""
+        ttl = self.default_ttl if ttl is None else ttl
+        metrics_collector.record_llm_cache(site, hit=False)
+        if ttl > 0:
+            entry = make_cache_entry({"output": output, "tokens": tokens}, ttl, 0)
+            await self._set(self.prefix + key, entry, ttl)
+
+
+# Global LLM response cache instance
+llm_response_cache = LLMResponseCache(default_ttl=settings.LLM_CACHE_TTL_SECONDS)
@@ -0,0 +1,399 @@
+"""
+NOOR Platform - LLM Gateway
+Shared async access to Anthropic/OpenAI with connection pooling,
+bounded concurrency, per-model token budgets and retries
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: timeouts, conflicts, rate limits, overload
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """
+    Rough prompt token count (~4 characters per token) for budgeting
+    """
+    return sum(len(text) for text in texts if text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at tokens_per_minute
+    
+    Callers wait until enough budget is available instead of being
+    rejected, so bursts are smoothed rather than turned into 429s upstream.
+    """
+    
+    def __init__(self, tokens_per_minute: int, capacity: Optional[int] = None):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = capacity or tokens_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, tokens: int):
+        """
+        Wait until `tokens` can be taken from the bucket
+        
+        Requests larger than the capacity are clamped so they cannot wait
+        forever.
+        """
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+    
+    def adjust(self, tokens: int):
+        """
+        Correct an earlier estimate once the real usage is known
+        
+        Positive values charge extra, negative values refund. The balance
+        may go negative, which delays the next callers accordingly.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - tokens)
+
+
+class LLMGateway:
+    """
+    Process-wide gateway for LLM completions
+    
+    - One pooled HTTP client shared by AsyncAnthropic and AsyncOpenAI
+    - A semaphore bounding in-flight requests per worker
+    - A token bucket per model (LLM_MODEL_TOKENS_PER_MINUTE overrides
+      LLM_TOKENS_PER_MINUTE)
+    - Exponential backoff with full jitter on rate limits, overload and
+      connection errors
+    
+    SDK clients are created on first use so importing agents never needs
+    network configuration.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0,
+        tokens_per_minute: int = 0,
+        model_tokens_per_minute: Optional[Dict[str, int]] = None,
+        timeout: float = 60.0,
+        max_connections: int = 32
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.tokens_per_minute = tokens_per_minute
+        self.model_tokens_per_minute = model_tokens_per_minute or {}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._anthropic = None
+        self._openai = None
+        
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "tokens": 0}
+    
+    @property
+    def has_anthropic(self) -> bool:
+        return self._anthropic is not None or bool(settings.ANTHROPIC_API_KEY)
+    
+    @property
+    def has_openai(self) -> bool:
+        return self._openai is not None or bool(settings.OPENAI_API_KEY)
+    
+    def is_available(self) -> bool:
+        return self.has_anthropic or self.has_openai
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._http_client
+    
+    def _get_anthropic(self):
+        if self._anthropic is None:
+            from anthropic import AsyncAnthropic
+            
+            # Retries are handled here so they share the jittered backoff
+            self._anthropic = AsyncAnthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                http_client=self._get_http_client(),
+                max_retries=0
+            )
+        return self._anthropic
+    
+    def _get_openai(self):
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            
+            self._openai = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=self._get_http_client(),
+                max_retries=0
+            )
+        return self._openai
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    def _get_bucket(self, model: str) -> Optional[TokenBucket]:
+        limit = self.model_tokens_per_minute.get(model, self.tokens_per_minute)
+        if not limit:
+            return None
+        if model not in self._buckets:
+            self._buckets[model] = TokenBucket(limit)
+        return self._buckets[model]
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+            return True
+        if getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES:
+            return True
+        # SDK connection/timeout errors carry no status code
+        return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.retry_max_delay))
+            except ValueError:
+                pass
+        return delay
+    
+    async def complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """
+        Generate a completion
+        
+        Claude models go to Anthropic; anything else, or Claude when no
+        Anthropic key is configured, goes to OpenAI.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instructions
+            model: Model to use (defaults to AI_MODEL)
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+        
+        Returns:
+            Generated text
+        """
+        model = model or settings.AI_MODEL
+        max_tokens = max_tokens or settings.AI_MAX_TOKENS
+        temperature = settings.AI_TEMPERATURE if temperature is None else temperature
+        
+        if "claude" in model.lower() and self.has_anthropic:
+            call = self._call_anthropic
+        elif self.has_openai:
+            call = self._call_openai
+            if "gpt" not in model.lower():
+                model = settings.OPENAI_MODEL
+        else:
+            raise ValueError("No LLM client available")
+        
+        estimated = estimate_tokens(prompt, system_prompt) + max_tokens
+        bucket = self._get_bucket(model)
+        if bucket:
+            await bucket.acquire(estimated)
+        
+        attempt = 0
+        while True:
+            try:
+                async with self._get_semaphore():
+                    self.stats["requests"] += 1
+                    text, used = await call(prompt, system_prompt, model, max_tokens, temperature)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.stats["failures"] += 1
+                    logger.error(f"LLM call failed ({model}): {str(e)}")
+                    raise
+                
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(
+                    f"LLM call to {model} failed ({str(e)}), retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        
+        if used:
+            self.stats["tokens"] += used
+            if bucket:
+                bucket.adjust(used - estimated)
+        
+        return text
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a completion, yielding text as it arrives
+        
+        Streams from Anthropic with messages.stream. Shares the semaphore,
+        token budget and retries with complete(), except that a request is
+        only retried before its first text chunk. Without an Anthropic key
+        the whole completion is yielded at once.
+        """
+        model = model or settings.AI_MODEL
+        max_tokens = max_tokens or settings.AI_MAX_TOKENS
+        temperature = settings.AI_TEMPERATURE if temperature is None else temperature
+        
+        if not ("claude" in model.lower() and self.has_anthropic):
+            yield await self.complete(prompt, system_prompt, model, max_tokens, temperature)
+            return
+        
+        estimated = estimate_tokens(prompt, system_prompt) + max_tokens
+        bucket = self._get_bucket(model)
+        if bucket:
+            await bucket.acquire(estimated)
+        
+        used = 0
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self._get_semaphore():
+                    self.stats["requests"] += 1
+                    async with self._get_anthropic().messages.stream(
+                        model=model,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        system=system_prompt or "",
+                        messages=[{"role": "user", "content": prompt}]
+                    ) as response:
+                        async for text in response.text_stream:
+                            started = True
+                            yield text
+                        
+                        message = await response.get_final_message()
+                        usage = getattr(message, "usage", None)
+                        used = (usage.input_tokens + usage.output_tokens) if usage else 0
+                break
+            except Exception as e:
+                if started or attempt >= self.max_retries or not self._is_retryable(e):
+                    self.stats["failures"] += 1
+                    logger.error(f"LLM stream failed ({model}): {str(e)}")
+                    raise
+                
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(
+                    f"LLM stream to {model} failed ({str(e)}), retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        
+        if used:
+            self.stats["tokens"] += used
+            if bucket:
+                bucket.adjust(used - estimated)
+    
+    async def _call_anthropic(self, prompt, system_prompt, model, max_tokens, temperature):
+        response = await self._get_anthropic().messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_prompt or "",
+            messages=[{"role": "user", "content": prompt}]
+        )
+        usage = getattr(response, "usage", None)
+        used = (usage.input_tokens + usage.output_tokens) if usage else 0
+        return response.content[0].text, used
+    
+    async def _call_openai(self, prompt, system_prompt, model, max_tokens, temperature):
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        response = await self._get_openai().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        usage = getattr(response, "usage", None)
+        used = usage.total_tokens if usage else 0
+        return response.choices[0].message.content, used
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get gateway counters and remaining per-model budgets"""
+        return {
+            **self.stats,
+            "max_concurrency": self.max_concurrency,
+            "budgets": {model: int(bucket.tokens) for model, bucket in self._buckets.items()}
+        }
+    
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._anthropic = None
+        self._openai = None
+        self._semaphore = None
+        self._buckets.clear()
+
+
+# Global LLM gateway instance
+llm_gateway = LLMGateway(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base_delay=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+    retry_max_delay=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    model_tokens_per_minute=settings.LLM_MODEL_TOKENS_PER_MINUTE,
+    timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+    max_connections=settings.LLM_MAX_CONNECTIONS
+)
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get global LLM gateway instance"""
+    return llm_gateway
@@ -4,16 +4,81 @@ Implements error tracking, performance monitoring, and health checks
 """
 
 import os
+import asyncio
+import bisect
+import json
 import logging
+import socket
 import time
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, List
 from datetime import datetime
 from fastapi import Request
+from redis.exceptions import WatchError
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
 
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram
+    
+    Buckets grow by sqrt(2) from 1ms to ~46s, so percentile estimates are
+    within about 20% anywhere in that range. Recording is a bisect plus an
+    increment with no locking; the collector only runs on the event loop.
+    """
+    
+    BUCKETS = tuple(round(0.001 * 2 ** (k / 2), 6) for k in range(32))
+    
+    __slots__ = ("counts", "count", "sum")
+    
+    def __init__(self):
+        # One extra slot for observations above the last bound (+Inf)
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the q-th percentile (0-100) by interpolating in its bucket
+        """
+        if self.count == 0:
+            return 0.0
+        
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.BUCKETS[i - 1] if i > 0 else 0.0
+                upper = self.BUCKETS[i] if i < len(self.BUCKETS) else lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        
+        return self.BUCKETS[-1]
+    
+    def merge(self, other: "LatencyHistogram"):
+        for i, bucket_count in enumerate(other.counts):
+            self.counts[i] += bucket_count
+        self.count += other.count
+        self.sum += other.sum
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "count": self.count, "sum": self.sum}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = list(data["counts"])
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        return histogram
+
+
 class PerformanceMonitor:
     """
     Monitor and track performance metrics
@@ -268,27 +333,38 @@ class MetricsCollector:
             "database_queries": {},
             "cache_hits": 0,
             "cache_misses": 0,
+            "cache_tiers": {},
+            "llm_cache": {},
             "errors_by_type": {}
         }
+        
+        # Per-endpoint latency histograms, keyed like api_calls
+        self.latency: Dict[str, LatencyHistogram] = {}
     
     def record_api_call(self, endpoint: str, method: str, duration: float, status_code: int):
         """
         Record API call metrics
+        
+        endpoint should be the route template (e.g. /users/{user_id}), not
+        the raw path, so the number of tracked keys stays bounded.
         """
         key = f"{method}:{endpoint}"
         
-        if key not in self.metrics["api_calls"]:
-            self.metrics["api_calls"][key] = {
+        calls = self.metrics["api_calls"].get(key)
+        if calls is None:
+            calls = self.metrics["api_calls"][key] = {
                 "count": 0,
                 "total_duration": 0.0,
                 "errors": 0
             }
+            self.latency[key] = LatencyHistogram()
         
-        self.metrics["api_calls"][key]["count"] += 1
-        self.metrics["api_calls"][key]["total_duration"] += duration
+        calls["count"] += 1
+        calls["total_duration"] += duration
+        self.latency[key].observe(duration)
         
         if status_code >= 400:
-            self.metrics["api_calls"][key]["errors"] += 1
+            calls["errors"] += 1
     
     def record_database_query(self, query_type: str, duration: float):
         """
@@ -303,13 +379,34 @@ class MetricsCollector:
         self.metrics["database_queries"][query_type]["count"] += 1
         self.metrics["database_queries"][query_type]["total_duration"] += duration
     
-    def record_cache_hit(self):
-        """Record cache hit"""
+    def record_cache_hit(self, tier: Optional[str] = None):
+        """Record cache hit, optionally attributed to a cache tier"""
         self.metrics["cache_hits"] += 1
+        if tier:
+            self._cache_tier(tier)["hits"] += 1
     
-    def record_cache_miss(self):
-        """Record cache miss"""
+    def record_cache_miss(self, tier: Optional[str] = None):
+        """Record cache miss, optionally attributed to a cache tier"""
         self.metrics["cache_misses"] += 1
+        if tier:
+            self._cache_tier(tier)["misses"] += 1
+    
+    def _cache_tier(self, tier: str) -> Dict[str, int]:
+        if tier not in self.metrics["cache_tiers"]:
+            self.metrics["cache_tiers"][tier] = {"hits": 0, "misses": 0}
+        return self.metrics["cache_tiers"][tier]
+    
+    def record_llm_cache(self, site: str, hit: bool, tokens: int = 0):
+        """Record an LLM response cache lookup and the tokens a hit saved"""
+        if site not in self.metrics["llm_cache"]:
+            self.metrics["llm_cache"][site] = {"hits": 0, "misses": 0, "tokens_saved": 0}
+        
+        data = self.metrics["llm_cache"][site]
+        if hit:
+            data["hits"] += 1
+            data["tokens_saved"] += tokens
+        else:
+            data["misses"] += 1
     
     def record_error(self, error_type: str):
         """Record error by type"""
@@ -330,15 +427,37 @@ class MetricsCollector:
             else 0
         )
         
+        # Per-tier hit rates (e.g. in-process L1 vs Redis L2)
+        cache_tiers = {}
+        for tier, data in self.metrics["cache_tiers"].items():
+            lookups = data["hits"] + data["misses"]
+            cache_tiers[tier] = {
+                **data,
+                "hit_rate": round(data["hits"] / lookups * 100, 2) if lookups > 0 else 0
+            }
+        
+        llm_cache = {}
+        for site, data in self.metrics["llm_cache"].items():
+            lookups = data["hits"] + data["misses"]
+            llm_cache[site] = {
+                **data,
+                "hit_rate": round(data["hits"] / lookups * 100, 2) if lookups > 0 else 0
+            }
+        
         # Calculate average durations for API calls
         api_metrics = {}
         for endpoint, data in self.metrics["api_calls"].items():
             avg_duration = data["total_duration"] / data["count"] if data["count"] > 0 else 0
             error_rate = data["errors"] / data["count"] * 100 if data["count"] > 0 else 0
             
+            histogram = self.latency[endpoint]
+            
             api_metrics[endpoint] = {
                 "calls": data["count"],
                 "avg_duration": round(avg_duration, 3),
+                "p50_duration": round(histogram.percentile(50), 3),
+                "p95_duration": round(histogram.percentile(95), 3),
+                "p99_duration": round(histogram.percentile(99), 3),
                 "error_rate": round(error_rate, 2)
             }
         
@@ -348,16 +467,275 @@ class MetricsCollector:
             "cache": {
                 "hits": self.metrics["cache_hits"],
                 "misses": self.metrics["cache_misses"],
-                "hit_rate": round(cache_hit_rate, 2)
+                "hit_rate": round(cache_hit_rate, 2),
+                "tiers": cache_tiers
             },
+            "llm_cache": llm_cache,
             "errors": self.metrics["errors_by_type"]
         }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable copy of the raw counters, for cross-worker merging
+        """
+        return {
+            "api_calls": {key: dict(data) for key, data in self.metrics["api_calls"].items()},
+            "latency": {key: histogram.to_dict() for key, histogram in self.latency.items()},
+            "cache_hits": self.metrics["cache_hits"],
+            "cache_misses": self.metrics["cache_misses"],
+            "cache_tiers": {tier: dict(data) for tier, data in self.metrics["cache_tiers"].items()},
+            "llm_cache": {site: dict(data) for site, data in self.metrics["llm_cache"].items()},
+            "errors_by_type": dict(self.metrics["errors_by_type"])
+        }
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Sum MetricsCollector snapshots from several workers
+    """
+    merged = {
+        "api_calls": {},
+        "latency": {},
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "cache_tiers": {},
+        "llm_cache": {},
+        "errors_by_type": {}
+    }
+    
+    for snapshot in snapshots:
+        for key, data in snapshot["api_calls"].items():
+            total = merged["api_calls"].setdefault(key, {"count": 0, "total_duration": 0.0, "errors": 0})
+            for field in total:
+                total[field] += data[field]
+        
+        for key, data in snapshot["latency"].items():
+            histogram = merged["latency"].setdefault(key, LatencyHistogram())
+            histogram.merge(LatencyHistogram.from_dict(data))
+        
+        merged["cache_hits"] += snapshot["cache_hits"]
+        merged["cache_misses"] += snapshot["cache_misses"]
+        
+        for tier, data in snapshot["cache_tiers"].items():
+            total = merged["cache_tiers"].setdefault(tier, {"hits": 0, "misses": 0})
+            total["hits"] += data["hits"]
+            total["misses"] += data["misses"]
+        
+        # Absent in snapshots published before LLM caching existed
+        for site, data in snapshot.get("llm_cache", {}).items():
+            total = merged["llm_cache"].setdefault(site, {"hits": 0, "misses": 0, "tokens_saved": 0})
+            for field in total:
+                total[field] += data[field]
+        
+        for error_type, count in snapshot["errors_by_type"].items():
+            merged["errors_by_type"][error_type] = merged["errors_by_type"].get(error_type, 0) + count
+    
+    merged["latency"] = {key: histogram.to_dict() for key, histogram in merged["latency"].items()}
+    return merged
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def render_prometheus(snapshot: Dict[str, Any]) -> str:
+    """
+    Render a (possibly merged) snapshot in the Prometheus text format
+    """
+    lines = [
+        "# HELP noor_http_request_duration_seconds HTTP request latency by route template",
+        "# TYPE noor_http_request_duration_seconds histogram"
+    ]
+    
+    bounds = [str(bound) for bound in LatencyHistogram.BUCKETS] + ["+Inf"]
+    for key, data in sorted(snapshot["latency"].items()):
+        method, _, route = key.partition(":")
+        labels = f'method="{_label(method)}",route="{_label(route)}"'
+        
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, data["counts"]):
+            cumulative += bucket_count
+            lines.append(f'noor_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"noor_http_request_duration_seconds_sum{{{labels}}} {data['sum']}")
+        lines.append(f"noor_http_request_duration_seconds_count{{{labels}}} {data['count']}")
+    
+    lines.append("# HELP noor_http_request_errors_total HTTP responses with status >= 400")
+    lines.append("# TYPE noor_http_request_errors_total counter")
+    for key, data in sorted(snapshot["api_calls"].items()):
+        method, _, route = key.partition(":")
+        lines.append(
+            f'noor_http_request_errors_total{{method="{_label(method)}",route="{_label(route)}"}} {data["errors"]}'
+        )
+    
+    lines.append("# HELP noor_cache_requests_total Cache lookups by tier and result")
+    lines.append("# TYPE noor_cache_requests_total counter")
+    lines.append(f'noor_cache_requests_total{{tier="all",result="hit"}} {snapshot["cache_hits"]}')
+    lines.append(f'noor_cache_requests_total{{tier="all",result="miss"}} {snapshot["cache_misses"]}')
+    for tier, data in sorted(snapshot["cache_tiers"].items()):
+        lines.append(f'noor_cache_requests_total{{tier="{_label(tier)}",result="hit"}} {data["hits"]}')
+        lines.append(f'noor_cache_requests_total{{tier="{_label(tier)}",result="miss"}} {data["misses"]}')
+    
+    lines.append("# HELP noor_llm_cache_requests_total LLM response cache lookups by call site and result")
+    lines.append("# TYPE noor_llm_cache_requests_total counter")
+    lines.append("# HELP noor_llm_cache_tokens_saved_total Estimated LLM tokens avoided by cache hits")
+    lines.append("# TYPE noor_llm_cache_tokens_saved_total counter")
+    for site, data in sorted(snapshot.get("llm_cache", {}).items()):
+        lines.append(f'noor_llm_cache_requests_total{{site="{_label(site)}",result="hit"}} {data["hits"]}')
+        lines.append(f'noor_llm_cache_requests_total{{site="{_label(site)}",result="miss"}} {data["misses"]}')
+        lines.append(f'noor_llm_cache_tokens_saved_total{{site="{_label(site)}"}} {data["tokens_saved"]}')
+    
+    lines.append("# HELP noor_errors_total Application errors by type")
+    lines.append("# TYPE noor_errors_total counter")
+    for error_type, count in sorted(snapshot["errors_by_type"].items()):
+        lines.append(f'noor_errors_total{{type="{_label(error_type)}"}} {count}')
+    
+    return "\n".join(lines) + "\n"
 
 
 # Global metrics collector instance
 metrics_collector = MetricsCollector()
 
 
+class WorkerMetricsAggregator:
+    """
+    Share MetricsCollector snapshots between the workers of a pod via Redis
+    
+    Each pod has its own hash (noor:metrics:workers:<hostname>) so its
+    /metrics covers only its own workers, and Prometheus summing across pod
+    targets counts every request once. Each worker publishes its snapshot
+    to one field every `interval` seconds; collect() merges every live
+    worker of the pod (plus this worker's current snapshot). Workers that
+    stop or go stale are folded into the pod's retired totals rather than
+    dropped, so the pod's counters never go backwards. Without Redis it
+    reports this worker only.
+    """
+    
+    RETIRED_FIELD = "retired"
+    
+    def __init__(
+        self,
+        collector: MetricsCollector,
+        key_prefix: str = "noor:metrics:workers",
+        interval: float = 10.0,
+        pod_id: Optional[str] = None
+    ):
+        self.collector = collector
+        self.pod_id = pod_id or socket.gethostname()
+        self.key = f"{key_prefix}:{self.pod_id}"
+        self.interval = interval
+        self.worker_id = f"{self.pod_id}:{os.getpid()}"
+        self.redis = None
+        self.publish_task: Optional[asyncio.Task] = None
+    
+    async def start(self, redis_client):
+        """
+        Start publishing this worker's snapshot
+        """
+        self.redis = redis_client
+        self.publish_task = asyncio.get_running_loop().create_task(self._publish_loop())
+    
+    async def stop(self):
+        """
+        Stop publishing and fold this worker into the pod's retired totals
+        """
+        if self.publish_task is not None:
+            self.publish_task.cancel()
+            try:
+                await self.publish_task
+            except asyncio.CancelledError:
+                pass
+            self.publish_task = None
+        
+        if self.redis is not None:
+            try:
+                await self.publish()
+                await self._retire([self.worker_id])
+            except Exception as e:
+                logger.error(f"Failed to retire worker metrics: {str(e)}")
+            self.redis = None
+    
+    async def publish(self):
+        payload = json.dumps({"ts": time.time(), "snapshot": self.collector.snapshot()})
+        await self.redis.hset(self.key, self.worker_id, payload)
+        await self.redis.expire(self.key, int(self.interval * 6))
+    
+    async def collect(self) -> Dict[str, Any]:
+        """
+        Merged snapshot for every live and retired worker of this pod
+        """
+        snapshots = [self.collector.snapshot()]
+        
+        if self.redis is None:
+            return snapshots[0]
+        
+        try:
+            entries = await self.redis.hgetall(self.key)
+        except Exception as e:
+            logger.error(f"Failed to read worker metrics: {str(e)}")
+            return snapshots[0]
+        
+        cutoff = time.time() - self.interval * 3
+        stale = []
+        for field, payload in entries.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            if field == self.RETIRED_FIELD:
+                snapshots.append(json.loads(payload))
+                continue
+            if field == self.worker_id or not field.startswith(f"{self.pod_id}:"):
+                continue
+            
+            entry = json.loads(payload)
+            if entry["ts"] < cutoff:
+                stale.append(field)
+            snapshots.append(entry["snapshot"])
+        
+        if stale:
+            await self._retire(stale)
+        
+        return merge_snapshots(snapshots)
+    
+    async def _retire(self, worker_ids: List[str]):
+        """
+        Move workers' last published snapshots into the retired field
+        
+        WATCH makes the read-merge-write atomic, so two workers retiring
+        the same stale worker count it once.
+        """
+        while True:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.key)
+                    retired, *payloads = await pipe.hmget(self.key, [self.RETIRED_FIELD, *worker_ids])
+                    present = [(worker_id, payload) for worker_id, payload in zip(worker_ids, payloads) if payload]
+                    if not present:
+                        return
+                    
+                    snapshots = [json.loads(payload)["snapshot"] for _, payload in present]
+                    if retired:
+                        snapshots.append(json.loads(retired))
+                    
+                    pipe.multi()
+                    pipe.hset(self.key, self.RETIRED_FIELD, json.dumps(merge_snapshots(snapshots)))
+                    pipe.hdel(self.key, *(worker_id for worker_id, _ in present))
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+    
+    async def _publish_loop(self):
+        while True:
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.error(f"Failed to publish worker metrics: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+
+# Global worker aggregator; reports this worker only until started
+worker_metrics = WorkerMetricsAggregator(metrics_collector)
+
+
 # Sentry Integration (Optional)
 def init_sentry():
     """
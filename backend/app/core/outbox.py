@@ -0,0 +1,114 @@
+"""
+NOOR Platform - Transactional Outbox
+Record side effects with the request's transaction, relay them to the job queue
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.job_queue import JobQueue
+from app.db.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# (job id, topic, payload)
+OutboxJob = Tuple[str, str, Dict[str, Any]]
+Publisher = Callable[[List[OutboxJob]], Awaitable[Any]]
+
+
+def enqueue_outbox(session: AsyncSession, topic: str, payload: Dict[str, Any]) -> OutboxMessage:
+    """
+    Add a side effect to the caller's transaction
+    
+    Nothing is sent here; the job exists once the session commits and is
+    picked up by the worker's OutboxRelay, so the request does not wait on
+    email, SMS or log writes.
+    """
+    message = OutboxMessage(id=uuid.uuid4(), topic=topic, payload=payload)
+    session.add(message)
+    return message
+
+
+class SQLOutboxStore:
+    """
+    Outbox rows in PostgreSQL
+    
+    relay_batch() locks the oldest rows with FOR UPDATE SKIP LOCKED, so
+    several relays can run side by side, publishes them and deletes them in
+    the same transaction. A failed publish rolls back and leaves the rows
+    for the next pass; a crash after publishing but before commit publishes
+    them again, with the same job ids.
+    """
+    
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None):
+        if session_factory is None:
+            from app.db.postgres import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+    
+    async def relay_batch(self, limit: int, publish: Publisher) -> int:
+        async with self.session_factory() as session:
+            async with session.begin():
+                rows = (await session.execute(
+                    select(OutboxMessage.id, OutboxMessage.topic, OutboxMessage.payload)
+                    .order_by(OutboxMessage.created_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )).all()
+                if not rows:
+                    return 0
+                
+                await publish([(str(row.id), row.topic, row.payload) for row in rows])
+                await session.execute(
+                    delete(OutboxMessage).where(OutboxMessage.id.in_([row.id for row in rows]))
+                )
+        return len(rows)
+
+
+class OutboxRelay:
+    """
+    Moves committed outbox rows onto the job queue in batches
+    """
+    
+    def __init__(self, store, queue: JobQueue, batch_size: int = 500, idle_interval: float = 1.0):
+        self.store = store
+        self.queue = queue
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+    
+    async def _publish(self, jobs: List[OutboxJob]):
+        await self.queue.enqueue_many((topic, payload, job_id) for job_id, topic, payload in jobs)
+    
+    async def relay_once(self) -> int:
+        """
+        Relay up to batch_size rows
+        
+        Returns:
+            Number of rows relayed
+        """
+        return await self.store.relay_batch(self.batch_size, self._publish)
+    
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """
+        Relay until stop is set, sleeping only when the outbox is empty
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                relayed = await self.relay_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+                relayed = 0
+            
+            if relayed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.idle_interval)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,91 @@
+"""
+NOOR Platform - Incremental JSON Parsing
+Emits the fields of a streamed JSON object as soon as each one is complete
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+
+class PartialJSONParser:
+    """
+    Incremental parser for one top-level JSON object
+    
+    Feed it text chunks as they arrive; every top-level member whose value
+    has been fully received is returned once, in order. Only structural
+    characters are tracked (nesting depth, strings, escapes), so each
+    chunk is scanned once and members are decoded with json.loads when
+    they close. Text before the opening brace, such as a preamble the
+    model adds despite instructions, is ignored.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        self.fields: Dict[str, Any] = {}
+        self._member: List[str] = []
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of model output
+        
+        Returns:
+            (key, value) pairs for the members completed by this chunk
+        """
+        completed: List[Tuple[str, Any]] = []
+        
+        for char in chunk:
+            if self.done:
+                break
+            
+            if self.depth == 0:
+                if char == "{":
+                    self.depth = 1
+                continue
+            
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                self._member.append(char)
+                continue
+            
+            if self.depth == 1 and char in ",}":
+                completed.extend(self._close_member())
+                if char == "}":
+                    self.depth = 0
+                    self.done = True
+                continue
+            
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+            self._member.append(char)
+        
+        return completed
+    
+    def _close_member(self) -> List[Tuple[str, Any]]:
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return []
+        
+        try:
+            decoded = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON member in AI response: {str(e)}")
+        
+        self.fields.update(decoded)
+        return list(decoded.items())
+    
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The whole object once its closing brace has been seen"""
+        return self.fields if self.done else None
@@ -3,6 +3,7 @@ NOOR Platform - Database Models
 """
 
 from app.db.models.user import User
+from app.db.models.outbox import OutboxMessage
 from app.db.models.skills import Skill, UserSkill, SkillVerificationRequest
 from app.db.models.work_experience import (
     WorkExperience,
@@ -19,6 +20,7 @@ __all__ = [
     "WorkExperience",
     "WorkExperienceVerification",
     "CareerAnalytics",
-    "work_experience_skills"
+    "work_experience_skills",
+    "OutboxMessage"
 ]
 
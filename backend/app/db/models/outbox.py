@@ -0,0 +1,34 @@
+"""
+NOOR Platform - Transactional Outbox ORM Model
+"""
+
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from app.db.postgres import Base
+
+
+class OutboxMessage(Base):
+    """
+    Side effect waiting to be relayed to the job queue
+    
+    Rows are added in the same transaction as the change that caused them
+    (see app.core.outbox.enqueue_outbox), so a committed request always
+    has its notification or log job, and a rolled back one never does.
+    """
+    __tablename__ = "outbox_messages"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    topic = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_outbox_messages_created_at', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, topic='{self.topic}')>"
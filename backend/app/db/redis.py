@@ -13,12 +13,15 @@ logger = logging.getLogger(__name__)
 # Global Redis client
 redis_client: Optional[redis.Redis] = None
 
+# Binary-safe client for serialized cache payloads
+redis_binary_client: Optional[redis.Redis] = None
+
 
 async def init_redis():
     """
     Initialize Redis connection
     """
-    global redis_client
+    global redis_client, redis_binary_client
     
     try:
         redis_client = redis.from_url(
@@ -26,6 +29,10 @@ async def init_redis():
             encoding="utf-8",
             decode_responses=True
         )
+        redis_binary_client = redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=False
+        )
         
         # Test connection
         await redis_client.ping()
@@ -42,10 +49,20 @@ async def get_redis():
     return redis_client
 
 
+async def get_redis_binary():
+    """
+    Get Redis client instance that returns raw bytes
+    """
+    return redis_binary_client
+
+
 async def close_redis():
     """
     Close Redis connection
     """
+    if redis_binary_client:
+        await redis_binary_client.close()
+    
     if redis_client:
         await redis_client.close()
         logger.info("Redis connection closed")
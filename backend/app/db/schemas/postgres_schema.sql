@@ -127,6 +127,19 @@ CREATE TABLE user_assessments (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Eight-faculty assessment scores (bulk loaded with COPY; competency_id is NULL for faculty totals)
+CREATE TABLE assessment_scores (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    faculty VARCHAR(50) NOT NULL,
+    competency_id VARCHAR(50),
+    total_score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    percentage DOUBLE PRECISION NOT NULL,
+    rating VARCHAR(50) NOT NULL,
+    scored_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Health Records (SEHA/DHA/MOHAP Integration)
 CREATE TABLE health_records (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -305,6 +318,20 @@ CREATE TABLE job_applications (
     UNIQUE(job_posting_id, user_id)
 );
 
+-- ============================================================================
+-- PLATFORM: TRANSACTIONAL OUTBOX
+-- ============================================================================
+
+-- Side effects (notifications, agent task logs) written in the same
+-- transaction as the change that caused them; app.worker relays them to the
+-- Redis job queue and deletes them
+CREATE TABLE outbox_messages (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    topic VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================================
 -- INDEXES FOR PERFORMANCE
 -- ============================================================================
@@ -343,6 +370,13 @@ CREATE INDEX idx_job_postings_institution_id ON job_postings(institution_id);
 CREATE INDEX idx_job_postings_status ON job_postings(status);
 CREATE INDEX idx_job_postings_posted_date ON job_postings(posted_date);
 
+-- Assessment Scores
+CREATE INDEX idx_assessment_scores_user_id ON assessment_scores(user_id);
+CREATE INDEX idx_assessment_scores_faculty ON assessment_scores(faculty, competency_id);
+
+-- Outbox
+CREATE INDEX idx_outbox_messages_created_at ON outbox_messages(created_at);
+
 -- Job Applications
 CREATE INDEX idx_job_applications_job_posting_id ON job_applications(job_posting_id);
 CREATE INDEX idx_job_applications_user_id ON job_applications(user_id);
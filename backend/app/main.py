@@ -6,22 +6,28 @@ Version: 7.2
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 import logging
-import time
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.cache import cache_manager, two_tier_cache
+from app.core.monitoring import worker_metrics, render_prometheus
+from app.core.llm_gateway import llm_gateway
+from app.core.llm_cache import llm_response_cache
+from app.core.job_queue import job_queue
+from app.services.skill_demand_index import skill_demand_index
 from app.api.v1.router import api_router
 from app.db.postgres import init_postgres
 from app.db.mongodb import init_mongodb
-from app.db.redis import init_redis
+from app.db.redis import init_redis, get_redis, get_redis_binary
 from app.middleware import (
     RateLimitMiddleware,
     SecurityHeadersMiddleware,
-    CORSSecurityMiddleware
+    CORSSecurityMiddleware,
+    RequestTimingMiddleware
 )
 
 # Setup logging
@@ -42,12 +48,37 @@ async def lifespan(app: FastAPI):
     await init_mongodb()
     await init_redis()
     
+    # Reclaim expired cache entries in the background
+    cache_manager.start_sweeper()
+    
+    if settings.CACHE_BACKEND == "two_tier":
+        await two_tier_cache.start(await get_redis_binary())
+    
+    # Demand rollups are shared by all workers
+    skill_demand_index.use_redis(await get_redis())
+    skill_demand_index.lock_ttl = settings.SKILL_DEMAND_REBUILD_LOCK_SECONDS
+    
+    if settings.LLM_CACHE_BACKEND == "redis":
+        llm_response_cache.use_redis(await get_redis_binary())
+    
+    # Hand agent task logs and queued notifications to app.worker
+    if settings.JOB_QUEUE_ENABLED:
+        job_queue.use_redis(await get_redis())
+    
+    if settings.METRICS_AGGREGATE_WORKERS:
+        worker_metrics.interval = settings.METRICS_PUBLISH_INTERVAL_SECONDS
+        await worker_metrics.start(await get_redis())
+    
     logger.info("✅ NOOR Platform started successfully")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down NOOR Platform...")
+    await llm_gateway.close()
+    await worker_metrics.stop()
+    await two_tier_cache.stop()
+    await cache_manager.stop_sweeper()
     logger.info("✅ NOOR Platform shut down successfully")
 
 
@@ -82,33 +113,19 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.add_middleware(SecurityHeadersMiddleware)
 
 # Rate Limiting Middleware
-# 60 requests per minute, 1000 requests per hour
+# 60 requests per minute, 1000 requests per hour by default
 app.add_middleware(
     RateLimitMiddleware,
-    requests_per_minute=60,
-    requests_per_hour=1000
+    requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    requests_per_hour=settings.RATE_LIMIT_PER_HOUR,
+    backend=settings.RATE_LIMIT_BACKEND,
+    prefetch=settings.RATE_LIMIT_PREFETCH,
+    lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS
 )
 
 
-# Request Timing Middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time to response headers"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-
-# Request Logging Middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    logger.info(f"📥 {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"📤 {request.method} {request.url.path} - Status: {response.status_code}")
-    return response
+# Request Timing + Logging Middleware (outermost, so it times the whole stack)
+app.add_middleware(RequestTimingMiddleware)
 
 
 # ============================================================================
@@ -168,6 +185,16 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request latency histograms and counters in Prometheus text format"""
+    snapshot = await worker_metrics.collect()
+    return PlainTextResponse(
+        render_prometheus(snapshot),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/api/v1/status")
 async def api_status():
     """API status endpoint"""
@@ -2,14 +2,17 @@
 NOOR Platform - Middleware Package
 """
 
-from .rate_limiter import RateLimitMiddleware, TieredRateLimiter
+from .rate_limiter import RateLimitMiddleware, TieredRateLimiter, DistributedRateLimiter
 from .security_headers import SecurityHeadersMiddleware, CORSSecurityMiddleware, CSRFProtectionMiddleware
+from .timing import RequestTimingMiddleware
 
 __all__ = [
     "RateLimitMiddleware",
     "TieredRateLimiter",
+    "DistributedRateLimiter",
     "SecurityHeadersMiddleware",
     "CORSSecurityMiddleware",
-    "CSRFProtectionMiddleware"
+    "CSRFProtectionMiddleware",
+    "RequestTimingMiddleware"
 ]
 
@@ -0,0 +1,41 @@
+"""
+NOOR Platform - ASGI Middleware Helpers
+Shared plumbing for the pure-ASGI middlewares
+"""
+
+from typing import Iterable, List, Tuple
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+def encode_headers(headers: dict) -> RawHeaders:
+    """
+    Convert a header dict to the raw (name, value) pairs ASGI expects
+    """
+    return [
+        (name.lower().encode("latin-1"), str(value).encode("latin-1"))
+        for name, value in headers.items()
+    ]
+
+
+def set_headers(message: dict, headers: Iterable[Tuple[bytes, bytes]]):
+    """
+    Set headers on an http.response.start message, replacing any existing
+    values with the same names
+    """
+    headers = list(headers)
+    names = {name for name, _ in headers}
+    message["headers"] = [
+        (name, value) for name, value in message.get("headers", [])
+        if name.lower() not in names
+    ] + headers
+
+
+def get_header(scope: dict, name: bytes) -> str:
+    """
+    Read a request header from the ASGI scope without building a Request
+    """
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
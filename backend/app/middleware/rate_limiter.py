@@ -1,15 +1,23 @@
 """
 NOOR Platform - Rate Limiting Middleware
-Implements token bucket algorithm for API rate limiting
+Implements token bucket algorithm for API rate limiting, with an optional
+Redis-backed GCRA limiter shared by every worker
 """
 
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Dict, Tuple
+from collections import defaultdict, OrderedDict
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import logging
+import math
+import time
+
+from app.db.redis import get_redis
+from app.middleware.asgi import encode_headers, set_headers
+
+logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
@@ -56,8 +64,9 @@ class RateLimiter:
         Check if client has exceeded rate limits
         Returns: (is_allowed, rate_limit_info)
         """
-        now = datetime.now()
+        # Read first so a new client's default windows are already in the past
         minute_count, minute_reset, hour_count, hour_reset = self.clients[client_id]
+        now = datetime.now()
         
         # Reset minute counter if needed
         if now >= minute_reset:
@@ -97,6 +106,19 @@ class RateLimiter:
             "reset": int(minute_reset.timestamp())
         }
     
+    async def acquire(self, client_id: str) -> Tuple[bool, Dict[str, any]]:
+        """
+        Async entry point shared with DistributedRateLimiter
+        """
+        return self.check_rate_limit(client_id)
+    
+    def start_cleanup(self):
+        """
+        Start the periodic cleanup task on the running event loop
+        """
+        if self.cleanup_task is None or self.cleanup_task.done():
+            self.cleanup_task = asyncio.get_running_loop().create_task(self.cleanup_old_entries())
+    
     async def cleanup_old_entries(self):
         """
         Periodically cleanup old client entries to prevent memory leaks
@@ -115,40 +137,195 @@ class RateLimiter:
                 del self.clients[client_id]
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+# Generic cell rate algorithm over any number of (limit, period) windows.
+# KEYS: one theoretical-arrival-time key per window
+# ARGV: cost, then limit and period (ms) for each window
+# Returns {allowed, remaining, retry_after_ms, reset_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local new_tats = {}
+local remaining = -1
+local retry_after = 0
+
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[2 * i])
+    local period = tonumber(ARGV[2 * i + 1])
+    local interval = period / limit
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + cost * interval
+    local allow_at = new_tat - period
+    if allow_at > now then
+        retry_after = math.max(retry_after, allow_at - now)
+    else
+        new_tats[i] = new_tat
+        local rem = math.floor((now + period - new_tat) / interval)
+        if remaining < 0 or rem < remaining then
+            remaining = rem
+        end
+    end
+end
+
+if retry_after > 0 then
+    return {0, 0, math.ceil(retry_after), math.ceil(now + retry_after)}
+end
+
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], tostring(new_tats[i]), 'PX', math.ceil(new_tats[i] - now))
+end
+
+return {1, remaining, 0, math.ceil(new_tats[1])}
+"""
+
+
+class DistributedRateLimiter(RateLimiter):
     """
-    FastAPI middleware for rate limiting
+    Redis-backed rate limiter enforcing limits across all workers
+    
+    Uses GCRA (a smoothed sliding window) evaluated in a single Lua
+    round-trip per check. To keep the common case off the network, a
+    worker reserves `prefetch` requests in one call and serves them from a
+    local lease for up to `lease_seconds`. Reserved requests are already
+    counted in Redis, so leases can only under-admit, never over-admit.
+    
+    If Redis is unavailable it falls back to the process-local limiter.
     """
     
-    def __init__(self, app, requests_per_minute: int = 60, requests_per_hour: int = 1000):
-        super().__init__(app)
+    def __init__(
+        self,
+        redis_client,
+        requests_per_minute: int = 60,
+        requests_per_hour: int = 1000,
+        prefetch: int = 5,
+        lease_seconds: float = 1.0,
+        key_prefix: str = "noor:ratelimit:",
+        max_leases: int = 10000
+    ):
+        super().__init__(requests_per_minute, requests_per_hour)
+        self.redis = redis_client
+        self.prefetch = max(1, prefetch)
+        self.lease_seconds = lease_seconds
+        self.key_prefix = key_prefix
+        self.max_leases = max_leases
+        self.windows: List[Tuple[int, int]] = [
+            (requests_per_minute, 60 * 1000),
+            (requests_per_hour, 3600 * 1000)
+        ]
+        self._script = redis_client.register_script(GCRA_SCRIPT)
+        
+        # Store: {client_id: [tokens_left, lease_expires_at, rate_info]}
+        self.leases: "OrderedDict[str, list]" = OrderedDict()
+    
+    async def acquire(self, client_id: str) -> Tuple[bool, Dict[str, any]]:
+        """
+        Check and consume one request for client_id
+        Returns: (is_allowed, rate_limit_info)
+        """
+        now = time.monotonic()
+        lease = self.leases.get(client_id)
+        
+        if lease is not None and lease[0] > 0 and lease[1] > now:
+            lease[0] -= 1
+            info = dict(lease[2])
+            info["remaining"] = info["remaining"] + lease[0]
+            return True, info
+        
+        try:
+            allowed, info = await self._reserve(client_id, self.prefetch)
+            if allowed:
+                self._store_lease(client_id, self.prefetch - 1, info, now)
+            elif self.prefetch > 1:
+                # Not enough headroom for a full lease; try a single request
+                allowed, info = await self._reserve(client_id, 1)
+            return allowed, info
+        except Exception as e:
+            logger.warning(f"Distributed rate limit check failed, using local limiter: {e}")
+            return self.check_rate_limit(client_id)
+    
+    async def _reserve(self, client_id: str, cost: int) -> Tuple[bool, Dict[str, any]]:
+        keys = [f"{self.key_prefix}{client_id}:{period}" for _, period in self.windows]
+        args = [cost]
+        for limit, period in self.windows:
+            args.extend([limit, period])
+        
+        allowed, remaining, retry_after_ms, reset_ms = await self._script(keys=keys, args=args)
+        
+        info = {
+            "limit": self.requests_per_minute,
+            "remaining": int(remaining),
+            "reset": int(reset_ms) // 1000
+        }
+        if not allowed:
+            info["retry_after"] = max(1, math.ceil(int(retry_after_ms) / 1000))
+        return bool(allowed), info
+    
+    def _store_lease(self, client_id: str, tokens: int, info: Dict[str, any], now: float):
+        self.leases.pop(client_id, None)
+        if tokens <= 0:
+            return
+        
+        self.leases[client_id] = [tokens, now + self.lease_seconds, info]
+        
+        # Oldest leases expire first, so trimming from the front is safe
+        while len(self.leases) > self.max_leases:
+            self.leases.popitem(last=False)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware for rate limiting
+    """
+    
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        requests_per_hour: int = 1000,
+        backend: str = "memory",
+        prefetch: int = 5,
+        lease_seconds: float = 1.0
+    ):
+        self.app = app
         self.limiter = RateLimiter(requests_per_minute, requests_per_hour)
         
+        # "redis" shares limits across workers once Redis is connected
+        self.backend = backend
+        self.prefetch = prefetch
+        self.lease_seconds = lease_seconds
+        self.distributed: Optional[DistributedRateLimiter] = None
+        
         # Paths to exclude from rate limiting
-        self.excluded_paths = [
+        self.excluded_paths = {
             "/api/v1/health",
+            "/metrics",
             "/docs",
             "/redoc",
             "/openapi.json"
-        ]
+        }
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope, receive, send):
         """
         Process request and apply rate limiting
         """
-        # Skip rate limiting for excluded paths
-        if request.url.path in self.excluded_paths:
-            return await call_next(request)
+        # Skip rate limiting for excluded paths and non-HTTP traffic
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
         
         # Get client identifier
-        client_id = self.limiter.get_client_id(request)
+        client_id = self.limiter.get_client_id(Request(scope))
         
         # Check rate limit
-        is_allowed, rate_info = self.limiter.check_rate_limit(client_id)
+        limiter = await self._get_limiter()
+        is_allowed, rate_info = await limiter.acquire(client_id)
         
         if not is_allowed:
             # Rate limit exceeded
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "Rate limit exceeded",
@@ -164,16 +341,41 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "Retry-After": str(rate_info["retry_after"])
                 }
             )
+            await response(scope, receive, send)
+            return
+        
+        # Add rate limit headers to response
+        rate_headers = encode_headers({
+            "X-RateLimit-Limit": rate_info["limit"],
+            "X-RateLimit-Remaining": rate_info["remaining"],
+            "X-RateLimit-Reset": rate_info["reset"]
+        })
+        
+        async def send_with_rate_headers(message):
+            if message["type"] == "http.response.start":
+                set_headers(message, rate_headers)
+            await send(message)
         
         # Process request
-        response = await call_next(request)
+        await self.app(scope, receive, send_with_rate_headers)
+    
+    async def _get_limiter(self) -> RateLimiter:
+        if self.backend == "redis" and self.distributed is None:
+            redis_client = await get_redis()
+            if redis_client is not None:
+                self.distributed = DistributedRateLimiter(
+                    redis_client,
+                    self.limiter.requests_per_minute,
+                    self.limiter.requests_per_hour,
+                    prefetch=self.prefetch,
+                    lease_seconds=self.lease_seconds
+                )
         
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(rate_info["limit"])
-        response.headers["X-RateLimit-Remaining"] = str(rate_info["remaining"])
-        response.headers["X-RateLimit-Reset"] = str(rate_info["reset"])
+        if self.distributed is not None:
+            return self.distributed
         
-        return response
+        self.limiter.start_cleanup()
+        return self.limiter
 
 
 # Different rate limits for different tiers
@@ -190,11 +392,24 @@ class TieredRateLimiter:
         "admin": {"minute": 1000, "hour": 100000}
     }
     
-    def __init__(self):
-        self.limiters = {
-            tier: RateLimiter(limits["minute"], limits["hour"])
-            for tier, limits in self.TIERS.items()
-        }
+    def __init__(self, redis_client=None, prefetch: int = 5, lease_seconds: float = 1.0):
+        if redis_client is not None:
+            self.limiters = {
+                tier: DistributedRateLimiter(
+                    redis_client,
+                    limits["minute"],
+                    limits["hour"],
+                    prefetch=prefetch,
+                    lease_seconds=lease_seconds,
+                    key_prefix=f"noor:ratelimit:{tier}:"
+                )
+                for tier, limits in self.TIERS.items()
+            }
+        else:
+            self.limiters = {
+                tier: RateLimiter(limits["minute"], limits["hour"])
+                for tier, limits in self.TIERS.items()
+            }
     
     def get_user_tier(self, request: Request) -> str:
         """
@@ -222,4 +437,13 @@ class TieredRateLimiter:
         client_id = limiter.get_client_id(request)
         
         return limiter.check_rate_limit(client_id)
-
+    
+    async def acquire(self, request: Request) -> Tuple[bool, Dict[str, any]]:
+        """
+        Check rate limit based on user tier, using Redis when configured
+        """
+        tier = self.get_user_tier(request)
+        limiter = self.limiters[tier]
+        client_id = limiter.get_client_id(request)
+        
+        return await limiter.acquire(client_id)
@@ -7,14 +7,16 @@ from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
+from app.middleware.asgi import encode_headers, get_header, set_headers
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+
+class SecurityHeadersMiddleware:
     """
-    Middleware to add security headers to all responses
+    Pure ASGI middleware to add security headers to all responses
     """
     
     def __init__(self, app, config: dict = None):
-        super().__init__(app)
+        self.app = app
         self.config = config or {}
         
         # Default security headers
@@ -66,39 +68,49 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         # Merge with custom config
         self.headers = {**self.default_headers, **self.config}
+        
+        # Pre-encoded once; applied to every response
+        self.raw_headers = encode_headers(self.headers)
+        self.raw_headers_with_hsts = self.raw_headers + encode_headers({
+            "Strict-Transport-Security": "max-age=31536000; includeSubDomains; preload"
+        })
+        self.production = self._is_production()
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope, receive, send):
         """
         Add security headers to response
         """
-        response = await call_next(request)
-        
-        # Add security headers
-        for header, value in self.headers.items():
-            response.headers[header] = value
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
         # Add HSTS only in production with HTTPS
-        if self._is_production() and self._is_https(request):
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains; preload"
-            )
+        if self.production and self._is_https(scope):
+            headers = self.raw_headers_with_hsts
+        else:
+            headers = self.raw_headers
         
-        return response
+        async def send_with_security_headers(message):
+            if message["type"] == "http.response.start":
+                set_headers(message, headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_security_headers)
     
     def _is_production(self) -> bool:
         """Check if running in production"""
         import os
         return os.getenv("APP_ENV", "development") == "production"
     
-    def _is_https(self, request: Request) -> bool:
+    def _is_https(self, scope) -> bool:
         """Check if request is over HTTPS"""
         # Check X-Forwarded-Proto header (set by reverse proxies)
-        proto = request.headers.get("X-Forwarded-Proto", "")
+        proto = get_header(scope, b"x-forwarded-proto")
         if proto.lower() == "https":
             return True
         
         # Check request scheme
-        return request.url.scheme == "https"
+        return scope.get("scheme") == "https"
 
 
 class CORSSecurityMiddleware(BaseHTTPMiddleware):
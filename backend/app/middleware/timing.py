@@ -0,0 +1,62 @@
+"""
+NOOR Platform - Request Timing Middleware
+Adds processing time to response headers, logs every request and records
+per-route latency metrics
+"""
+
+import logging
+import time
+
+from app.core.monitoring import metrics_collector, performance_monitor
+from app.middleware.asgi import set_headers
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Pure ASGI middleware that times and logs each request in one pass
+    
+    X-Process-Time covers everything up to the start of the response,
+    matching what an http middleware measures around call_next(). The
+    recorded latency covers the full response, keyed by route template.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+        
+        logger.info(f"📥 {method} {path}")
+        
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                set_headers(message, [(b"x-process-time", str(process_time).encode())])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - start_time
+            route = self._route_template(scope)
+            metrics_collector.record_api_call(route, method, duration, status_code)
+            performance_monitor.record_request(duration, status_code, route)
+            logger.info(f"📤 {method} {path} - Status: {status_code}")
+    
+    @staticmethod
+    def _route_template(scope) -> str:
+        # Set by the router once a route matches; raw paths would make the
+        # number of metric series unbounded
+        route = scope.get("route")
+        return getattr(route, "path", None) or "<unmatched>"
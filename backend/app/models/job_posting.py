@@ -0,0 +1,33 @@
+"""
+NOOR Platform - Job Posting Pydantic Models
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from enum import Enum
+
+
+class JobPostingStatus(str, Enum):
+    """Job posting statuses (job_postings.valid_status)"""
+    DRAFT = "draft"
+    ACTIVE = "active"
+    CLOSED = "closed"
+    FILLED = "filled"
+
+
+class JobPostingCreate(BaseModel):
+    """Create job posting request"""
+    institution_id: str = Field(..., description="Posting institution")
+    title: str = Field(..., min_length=2, max_length=255)
+    description: str = Field(..., min_length=1)
+    industry: Optional[str] = Field(None, max_length=100)
+    location: Optional[str] = Field(None, max_length=255)
+    employment_type: Optional[str] = Field(None, max_length=50)
+    required_skills: List[str] = Field(default_factory=list)
+    preferred_skills: List[str] = Field(default_factory=list)
+    status: JobPostingStatus = JobPostingStatus.ACTIVE
+
+
+class JobPostingClose(BaseModel):
+    """Close job posting request"""
+    status: JobPostingStatus = Field(JobPostingStatus.CLOSED, description="closed or filled")
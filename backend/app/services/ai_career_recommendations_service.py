@@ -3,7 +3,7 @@ NOOR Platform - AI-Powered Career Recommendations Service
 Uses Claude AI for personalized career guidance and recommendations
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional
 import logging
 import json
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -49,6 +49,57 @@ class AICareerRecommendationsService:
         # Generate AI-powered recommendations
         return await self._ai_powered_recommendations(user_profile, work_history, skills)
     
+    async def stream_career_recommendations(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate career recommendations, streaming each section as it is
+        generated
+        
+        User data is loaded before returning, so the stream never touches
+        the request's DB session. The stream yields {"event": "field",
+        "key", "value"} per top-level recommendations field, then
+        {"event": "result", "data"} with the same payload
+        generate_career_recommendations() returns. If the AI call fails
+        part-way, the result is the fallback payload.
+        """
+        user_profile = await self._get_user_profile(user_id)
+        work_history = await self._get_work_history(user_id)
+        skills = await self._get_user_skills(user_id)
+        return self._stream_recommendations(user_profile, work_history, skills)
+    
+    async def _stream_recommendations(
+        self,
+        user_profile: Dict[str, Any],
+        work_history: List[Dict[str, Any]],
+        skills: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        if not self.ai_client.is_available():
+            yield {"event": "result", "data": self._fallback_recommendations(user_profile, work_history, skills)}
+            return
+        
+        recommendations = {}
+        try:
+            async for key, value in self.ai_client.stream_structured_output_async(
+                **self._recommendations_request(user_profile, work_history, skills)
+            ):
+                recommendations[key] = value
+                yield {"event": "field", "key": key, "value": value}
+        except Exception as e:
+            logger.error(f"AI recommendations stream failed: {e}")
+            yield {"event": "result", "data": self._fallback_recommendations(user_profile, work_history, skills)}
+            return
+        
+        logger.info(f"Career recommendations streamed for user {user_profile.get('user_id')}")
+        
+        yield {
+            "event": "result",
+            "data": {
+                "success": True,
+                "generated_at": datetime.now().isoformat(),
+                "recommendations": recommendations,
+                "generated_by": "ai"
+            }
+        }
+    
     async def _get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Fetch user profile"""
         result = await self.db.execute(
@@ -112,14 +163,14 @@ class AICareerRecommendationsService:
             for us in user_skills
         ]
     
-    async def _ai_powered_recommendations(
+    def _recommendations_request(
         self,
         user_profile: Dict[str, Any],
         work_history: List[Dict[str, Any]],
         skills: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
-        Generate AI-powered career recommendations
+        Prompt, system prompt and output schema for career recommendations
         """
         system_prompt = """You are an expert career advisor for the NOOR Platform in the UAE.
 
@@ -191,11 +242,24 @@ Generate detailed, actionable career recommendations."""
             "warnings": ["list of potential challenges"]
         }
         
+        return {
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "output_schema": output_schema
+        }
+    
+    async def _ai_powered_recommendations(
+        self,
+        user_profile: Dict[str, Any],
+        work_history: List[Dict[str, Any]],
+        skills: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Generate AI-powered career recommendations
+        """
         try:
             recommendations = await self.ai_client.generate_structured_output_async(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                output_schema=output_schema
+                **self._recommendations_request(user_profile, work_history, skills)
             )
             
             logger.info(f"Career recommendations generated for user {user_profile.get('user_id')}")
@@ -312,6 +376,89 @@ Generate detailed, actionable career recommendations."""
                 "learning_path": "AI service not available"
             }
         
+        try:
+            learning_path = await self.ai_client.generate_completion_async(
+                **self._learning_path_request(target_role, skills)
+            )
+            
+            return {
+                "target_role": target_role,
+                "current_skills_count": len(skills),
+                "learning_path": learning_path,
+                "generated_at": datetime.now().isoformat(),
+                "generated_by": "ai"
+            }
+            
+        except Exception as e:
+            logger.error(f"Learning path generation failed: {e}")
+            return {
+                "target_role": target_role,
+                "learning_path": "Unable to generate learning path at this time"
+            }
+    
+    async def stream_learning_path(
+        self,
+        user_id: str,
+        target_role: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a learning path, streaming the text as it is generated
+        
+        Skills are loaded before returning. The stream yields
+        {"event": "delta", "text"} chunks, then {"event": "result", "data"}
+        with the same payload generate_learning_path() returns.
+        """
+        skills = await self._get_user_skills(user_id)
+        return self._stream_learning_path(target_role, skills)
+    
+    async def _stream_learning_path(
+        self,
+        target_role: str,
+        skills: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        if not self.ai_client.is_available():
+            yield {
+                "event": "result",
+                "data": {
+                    "target_role": target_role,
+                    "learning_path": "AI service not available"
+                }
+            }
+            return
+        
+        chunks = []
+        try:
+            async for text in self.ai_client.stream_completion_async(
+                **self._learning_path_request(target_role, skills)
+            ):
+                chunks.append(text)
+                yield {"event": "delta", "text": text}
+        except Exception as e:
+            logger.error(f"Learning path stream failed: {e}")
+            yield {
+                "event": "result",
+                "data": {
+                    "target_role": target_role,
+                    "learning_path": "Unable to generate learning path at this time"
+                }
+            }
+            return
+        
+        yield {
+            "event": "result",
+            "data": {
+                "target_role": target_role,
+                "current_skills_count": len(skills),
+                "learning_path": "".join(chunks),
+                "generated_at": datetime.now().isoformat(),
+                "generated_by": "ai"
+            }
+        }
+    
+    def _learning_path_request(self, target_role: str, skills: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Prompt, system prompt and temperature for a learning path
+        """
         system_prompt = """You are a learning and development advisor for the NOOR Platform.
 
 Create a detailed learning path to help the user transition to their target role.
@@ -332,27 +479,11 @@ Current skills:
 
 Provide structured learning plan."""
         
-        try:
-            learning_path = await self.ai_client.generate_completion_async(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.6
-            )
-            
-            return {
-                "target_role": target_role,
-                "current_skills_count": len(skills),
-                "learning_path": learning_path,
-                "generated_at": datetime.now().isoformat(),
-                "generated_by": "ai"
-            }
-            
-        except Exception as e:
-            logger.error(f"Learning path generation failed: {e}")
-            return {
-                "target_role": target_role,
-                "learning_path": "Unable to generate learning path at this time"
-            }
+        return {
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "temperature": 0.6
+        }
     
     async def analyze_career_trajectory(
         self,
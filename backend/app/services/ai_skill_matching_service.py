@@ -4,6 +4,7 @@ Uses Claude AI for intelligent skill matching and job recommendations
 """
 
 from typing import List, Dict, Any, Optional
+import asyncio
 import logging
 import json
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,6 +13,7 @@ from sqlalchemy import select
 from app.core.ai_client import get_ai_client
 from app.db.models import Skill, UserSkill, User
 from app.models.skills import ProficiencyLevel
+from app.services.batch_job_matcher import BatchJobMatcher, recommendation_for_score
 
 logger = logging.getLogger(__name__)
 
@@ -137,7 +139,10 @@ Provide a comprehensive matching analysis."""
             analysis = await self.ai_client.generate_structured_output_async(
                 prompt=prompt,
                 system_prompt=system_prompt,
-                output_schema=output_schema
+                output_schema=output_schema,
+                # Same skills against the same job give the same analysis
+                cache_ttl=24 * 3600,
+                cache_site="skill_matching"
             )
             
             logger.info(f"AI matching completed: {analysis['match_score']:.2f} match score")
@@ -186,21 +191,11 @@ Provide a comprehensive matching analysis."""
         # Weighted average (70% required, 30% optional)
         match_score = (required_score * 0.7) + (optional_score * 0.3)
         
-        # Recommendation
-        if match_score >= 0.8:
-            recommendation = "hire"
-        elif match_score >= 0.6:
-            recommendation = "interview"
-        elif match_score >= 0.4:
-            recommendation = "consider"
-        else:
-            recommendation = "reject"
-        
         return {
             "match_score": round(match_score, 2),
             "matched_skills": required_matches + optional_matches,
             "total_required_skills": len(required_skills),
-            "recommendation": recommendation,
+            "recommendation": recommendation_for_score(match_score),
             "strengths": [skill["skill_name"] for skill in user_skills[:5]],
             "gaps": [req for req in required_skills if req.lower() not in user_skill_names],
             "development_suggestions": ["Develop missing required skills"],
@@ -216,6 +211,10 @@ Provide a comprehensive matching analysis."""
         """
         Recommend best matching jobs for a user
         
+        The user's skills are fetched once and every job is scored in one
+        vectorized rule-based pass. When AI is available only the top_n
+        shortlist is sent to Claude for a detailed analysis.
+        
         Args:
             user_id: User ID
             available_jobs: List of available jobs with requirements
@@ -224,28 +223,57 @@ Provide a comprehensive matching analysis."""
         Returns:
             List of job recommendations with match scores
         """
-        recommendations = []
+        user_skills = await self._get_user_skills(user_id)
         
-        for job in available_jobs:
-            match_result = await self.match_user_to_job(
-                user_id=user_id,
-                job_requirements=job.get("requirements", {})
-            )
-            
+        if not user_skills:
+            return [
+                {
+                    "job_id": job.get("job_id"),
+                    "job_title": job.get("title"),
+                    "company": job.get("company"),
+                    "match_score": 0.0,
+                    "recommendation": "No skills found for user",
+                    "matched_skills": 0,
+                    "total_required_skills": len(job.get("requirements", {}).get("required_skills", []))
+                }
+                for job in available_jobs[:top_n]
+            ]
+        
+        matcher = BatchJobMatcher([job.get("requirements", {}) for job in available_jobs])
+        shortlist = matcher.top_k([skill["skill_name"] for skill in user_skills], top_n)
+        
+        if self.ai_client.is_available():
+            # Narrative analysis for the shortlist only, run concurrently
+            analyses = await asyncio.gather(*[
+                self._ai_powered_matching(
+                    user_skills, available_jobs[match["job_index"]].get("requirements", {})
+                )
+                for match in shortlist
+            ])
+            for match, analysis in zip(shortlist, analyses):
+                match.update({
+                    field: analysis[field]
+                    for field in ("match_score", "recommendation", "matched_skills", "total_required_skills")
+                    if field in analysis
+                })
+        
+        recommendations = []
+        for match in shortlist:
+            job = available_jobs[match["job_index"]]
             recommendations.append({
                 "job_id": job.get("job_id"),
                 "job_title": job.get("title"),
                 "company": job.get("company"),
-                "match_score": match_result["match_score"],
-                "recommendation": match_result["recommendation"],
-                "matched_skills": match_result["matched_skills"],
-                "total_required_skills": match_result["total_required_skills"]
+                "match_score": match["match_score"],
+                "recommendation": match["recommendation"],
+                "matched_skills": match["matched_skills"],
+                "total_required_skills": match["total_required_skills"]
             })
         
         # Sort by match score
         recommendations.sort(key=lambda x: x["match_score"], reverse=True)
         
-        return recommendations[:top_n]
+        return recommendations
     
     async def suggest_skill_improvements(
         self,
@@ -3,7 +3,7 @@ NOOR Platform - AI Work Experience Insights Service
 Uses Claude AI to generate insights from work experience data
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional
 import logging
 import json
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -51,6 +51,52 @@ class AIWorkExperienceInsightsService:
         
         return await self._ai_powered_summary(work_history)
     
+    async def stream_experience_summary(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate an experience summary, streaming each section as it is
+        generated
+        
+        Work history is loaded before returning, so the stream never
+        touches the request's DB session. The stream yields
+        {"event": "field", "key", "value"} per top-level summary field,
+        then {"event": "result", "data"} with the same payload
+        generate_experience_summary() returns. If the AI call fails
+        part-way, the result is the fallback payload.
+        """
+        work_history = await self._get_work_history(user_id)
+        return self._stream_summary(work_history)
+    
+    async def _stream_summary(self, work_history: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        if not work_history:
+            yield {"event": "result", "data": {"summary": "No work experience found", "insights": []}}
+            return
+        
+        if not self.ai_client.is_available():
+            yield {"event": "result", "data": self._fallback_summary(work_history)}
+            return
+        
+        summary = {}
+        try:
+            async for key, value in self.ai_client.stream_structured_output_async(
+                **self._summary_request(work_history)
+            ):
+                summary[key] = value
+                yield {"event": "field", "key": key, "value": value}
+        except Exception as e:
+            logger.error(f"AI summary stream failed: {e}")
+            yield {"event": "result", "data": self._fallback_summary(work_history)}
+            return
+        
+        yield {
+            "event": "result",
+            "data": {
+                "success": True,
+                "summary": summary,
+                "generated_at": datetime.now().isoformat(),
+                "generated_by": "ai"
+            }
+        }
+    
     async def _get_work_history(self, user_id: str) -> List[Dict[str, Any]]:
         """Fetch work history"""
         result = await self.db.execute(
@@ -77,12 +123,9 @@ class AIWorkExperienceInsightsService:
             for exp in experiences
         ]
     
-    async def _ai_powered_summary(
-        self,
-        work_history: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+    def _summary_request(self, work_history: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Generate AI-powered experience summary
+        Prompt, system prompt and output schema for an experience summary
         """
         system_prompt = """You are a professional resume writer and career analyst for the NOOR Platform.
 
@@ -122,11 +165,22 @@ Generate a comprehensive professional summary."""
             "professional_development": "string (trajectory analysis)"
         }
         
+        return {
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "output_schema": output_schema
+        }
+    
+    async def _ai_powered_summary(
+        self,
+        work_history: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Generate AI-powered experience summary
+        """
         try:
             summary = await self.ai_client.generate_structured_output_async(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                output_schema=output_schema
+                **self._summary_request(work_history)
             )
             
             logger.info("AI experience summary generated successfully")
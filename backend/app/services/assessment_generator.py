@@ -5,12 +5,34 @@ Generates assessment questions for 96 competencies across 8 faculties
 using Claude AI and predefined templates.
 """
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from anthropic import Anthropic
+import numpy as np
 
-# Initialize Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+from app.core.llm_gateway import get_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+QUESTION_MODEL = "claude-3-5-sonnet-20241022"
+QUESTION_MAX_TOKENS = 1024
+QUESTION_TYPES = ["multiple_choice", "likert_scale", "scenario_based", "self_reflection"]
+
+DEFAULT_QUESTION_BANK_PATH = os.environ.get("QUESTION_BANK_PATH", "data/question_bank.json")
+
+_client: Optional[Anthropic] = None
+
+
+def get_client() -> Anthropic:
+    """Blocking Anthropic client, created on first sync call"""
+    global _client
+    if _client is None:
+        _client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    return _client
 
 # ============================================================================
 # Question Templates
@@ -158,6 +180,105 @@ FACULTIES = {
     # ... (other faculties follow same structure)
 }
 
+# ============================================================================
+# Question Bank
+# ============================================================================
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def template_hash(question_type: str) -> str:
+    """Hash of a question template (prompt and scoring)"""
+    template = QUESTION_TEMPLATES[question_type]
+    return _hash(template["prompt"], template["scoring"])
+
+
+def competency_hash(faculty: Dict[str, Any], competency: Dict[str, Any]) -> str:
+    """Hash of everything about a competency that goes into its prompts"""
+    return _hash(faculty["name"], faculty["scholar"], competency["name"], competency["description"])
+
+
+class QuestionBank:
+    """
+    On-disk store of generated questions
+    
+    Entries are keyed by (competency_id, question_type) and record the
+    template and competency hashes they were generated from, so an entry
+    is reused only while both are unchanged. Each new question is appended
+    to a JSONL journal next to the file, which makes an interrupted bulk
+    build resumable; compact() folds the journal back into the file.
+    """
+    
+    def __init__(self, path: str = DEFAULT_QUESTION_BANK_PATH):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self.load()
+    
+    @staticmethod
+    def key(competency_id: str, question_type: str) -> str:
+        return f"{competency_id}:{question_type}"
+    
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("questions", {})
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn final write of an interrupted build
+                    self.entries[record["key"]] = record["entry"]
+    
+    def save(self):
+        """Write every entry to the bank file and empty the journal"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"questions": self.entries}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+    
+    def _append(self, key: str, entry: Dict[str, Any]):
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "entry": entry}, ensure_ascii=False) + "\n")
+    
+    def get(self, competency_id: str, question_type: str, hashes: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Stored question, or None if missing or generated from other inputs"""
+        entry = self.entries.get(self.key(competency_id, question_type))
+        if entry and (entry.get("template_hash"), entry.get("competency_hash")) == hashes:
+            return entry["question"]
+        return None
+    
+    async def put(self, competency_id: str, question_type: str, hashes: Tuple[str, str], question: Dict[str, Any]):
+        """Store a question and append it to the journal"""
+        key = self.key(competency_id, question_type)
+        entry = {
+            "template_hash": hashes[0],
+            "competency_hash": hashes[1],
+            "question": question
+        }
+        async with self._lock:
+            self.entries[key] = entry
+            await asyncio.to_thread(self._append, key, entry)
+    
+    async def compact(self):
+        """Fold the journal into the bank file"""
+        async with self._lock:
+            await asyncio.to_thread(self.save)
+
 # ============================================================================
 # Question Generator
 # ============================================================================
@@ -165,8 +286,38 @@ FACULTIES = {
 class AssessmentQuestionGenerator:
     """Generate assessment questions using AI"""
     
-    def __init__(self):
-        self.client = client
+    def __init__(self, faculties: Optional[Dict[str, Any]] = None):
+        self.faculties = faculties or FACULTIES
+        self.gateway = get_llm_gateway()
+    
+    @property
+    def client(self) -> Anthropic:
+        return get_client()
+    
+    def _question_prompt(self, competency_id: str, question_type: str, faculty_key: str) -> Tuple[Dict, Dict, str]:
+        """Faculty, competency and formatted prompt for a question"""
+        faculty = self.faculties[faculty_key]
+        competency = next(c for c in faculty["competencies"] if c["id"] == competency_id)
+        
+        prompt = QUESTION_TEMPLATES[question_type]["prompt"].format(
+            competency_name=competency["name"],
+            competency_description=competency["description"],
+            faculty_name=faculty["name"],
+            scholar_name=faculty["scholar"]
+        )
+        return faculty, competency, prompt
+    
+    @staticmethod
+    def _question(competency_id, competency, faculty_key, question_type, question_text) -> Dict[str, Any]:
+        return {
+            "id": f"{competency_id}_{question_type}",
+            "competency_id": competency_id,
+            "competency_name": competency["name"],
+            "faculty": faculty_key,
+            "type": question_type,
+            "content": question_text,
+            "scoring": QUESTION_TEMPLATES[question_type]["scoring"]
+        }
     
     def generate_question(
         self,
@@ -185,25 +336,12 @@ class AssessmentQuestionGenerator:
         Returns:
             Generated question dict
         """
-        # Get faculty and competency data
-        faculty = FACULTIES[faculty_key]
-        competency = next(c for c in faculty["competencies"] if c["id"] == competency_id)
-        
-        # Get template
-        template = QUESTION_TEMPLATES[question_type]
-        
-        # Format prompt
-        prompt = template["prompt"].format(
-            competency_name=competency["name"],
-            competency_description=competency["description"],
-            faculty_name=faculty["name"],
-            scholar_name=faculty["scholar"]
-        )
+        faculty, competency, prompt = self._question_prompt(competency_id, question_type, faculty_key)
         
         # Generate question using Claude
         message = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1024,
+            model=QUESTION_MODEL,
+            max_tokens=QUESTION_MAX_TOKENS,
             messages=[{
                 "role": "user",
                 "content": prompt
@@ -213,15 +351,29 @@ class AssessmentQuestionGenerator:
         # Parse response
         question_text = message.content[0].text
         
-        return {
-            "id": f"{competency_id}_{question_type}",
-            "competency_id": competency_id,
-            "competency_name": competency["name"],
-            "faculty": faculty_key,
-            "type": question_type,
-            "content": question_text,
-            "scoring": template["scoring"]
-        }
+        return self._question(competency_id, competency, faculty_key, question_type, question_text)
+    
+    async def generate_question_async(
+        self,
+        competency_id: str,
+        question_type: str,
+        faculty_key: str
+    ) -> Dict[str, Any]:
+        """
+        Generate a single question through the shared LLM gateway
+        
+        The gateway retries rate limits, overload and connection errors
+        with jittered backoff and applies the per-model token budget.
+        """
+        faculty, competency, prompt = self._question_prompt(competency_id, question_type, faculty_key)
+        
+        question_text = await self.gateway.complete(
+            prompt=prompt,
+            model=QUESTION_MODEL,
+            max_tokens=QUESTION_MAX_TOKENS
+        )
+        
+        return self._question(competency_id, competency, faculty_key, question_type, question_text)
     
     def generate_competency_assessment(
         self,
@@ -240,7 +392,7 @@ class AssessmentQuestionGenerator:
         """
         questions = []
         
-        for question_type in ["multiple_choice", "likert_scale", "scenario_based", "self_reflection"]:
+        for question_type in QUESTION_TYPES:
             question = self.generate_question(competency_id, question_type, faculty_key)
             questions.append(question)
         
@@ -257,7 +409,7 @@ class AssessmentQuestionGenerator:
             List of 48 questions (12 competencies × 4 questions)
         """
         questions = []
-        faculty = FACULTIES[faculty_key]
+        faculty = self.faculties[faculty_key]
         
         for competency in faculty["competencies"]:
             competency_questions = self.generate_competency_assessment(
@@ -277,10 +429,101 @@ class AssessmentQuestionGenerator:
         """
         all_questions = {}
         
-        for faculty_key in FACULTIES.keys():
+        for faculty_key in self.faculties.keys():
             all_questions[faculty_key] = self.generate_faculty_assessment(faculty_key)
         
         return all_questions
+    
+    async def build_question_bank(
+        self,
+        bank: Optional[QuestionBank] = None,
+        faculty_keys: Optional[Iterable[str]] = None,
+        max_concurrency: int = 8,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Generate every missing or outdated question concurrently
+        
+        Questions whose template and competency text are unchanged since
+        they were stored are reused; only the rest are sent to the LLM,
+        at most max_concurrency at a time. Each new question is journaled as
+        soon as it arrives and the bank file is rewritten once at the end.
+        Failures are reported rather than raised, so running the build
+        again resumes where it stopped.
+        
+        Args:
+            bank: Question bank to fill (defaults to DEFAULT_QUESTION_BANK_PATH)
+            faculty_keys: Faculties to build (defaults to all)
+            max_concurrency: Maximum questions generated at once
+            force: Regenerate every question
+        
+        Returns:
+            Counts of generated/reused/failed questions and failure messages
+        """
+        bank = bank or QuestionBank()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        summary = {"generated": 0, "reused": 0, "failed": 0, "errors": {}}
+        
+        async def generate(faculty_key, competency_id, question_type, hashes):
+            key = QuestionBank.key(competency_id, question_type)
+            try:
+                async with semaphore:
+                    question = await self.generate_question_async(competency_id, question_type, faculty_key)
+                await bank.put(competency_id, question_type, hashes, question)
+                summary["generated"] += 1
+            except Exception as e:
+                logger.error(f"Question generation failed for {key}: {str(e)}")
+                summary["failed"] += 1
+                summary["errors"][key] = str(e)
+        
+        pending = []
+        for faculty_key in faculty_keys or self.faculties.keys():
+            faculty = self.faculties[faculty_key]
+            for competency in faculty["competencies"]:
+                for question_type in QUESTION_TYPES:
+                    hashes = (template_hash(question_type), competency_hash(faculty, competency))
+                    if not force and bank.get(competency["id"], question_type, hashes) is not None:
+                        summary["reused"] += 1
+                        continue
+                    pending.append(generate(faculty_key, competency["id"], question_type, hashes))
+        
+        await asyncio.gather(*pending)
+        if summary["generated"] or os.path.exists(bank.journal_path):
+            await bank.compact()
+        
+        logger.info(
+            f"Question bank built: {summary['generated']} generated, "
+            f"{summary['reused']} reused, {summary['failed']} failed"
+        )
+        return summary
+    
+    async def generate_all_assessments_async(
+        self,
+        bank: Optional[QuestionBank] = None,
+        max_concurrency: int = 8
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Async generate_all_assessments backed by the question bank
+        
+        Returns:
+            Dict mapping faculty keys to question lists (questions that
+            failed to generate are left out)
+        """
+        bank = bank or QuestionBank()
+        await self.build_question_bank(bank, max_concurrency=max_concurrency)
+        
+        all_questions = {}
+        for faculty_key, faculty in self.faculties.items():
+            questions = []
+            for competency in faculty["competencies"]:
+                for question_type in QUESTION_TYPES:
+                    hashes = (template_hash(question_type), competency_hash(faculty, competency))
+                    question = bank.get(competency["id"], question_type, hashes)
+                    if question is not None:
+                        questions.append(question)
+            all_questions[faculty_key] = questions
+        
+        return all_questions
 
 # ============================================================================
 # Scoring System
@@ -387,6 +630,206 @@ class AssessmentScorer:
         else:
             return "Needs Improvement"
 
+
+# Lower bounds of the ratings above, for np.searchsorted
+RATING_THRESHOLDS = np.array([60, 70, 80, 90])
+RATINGS = np.array(["Needs Improvement", "Fair", "Average", "Good", "Excellent"], dtype=object)
+
+# Answer letters as column codes; numeric answers (0-4) are their own code
+ANSWER_CODES = {"A": 0, "B": 1, "C": 2, "D": 3}
+MISSING_ANSWER = -1
+
+SCORE_COLUMNS = ["user_id", "faculty", "competency_id", "total_score", "max_score", "percentage", "rating"]
+
+
+def encode_answer(answer: Any) -> int:
+    """Column code for a raw answer (letter or 0-4), MISSING_ANSWER if blank"""
+    if answer is None or answer == "":
+        return MISSING_ANSWER
+    if isinstance(answer, str) and answer.upper() in ANSWER_CODES:
+        return ANSWER_CODES[answer.upper()]
+    return int(answer)
+
+
+def encode_answers(submissions: Iterable[Sequence[Any]]) -> np.ndarray:
+    """Encode per-user answer lists into a (users, questions) code matrix"""
+    return np.array(
+        [[encode_answer(answer) for answer in answers] for answers in submissions],
+        dtype=np.int16
+    )
+
+
+class BatchAssessmentScorer:
+    """
+    Vectorized AssessmentScorer for whole cohorts
+    
+    Answers are a (users, questions) matrix of codes in question order.
+    Each question gets a row in a points lookup table (code -> points),
+    so scoring is one gather over the matrix followed by np.add.reduceat
+    over the columns of each competency and each faculty. Ratings use
+    the AssessmentScorer.get_rating thresholds.
+    
+    Codes outside 0-4 (including MISSING_ANSWER) score 0.
+    """
+    
+    def __init__(self, questions: List[Dict[str, Any]]):
+        """
+        Args:
+            questions: Questions in answer column order, each with type,
+                competency_id, faculty and (multiple choice) correct_answer
+        """
+        self.num_questions = len(questions)
+        
+        self.points = np.zeros((self.num_questions, 5), dtype=np.int16)
+        for i, question in enumerate(questions):
+            question_type = question["type"]
+            if question_type == "multiple_choice":
+                correct = question.get("correct_answer")
+                if correct is not None:
+                    self.points[i, encode_answer(correct)] = 4
+            elif question_type == "scenario_based":
+                self.points[i, :4] = [0, 1, 3, 4]
+            elif question_type in ("likert_scale", "self_reflection"):
+                self.points[i] = np.arange(5)
+        
+        # Group columns by competency, and competencies by faculty, so both
+        # reductions run over contiguous slices
+        competency_faculty: Dict[str, str] = {}
+        for question in questions:
+            competency_faculty.setdefault(question["competency_id"], question["faculty"])
+        
+        self.faculties = list(dict.fromkeys(competency_faculty.values()))
+        self.competency_ids = sorted(
+            competency_faculty, key=lambda c: (self.faculties.index(competency_faculty[c]), c)
+        )
+        self.competency_faculty = np.array([competency_faculty[c] for c in self.competency_ids], dtype=object)
+        
+        competency_index = {c: i for i, c in enumerate(self.competency_ids)}
+        column_competency = np.array([competency_index[q["competency_id"]] for q in questions], dtype=np.int64)
+        self.column_order = np.argsort(column_competency, kind="stable")
+        
+        questions_per_competency = np.bincount(column_competency, minlength=len(self.competency_ids))
+        self.competency_starts = np.concatenate(([0], np.cumsum(questions_per_competency)[:-1]))
+        self.competency_max = questions_per_competency * 4
+        
+        faculty_of_competency = np.array(
+            [self.faculties.index(f) for f in self.competency_faculty], dtype=np.int64
+        )
+        competencies_per_faculty = np.bincount(faculty_of_competency, minlength=len(self.faculties))
+        self.faculty_starts = np.concatenate(([0], np.cumsum(competencies_per_faculty)[:-1]))
+        self.faculty_max = np.add.reduceat(self.competency_max, self.faculty_starts)
+    
+    @staticmethod
+    def ratings(percentages: np.ndarray) -> np.ndarray:
+        """Rating labels for an array of percentages"""
+        return RATINGS[np.searchsorted(RATING_THRESHOLDS, percentages, side="right")]
+    
+    def question_points(self, answers: np.ndarray) -> np.ndarray:
+        """Points per answer, shape (users, questions)"""
+        answers = np.asarray(answers)
+        valid = (answers >= 0) & (answers <= 4)
+        points = self.points[np.arange(self.num_questions), np.where(valid, answers, 0)]
+        return np.where(valid, points, 0)
+    
+    def score(self, answers: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score every user
+        
+        Returns:
+            Arrays per user: competency_scores/percentages/ratings with
+            one column per competency_ids entry, and faculty_scores/
+            percentages/ratings with one column per faculties entry
+        """
+        points = self.question_points(answers)[:, self.column_order].astype(np.int32)
+        
+        competency_scores = np.add.reduceat(points, self.competency_starts, axis=1)
+        faculty_scores = np.add.reduceat(competency_scores, self.faculty_starts, axis=1)
+        
+        competency_percentages = (competency_scores / self.competency_max) * 100
+        faculty_percentages = (faculty_scores / self.faculty_max) * 100
+        
+        return {
+            "competency_scores": competency_scores,
+            "competency_percentages": competency_percentages,
+            "competency_ratings": self.ratings(competency_percentages),
+            "faculty_scores": faculty_scores,
+            "faculty_percentages": faculty_percentages,
+            "faculty_ratings": self.ratings(faculty_percentages)
+        }
+    
+    def iter_score_records(
+        self,
+        user_ids: Sequence[Any],
+        answers: np.ndarray,
+        chunk_size: int = 10000
+    ) -> Iterator[List[Tuple]]:
+        """
+        Score users chunk by chunk, yielding SCORE_COLUMNS rows
+        
+        Each user gets one row per competency and one per faculty
+        (competency_id None). Only one chunk of rows is held at a time.
+        """
+        for start in range(0, len(user_ids), chunk_size):
+            chunk_ids = user_ids[start:start + chunk_size]
+            scores = self.score(answers[start:start + chunk_size])
+            
+            users = np.asarray(chunk_ids, dtype=object)
+            records = self._records(
+                users, self.competency_faculty, np.array(self.competency_ids, dtype=object),
+                self.competency_max, scores["competency_scores"],
+                scores["competency_percentages"], scores["competency_ratings"]
+            )
+            records.extend(self._records(
+                users, np.array(self.faculties, dtype=object), np.full(len(self.faculties), None),
+                self.faculty_max, scores["faculty_scores"],
+                scores["faculty_percentages"], scores["faculty_ratings"]
+            ))
+            yield records
+    
+    @staticmethod
+    def _records(users, faculties, competency_ids, max_scores, scores, percentages, ratings) -> List[Tuple]:
+        # Build whole columns, then zip them into rows once
+        count = len(users)
+        return list(zip(
+            np.repeat(users, len(faculties)).tolist(),
+            np.tile(faculties, count).tolist(),
+            np.tile(competency_ids, count).tolist(),
+            scores.ravel().tolist(),
+            np.tile(max_scores, count).tolist(),
+            percentages.ravel().tolist(),
+            ratings.ravel().tolist()
+        ))
+    
+    async def copy_scores(
+        self,
+        connection,
+        user_ids: Sequence[Any],
+        answers: np.ndarray,
+        table: str = "assessment_scores",
+        chunk_size: int = 10000
+    ) -> int:
+        """
+        Score a cohort and stream the rows into Postgres with COPY
+        
+        Args:
+            connection: asyncpg connection (from an AsyncSession:
+                (await (await session.connection()).get_raw_connection()).driver_connection)
+            user_ids: User id per answer row
+            answers: (users, questions) answer codes
+            table: Target table with SCORE_COLUMNS
+            chunk_size: Users scored and copied per round trip
+        
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        for records in self.iter_score_records(user_ids, answers, chunk_size):
+            await connection.copy_records_to_table(table, records=records, columns=SCORE_COLUMNS)
+            written += len(records)
+        
+        logger.info(f"Copied {written} assessment score rows for {len(user_ids)} users into {table}")
+        return written
+
 # ============================================================================
 # Usage Example
 # ============================================================================
@@ -418,4 +861,8 @@ if __name__ == "__main__":
     # all_assessments = generator.generate_all_assessments()
     # total_questions = sum(len(q) for q in all_assessments.values())
     # print(f"\nGenerated {total_questions} total questions across all faculties")
+    
+    # Build or refresh the on-disk question bank (only changed entries are regenerated)
+    # summary = asyncio.run(generator.build_question_bank(QuestionBank("data/question_bank.json")))
+    # print(f"\nQuestion bank: {summary['generated']} generated, {summary['reused']} reused")
 
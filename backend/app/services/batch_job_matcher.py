@@ -0,0 +1,152 @@
+"""
+NOOR Platform - Batch Job Matcher
+Scores one user against many jobs in a single vectorized pass
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Weighted average of required and optional skill coverage
+REQUIRED_WEIGHT = 0.7
+OPTIONAL_WEIGHT = 0.3
+
+
+def recommendation_for_score(match_score: float) -> str:
+    """Map a 0-1 match score to a hiring recommendation"""
+    if match_score >= 0.8:
+        return "hire"
+    elif match_score >= 0.6:
+        return "interview"
+    elif match_score >= 0.4:
+        return "consider"
+    return "reject"
+
+
+class BatchJobMatcher:
+    """
+    Rule-based skill matcher over a fixed set of jobs
+    
+    Skill names are mapped to a shared vocabulary and each job's required
+    and optional skills are stored as sparse rows (CSR-style row/column
+    index arrays). Scoring a user is then a gather of the user's skill mask
+    over all columns plus a bincount per row: O(total job skills) NumPy work
+    instead of a Python loop per job.
+    
+    Uses the same formula and thresholds as
+    AISkillMatchingService._rule_based_matching.
+    """
+    
+    def __init__(self, job_requirements: List[Dict[str, Any]]):
+        self.num_jobs = len(job_requirements)
+        self.vocabulary: Dict[str, int] = {}
+        
+        self.required_rows, self.required_cols = self._encode(
+            req.get("required_skills", []) for req in job_requirements
+        )
+        self.optional_rows, self.optional_cols = self._encode(
+            req.get("optional_skills", []) for req in job_requirements
+        )
+        
+        self.required_counts = np.bincount(self.required_rows, minlength=self.num_jobs)
+        self.optional_counts = np.bincount(self.optional_rows, minlength=self.num_jobs)
+    
+    def _encode(self, skill_lists: Iterable[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        rows: List[int] = []
+        cols: List[int] = []
+        vocabulary = self.vocabulary
+        for row, skills in enumerate(skill_lists):
+            for skill in skills:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(skill.lower(), len(vocabulary)))
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+    
+    def _user_mask(self, user_skill_names: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for name in user_skill_names:
+            index = self.vocabulary.get(name.lower())
+            if index is not None:
+                mask[index] = 1.0
+        return mask
+    
+    def score(self, user_skill_names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Score every job for a user
+        
+        Returns:
+            Arrays indexed by job: raw_score, match_score (rounded to 2
+            places), required_matches and optional_matches
+        """
+        mask = self._user_mask(user_skill_names)
+        
+        required_matches = np.bincount(
+            self.required_rows, weights=mask[self.required_cols], minlength=self.num_jobs
+        )
+        optional_matches = np.bincount(
+            self.optional_rows, weights=mask[self.optional_cols], minlength=self.num_jobs
+        )
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            required_score = np.where(
+                self.required_counts > 0, required_matches / self.required_counts, 1.0
+            )
+            optional_score = np.where(
+                self.optional_counts > 0, optional_matches / self.optional_counts, 0.0
+            )
+        
+        match_score = required_score * REQUIRED_WEIGHT + optional_score * OPTIONAL_WEIGHT
+        
+        return {
+            "raw_score": match_score,
+            "match_score": self._round_scores(match_score),
+            "required_matches": required_matches.astype(np.int64),
+            "optional_matches": optional_matches.astype(np.int64)
+        }
+    
+    @staticmethod
+    def _round_scores(scores: np.ndarray) -> np.ndarray:
+        """
+        Round to 2 places exactly as Python's round() does
+        
+        np.round scales by 100 first, which can land on the other side of
+        a half-way point; the few values close to one are redone with round().
+        """
+        rounded = np.round(scores, 2)
+        scaled = scores * 100
+        near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+        for i in near_half:
+            rounded[i] = round(float(scores[i]), 2)
+        return rounded
+    
+    def top_k(self, user_skill_names: Iterable[str], k: int) -> List[Dict[str, Any]]:
+        """
+        Return the k best jobs as rule-based match results
+        
+        Ties keep job order, as a stable sort over all jobs would.
+        """
+        if self.num_jobs == 0 or k <= 0:
+            return []
+        
+        scores = self.score(user_skill_names)
+        match_score = scores["match_score"]
+        
+        k = min(k, self.num_jobs)
+        if k < self.num_jobs:
+            # Everything scoring at least the k-th best, so ties are decided below
+            threshold = np.partition(match_score, self.num_jobs - k)[self.num_jobs - k]
+            candidates = np.flatnonzero(match_score >= threshold)
+        else:
+            candidates = np.arange(self.num_jobs)
+        
+        order = candidates[np.lexsort((candidates, -match_score[candidates]))][:k]
+        
+        return [
+            {
+                "job_index": int(i),
+                "match_score": float(match_score[i]),
+                "recommendation": recommendation_for_score(scores["raw_score"][i]),
+                "matched_skills": int(scores["required_matches"][i] + scores["optional_matches"][i]),
+                "total_required_skills": int(self.required_counts[i])
+            }
+            for i in order
+        ]
@@ -0,0 +1,50 @@
+"""
+NOOR Platform - Background Job Handlers
+Topics processed by app.worker
+"""
+
+import logging
+from typing import Any, Dict
+
+from app.core.job_queue import AGENT_TASK_LOG_TOPIC, NOTIFICATION_TOPIC, JobQueue
+
+logger = logging.getLogger(__name__)
+
+AGENT_TASK_LOG_COLLECTION = "agent_task_logs"
+
+
+async def send_notification(payload: Dict[str, Any]):
+    """
+    Run a NotificationAgent task ({"action", "parameters"})
+    
+    Raises when the agent reports a failure so the queue retries it;
+    a disabled channel is a successful no-op.
+    """
+    from app.agents.notification_agent import get_notification_agent
+    
+    result = await get_notification_agent().execute(payload)
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or f"Notification {payload.get('action')} failed")
+
+
+async def store_agent_task_log(payload: Dict[str, Any]):
+    """
+    Persist a BaseAgent.log_task entry to MongoDB
+    """
+    from app.db.mongodb import get_mongodb
+    
+    database = await get_mongodb()
+    if database is None:
+        logger.info(f"Task log: {payload}")
+        return
+    await database[AGENT_TASK_LOG_COLLECTION].update_one(
+        {"_id": payload["log_id"]}, {"$setOnInsert": payload}, upsert=True
+    )
+
+
+def register_default_handlers(queue: JobQueue):
+    """
+    Register the platform's job handlers on a queue
+    """
+    queue.register(NOTIFICATION_TOPIC, send_notification)
+    queue.register(AGENT_TASK_LOG_TOPIC, store_agent_task_log)
@@ -0,0 +1,100 @@
+"""
+NOOR Platform - Job Posting Service Layer
+Job posting writes, keeping the skill demand index in step
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import Any, Dict, Optional
+import logging
+
+from app.models.job_posting import JobPostingCreate, JobPostingStatus
+from app.services.skill_demand_index import SkillDemandIndex, get_skill_demand_index
+
+logger = logging.getLogger(__name__)
+
+# Columns the skill demand index counts
+DEMAND_COLUMNS = ("id", "industry", "location", "employment_type", "required_skills", "preferred_skills", "status")
+
+
+class JobPostingService:
+    """
+    Service for job posting management
+    
+    Every insert and status change is applied to the skill demand index
+    after the commit. An index update that fails is only logged; the
+    worker's periodic reconcile repairs it.
+    """
+    
+    def __init__(self, db: AsyncSession, demand_index: Optional[SkillDemandIndex] = None):
+        self.db = db
+        self.demand_index = demand_index or get_skill_demand_index()
+    
+    async def create_posting(self, posting: JobPostingCreate) -> Dict[str, Any]:
+        """Insert a posting; active postings are counted right away"""
+        result = await self.db.execute(
+            text(f"""
+                INSERT INTO job_postings (
+                    institution_id, title, description, industry, location,
+                    employment_type, required_skills, preferred_skills, status
+                )
+                VALUES (
+                    :institution_id, :title, :description, :industry, :location,
+                    :employment_type, :required_skills, :preferred_skills, :status
+                )
+                RETURNING {", ".join(DEMAND_COLUMNS)}
+            """),
+            {**posting.model_dump(), "status": posting.status.value}
+        )
+        job = dict(result.mappings().one())
+        await self.db.commit()
+        
+        await self._update_demand(None, job)
+        logger.info(f"Created job posting {job['id']} ({job['status']})")
+        return job
+    
+    async def set_status(self, job_id: str, status: JobPostingStatus) -> Optional[Dict[str, Any]]:
+        """
+        Change a posting's status (publish, close, mark filled)
+        
+        Returns:
+            The updated posting, or None if it does not exist
+        """
+        # The subquery locks the row and returns the status before the update
+        result = await self.db.execute(
+            text(f"""
+                UPDATE job_postings AS job
+                SET status = :status, updated_at = CURRENT_TIMESTAMP
+                FROM (SELECT id, status FROM job_postings WHERE id = :job_id FOR UPDATE) AS old
+                WHERE job.id = old.id
+                RETURNING {", ".join(f"job.{column}" for column in DEMAND_COLUMNS)},
+                          old.status AS old_status
+            """),
+            {"job_id": job_id, "status": status.value}
+        )
+        row = result.mappings().first()
+        await self.db.commit()
+        if row is None:
+            return None
+        
+        job = dict(row)
+        old_job = {**job, "status": job.pop("old_status")}
+        await self._update_demand(old_job, job)
+        logger.info(f"Job posting {job_id}: {old_job['status']} -> {job['status']}")
+        return job
+    
+    async def close_posting(
+        self,
+        job_id: str,
+        status: JobPostingStatus = JobPostingStatus.CLOSED
+    ) -> Optional[Dict[str, Any]]:
+        """Close a posting or mark it filled"""
+        if status not in (JobPostingStatus.CLOSED, JobPostingStatus.FILLED):
+            raise ValueError(f"Cannot close a posting with status {status.value}")
+        return await self.set_status(job_id, status)
+    
+    async def _update_demand(self, old_job: Optional[Dict[str, Any]], job: Dict[str, Any]):
+        try:
+            await self.demand_index.update_posting(old_job, job)
+        except Exception as e:
+            logger.error(f"Skill demand index update failed for job posting {job['id']}: {e}")
@@ -0,0 +1,327 @@
+"""
+NOOR Platform - Bulk Notification Delivery
+Concurrent, rate-limited fan-out of email/SMS notifications
+"""
+
+import asyncio
+import logging
+import random
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import httpx
+
+from app.core.llm_gateway import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+
+# SendGrid accepts up to 1000 personalizations per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+class NotificationProvider(ABC):
+    """
+    Delivers notifications of one channel
+    
+    send_batch() receives up to max_batch_size notifications and returns
+    one result dict per notification, in order, each with "delivered"
+    and either "message_id" or "error".
+    """
+    
+    channel: str = ""
+    max_batch_size: int = 1
+    
+    @abstractmethod
+    async def send_batch(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        pass
+    
+    async def close(self):
+        pass
+
+
+class SingleMessageProvider(NotificationProvider):
+    """
+    Provider for APIs without a batch endpoint
+    
+    Wraps a coroutine sending one notification; a batch is sent
+    concurrently.
+    """
+    
+    def __init__(self, channel: str, send_one: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        self.channel = channel
+        self.send_one = send_one
+    
+    async def send_batch(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = await asyncio.gather(
+            *(self.send_one(notification) for notification in notifications),
+            return_exceptions=True
+        )
+        return [
+            {"delivered": False, "error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+
+class SendGridProvider(NotificationProvider):
+    """
+    Email through the SendGrid v3 API
+    
+    Notifications sharing a subject and body go out as one request with a
+    personalization per recipient, so a bulk announcement is one HTTP call
+    per SENDGRID_MAX_PERSONALIZATIONS recipients.
+    """
+    
+    channel = "email"
+    max_batch_size = SENDGRID_MAX_PERSONALIZATIONS
+    
+    def __init__(self, api_key: str, from_email: str, timeout: float = 30.0):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        return self._client
+    
+    async def send_batch(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        groups: Dict[tuple, List[int]] = {}
+        for i, notification in enumerate(notifications):
+            groups.setdefault((notification["subject"], notification["body"]), []).append(i)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(notifications)
+        for (subject, body), indexes in groups.items():
+            payload = {
+                "personalizations": [{"to": [{"email": notifications[i]["to"]}]} for i in indexes],
+                "from": {"email": self.from_email},
+                "subject": subject,
+                "content": [{"type": "text/plain", "value": body}]
+            }
+            try:
+                response = await self._get_client().post(SENDGRID_SEND_URL, json=payload)
+                if response.status_code == 202:
+                    result = {"delivered": True, "message_id": response.headers.get("x-message-id")}
+                else:
+                    result = {"delivered": False, "error": f"SendGrid returned {response.status_code}"}
+            except httpx.HTTPError as e:
+                result = {"delivered": False, "error": str(e)}
+            
+            for i in indexes:
+                results[i] = dict(result)
+        return results
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+
+class LocalStubProvider(NotificationProvider):
+    """
+    Offline provider for tests and throughput benchmarks
+    
+    Each batch takes `latency` seconds, like one provider round trip, and
+    fails with probability failure_rate. Nothing leaves the process.
+    """
+    
+    def __init__(
+        self,
+        channel: str,
+        latency: float = 0.0,
+        max_batch_size: int = 1,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.channel = channel
+        self.latency = latency
+        self.max_batch_size = max_batch_size
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.sent = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def send_batch(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        
+        self.batches += 1
+        if self._random.random() < self.failure_rate:
+            return [{"delivered": False, "error": "stub failure"} for _ in notifications]
+        
+        self.sent += len(notifications)
+        return [
+            {"delivered": True, "message_id": f"stub-{self.channel}-{self.batches}-{i}"}
+            for i in range(len(notifications))
+        ]
+
+
+_DONE = object()
+
+
+class BulkNotificationSender:
+    """
+    Bounded worker pool delivering a stream of notifications
+    
+    Notifications are grouped per channel into provider-sized batches and
+    handed to that channel's workers through a bounded queue, so reading
+    the input slows down when providers fall behind. Each channel has its
+    own worker count and a messages-per-minute token bucket. Results are
+    yielded as they complete (not in input order) and only the recipient,
+    not the payload, is kept in them, so memory does not grow with the
+    size of the batch.
+    """
+    
+    def __init__(
+        self,
+        providers: Dict[str, NotificationProvider],
+        concurrency: Optional[Dict[str, int]] = None,
+        rate_per_minute: Optional[Dict[str, int]] = None,
+        queue_size: int = 1000
+    ):
+        self.providers = providers
+        self.concurrency = concurrency or {}
+        self.rate_per_minute = rate_per_minute or {}
+        self.queue_size = queue_size
+    
+    def _bucket(self, channel: str) -> Optional[TokenBucket]:
+        rate = self.rate_per_minute.get(channel, 0)
+        if not rate:
+            return None
+        # About one second of burst, but always room for a full batch
+        capacity = max(self.providers[channel].max_batch_size, rate // 60)
+        return TokenBucket(rate, capacity=capacity)
+    
+    async def deliver(
+        self,
+        notifications: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send notifications, yielding one result per notification
+        
+        Yields:
+            {"index", "type", "to", "delivered"} plus "message_id" or "error"
+        """
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        channels = {
+            channel: {
+                "queue": asyncio.Queue(maxsize=max(1, self.concurrency.get(channel, 1)) * 2),
+                "workers": max(1, self.concurrency.get(channel, 1)),
+                "bucket": self._bucket(channel)
+            }
+            for channel in self.providers
+        }
+        
+        async def produce():
+            pending: Dict[str, list] = {channel: [] for channel in channels}
+            
+            async def flush(channel):
+                if pending[channel]:
+                    await channels[channel]["queue"].put(pending[channel])
+                    pending[channel] = []
+            
+            index = 0
+            input_error = None
+            try:
+                async for notification in _aiter(notifications):
+                    channel = str(getattr(notification.get("type"), "value", notification.get("type")))
+                    if channel not in channels:
+                        await results.put(_result(index, notification, {
+                            "delivered": False, "error": "Unknown notification type"
+                        }))
+                    else:
+                        pending[channel].append((index, notification))
+                        if len(pending[channel]) >= self.providers[channel].max_batch_size:
+                            await flush(channel)
+                    index += 1
+            except Exception as e:
+                # Still deliver what was read and stop the workers; the
+                # error is raised to the consumer after those results
+                input_error = e
+            
+            for channel in channels:
+                await flush(channel)
+                for _ in range(channels[channel]["workers"]):
+                    await channels[channel]["queue"].put(None)
+            return input_error
+        
+        async def work(channel):
+            provider = self.providers[channel]
+            state = channels[channel]
+            while True:
+                batch = await state["queue"].get()
+                if batch is None:
+                    return
+                
+                if state["bucket"]:
+                    await state["bucket"].acquire(len(batch))
+                try:
+                    outcomes = await provider.send_batch([notification for _, notification in batch])
+                except Exception as e:
+                    logger.error(f"Bulk {channel} batch of {len(batch)} failed: {e}")
+                    outcomes = [{"delivered": False, "error": str(e)}] * len(batch)
+                
+                for (index, notification), outcome in zip(batch, outcomes):
+                    await results.put(_result(index, notification, outcome))
+        
+        async def run():
+            # A failing worker cancels the rest instead of leaving them blocked
+            try:
+                async with asyncio.TaskGroup() as group:
+                    producer = group.create_task(produce())
+                    for channel, state in channels.items():
+                        for _ in range(state["workers"]):
+                            group.create_task(work(channel))
+            except* Exception as errors:
+                outcome = errors.exceptions[0]
+            else:
+                outcome = producer.result() or _DONE
+            await results.put(outcome)
+        
+        runner = asyncio.ensure_future(run())
+        try:
+            while True:
+                item = await results.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+    
+    async def close(self):
+        for provider in self.providers.values():
+            await provider.close()
+
+
+def _result(index: int, notification: Dict[str, Any], outcome: Dict[str, Any]) -> Dict[str, Any]:
+    notification_type = notification.get("type")
+    return {
+        "index": index,
+        "type": getattr(notification_type, "value", notification_type),
+        "to": notification.get("to"),
+        **outcome
+    }
+
+
+async def _aiter(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,432 @@
+"""
+NOOR Platform - Skill Demand Index
+Incrementally maintained demand counts over active job postings
+"""
+
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Tuple
+from collections import Counter
+import asyncio
+import logging
+import time
+import uuid
+
+from redis.exceptions import WatchError
+
+logger = logging.getLogger(__name__)
+
+# Rebuilds count into "<prefix>rebuild:<id>:..." and rename into place; the
+# rebuild lock and reconcile marker live there too, outside the rollups
+STAGING_SCOPE = "rebuild:"
+
+def scope_name(industry: Optional[str] = None, location: Optional[str] = None) -> str:
+    """Name of the rollup covering postings matching the given filters"""
+    parts = []
+    if industry:
+        parts.append(f"industry={industry}")
+    if location:
+        parts.append(f"location={location}")
+    return "|".join(parts) or "all"
+
+
+def posting_counts(job: Dict[str, Any]) -> Dict[str, Counter]:
+    """
+    Per-dimension counts a single posting contributes
+    
+    Dimensions: required, preferred, skills (both), skills_lower (both,
+    lower-cased), industry, location, employment_type
+    """
+    required = job.get("required_skills") or []
+    preferred = job.get("preferred_skills") or []
+    
+    counts = {
+        "required": Counter(required),
+        "preferred": Counter(preferred),
+        "skills": Counter(required + preferred),
+        "skills_lower": Counter(skill.lower() for skill in required + preferred)
+    }
+    for field in ("industry", "location", "employment_type"):
+        counts[field] = Counter([job[field]] if job.get(field) else [])
+    return counts
+
+
+def posting_scopes(job: Dict[str, Any]) -> List[str]:
+    """Every rollup a posting belongs to"""
+    industry = job.get("industry")
+    location = job.get("location")
+    
+    scopes = ["all"]
+    if industry:
+        scopes.append(scope_name(industry=industry))
+    if location:
+        scopes.append(scope_name(location=location))
+    if industry and location:
+        scopes.append(scope_name(industry=industry, location=location))
+    return scopes
+
+
+class SkillDemandIndex:
+    """
+    Demand rollups over active job postings
+    
+    Each (scope, dimension) pair is a Redis sorted set of value -> count,
+    where a scope is all postings, one industry, one location, or one
+    industry in one location. Job posting writers (JobPostingService) open
+    and close postings here; each call adjusts every set it touches in one
+    pipeline, and a set of open posting ids makes both operations
+    idempotent. Reads are ZREVRANGE, O(log n + k).
+    
+    app.worker recounts every active posting periodically (reconcile) to
+    repair drift from missed or failed updates; readers keep using the
+    current rollups until the recount is swapped in.
+    
+    Without Redis the same rollups are kept in process (single worker and
+    tests only).
+    """
+    
+    def __init__(self, redis_client=None, prefix: str = "noor:demand:", lock_ttl: int = 600):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self._local: Dict[str, Counter] = {}
+        self._local_jobs: Counter = Counter()
+        self._local_open: set = set()
+        self._local_built = False
+        self._local_reconciled_at: Optional[float] = None
+    
+    def use_redis(self, redis_client):
+        """Keep rollups in Redis, shared by all workers"""
+        self.redis = redis_client
+    
+    def _key(self, scope: str, dimension: str) -> str:
+        return f"{self.prefix}{scope}:{dimension}"
+    
+    @property
+    def _open_key(self) -> str:
+        return f"{self.prefix}open"
+    
+    @property
+    def _jobs_key(self) -> str:
+        return f"{self.prefix}jobs"
+    
+    @property
+    def _built_key(self) -> str:
+        return f"{self.prefix}built"
+    
+    @property
+    def _lock_key(self) -> str:
+        return f"{self.prefix}{STAGING_SCOPE}lock"
+    
+    @property
+    def _reconciled_key(self) -> str:
+        return f"{self.prefix}{STAGING_SCOPE}reconciled"
+    
+    async def add_posting(self, job: Dict[str, Any]) -> bool:
+        """
+        Count a posting that became active
+        
+        Returns:
+            False if the posting was already counted
+        """
+        return await self._apply([job], 1) == 1
+    
+    async def add_postings(self, jobs: List[Dict[str, Any]]) -> int:
+        """
+        Count many active postings in two round trips
+        
+        Returns:
+            Number of postings that were not already counted
+        """
+        return await self._apply(jobs, 1)
+    
+    async def remove_posting(self, job: Dict[str, Any]) -> bool:
+        """
+        Stop counting a posting that was closed, filled or deleted
+        
+        job must carry the same skills/industry/location it was added
+        with.
+        
+        Returns:
+            False if the posting was not counted
+        """
+        return await self._apply([job], -1) == 1
+    
+    async def update_posting(self, old_job: Optional[Dict[str, Any]], new_job: Dict[str, Any]):
+        """
+        Apply a status or content change to a posting
+        
+        Call from job posting writers with the row before and after the
+        change (old_job None for inserts).
+        """
+        if old_job and old_job.get("status", "active") == "active":
+            await self.remove_posting(old_job)
+        if new_job.get("status", "active") == "active":
+            await self.add_posting(new_job)
+    
+    async def _apply(self, jobs: List[Dict[str, Any]], sign: int) -> int:
+        if self.redis is None:
+            changed = []
+            for job in jobs:
+                job_id = str(job["id"])
+                if (job_id in self._local_open) == (sign > 0):
+                    continue
+                if sign > 0:
+                    self._local_open.add(job_id)
+                else:
+                    self._local_open.discard(job_id)
+                changed.append(job)
+        else:
+            # SADD/SREM are atomic, so only one caller applies a given change
+            pipe = self.redis.pipeline(transaction=False)
+            for job in jobs:
+                if sign > 0:
+                    pipe.sadd(self._open_key, str(job["id"]))
+                else:
+                    pipe.srem(self._open_key, str(job["id"]))
+            changed = [job for job, applied in zip(jobs, await pipe.execute()) if applied]
+        if not changed:
+            return 0
+        
+        # Sum the batch first so each value is incremented once
+        job_counts: Counter = Counter()
+        rollups: Dict[str, Counter] = {}
+        for job in changed:
+            counts = posting_counts(job)
+            for scope in posting_scopes(job):
+                job_counts[scope] += sign
+                for dimension, counter in counts.items():
+                    rollup = rollups.setdefault(self._key(scope, dimension), Counter())
+                    for value, count in counter.items():
+                        rollup[value] += sign * count
+        
+        if self.redis is None:
+            self._local_jobs.update(job_counts)
+            for key, deltas in rollups.items():
+                rollup = self._local.setdefault(key, Counter())
+                for value, delta in deltas.items():
+                    rollup[value] += delta
+                    if rollup[value] <= 0:
+                        del rollup[value]
+            return len(changed)
+        
+        pipe = self.redis.pipeline(transaction=True)
+        for scope, delta in job_counts.items():
+            pipe.hincrby(self._jobs_key, scope, delta)
+        for key, deltas in rollups.items():
+            for value, delta in deltas.items():
+                pipe.zincrby(key, delta, value)
+            if sign < 0:
+                pipe.zremrangebyscore(key, "-inf", 0)
+        await pipe.execute()
+        return len(changed)
+    
+    async def rebuild(self, job_batches: AsyncIterable[List[Dict[str, Any]]]):
+        """
+        Recount from scratch
+        
+        Counts go into a staging index under a temporary prefix, one
+        pipeline per batch, and replace the live rollups in one
+        transaction, so readers keep the current rollups until then and
+        never see a partial recount. Changes applied while a rebuild runs
+        are overwritten by it and picked up by the next one.
+        
+        Args:
+            job_batches: Batches of active postings
+        """
+        staging = SkillDemandIndex(self.redis, prefix=f"{self.prefix}{STAGING_SCOPE}{uuid.uuid4().hex}:")
+        total = 0
+        try:
+            async for jobs in job_batches:
+                await staging.add_postings(jobs)
+                total += len(jobs)
+            await self._swap_in(staging)
+        finally:
+            # No-op after a successful swap; drops partial counts otherwise
+            await staging.clear()
+        logger.info(f"Skill demand index rebuilt from {total} active job postings")
+    
+    async def try_rebuild(self, job_batches: AsyncIterable[List[Dict[str, Any]]]) -> bool:
+        """
+        Rebuild unless another process is rebuilding
+        
+        The rebuild lock is a SET NX EX key, so at most one worker in the
+        cluster recounts at a time and a crashed one releases it after
+        lock_ttl seconds.
+        
+        Returns:
+            False if another process holds the lock
+        """
+        if self.redis is None:
+            await self.rebuild(job_batches)
+            return True
+        
+        token = uuid.uuid4().hex
+        if not await self.redis.set(self._lock_key, token, nx=True, ex=self.lock_ttl):
+            return False
+        try:
+            await self.rebuild(job_batches)
+        finally:
+            await self._release_lock(token)
+        return True
+    
+    async def _release_lock(self, token: str):
+        # Delete only our own lock, in case it expired and was taken over
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self._lock_key)
+                if await pipe.get(self._lock_key) == token:
+                    pipe.multi()
+                    pipe.delete(self._lock_key)
+                    await pipe.execute()
+            except WatchError:
+                pass
+    
+    async def ensure_built(
+        self,
+        job_batches: Callable[[], AsyncIterable[List[Dict[str, Any]]]],
+        poll_interval: float = 0.5
+    ):
+        """
+        Build the index if it has never been built
+        
+        Used by readers on a cold start; when another process holds the
+        rebuild lock, waits for its swap (up to lock_ttl seconds).
+        """
+        deadline = time.monotonic() + self.lock_ttl
+        while not await self.is_built():
+            if await self.try_rebuild(job_batches()):
+                return
+            if time.monotonic() >= deadline:
+                logger.warning("Skill demand index still not built; serving empty rollups")
+                return
+            await asyncio.sleep(poll_interval)
+    
+    async def reconcile(self, job_batches: Callable[[], AsyncIterable[List[Dict[str, Any]]]], interval: int) -> bool:
+        """
+        Periodic recount, at most once per interval across all processes
+        
+        Returns:
+            True if this call rebuilt the index
+        """
+        if self.redis is None:
+            now = time.monotonic()
+            if self._local_reconciled_at is not None and now - self._local_reconciled_at < interval:
+                return False
+            self._local_reconciled_at = now
+        elif not await self.redis.set(self._reconciled_key, 1, nx=True, ex=interval):
+            return False
+        return await self.try_rebuild(job_batches())
+    
+    async def _swap_in(self, staging: "SkillDemandIndex"):
+        if self.redis is None:
+            self._local = {
+                self.prefix + key[len(staging.prefix):]: rollup for key, rollup in staging._local.items()
+            }
+            self._local_jobs = staging._local_jobs
+            self._local_open = staging._local_open
+            self._local_built = True
+            staging._local, staging._local_jobs, staging._local_open = {}, Counter(), set()
+            return
+        
+        staged = [key async for key in self.redis.scan_iter(match=f"{staging.prefix}*", count=1000)]
+        stale = set(await self._live_keys())
+        
+        pipe = self.redis.pipeline(transaction=True)
+        for key in staged:
+            live_key = self.prefix + key[len(staging.prefix):]
+            pipe.rename(key, live_key)
+            stale.discard(live_key)
+        if stale:
+            pipe.unlink(*stale)
+        pipe.set(self._built_key, 1)
+        await pipe.execute()
+    
+    async def _live_keys(self) -> List[str]:
+        staging = f"{self.prefix}{STAGING_SCOPE}"
+        return [
+            key async for key in self.redis.scan_iter(match=f"{self.prefix}*", count=1000)
+            if not key.startswith(staging)
+        ]
+    
+    async def clear(self):
+        """Drop every rollup"""
+        if self.redis is None:
+            self._local.clear()
+            self._local_jobs.clear()
+            self._local_open.clear()
+            self._local_built = False
+            return
+        
+        keys = await self._live_keys()
+        for i in range(0, len(keys), 500):
+            await self.redis.unlink(*keys[i:i + 500])
+    
+    async def is_built(self) -> bool:
+        """Whether a rebuild has swapped in rollups"""
+        if self.redis is None:
+            return self._local_built
+        return bool(await self.redis.exists(self._built_key))
+    
+    async def top(
+        self,
+        dimension: str,
+        k: Optional[int] = 10,
+        industry: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Most frequent values of a dimension, like Counter.most_common(k)
+        """
+        key = self._key(scope_name(industry, location), dimension)
+        
+        if self.redis is None:
+            return self._local.get(key, Counter()).most_common(k)
+        
+        entries = await self.redis.zrevrange(key, 0, (k or 0) - 1, withscores=True)
+        return [(value, int(score)) for value, score in entries]
+    
+    async def counts(
+        self,
+        dimension: str,
+        values: List[str],
+        industry: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> Dict[str, int]:
+        """Counts for specific values of a dimension"""
+        key = self._key(scope_name(industry, location), dimension)
+        
+        if self.redis is None:
+            rollup = self._local.get(key, Counter())
+            return {value: rollup[value] for value in values}
+        
+        scores = await self.redis.zmscore(key, values)
+        return {value: int(score or 0) for value, score in zip(values, scores)}
+    
+    async def unique_count(
+        self,
+        dimension: str,
+        industry: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> int:
+        """Number of distinct values of a dimension"""
+        key = self._key(scope_name(industry, location), dimension)
+        
+        if self.redis is None:
+            return len(self._local.get(key, ()))
+        return await self.redis.zcard(key)
+    
+    async def job_count(self, industry: Optional[str] = None, location: Optional[str] = None) -> int:
+        """Number of active postings in a scope"""
+        scope = scope_name(industry, location)
+        
+        if self.redis is None:
+            return self._local_jobs[scope]
+        return int(await self.redis.hget(self._jobs_key, scope) or 0)
+
+
+# Global skill demand index
+skill_demand_index = SkillDemandIndex()
+
+
+def get_skill_demand_index() -> SkillDemandIndex:
+    """Get global skill demand index"""
+    return skill_demand_index
@@ -0,0 +1,100 @@
+"""
+NOOR Platform - Background Worker
+
+Relays the transactional outbox to the Redis job queue, processes the
+queue (notifications, agent task logs) and periodically recounts the skill
+demand rollups. Run one or more next to the API:
+
+    python -m app.worker
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.agents.data_retrieval_agent import get_data_retrieval_agent
+from app.core.config import settings
+from app.core.job_queue import get_job_queue
+from app.core.logging import setup_logging
+from app.core.outbox import OutboxRelay, SQLOutboxStore
+from app.db.mongodb import init_mongodb, close_mongodb
+from app.db.redis import init_redis, get_redis, close_redis
+from app.services.job_handlers import register_default_handlers
+from app.services.skill_demand_index import get_skill_demand_index
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_skill_demand(stop: asyncio.Event, interval: int):
+    """
+    Recount the skill demand rollups every interval seconds
+    
+    Every worker runs this loop; the index's Redis markers let one of
+    them recount per interval while the API keeps serving the current
+    rollups.
+    """
+    index = get_skill_demand_index()
+    data_agent = get_data_retrieval_agent()
+    # Poll well within the interval; the first worker to find the marker
+    # expired does the recount
+    check_every = max(1, interval // 10)
+    while not stop.is_set():
+        try:
+            await index.reconcile(data_agent.iter_active_job_postings, interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Skill demand reconcile failed: {e}")
+        
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=check_every)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker(stop: asyncio.Event):
+    """
+    Run the outbox relay and the queue consumer until stop is set
+    """
+    await init_redis()
+    await init_mongodb()
+    
+    queue = get_job_queue()
+    queue.use_redis(await get_redis())
+    queue.max_attempts = settings.JOB_MAX_ATTEMPTS
+    queue.concurrency = settings.JOB_CONCURRENCY
+    register_default_handlers(queue)
+    
+    demand_index = get_skill_demand_index()
+    demand_index.use_redis(await get_redis())
+    demand_index.lock_ttl = settings.SKILL_DEMAND_REBUILD_LOCK_SECONDS
+    
+    relay = OutboxRelay(SQLOutboxStore(), queue, batch_size=settings.OUTBOX_RELAY_BATCH_SIZE)
+    
+    logger.info(f"👷 Worker {queue.consumer} consuming {queue.stream}")
+    try:
+        await asyncio.gather(
+            relay.run(stop),
+            queue.run(batch_size=settings.JOB_BATCH_SIZE, stop=stop),
+            reconcile_skill_demand(stop, settings.SKILL_DEMAND_RECONCILE_SECONDS)
+        )
+    finally:
+        await close_mongodb()
+        await close_redis()
+        logger.info("Worker stopped")
+
+
+def main():
+    setup_logging()
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        loop.run_until_complete(run_worker(stop))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+NOOR Platform - Assessment Scoring Benchmark
+
+Compares scoring a cohort of eight-faculty assessment submissions with the
+per-question AssessmentScorer path (score_competency per competency, then
+score_faculty per faculty) versus the vectorized BatchAssessmentScorer.
+Building COPY rows is timed separately; the database round trips are not.
+
+Usage (from backend/):
+    python -m benchmarks.assessment_scoring --users 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.services.assessment_generator import (
+    FACULTIES,
+    QUESTION_TYPES,
+    AssessmentScorer,
+    BatchAssessmentScorer
+)
+
+
+def build_questions(seed: int):
+    rng = random.Random(seed)
+    return [
+        {
+            "type": question_type,
+            "competency_id": competency["id"],
+            "faculty": faculty_key,
+            "correct_answer": rng.choice("ABCD") if question_type == "multiple_choice" else None
+        }
+        for faculty_key, faculty in FACULTIES.items()
+        for competency in faculty["competencies"]
+        for question_type in QUESTION_TYPES
+    ]
+
+
+def build_answers(questions, users: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    answers = rng.integers(0, 5, size=(users, len(questions)), dtype=np.int16)
+    letter_columns = [i for i, q in enumerate(questions) if q["type"] in ("multiple_choice", "scenario_based")]
+    answers[:, letter_columns] %= 4
+    return answers
+
+
+def per_question(questions, answer_rows):
+    letters = "ABCD"
+    per_competency = len(QUESTION_TYPES)
+    results = []
+    for row in answer_rows:
+        by_faculty = {}
+        for i in range(0, len(questions), per_competency):
+            competency_questions = questions[i:i + per_competency]
+            answers = [
+                letters[code] if q["type"] in ("multiple_choice", "scenario_based") else code
+                for q, code in zip(competency_questions, row[i:i + per_competency])
+            ]
+            score = AssessmentScorer.score_competency(competency_questions, answers)
+            by_faculty.setdefault(competency_questions[0]["faculty"], []).append(score)
+        results.append({f: AssessmentScorer.score_faculty(s) for f, s in by_faculty.items()})
+    return results
+
+
+def measure(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--per-question-users", type=int, default=5000,
+                        help="Users scored on the slow path (extrapolated to --users)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    
+    questions = build_questions(seed=42)
+    answers = build_answers(questions, args.users, seed=1)
+    user_ids = [f"user-{i}" for i in range(args.users)]
+    scorer = BatchAssessmentScorer(questions)
+    
+    sample = answers[:args.per_question_users].tolist()
+    per_question_time = measure(lambda: per_question(questions, sample), args.rounds)
+    per_question_time *= args.users / len(sample)
+    
+    batch_time = measure(lambda: scorer.score(answers), args.rounds)
+    records_time = measure(
+        lambda: sum(len(records) for records in scorer.iter_score_records(user_ids, answers)), args.rounds
+    )
+    
+    print(f"users={args.users} questions={len(questions)} competencies={len(scorer.competency_ids)}")
+    print(f"  per-question scorer (extrapolated): {per_question_time * 1000:10.1f} ms")
+    print(f"  batch scoring:                      {batch_time * 1000:10.1f} ms  ({per_question_time / batch_time:.0f}x)")
+    print(f"  batch scoring + COPY rows:          {records_time * 1000:10.1f} ms  ({per_question_time / records_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
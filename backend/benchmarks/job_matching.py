@@ -0,0 +1,89 @@
+"""
+NOOR Platform - Job Matching Benchmark
+
+Compares ranking one user against N jobs with the per-job rule-based
+matcher (one match_user_to_job-style call per job) versus the vectorized
+BatchJobMatcher. Database and AI calls are excluded, so the per-job
+numbers are a lower bound for the old recommend_jobs_for_user path.
+
+Usage (from backend/):
+    python -m benchmarks.job_matching --jobs 10000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.ai_skill_matching_service import AISkillMatchingService
+from app.services.batch_job_matcher import BatchJobMatcher
+
+
+def build_jobs(count: int, vocabulary_size: int, seed: int):
+    rng = random.Random(seed)
+    skills = [f"skill-{i}" for i in range(vocabulary_size)]
+    return [
+        {
+            "required_skills": rng.sample(skills, rng.randint(3, 10)),
+            "optional_skills": rng.sample(skills, rng.randint(0, 6))
+        }
+        for _ in range(count)
+    ], skills
+
+
+async def per_job(service, user_skills, jobs, top_n):
+    results = []
+    for job in jobs:
+        results.append(await service._rule_based_matching(user_skills, job))
+    results.sort(key=lambda r: r["match_score"], reverse=True)
+    return results[:top_n]
+
+
+def batch(user_skills, jobs, top_n):
+    matcher = BatchJobMatcher(jobs)
+    return matcher.top_k([skill["skill_name"] for skill in user_skills], top_n)
+
+
+def measure(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--user-skills", type=int, default=25)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    
+    jobs, skills = build_jobs(args.jobs, args.vocabulary, seed=42)
+    user_skills = [{"skill_name": name} for name in random.Random(1).sample(skills, args.user_skills)]
+    service = AISkillMatchingService(db=None)
+    
+    loop = asyncio.new_event_loop()
+    per_job_time = measure(
+        lambda: loop.run_until_complete(per_job(service, user_skills, jobs, args.top_n)), args.rounds
+    )
+    loop.close()
+    
+    batch_time = measure(lambda: batch(user_skills, jobs, args.top_n), args.rounds)
+    
+    matcher = BatchJobMatcher(jobs)
+    names = [skill["skill_name"] for skill in user_skills]
+    score_time = measure(lambda: matcher.top_k(names, args.top_n), args.rounds)
+    
+    print(f"jobs={args.jobs} vocabulary={args.vocabulary} user_skills={args.user_skills}")
+    print(f"  per-job matcher:        {per_job_time * 1000:8.2f} ms")
+    print(f"  batch (incl. encoding): {batch_time * 1000:8.2f} ms  ({per_job_time / batch_time:.1f}x)")
+    print(f"  batch (scoring only):   {score_time * 1000:8.2f} ms  ({per_job_time / score_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
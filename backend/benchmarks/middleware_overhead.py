@@ -0,0 +1,162 @@
+"""
+NOOR Platform - Middleware Overhead Benchmark
+
+Measures per-request overhead of the full middleware stack (timing/logging,
+rate limiting, security headers, GZip) in its previous BaseHTTPMiddleware
+form versus the pure-ASGI middlewares, by driving the ASGI apps directly.
+
+Usage (from backend/):
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware, RequestTimingMiddleware
+from app.middleware.rate_limiter import RateLimiter
+
+UNLIMITED = 10 ** 9
+
+
+async def ping(request):
+    return JSONResponse({"success": True, "status": "healthy"})
+
+
+def build_app() -> Starlette:
+    return Starlette(routes=[Route("/api/v1/ping", ping)])
+
+
+# Previous implementations, kept here only as the comparison baseline
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.limiter = RateLimiter(UNLIMITED, UNLIMITED)
+    
+    async def dispatch(self, request, call_next):
+        client_id = self.limiter.get_client_id(request)
+        _, rate_info = self.limiter.check_rate_limit(client_id)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(rate_info["limit"])
+        response.headers["X-RateLimit-Remaining"] = str(rate_info["remaining"])
+        response.headers["X-RateLimit-Reset"] = str(rate_info["reset"])
+        return response
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.headers = SecurityHeadersMiddleware(None).headers
+    
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for header, value in self.headers.items():
+            response.headers[header] = value
+        return response
+
+
+async def legacy_process_time(request, call_next):
+    start_time = time.time()
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = str(time.time() - start_time)
+    return response
+
+
+async def legacy_log_requests(request, call_next):
+    logging.getLogger("app.main").info(f"📥 {request.method} {request.url.path}")
+    response = await call_next(request)
+    logging.getLogger("app.main").info(f"📤 {request.method} {request.url.path} - Status: {response.status_code}")
+    return response
+
+
+def build_legacy_stack() -> Starlette:
+    app = build_app()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    app.add_middleware(LegacySecurityHeadersMiddleware)
+    app.add_middleware(LegacyRateLimitMiddleware)
+    app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_process_time)
+    app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_log_requests)
+    return app
+
+
+def build_asgi_stack() -> Starlette:
+    app = build_app()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=UNLIMITED, requests_per_hour=UNLIMITED)
+    app.add_middleware(RequestTimingMiddleware)
+    return app
+
+
+async def call(app, scope):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        pass
+    
+    await app(dict(scope), receive, send)
+
+
+async def measure(app, requests: int) -> list:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/ping",
+        "raw_path": b"/api/v1/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000)
+    }
+    
+    # Warm up routing, middleware stack construction and the limiter
+    for _ in range(min(500, requests)):
+        await call(app, scope)
+    
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await call(app, scope)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(name: str, timings: list, baseline: float = None) -> float:
+    timings = sorted(timings)
+    mean = statistics.fmean(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    overhead = "" if baseline is None else f"  overhead {(mean - baseline) * 1e6:8.1f} µs"
+    print(f"{name:<22} mean {mean * 1e6:8.1f} µs  p50 {p50 * 1e6:8.1f} µs  p99 {p99 * 1e6:8.1f} µs{overhead}")
+    return mean
+
+
+async def main(requests: int):
+    # Request logging is part of the stack; keep handlers out of the numbers
+    logging.disable(logging.INFO)
+    
+    baseline = summarize("no middleware", await measure(build_app(), requests))
+    legacy = summarize("BaseHTTPMiddleware", await measure(build_legacy_stack(), requests), baseline)
+    asgi = summarize("pure ASGI", await measure(build_asgi_stack(), requests), baseline)
+    
+    print(f"\nStack overhead reduced by {(legacy - baseline) / max(asgi - baseline, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,90 @@
+"""
+NOOR Platform - Bulk Notification Delivery Benchmark
+
+Compares sending N notifications one at a time (the previous
+send_bulk_notifications loop) with BulkNotificationSender, both against
+LocalStubProvider with a fixed per-request latency, so no network or
+provider account is needed.
+
+Usage (from backend/):
+    python -m benchmarks.notification_delivery --notifications 5000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.services.notification_delivery import BulkNotificationSender, LocalStubProvider
+
+
+def build_notifications(count: int):
+    for i in range(count):
+        if i % 5 == 0:
+            yield {"type": "sms", "to": f"+9715{i:08d}", "message": "Your application was received"}
+        else:
+            yield {"type": "email", "to": f"user{i}@example.com", "subject": "Job alert", "body": "New jobs " * 50}
+
+
+async def sequential(count: int, latency: float):
+    providers = {"email": LocalStubProvider("email", latency), "sms": LocalStubProvider("sms", latency)}
+    details = []
+    for notification in build_notifications(count):
+        result = (await providers[notification["type"]].send_batch([notification]))[0]
+        details.append({"notification": notification, "result": result})
+    return len(details)
+
+
+async def bulk(count: int, latency: float, email_batch: int, email_workers: int, sms_workers: int):
+    sender = BulkNotificationSender(
+        {
+            "email": LocalStubProvider("email", latency, max_batch_size=email_batch),
+            "sms": LocalStubProvider("sms", latency)
+        },
+        concurrency={"email": email_workers, "sms": sms_workers}
+    )
+    delivered = 0
+    async for result in sender.deliver(build_notifications(count)):
+        delivered += result["delivered"]
+    return delivered
+
+
+def measure(coro_fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(coro_fn())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notifications", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per provider request")
+    parser.add_argument("--sequential-notifications", type=int, default=200,
+                        help="Notifications sent on the slow path (extrapolated)")
+    parser.add_argument("--email-batch", type=int, default=1000)
+    parser.add_argument("--email-workers", type=int, default=8)
+    parser.add_argument("--sms-workers", type=int, default=16)
+    args = parser.parse_args()
+    
+    sample = min(args.sequential_notifications, args.notifications)
+    seq_time, seq_peak = measure(lambda: sequential(sample, args.latency))
+    seq_time *= args.notifications / sample
+    
+    bulk_time, bulk_peak = measure(lambda: bulk(
+        args.notifications, args.latency, args.email_batch, args.email_workers, args.sms_workers
+    ))
+    
+    print(f"notifications={args.notifications} latency={args.latency * 1000:.0f} ms/request")
+    print(f"  sequential (extrapolated): {seq_time:8.2f} s  ({args.notifications / seq_time:8.0f}/s)")
+    print(f"  bulk sender:               {bulk_time:8.2f} s  ({args.notifications / bulk_time:8.0f}/s)  "
+          f"{seq_time / bulk_time:.0f}x")
+    print(f"  peak memory: sequential {seq_peak * args.notifications / sample / 1e6:.1f} MB (extrapolated), "
+          f"bulk {bulk_peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
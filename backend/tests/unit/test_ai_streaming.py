@@ -0,0 +1,162 @@
+"""
+Unit tests for streaming AI responses
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.api.v1.endpoints import ai_features
+from app.core.ai_client import ClaudeAIClient
+from app.core.partial_json import PartialJSONParser
+from app.db.postgres import get_db
+from app.services.ai_career_recommendations_service import AICareerRecommendationsService
+
+RESPONSE = 'Sure:\n{"score": 7.5, "roles": [{"title": "Lead, Data", "note": "a \\"}\\" b"}], "tags": ["x"], "done": true}'
+
+
+class FakeStreamingGateway:
+    """Gateway stand-in that streams a canned response in small chunks"""
+    
+    has_anthropic = True
+    
+    def __init__(self, response: str = RESPONSE, chunk_size: int = 5):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.calls = 0
+    
+    async def stream(self, **kwargs):
+        self.calls += 1
+        for i in range(0, len(self.response), self.chunk_size):
+            await asyncio.sleep(0)
+            yield self.response[i:i + self.chunk_size]
+
+
+class TestPartialJSONParser:
+    """Tests for incremental JSON parsing"""
+    
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, len(RESPONSE)])
+    def test_fields_match_full_parse(self, chunk_size):
+        """Test every chunking yields each top-level field once, in order"""
+        parser = PartialJSONParser()
+        fields = []
+        for i in range(0, len(RESPONSE), chunk_size):
+            fields.extend(parser.feed(RESPONSE[i:i + chunk_size]))
+        
+        expected = json.loads(RESPONSE[RESPONSE.index("{"):])
+        assert fields == list(expected.items())
+        assert parser.result() == expected
+    
+    def test_fields_emitted_before_object_closes(self):
+        """Test a field is available as soon as its value is complete"""
+        parser = PartialJSONParser()
+        assert parser.feed('{"a": [1, 2') == []
+        assert parser.feed('], "b": "x') == [("a", [1, 2])]
+        assert parser.result() is None
+        assert parser.feed('"}') == [("b", "x")]
+        assert parser.result() == {"a": [1, 2], "b": "x"}
+    
+    def test_invalid_member_raises(self):
+        """Test malformed members raise ValueError"""
+        parser = PartialJSONParser()
+        with pytest.raises(ValueError):
+            parser.feed('{"a": nope, ')
+
+
+class TestStructuredOutputStream:
+    """Tests for ClaudeAIClient.stream_structured_output_async"""
+    
+    def test_stream_then_cache_hit(self):
+        """Test a streamed output is cached and replayed without a call"""
+        client = ClaudeAIClient()
+        client.gateway = FakeStreamingGateway()
+        
+        async def collect():
+            return [
+                field
+                async for field in client.stream_structured_output_async(
+                    prompt="stream test prompt",
+                    output_schema={"score": "float"},
+                    cache_site="stream_test"
+                )
+            ]
+        
+        first = asyncio.run(collect())
+        second = asyncio.run(collect())
+        
+        assert dict(first) == json.loads(RESPONSE[RESPONSE.index("{"):])
+        assert second == first
+        assert client.gateway.calls == 1
+    
+    def test_unclosed_object_raises(self):
+        """Test a truncated response is an error and is not cached"""
+        client = ClaudeAIClient()
+        client.gateway = FakeStreamingGateway('{"score": 1, "roles": [')
+        
+        async def collect():
+            return [
+                field
+                async for field in client.stream_structured_output_async(
+                    prompt="truncated prompt", cache_site="stream_test"
+                )
+            ]
+        
+        with pytest.raises(ValueError):
+            asyncio.run(collect())
+
+
+class TestStreamingEndpoints:
+    """Tests for stream=true on the AI feature endpoints"""
+    
+    @pytest.fixture
+    def client(self, monkeypatch):
+        async def events(user_id):
+            yield {"event": "field", "key": "career_progression_score", "value": 7.0}
+            yield {"event": "result", "data": {"success": True, "user_id": user_id}}
+        
+        async def stream_career_recommendations(self, user_id):
+            return events(user_id)
+        
+        async def generate_career_recommendations(self, user_id):
+            return {"success": True, "user_id": user_id}
+        
+        monkeypatch.setattr(
+            AICareerRecommendationsService, "stream_career_recommendations", stream_career_recommendations
+        )
+        monkeypatch.setattr(
+            AICareerRecommendationsService, "generate_career_recommendations", generate_career_recommendations
+        )
+        
+        app = FastAPI()
+        app.include_router(ai_features.router)
+        app.dependency_overrides[get_db] = lambda: None
+        return TestClient(app)
+    
+    def test_ndjson(self, client):
+        """Test NDJSON is the default stream format"""
+        response = client.get("/ai/career/recommendations/u1?stream=true")
+        
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [event["event"] for event in events] == ["field", "result"]
+        assert events[-1]["data"]["user_id"] == "u1"
+    
+    def test_sse(self, client):
+        """Test SSE is used when the client accepts it"""
+        response = client.get(
+            "/ai/career/recommendations/u1?stream=true",
+            headers={"Accept": "text/event-stream"}
+        )
+        
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: field\ndata: ")
+        assert "event: result\n" in response.text
+    
+    def test_non_streaming_unchanged(self, client):
+        """Test the plain JSON response is still the default"""
+        response = client.get("/ai/career/recommendations/u1")
+        
+        assert response.json() == {"success": True, "user_id": "u1"}
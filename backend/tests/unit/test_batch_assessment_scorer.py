@@ -0,0 +1,136 @@
+"""
+Unit tests for the vectorized assessment scorer
+"""
+
+import asyncio
+import random
+
+import numpy as np
+
+from app.services.assessment_generator import (
+    FACULTIES,
+    QUESTION_TYPES,
+    SCORE_COLUMNS,
+    AssessmentScorer,
+    BatchAssessmentScorer,
+    encode_answers
+)
+
+
+def build_questions(seed: int = 3):
+    rng = random.Random(seed)
+    questions = []
+    for faculty_key, faculty in FACULTIES.items():
+        for competency in faculty["competencies"]:
+            for question_type in QUESTION_TYPES:
+                questions.append({
+                    "type": question_type,
+                    "competency_id": competency["id"],
+                    "faculty": faculty_key,
+                    "correct_answer": rng.choice("ABCD") if question_type == "multiple_choice" else None
+                })
+    return questions
+
+
+def random_submissions(questions, count: int, seed: int = 11):
+    rng = random.Random(seed)
+    return [
+        [
+            rng.choice("ABCD") if q["type"] in ("multiple_choice", "scenario_based") else rng.randint(0, 4)
+            for q in questions
+        ]
+        for _ in range(count)
+    ]
+
+
+def per_question_scores(questions, answers):
+    """Reference scores from the per-question AssessmentScorer path"""
+    by_faculty = {}
+    for i in range(0, len(questions), len(QUESTION_TYPES)):
+        competency_questions = questions[i:i + len(QUESTION_TYPES)]
+        score = AssessmentScorer.score_competency(competency_questions, answers[i:i + len(QUESTION_TYPES)])
+        by_faculty.setdefault(competency_questions[0]["faculty"], []).append(score)
+    return {faculty: AssessmentScorer.score_faculty(scores) for faculty, scores in by_faculty.items()}
+
+
+class FakeCopyConnection:
+    """asyncpg connection stand-in recording COPY calls"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def copy_records_to_table(self, table, records, columns):
+        self.calls.append((table, list(records), columns))
+
+
+class TestBatchAssessmentScorer:
+    """Tests that batch scoring agrees with AssessmentScorer"""
+    
+    def test_scores_match_per_question_path(self):
+        """Test every competency and faculty score and rating matches"""
+        questions = build_questions()
+        submissions = random_submissions(questions, 50)
+        scorer = BatchAssessmentScorer(questions)
+        
+        scores = scorer.score(encode_answers(submissions))
+        
+        for row, answers in enumerate(submissions):
+            expected = per_question_scores(questions, answers)
+            for col, faculty in enumerate(scorer.faculties):
+                assert scores["faculty_scores"][row, col] == expected[faculty]["total_score"]
+                assert scores["faculty_percentages"][row, col] == expected[faculty]["percentage"]
+                assert scores["faculty_ratings"][row, col] == expected[faculty]["rating"]
+                
+                competency_scores = expected[faculty]["competency_scores"]
+                competency_cols = [
+                    i for i, f in enumerate(scorer.competency_faculty) if f == faculty
+                ]
+                assert [scores["competency_scores"][row, i] for i in competency_cols] == [
+                    c["total_score"] for c in competency_scores
+                ]
+                assert [scores["competency_ratings"][row, i] for i in competency_cols] == [
+                    c["rating"] for c in competency_scores
+                ]
+    
+    def test_rating_boundaries(self):
+        """Test thresholds are inclusive lower bounds, as in get_rating"""
+        percentages = np.array([0, 59.9, 60, 69.9, 70, 80, 89.9, 90, 100])
+        
+        assert list(BatchAssessmentScorer.ratings(percentages)) == [
+            AssessmentScorer.get_rating(p) for p in percentages
+        ]
+    
+    def test_missing_answers_score_zero(self):
+        """Test blank and out-of-range answers earn no points"""
+        questions = build_questions()[:4]
+        scorer = BatchAssessmentScorer(questions)
+        
+        points = scorer.question_points(encode_answers([[None, 9, "", 4]]))
+        
+        assert points.tolist() == [[0, 0, 0, 4]]
+    
+    def test_copy_scores_streams_chunks(self):
+        """Test rows are copied one chunk at a time with the score columns"""
+        questions = build_questions()
+        submissions = random_submissions(questions, 5)
+        scorer = BatchAssessmentScorer(questions)
+        connection = FakeCopyConnection()
+        
+        written = asyncio.run(scorer.copy_scores(
+            connection, [f"user-{i}" for i in range(5)], encode_answers(submissions), chunk_size=2
+        ))
+        
+        rows_per_user = len(scorer.competency_ids) + len(scorer.faculties)
+        assert written == 5 * rows_per_user
+        assert [len(records) for _, records, _ in connection.calls] == [
+            2 * rows_per_user, 2 * rows_per_user, rows_per_user
+        ]
+        
+        table, records, columns = connection.calls[0]
+        assert table == "assessment_scores"
+        assert columns == SCORE_COLUMNS
+        faculty_row = next(r for r in records if r[0] == "user-0" and r[2] is None)
+        expected = per_question_scores(questions, submissions[0])[faculty_row[1]]
+        assert faculty_row[3:] == (
+            expected["total_score"], expected["max_score"], expected["percentage"], expected["rating"]
+        )
@@ -0,0 +1,63 @@
+"""
+Unit tests for the vectorized batch job matcher
+"""
+
+import asyncio
+import random
+
+from app.services.ai_skill_matching_service import AISkillMatchingService
+from app.services.batch_job_matcher import BatchJobMatcher
+
+SKILLS = [f"skill-{i}" for i in range(40)]
+
+
+def random_jobs(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "required_skills": rng.sample(SKILLS, rng.randint(0, 6)),
+            "optional_skills": rng.sample(SKILLS, rng.randint(0, 4))
+        }
+        for _ in range(count)
+    ]
+
+
+class TestBatchJobMatcher:
+    """Tests that batch scoring agrees with per-job rule-based matching"""
+    
+    def test_scores_match_rule_based_matching(self):
+        """Test every job gets the same score and recommendation"""
+        jobs = random_jobs(300)
+        user_skills = [{"skill_name": name.upper()} for name in SKILLS[:15]]
+        service = AISkillMatchingService(db=None)
+        
+        expected = [
+            asyncio.run(service._rule_based_matching(user_skills, job))
+            for job in jobs
+        ]
+        results = BatchJobMatcher(jobs).top_k([s["skill_name"] for s in user_skills], len(jobs))
+        
+        by_index = {result["job_index"]: result for result in results}
+        for i, match in enumerate(expected):
+            for field in ("match_score", "recommendation", "matched_skills", "total_required_skills"):
+                assert by_index[i][field] == match[field]
+    
+    def test_top_k_order_is_stable(self):
+        """Test the shortlist matches a stable sort of all scores"""
+        jobs = random_jobs(500, seed=3)
+        matcher = BatchJobMatcher(jobs)
+        names = SKILLS[:10]
+        
+        full = matcher.top_k(names, len(jobs))
+        shortlist = matcher.top_k(names, 10)
+        
+        assert shortlist == full[:10]
+        assert [r["match_score"] for r in full] == sorted((r["match_score"] for r in full), reverse=True)
+    
+    def test_empty_inputs(self):
+        """Test no jobs and unknown skills are handled"""
+        assert BatchJobMatcher([]).top_k(["python"], 5) == []
+        
+        result = BatchJobMatcher([{"required_skills": ["python"]}]).top_k(["cobol"], 5)
+        assert result[0]["match_score"] == 0.0
+        assert result[0]["recommendation"] == "reject"
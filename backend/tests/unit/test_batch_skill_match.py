@@ -0,0 +1,80 @@
+"""
+Unit tests for batched skill-match analysis
+"""
+
+import asyncio
+import re
+
+from app.agents.ai_analysis_agent import AIAnalysisAgent
+
+
+class FakeAIClient:
+    """Scores every job in a prompt 90 and records prompt sizes"""
+    
+    def __init__(self, fail_first: bool = False):
+        self.prompts = []
+        self.fail_first = fail_first
+    
+    def is_available(self):
+        return True
+    
+    async def generate_structured_output_async(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.fail_first and len(self.prompts) == 1:
+            raise ValueError("Invalid JSON response from AI")
+        indexes = [int(i) for i in re.findall(r"^Job (\d+):", prompt, re.MULTILINE)]
+        return {
+            "matches": [
+                {"job_index": i, "match_score": 90, "recommendation": "Strong Match"}
+                for i in indexes
+            ]
+        }
+
+
+def build_agent(client: FakeAIClient) -> AIAnalysisAgent:
+    agent = AIAnalysisAgent()
+    agent.ai_client = client
+    return agent
+
+
+USER_SKILLS = [{"skill_name": "Python"}, {"skill_name": "SQL"}]
+
+GOOD_JOB = {"title": "Data Engineer", "required_skills": ["python", "sql"]}
+POOR_JOB = {"title": "Nurse", "required_skills": ["triage", "phlebotomy"], "preferred_skills": ["icu"]}
+
+
+class TestBatchSkillMatch:
+    """Tests for pre-filtering and chunked prompts"""
+    
+    def test_poor_matches_are_pruned(self):
+        """Test only jobs passing the rule-based filter reach the LLM"""
+        client = FakeAIClient()
+        jobs = [GOOD_JOB, POOR_JOB] * 5
+        
+        results = asyncio.run(build_agent(client).analyze_skill_matches_batch(USER_SKILLS, jobs, chunk_size=2))
+        
+        assert len(client.prompts) == 3
+        assert [r["scored_by"] for r in results] == ["ai", "rule_based"] * 5
+        assert results[0]["match_score"] == 90
+        assert results[1]["recommendation"] == "Not Recommended"
+    
+    def test_failed_chunk_keeps_rule_based_scores(self):
+        """Test one failing prompt does not lose the other chunks"""
+        client = FakeAIClient(fail_first=True)
+        jobs = [GOOD_JOB] * 4
+        
+        results = asyncio.run(build_agent(client).analyze_skill_matches_batch(USER_SKILLS, jobs, chunk_size=2))
+        
+        assert [r["scored_by"] for r in results].count("ai") == 2
+        assert all(r["match_score"] > 0 for r in results)
+    
+    def test_null_skill_columns(self):
+        """Test a posting with NULL skills is scored instead of failing the batch"""
+        client = FakeAIClient()
+        jobs = [GOOD_JOB, {"title": "Intern", "required_skills": None, "preferred_skills": None}]
+        
+        results = asyncio.run(build_agent(client).analyze_skill_matches_batch(USER_SKILLS, jobs))
+        
+        assert len(results) == 2
+        assert results[1]["missing_required_skills"] == []
+        assert all(r["scored_by"] == "ai" for r in results)
@@ -0,0 +1,357 @@
+"""
+Unit tests for the in-process cache manager
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import (
+    COMPRESS_THRESHOLD,
+    CacheManager,
+    RedisCache,
+    SingleFlight,
+    TagVersions,
+    TwoTierCache,
+    cached,
+    deserialize,
+    estimate_size,
+    get_or_compute,
+    invalidate_tags,
+    invalidate_user_cache,
+    make_cache_entry,
+    serialize,
+    should_refresh_early
+)
+
+
+class TestCacheManager:
+    """Tests for CacheManager bounds, expiry and statistics"""
+
+    def test_get_set_roundtrip(self):
+        """Test values are returned until deleted"""
+        cache = CacheManager()
+        cache.set("a", {"x": 1})
+        assert cache.get("a") == {"x": 1}
+
+        cache.delete("a")
+        assert cache.get("a") is None
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first"""
+        cache = CacheManager(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_limit_is_enforced(self):
+        """Test total tracked bytes never exceed max_bytes"""
+        value = "x" * 1000
+        cache = CacheManager(max_bytes=estimate_size(value) * 3)
+        for i in range(10):
+            cache.set(f"k{i}", value)
+
+        stats = cache.get_stats()
+        assert stats["size"] == 3
+        assert stats["bytes"] <= cache.max_bytes
+        assert stats["evictions"] == 7
+
+    def test_oversized_value_is_not_cached(self):
+        """Test a single value larger than the byte limit is skipped"""
+        cache = CacheManager(max_bytes=100)
+        cache.set("big", "x" * 1000)
+        assert cache.get("big") is None
+        assert cache.get_stats()["bytes"] == 0
+
+    def test_sweep_removes_expired_entries(self):
+        """Test expired entries are reclaimed without being read"""
+        cache = CacheManager()
+        cache.set("short", 1, ttl=1)
+        cache.set("long", 2, ttl=60)
+        cache.set("forever", 3)
+
+        cache.ttls["short"] = time.monotonic() - 1
+        cache._expiry_heap = [(exp, k) for k, exp in cache.ttls.items()]
+
+        assert cache.sweep_expired() == 1
+        assert "short" not in cache.cache
+        assert cache.get("long") == 2
+        assert cache.get("forever") == 3
+
+    def test_overwrite_keeps_byte_count_consistent(self):
+        """Test re-setting a key does not double count its size"""
+        cache = CacheManager()
+        cache.set("a", "x" * 100, ttl=60)
+        cache.set("a", "y" * 100, ttl=60)
+        assert cache.get_stats()["bytes"] == estimate_size("y" * 100)
+        assert cache.sweep_expired() == 0
+
+    def test_stats_do_not_expose_keys(self):
+        """Test stats report counters rather than every key"""
+        cache = CacheManager()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.get_stats()
+        assert "keys" not in stats
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 50.0
+
+
+class TestCachedDecorator:
+    """Tests for the @cached decorator on top of the bounded cache"""
+
+    def test_async_function_is_cached(self):
+        """Test an async function is only called once per argument set"""
+        calls = []
+
+        @cached(ttl=60, key_prefix="test")
+        async def compute(x):
+            calls.append(x)
+            return x * 2
+
+        async def run():
+            return [await compute(2), await compute(2), await compute(3)]
+
+        assert asyncio.run(run()) == [4, 4, 6]
+        assert calls == [2, 3]
+
+    def test_sync_function_is_cached(self):
+        """Test a sync function is only called once per argument set"""
+        calls = []
+
+        @cached(ttl=60, key_prefix="test")
+        def compute(x):
+            calls.append(x)
+            return x + 1
+
+        assert compute(1) == 2
+        assert compute(1) == 2
+        assert calls == [1]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the binary Redis client"""
+
+    def __init__(self):
+        self.store = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value):
+        self.store[key] = value
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class TestSerializer:
+    """Tests for the shared-tier serializer"""
+
+    def test_roundtrip(self):
+        """Test native values survive a serialize/deserialize cycle"""
+        value = {"id": 7, "skills": ["python", "sql"], "score": 0.5, "meta": None}
+        assert deserialize(serialize(value)) == value
+
+    def test_large_payload_is_compressed(self):
+        """Test payloads above the threshold are stored compressed"""
+        value = {"text": "a" * (COMPRESS_THRESHOLD * 4)}
+        data = serialize(value)
+        assert len(data) < COMPRESS_THRESHOLD
+        assert deserialize(data) == value
+
+
+class TestTwoTierCache:
+    """Tests for the L1 + Redis L2 cache"""
+
+    def test_l2_hit_refills_l1(self):
+        """Test a value written by another worker is served from Redis then L1"""
+        redis = FakeRedis()
+        cache = TwoTierCache()
+        cache.l2 = RedisCache(redis)
+
+        async def run():
+            redis.store["k"] = serialize({"v": 1})
+            first = await cache.get("k")
+            redis.store.clear()
+            second = await cache.get("k")
+            return first, second
+
+        assert asyncio.run(run()) == ({"v": 1}, {"v": 1})
+
+    def test_set_and_delete_publish_invalidations(self):
+        """Test writes go to both tiers and are broadcast to other workers"""
+        redis = FakeRedis()
+        cache = TwoTierCache(channel="test:invalidate")
+        cache.l2 = RedisCache(redis)
+
+        async def run():
+            await cache.set("k", [1, 2, 3], ttl=60)
+            in_l1 = cache.l1.get("k")
+            await cache.delete("k")
+            return in_l1, await cache.get("k")
+
+        assert asyncio.run(run()) == ([1, 2, 3], None)
+        assert [channel for channel, _ in redis.published] == ["test:invalidate"] * 2
+        assert redis.published[0][1] == f"{cache.instance_id}|k"
+
+
+class TestSingleFlight:
+    """Tests for request coalescing and stale-while-revalidate"""
+
+    def test_concurrent_misses_share_one_call(self):
+        """Test concurrent callers of a cold key trigger one computation"""
+        calls = []
+
+        @cached(ttl=60, key_prefix="coalesce")
+        async def slow(x):
+            calls.append(x)
+            await asyncio.sleep(0.01)
+            return x * 10
+
+        async def run():
+            return await asyncio.gather(*[slow(1) for _ in range(20)])
+
+        assert asyncio.run(run()) == [10] * 20
+        assert calls == [1]
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failing computation raises in all coalesced callers"""
+        flight = SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                *[flight.do("k", boom) for _ in range(3)],
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flight.in_flight("k")
+
+    def test_stale_value_served_while_refreshing(self):
+        """Test an expired entry inside stale_ttl is returned immediately"""
+        store = {}
+
+        async def getter(key):
+            return store.get(key)
+
+        async def setter(key, value, ttl):
+            store[key] = value
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "new"
+
+        async def run():
+            entry = make_cache_entry("old", ttl=60, delta=0.0)
+            entry["expires_at"] = time.time() - 1
+            store["k"] = entry
+
+            first = await get_or_compute(
+                "k", compute, ttl=60, stale_ttl=30, getter=getter, setter=setter
+            )
+            await asyncio.sleep(0.05)
+            second = await get_or_compute(
+                "k", compute, ttl=60, stale_ttl=30, getter=getter, setter=setter
+            )
+            return first, second
+
+        assert asyncio.run(run()) == ("old", "new")
+
+    def test_early_refresh_probability(self):
+        """Test XFetch never fires far from expiry and always fires past it"""
+        entry = make_cache_entry("v", ttl=3600, delta=0.1)
+        assert not should_refresh_early(entry, beta=1.0)
+        assert not should_refresh_early(entry, beta=0)
+
+        entry["expires_at"] = time.time() - 1
+        assert should_refresh_early(entry, beta=1.0)
+
+
+class TestTagInvalidation:
+    """Tests for tag-versioned cache keys"""
+
+    def test_invalidate_tag_drops_only_tagged_entries(self):
+        """Test bumping a user tag misses that user's entries only"""
+        calls = []
+
+        @cached(ttl=60, key_prefix="profile", tags=["user:{user_id}"])
+        async def profile(user_id):
+            calls.append(user_id)
+            return {"id": user_id}
+
+        async def run():
+            await profile(1)
+            await profile(2)
+            await invalidate_tags("user:1")
+            await profile(1)
+            await profile(2)
+
+        asyncio.run(run())
+        assert calls == [1, 2, 1]
+
+    def test_sync_invalidate_user_cache(self):
+        """Test the sync helper invalidates with or without a running loop"""
+        calls = []
+
+        @cached(ttl=60, key_prefix="settings", tags=["user:{user_id}"])
+        async def settings_for(user_id):
+            calls.append(user_id)
+            return {"id": user_id}
+
+        async def scheduled():
+            await settings_for(7)
+            await invalidate_user_cache(7)
+            await settings_for(7)
+
+        asyncio.run(scheduled())
+        asyncio.run(settings_for(8))
+        assert invalidate_user_cache(8) is None
+        asyncio.run(settings_for(8))
+        assert calls == [7, 7, 8, 8]
+
+    def test_tags_require_async_function(self):
+        """Test tags are rejected on sync functions"""
+        with pytest.raises(ValueError):
+            @cached(ttl=60, tags=["jobs"])
+            def jobs():
+                return []
+
+    def test_local_reset_never_reuses_versions(self):
+        """Test overflowing the local tag table cannot resurrect old entries"""
+        versions = TagVersions(max_tags=2)
+
+        async def run():
+            await versions.bump("a")
+            before = await versions.get_many(["a", "b"])
+            await versions.bump("b")
+            await versions.bump("c")
+            after = await versions.get_many(["a", "b"])
+            return before, after
+
+        before, after = asyncio.run(run())
+        assert before[0] not in after
+        assert before[1] not in after
@@ -0,0 +1,106 @@
+"""
+Unit tests for the orchestrator's subtask DAG executor
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.dag_executor import DAGExecutor, validate_dag
+from app.agents.master_orchestrator_v2 import MasterOrchestratorV2
+
+
+def node(subtask_id, depends_on=(), agent="default", **parameters):
+    return {
+        "subtask_id": subtask_id,
+        "agent": agent,
+        "depends_on": list(depends_on),
+        "parameters": parameters
+    }
+
+
+async def sleep_and_echo(subtask):
+    await asyncio.sleep(0.05)
+    return subtask["parameters"]
+
+
+class TestDAGExecutor:
+    """Tests for dependency ordering, concurrency and tracing"""
+    
+    def test_independent_subtasks_run_concurrently(self):
+        """Test wall time follows the longest chain, not the sum"""
+        subtasks = [
+            node("a"),
+            node("b"),
+            node("c", depends_on=["a", "b"])
+        ]
+        
+        results, trace = asyncio.run(DAGExecutor().run(subtasks, sleep_and_echo))
+        
+        assert set(results) == {"a", "b", "c"}
+        assert trace["wall_time"] < 0.14
+        assert trace["sum_of_steps"] >= 0.15
+        assert trace["critical_path"][-1] == "c"
+        assert len(trace["critical_path"]) == 2
+    
+    def test_dependency_results_replace_placeholders(self):
+        """Test a subtask receives its dependency's result"""
+        subtasks = [
+            node("fetch", value=42),
+            node("use", depends_on=["fetch"], input="{{fetch.result}}")
+        ]
+        
+        results, _ = asyncio.run(DAGExecutor().run(subtasks, sleep_and_echo))
+        assert results["use"] == {"input": {"value": 42}}
+    
+    def test_per_agent_cap(self):
+        """Test one agent never runs more than its cap at once"""
+        active = {"now": 0, "peak": 0}
+        
+        async def execute(subtask):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+        
+        subtasks = [node(f"n{i}", agent="data_agent") for i in range(6)]
+        asyncio.run(DAGExecutor(max_concurrency_per_agent=2).run(subtasks, execute))
+        assert active["peak"] == 2
+    
+    def test_failure_is_reraised(self):
+        """Test the original exception propagates and dependents never run"""
+        ran = []
+        
+        async def execute(subtask):
+            ran.append(subtask["subtask_id"])
+            if subtask["subtask_id"] == "a":
+                raise RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(DAGExecutor().run([node("a"), node("b", depends_on=["a"])], execute))
+        assert ran == ["a"]
+    
+    def test_invalid_graphs_rejected(self):
+        """Test cycles and unknown dependencies raise ValueError"""
+        with pytest.raises(ValueError):
+            validate_dag([node("a", depends_on=["b"]), node("b", depends_on=["a"])])
+        with pytest.raises(ValueError):
+            validate_dag([node("a", depends_on=["missing"])])
+
+
+class TestMasterOrchestratorSubtasks:
+    """Tests for the orchestrator's use of the DAG executor"""
+    
+    def test_skill_matching_fetches_in_parallel(self):
+        """Test both fetches overlap and results keep subtask order"""
+        orchestrator = MasterOrchestratorV2()
+        subtasks = asyncio.run(orchestrator._decompose_skill_matching(
+            {"parameters": {"user_id": "u1", "job_id": "j1"}}
+        ))
+        
+        results, trace = asyncio.run(orchestrator._execute_subtasks(subtasks))
+        
+        assert [r["subtask_id"] for r in results] == [s["subtask_id"] for s in subtasks]
+        assert trace["critical_path"][-1] == "calculate_match"
+        assert trace["wall_time"] < trace["sum_of_steps"]
+        assert results[2]["result"]["data"]["user_skills"]["data"] == {"user_id": "u1"}
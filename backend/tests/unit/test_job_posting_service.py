@@ -0,0 +1,94 @@
+"""
+Unit tests for job posting writes and the skill demand index
+"""
+
+import asyncio
+
+from app.models.job_posting import JobPostingCreate, JobPostingStatus
+from app.services.job_posting_service import JobPostingService
+from app.services.skill_demand_index import SkillDemandIndex
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+    
+    def mappings(self):
+        return self
+    
+    def one(self):
+        return self.row
+    
+    def first(self):
+        return self.row
+
+
+class FakeSession:
+    """AsyncSession stand-in holding job_postings rows in a dict"""
+    
+    def __init__(self):
+        self.rows = {}
+        self.commits = 0
+    
+    async def execute(self, statement, params):
+        if str(statement).lstrip().startswith("INSERT"):
+            row = {"id": f"job-{len(self.rows)}", **params}
+            self.rows[row["id"]] = row
+            return FakeResult(row)
+        
+        row = self.rows.get(params["job_id"])
+        if row is None:
+            return FakeResult(None)
+        old_status = row["status"]
+        row["status"] = params["status"]
+        return FakeResult({**row, "old_status": old_status})
+    
+    async def commit(self):
+        self.commits += 1
+
+
+def posting(**overrides):
+    return JobPostingCreate(**{
+        "institution_id": "inst-1",
+        "title": "Data Engineer",
+        "description": "Pipelines",
+        "industry": "Technology",
+        "location": "Dubai",
+        "required_skills": ["Python", "SQL"],
+        "preferred_skills": ["AWS"],
+        **overrides
+    })
+
+
+class TestJobPostingService:
+    """Tests for the posting create/close paths"""
+    
+    def test_create_and_close_update_demand(self):
+        """Test active inserts are counted and closing removes them"""
+        index = SkillDemandIndex()
+        service = JobPostingService(FakeSession(), demand_index=index)
+        
+        async def run():
+            job = await service.create_posting(posting())
+            await service.create_posting(posting(status=JobPostingStatus.DRAFT))
+            after_create = (await index.job_count(), await index.counts("required", ["Python"]))
+            await service.close_posting(job["id"], JobPostingStatus.FILLED)
+            return after_create, await index.job_count(), await index.top("skills", 10)
+        
+        after_create, after_close, skills = asyncio.run(run())
+        
+        assert after_create == (1, {"Python": 1})
+        assert after_close == 0
+        assert skills == []
+    
+    def test_publish_draft_and_missing_posting(self):
+        """Test publishing a draft counts it and unknown ids return None"""
+        index = SkillDemandIndex()
+        service = JobPostingService(FakeSession(), demand_index=index)
+        
+        async def run():
+            draft = await service.create_posting(posting(status=JobPostingStatus.DRAFT))
+            await service.set_status(draft["id"], JobPostingStatus.ACTIVE)
+            return await index.job_count(industry="Technology"), await service.close_posting("missing")
+        
+        assert asyncio.run(run()) == (1, None)
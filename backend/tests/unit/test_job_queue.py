@@ -0,0 +1,200 @@
+"""
+Unit tests for the Redis Streams job queue and the outbox relay
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.job_queue import JobQueue
+from app.core.outbox import OutboxRelay, enqueue_outbox
+from app.db.models.outbox import OutboxMessage
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_queue(**kwargs) -> JobQueue:
+    queue = JobQueue(stream="test:jobs", consumer="worker-1", **kwargs)
+    queue.use_redis(fakeredis.FakeAsyncRedis(decode_responses=True))
+    return queue
+
+
+class MemoryOutboxStore:
+    """Outbox store keeping rows in a list, with SQLOutboxStore's contract"""
+    
+    def __init__(self, rows):
+        self.rows = list(rows)
+    
+    async def relay_batch(self, limit, publish):
+        batch = self.rows[:limit]
+        if not batch:
+            return 0
+        await publish(batch)
+        del self.rows[:len(batch)]
+        return len(batch)
+
+
+class TestJobQueue:
+    """Tests for batching, retries and dead-lettering"""
+    
+    def test_processes_and_acks_batch(self):
+        """Test each job runs once and nothing is left pending"""
+        queue = make_queue()
+        seen = []
+        
+        @queue.register("echo")
+        async def echo(payload):
+            seen.append(payload["n"])
+        
+        async def scenario():
+            await queue.enqueue_many([("echo", {"n": i}, None) for i in range(25)])
+            counts = await queue.run_once(batch_size=10, block_ms=0)
+            while (await queue.run_once(batch_size=10, block_ms=0))["succeeded"]:
+                pass
+            pending = await queue.redis.xpending(queue.stream, queue.group)
+            return counts, pending
+        
+        counts, pending = asyncio.run(scenario())
+        
+        assert counts == {"succeeded": 10, "retried": 0, "dead_lettered": 0}
+        assert sorted(seen) == list(range(25))
+        assert pending["pending"] == 0
+    
+    def test_retries_then_dead_letters(self):
+        """Test failures back off, keep the job id and end in the dead-letter stream"""
+        queue = make_queue(max_attempts=3, retry_backoff=0.0)
+        calls = []
+        
+        @queue.register("flaky")
+        async def flaky(payload):
+            calls.append(payload)
+            raise RuntimeError("provider down")
+        
+        async def scenario():
+            job_id = await queue.enqueue("flaky", {"to": "a@example.com"})
+            totals = []
+            for _ in range(4):
+                totals.append(await queue.run_once(block_ms=0))
+            return job_id, totals, await queue.dead_letters()
+        
+        job_id, totals, dead = asyncio.run(scenario())
+        
+        assert len(calls) == 3
+        assert [t["retried"] for t in totals] == [1, 1, 0, 0]
+        assert [t["dead_lettered"] for t in totals] == [0, 0, 1, 0]
+        assert len(dead) == 1
+        assert dead[0]["id"] == job_id
+        assert dead[0]["error"] == "provider down"
+        assert dead[0]["payload"] == {"to": "a@example.com"}
+    
+    def test_retry_waits_for_backoff(self):
+        """Test a retried job is not picked up before its delay"""
+        queue = make_queue(retry_backoff=60.0)
+        attempts = 0
+        
+        @queue.register("slow")
+        async def slow(payload):
+            nonlocal attempts
+            attempts += 1
+            raise ValueError("not yet")
+        
+        async def scenario():
+            await queue.enqueue("slow", {})
+            await queue.run_once(block_ms=0)
+            await queue.run_once(block_ms=0)
+            return await queue.redis.zcard(queue.delayed_key)
+        
+        assert asyncio.run(scenario()) == 1
+        assert attempts == 1
+    
+    def test_replay_dead_letters(self):
+        """Test dead letters go back on the stream with a fresh attempt count"""
+        queue = make_queue(max_attempts=1)
+        
+        async def scenario():
+            await queue.enqueue("unknown.topic", {"x": 1})
+            first = await queue.run_once(block_ms=0)
+            replayed = await queue.replay_dead_letters()
+            
+            done = []
+            queue.register("unknown.topic", lambda payload: asyncio.sleep(0, done.append(payload)))
+            second = await queue.run_once(block_ms=0)
+            return first, replayed, second, done, await queue.dead_letters()
+        
+        first, replayed, second, done, dead = asyncio.run(scenario())
+        
+        assert first["dead_lettered"] == 1
+        assert replayed == 1
+        assert second["succeeded"] == 1
+        assert done == [{"x": 1}]
+        assert dead == []
+    
+    def test_reclaims_entries_from_crashed_worker(self):
+        """Test entries another consumer read but never acked are processed"""
+        queue = make_queue(claim_idle_ms=1)
+        seen = []
+        queue.register("echo", lambda payload: asyncio.sleep(0, seen.append(payload["n"])))
+        
+        async def scenario():
+            await queue.ensure_group()
+            await queue.enqueue("echo", {"n": 7})
+            await queue.redis.xreadgroup(queue.group, "crashed", {queue.stream: ">"}, count=10)
+            await asyncio.sleep(0.01)
+            return await queue.run_once(block_ms=0)
+        
+        counts = asyncio.run(scenario())
+        
+        assert counts["succeeded"] == 1
+        assert seen == [7]
+    
+    def test_submit_nowait_without_redis(self):
+        """Test producers can tell when they must fall back to inline work"""
+        assert JobQueue().submit_nowait("agent.task_log", {}) is False
+
+
+class TestOutboxRelay:
+    """Tests for relaying committed outbox rows"""
+    
+    def test_relays_in_batches_with_outbox_ids(self):
+        """Test rows become jobs whose ids are the outbox ids"""
+        queue = make_queue()
+        store = MemoryOutboxStore([(f"row-{i}", "echo", {"n": i}) for i in range(5)])
+        relay = OutboxRelay(store, queue, batch_size=2)
+        
+        async def scenario():
+            relayed = [await relay.relay_once() for _ in range(4)]
+            return relayed, await queue.redis.xrange(queue.stream)
+        
+        relayed, entries = asyncio.run(scenario())
+        
+        assert relayed == [2, 2, 1, 0]
+        assert [fields["id"] for _, fields in entries] == [f"row-{i}" for i in range(5)]
+        assert store.rows == []
+    
+    def test_failed_publish_keeps_rows(self):
+        """Test rows stay in the outbox when the queue is unreachable"""
+        class DownQueue:
+            async def enqueue_many(self, jobs):
+                raise ConnectionError("redis down")
+        
+        store = MemoryOutboxStore([("row-1", "echo", {})])
+        
+        with pytest.raises(ConnectionError):
+            asyncio.run(OutboxRelay(store, DownQueue()).relay_once())
+        assert len(store.rows) == 1
+    
+    def test_enqueue_outbox_adds_to_session(self):
+        """Test the message joins the caller's session with its id set"""
+        class Session:
+            def __init__(self):
+                self.added = []
+            
+            def add(self, instance):
+                self.added.append(instance)
+        
+        session = Session()
+        message = enqueue_outbox(session, "notification.send", {"action": "send_sms"})
+        
+        assert session.added == [message]
+        assert isinstance(message, OutboxMessage)
+        assert message.id is not None
@@ -0,0 +1,83 @@
+"""
+Unit tests for the content-addressed LLM response cache
+"""
+
+import asyncio
+
+from app.core.ai_client import ClaudeAIClient
+from app.core.llm_cache import LLMResponseCache, response_cache_key
+from app.core.monitoring import metrics_collector
+
+
+class FakeGateway:
+    """Gateway stand-in that counts completions"""
+    
+    has_anthropic = True
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def complete(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return '{"match_score": 0.8}'
+
+
+class TestResponseCacheKey:
+    """Tests for request hashing"""
+    
+    def test_key_covers_every_input(self):
+        """Test any change to the request changes the key"""
+        base = ("claude", "system", "prompt", {"a": "number"}, 0.3)
+        key = response_cache_key(*base)
+        
+        assert response_cache_key(*base) == key
+        for i, changed in enumerate(["gpt", "other", "other", {"b": "string"}, 0.7]):
+            args = list(base)
+            args[i] = changed
+            assert response_cache_key(*args) != key
+
+
+class TestLLMResponseCache:
+    """Tests for caching structured outputs"""
+    
+    def test_identical_requests_hit_cache(self):
+        """Test repeated and concurrent identical prompts make one LLM call"""
+        client = ClaudeAIClient()
+        client.gateway = FakeGateway()
+        
+        async def ask():
+            return await client.generate_structured_output_async(
+                prompt="match these skills",
+                system_prompt="You are a recruiter",
+                output_schema={"match_score": "number"},
+                cache_site="test_site"
+            )
+        
+        async def run():
+            concurrent = await asyncio.gather(ask(), ask(), ask())
+            return concurrent + [await ask()]
+        
+        assert asyncio.run(run()) == [{"match_score": 0.8}] * 4
+        assert client.gateway.calls == 1
+        
+        site = metrics_collector.get_metrics()["llm_cache"]["test_site"]
+        assert site["hits"] == 3
+        assert site["misses"] == 1
+        assert site["tokens_saved"] > 0
+    
+    def test_zero_ttl_bypasses_cache(self):
+        """Test cache_ttl=0 always calls the model"""
+        cache = LLMResponseCache()
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            return {"output": {"ok": True}, "tokens": 10}
+        
+        async def run():
+            for _ in range(2):
+                await cache.get_or_generate("k", generate, ttl=0)
+        
+        asyncio.run(run())
+        assert len(calls) == 2
@@ -0,0 +1,112 @@
+"""
+Unit tests for the shared LLM gateway
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.llm_gateway import LLMGateway, TokenBucket
+
+
+class FakeStatusError(Exception):
+    """Stand-in for an SDK error carrying an HTTP status"""
+    
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = None
+
+
+class FakeMessages:
+    """Records concurrency and fails the first `failures` calls"""
+    
+    def __init__(self, failures=0, status_code=529, delay=0.0):
+        self.failures = failures
+        self.status_code = status_code
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.failures:
+                raise FakeStatusError(self.status_code)
+            return SimpleNamespace(
+                content=[SimpleNamespace(text=f"echo:{kwargs['messages'][0]['content']}")],
+                usage=SimpleNamespace(input_tokens=10, output_tokens=5)
+            )
+        finally:
+            self.active -= 1
+
+
+def build_gateway(messages, **kwargs) -> LLMGateway:
+    gateway = LLMGateway(retry_base_delay=0.001, retry_max_delay=0.001, **kwargs)
+    gateway._anthropic = SimpleNamespace(messages=messages)
+    return gateway
+
+
+class TestLLMGateway:
+    """Tests for concurrency bounds, retries and budgets"""
+    
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency calls are in flight"""
+        messages = FakeMessages(delay=0.01)
+        gateway = build_gateway(messages, max_concurrency=3)
+        
+        async def run():
+            return await asyncio.gather(
+                *[gateway.complete(f"p{i}", model="claude-test") for i in range(10)]
+            )
+        
+        results = asyncio.run(run())
+        assert results == [f"echo:p{i}" for i in range(10)]
+        assert messages.peak == 3
+    
+    def test_retryable_errors_are_retried(self):
+        """Test overload errors are retried until success"""
+        messages = FakeMessages(failures=2, status_code=529)
+        gateway = build_gateway(messages, max_retries=3)
+        
+        assert asyncio.run(gateway.complete("hi", model="claude-test")) == "echo:hi"
+        assert messages.calls == 3
+        assert gateway.get_stats()["retries"] == 2
+    
+    def test_client_errors_are_not_retried(self):
+        """Test a 400 fails immediately"""
+        messages = FakeMessages(failures=5, status_code=400)
+        gateway = build_gateway(messages, max_retries=3)
+        
+        with pytest.raises(FakeStatusError):
+            asyncio.run(gateway.complete("hi", model="claude-test"))
+        assert messages.calls == 1
+    
+    def test_budget_charged_with_actual_usage(self):
+        """Test the model budget is reconciled with reported usage"""
+        gateway = build_gateway(FakeMessages(), model_tokens_per_minute={"claude-test": 60000})
+        
+        asyncio.run(gateway.complete("hi", model="claude-test", max_tokens=1000))
+        assert 59980 <= gateway.get_stats()["budgets"]["claude-test"] <= 59985
+
+
+class TestTokenBucket:
+    """Tests for the per-model token bucket"""
+    
+    def test_waits_for_refill(self):
+        """Test a caller waits when the bucket is empty"""
+        bucket = TokenBucket(tokens_per_minute=6000, capacity=100)
+        
+        async def run():
+            await bucket.acquire(100)
+            start = time.monotonic()
+            await bucket.acquire(10)
+            return time.monotonic() - start
+        
+        assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,67 @@
+"""
+Unit tests for the pure-ASGI middleware stack
+"""
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.monitoring import metrics_collector
+from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware, RequestTimingMiddleware
+
+
+async def ping(request):
+    return JSONResponse({"success": True}, headers={"X-Frame-Options": "SAMEORIGIN"})
+
+
+async def item(request):
+    return JSONResponse({"id": request.path_params["item_id"]})
+
+
+def build_client(requests_per_minute: int = 60) -> TestClient:
+    app = Starlette(routes=[Route("/ping", ping), Route("/items/{item_id}", item)])
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=requests_per_minute)
+    app.add_middleware(RequestTimingMiddleware)
+    return TestClient(app)
+
+
+class TestMiddlewareStack:
+    """Tests for headers added by the ASGI middlewares"""
+    
+    def test_headers_are_added(self):
+        """Test timing, rate limit and security headers reach the client"""
+        response = build_client().get("/ping")
+        
+        assert response.status_code == 200
+        assert response.json() == {"success": True}
+        assert float(response.headers["X-Process-Time"]) >= 0
+        assert response.headers["X-RateLimit-Limit"] == "60"
+        assert response.headers["X-RateLimit-Remaining"] == "59"
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+    
+    def test_security_headers_replace_app_values(self):
+        """Test security headers override rather than duplicate app headers"""
+        response = build_client().get("/ping")
+        assert response.headers.get_list("X-Frame-Options") == ["DENY"]
+    
+    def test_rate_limit_exceeded(self):
+        """Test requests over the limit get a 429 with retry information"""
+        client = build_client(requests_per_minute=2)
+        statuses = [client.get("/ping").status_code for _ in range(3)]
+        
+        assert statuses == [200, 200, 429]
+        response = client.get("/ping")
+        assert response.json()["error"] == "Rate limit exceeded"
+        assert "Retry-After" in response.headers
+    
+    def test_latency_recorded_per_route_template(self):
+        """Test metrics are keyed by route template rather than raw path"""
+        client = build_client()
+        client.get("/items/1")
+        client.get("/items/2")
+        
+        api_calls = metrics_collector.metrics["api_calls"]
+        assert api_calls["GET:/items/{item_id}"]["count"] >= 2
+        assert not any(key.startswith("GET:/items/1") for key in api_calls)
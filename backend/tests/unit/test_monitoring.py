@@ -0,0 +1,136 @@
+"""
+Unit tests for latency histograms and metrics export
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.monitoring import (
+    LatencyHistogram,
+    MetricsCollector,
+    WorkerMetricsAggregator,
+    merge_snapshots,
+    render_prometheus
+)
+
+
+class TestLatencyHistogram:
+    """Tests for LatencyHistogram percentile estimates"""
+    
+    def test_percentiles_track_distribution(self):
+        """Test estimates fall in the right bucket range"""
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.observe(0.010)
+        for _ in range(10):
+            histogram.observe(1.0)
+        
+        assert 0.005 < histogram.percentile(50) <= 0.0114
+        assert 0.7 < histogram.percentile(99) <= 1.02
+        assert histogram.count == 100
+    
+    def test_empty_histogram(self):
+        """Test an empty histogram reports zero"""
+        assert LatencyHistogram().percentile(95) == 0.0
+    
+    def test_overflow_bucket(self):
+        """Test values above the last bound are still counted"""
+        histogram = LatencyHistogram()
+        histogram.observe(1000.0)
+        assert histogram.counts[-1] == 1
+        assert histogram.percentile(50) == LatencyHistogram.BUCKETS[-1]
+
+
+class TestMetricsExport:
+    """Tests for cross-worker merging and Prometheus rendering"""
+    
+    def test_merge_sums_workers(self):
+        """Test snapshots from two workers add up"""
+        first, second = MetricsCollector(), MetricsCollector()
+        first.record_api_call("/users/{user_id}", "GET", 0.02, 200)
+        second.record_api_call("/users/{user_id}", "GET", 0.04, 500)
+        second.record_cache_hit("l1")
+        
+        merged = merge_snapshots([first.snapshot(), second.snapshot()])
+        
+        assert merged["api_calls"]["GET:/users/{user_id}"]["count"] == 2
+        assert merged["api_calls"]["GET:/users/{user_id}"]["errors"] == 1
+        assert merged["latency"]["GET:/users/{user_id}"]["count"] == 2
+        assert merged["cache_tiers"]["l1"]["hits"] == 1
+    
+    def test_prometheus_format(self):
+        """Test histogram series are cumulative and labelled by route"""
+        collector = MetricsCollector()
+        collector.record_api_call("/jobs", "GET", 0.003, 200)
+        collector.record_api_call("/jobs", "GET", 0.3, 200)
+        
+        text = render_prometheus(collector.snapshot())
+        
+        assert "# TYPE noor_http_request_duration_seconds histogram" in text
+        assert 'noor_http_request_duration_seconds_bucket{method="GET",route="/jobs",le="+Inf"} 2' in text
+        assert 'noor_http_request_duration_seconds_count{method="GET",route="/jobs"} 2' in text
+        assert text.endswith("\n")
+    
+    def test_api_metrics_include_percentiles(self):
+        """Test get_metrics exposes latency percentiles per endpoint"""
+        collector = MetricsCollector()
+        collector.record_api_call("/jobs", "GET", 0.05, 200)
+        
+        metrics = collector.get_metrics()["api_calls"]["GET:/jobs"]
+        assert {"p50_duration", "p95_duration", "p99_duration"} <= set(metrics)
+
+
+class TestWorkerMetricsAggregator:
+    """Tests for per-pod merging through Redis"""
+    
+    def test_pods_are_separate_and_totals_survive_worker_exit(self):
+        """Test a pod sees only its workers and a stopped worker still counts"""
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.FakeAsyncRedis()
+        
+        def worker(pod, pid, calls):
+            collector = MetricsCollector()
+            for _ in range(calls):
+                collector.record_api_call("/jobs", "GET", 0.01, 200)
+            aggregator = WorkerMetricsAggregator(collector, pod_id=pod)
+            aggregator.worker_id = f"{pod}:{pid}"
+            aggregator.redis = redis
+            return aggregator
+        
+        async def run():
+            a1, a2, b1 = worker("pod-a", 1, 3), worker("pod-a", 2, 5), worker("pod-b", 1, 7)
+            for aggregator in (a1, a2, b1):
+                await aggregator.publish()
+            before = await a1.collect()
+            await a2.stop()
+            after = await a1.collect()
+            return before, after, await b1.collect()
+        
+        before, after, other_pod = asyncio.run(run())
+        
+        assert before["api_calls"]["GET:/jobs"]["count"] == 8
+        assert after["api_calls"]["GET:/jobs"]["count"] == 8
+        assert other_pod["api_calls"]["GET:/jobs"]["count"] == 7
+    
+    def test_stale_worker_is_retired_once(self):
+        """Test a crashed worker's last snapshot moves to the retired totals"""
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.FakeAsyncRedis()
+        crashed = MetricsCollector()
+        crashed.record_api_call("/jobs", "GET", 0.01, 500)
+        
+        async def run():
+            live = WorkerMetricsAggregator(MetricsCollector(), pod_id="pod-a")
+            live.redis = redis
+            await redis.hset(live.key, "pod-a:99", json.dumps({"ts": 0, "snapshot": crashed.snapshot()}))
+            first = await live.collect()
+            second = await live.collect()
+            return first, second, await redis.hkeys(live.key)
+        
+        first, second, fields = asyncio.run(run())
+        
+        assert first["api_calls"]["GET:/jobs"]["errors"] == 1
+        assert second["api_calls"]["GET:/jobs"]["errors"] == 1
+        assert fields == [b"retired"]
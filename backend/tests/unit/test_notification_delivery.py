@@ -0,0 +1,173 @@
+"""
+Unit tests for bulk notification delivery
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.agents.notification_agent import NotificationAgent, NotificationType
+from app.services.notification_delivery import BulkNotificationSender, LocalStubProvider, SendGridProvider
+
+
+def emails(count: int, subject: str = "Hello"):
+    return [
+        {"type": NotificationType.EMAIL, "to": f"user{i}@example.com", "subject": subject, "body": "Body"}
+        for i in range(count)
+    ]
+
+
+def sms(count: int):
+    return [{"type": "sms", "to": f"+97150000{i:04d}", "message": "Code 1234"} for i in range(count)]
+
+
+async def collect(sender, notifications):
+    return [result async for result in sender.deliver(notifications)]
+
+
+class TestBulkNotificationSender:
+    """Tests for the bounded, batched worker pool"""
+    
+    def test_delivers_every_notification_once(self):
+        """Test each input gets exactly one result with its recipient"""
+        email = LocalStubProvider("email", latency=0.005, max_batch_size=10)
+        text = LocalStubProvider("sms", latency=0.005)
+        sender = BulkNotificationSender(
+            {"email": email, "sms": text}, concurrency={"email": 3, "sms": 5}
+        )
+        notifications = emails(95) + sms(20)
+        
+        results = asyncio.run(collect(sender, notifications))
+        
+        assert sorted(r["index"] for r in results) == list(range(len(notifications)))
+        assert all(r["delivered"] for r in results)
+        assert {r["to"] for r in results} == {n["to"] for n in notifications}
+        assert email.batches == 10 and email.sent == 95
+        assert email.max_in_flight <= 3
+        assert text.max_in_flight <= 5
+        assert "body" not in results[0]
+    
+    def test_unknown_type_and_provider_errors(self):
+        """Test unknown types and failing batches become failed results"""
+        class BrokenProvider(LocalStubProvider):
+            async def send_batch(self, notifications):
+                raise RuntimeError("provider down")
+        
+        sender = BulkNotificationSender({"email": BrokenProvider("email", max_batch_size=5)})
+        notifications = emails(7) + [{"type": "pigeon", "to": "roof"}]
+        
+        results = asyncio.run(collect(sender, notifications))
+        
+        assert len(results) == 8
+        assert not any(r["delivered"] for r in results)
+        errors = {r["error"] for r in results}
+        assert errors == {"provider down", "Unknown notification type"}
+    
+    def test_rate_limit(self):
+        """Test the per-channel rate limit paces delivery"""
+        sender = BulkNotificationSender(
+            {"sms": LocalStubProvider("sms")},
+            concurrency={"sms": 50},
+            rate_per_minute={"sms": 60000}
+        )
+        
+        start = time.perf_counter()
+        results = asyncio.run(collect(sender, sms(1500)))
+        elapsed = time.perf_counter() - start
+        
+        assert len(results) == 1500
+        # 1000 burst, then 500 more at 1000/second
+        assert elapsed >= 0.4
+    
+    def test_stops_when_consumer_stops(self):
+        """Test breaking out of the stream stops reading the input"""
+        consumed = 0
+        
+        async def source():
+            nonlocal consumed
+            for notification in sms(10000):
+                consumed += 1
+                yield notification
+        
+        async def take(count):
+            sender = BulkNotificationSender({"sms": LocalStubProvider("sms")}, queue_size=10)
+            taken = 0
+            async for _ in sender.deliver(source()):
+                taken += 1
+                if taken == count:
+                    break
+            return taken
+        
+        assert asyncio.run(take(5)) == 5
+        assert consumed < 100
+    
+    def test_input_error_after_results(self):
+        """Test a failing input still yields what was read, then raises"""
+        async def source():
+            for notification in emails(25):
+                yield notification
+            raise ValueError("cursor closed")
+        
+        async def run():
+            sender = BulkNotificationSender(
+                {"email": LocalStubProvider("email", max_batch_size=10)}, concurrency={"email": 3}
+            )
+            results = []
+            try:
+                async for result in sender.deliver(source()):
+                    results.append(result)
+            except ValueError as e:
+                error = e
+            await asyncio.sleep(0)
+            leaked = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            return results, error, leaked
+        
+        results, error, leaked = asyncio.run(run())
+        
+        assert sorted(r["index"] for r in results) == list(range(25))
+        assert str(error) == "cursor closed"
+        assert leaked == []
+
+
+class TestSendGridProvider:
+    """Tests for SendGrid personalization batching"""
+    
+    def test_groups_identical_messages(self):
+        """Test one request per distinct subject/body"""
+        requests = []
+        
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(202, headers={"X-Message-Id": f"sg-{len(requests)}"})
+        
+        provider = SendGridProvider("key", "noreply@noor.gov.ae")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        batch = emails(3, "A") + emails(2, "B")
+        
+        results = asyncio.run(provider.send_batch(batch))
+        
+        assert [len(r["personalizations"]) for r in requests] == [3, 2]
+        assert [r["message_id"] for r in results] == ["sg-1"] * 3 + ["sg-2"] * 2
+        assert all(r["delivered"] for r in results)
+
+
+class TestNotificationAgentBulk:
+    """Tests for NotificationAgent.send_bulk_notifications"""
+    
+    def test_summary_counts_without_details(self):
+        """Test the summary keeps counts and a capped failure sample"""
+        agent = NotificationAgent()
+        agent.use_bulk_providers({
+            "email": LocalStubProvider("email", max_batch_size=50, failure_rate=1.0),
+            "sms": LocalStubProvider("sms")
+        })
+        
+        results = asyncio.run(agent.send_bulk_notifications(emails(300) + sms(40)))
+        
+        assert results["total"] == 340
+        assert results["successful"] == 40
+        assert results["failed"] == 300
+        assert len(results["failures"]) == 100
+        assert "details" not in results
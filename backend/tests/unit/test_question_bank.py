@@ -0,0 +1,123 @@
+"""
+Unit tests for the assessment question bank builder
+"""
+
+import asyncio
+import copy
+import json
+import os
+
+from app.services.assessment_generator import (
+    FACULTIES,
+    AssessmentQuestionGenerator,
+    QuestionBank,
+    QUESTION_TYPES
+)
+
+
+class FakeGateway:
+    """Gateway stand-in that records prompts and can fail on request"""
+    
+    def __init__(self, fail_on: str = None):
+        self.fail_on = fail_on
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def complete(self, prompt, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("overloaded")
+        self.prompts.append(prompt)
+        return f"Question for: {prompt.splitlines()[0]}"
+
+
+def build_generator(faculties=None, **gateway_kwargs):
+    generator = AssessmentQuestionGenerator(copy.deepcopy(faculties or FACULTIES))
+    generator.gateway = FakeGateway(**gateway_kwargs)
+    return generator
+
+
+class TestQuestionBank:
+    """Tests for concurrent, resumable, incremental bank builds"""
+    
+    def test_build_then_reuse(self, tmp_path):
+        """Test a second build reuses every stored question"""
+        path = str(tmp_path / "bank.json")
+        total = sum(len(f["competencies"]) for f in FACULTIES.values()) * len(QUESTION_TYPES)
+        
+        generator = build_generator()
+        summary = asyncio.run(generator.build_question_bank(QuestionBank(path), max_concurrency=4))
+        
+        assert summary["generated"] == total
+        assert generator.gateway.max_in_flight <= 4
+        
+        generator = build_generator()
+        summary = asyncio.run(generator.build_question_bank(QuestionBank(path)))
+        
+        assert summary == {"generated": 0, "reused": total, "failed": 0, "errors": {}}
+        assert generator.gateway.prompts == []
+    
+    def test_changed_competency_regenerates_only_its_questions(self, tmp_path):
+        """Test editing a competency regenerates just its four questions"""
+        path = str(tmp_path / "bank.json")
+        asyncio.run(build_generator().build_question_bank(QuestionBank(path)))
+        
+        faculties = copy.deepcopy(FACULTIES)
+        faculties["mental"]["competencies"][0]["description"] = "Evaluating arguments and evidence"
+        generator = build_generator(faculties)
+        summary = asyncio.run(generator.build_question_bank(QuestionBank(path)))
+        
+        assert summary["generated"] == len(QUESTION_TYPES)
+        assert all("Critical Thinking" in prompt for prompt in generator.gateway.prompts)
+    
+    def test_failures_are_resumed(self, tmp_path):
+        """Test failed questions are reported and generated on the next run"""
+        path = str(tmp_path / "bank.json")
+        
+        generator = build_generator(fail_on="Critical Thinking")
+        summary = asyncio.run(generator.build_question_bank(QuestionBank(path)))
+        
+        assert summary["failed"] == len(QUESTION_TYPES)
+        assert "ment_01:likert_scale" in summary["errors"]
+        
+        generator = build_generator()
+        summary = asyncio.run(generator.build_question_bank(QuestionBank(path)))
+        
+        assert summary["generated"] == len(QUESTION_TYPES)
+        assert summary["failed"] == 0
+    
+    def test_generate_all_assessments_async(self, tmp_path):
+        """Test the async bulk generation returns questions per faculty"""
+        generator = build_generator()
+        assessments = asyncio.run(
+            generator.generate_all_assessments_async(QuestionBank(str(tmp_path / "bank.json")))
+        )
+        
+        assert set(assessments) == set(FACULTIES)
+        physical = assessments["physical"]
+        assert len(physical) == 12 * len(QUESTION_TYPES)
+        assert physical[0]["id"] == "phys_01_multiple_choice"
+    
+    def test_questions_are_journaled_then_compacted(self, tmp_path):
+        """Test puts only append to the journal and the build compacts it"""
+        path = str(tmp_path / "bank.json")
+        bank = QuestionBank(path)
+        asyncio.run(bank.put("phys_01", "likert_scale", ("t", "c"), {"content": "Q1"}))
+        asyncio.run(bank.put("phys_02", "likert_scale", ("t", "c"), {"content": "Q2"}))
+        
+        assert not os.path.exists(path)
+        with open(bank.journal_path) as f:
+            assert len(f.readlines()) == 2
+        assert QuestionBank(path).get("phys_02", "likert_scale", ("t", "c")) == {"content": "Q2"}
+        
+        asyncio.run(build_generator().build_question_bank(bank, faculty_keys=["physical"]))
+        
+        assert not os.path.exists(bank.journal_path)
+        with open(path) as f:
+            stored = json.load(f)["questions"]
+        assert len(stored) == 12 * len(QUESTION_TYPES)
@@ -0,0 +1,89 @@
+"""
+Unit tests for the rate limiting middleware limiters
+"""
+
+import asyncio
+
+from app.middleware.rate_limiter import DistributedRateLimiter, RateLimiter
+
+
+class FakeScript:
+    """Stand-in for the registered GCRA script with simple window counting"""
+
+    def __init__(self):
+        self.calls = []
+        self.used = {}
+
+    async def __call__(self, keys, args):
+        cost = args[0]
+        self.calls.append(cost)
+        limits = args[1::2]
+
+        if any(self.used.get(key, 0) + cost > limit for key, limit in zip(keys, limits)):
+            return [0, 0, 1500, 0]
+
+        for key in keys:
+            self.used[key] = self.used.get(key, 0) + cost
+        remaining = min(limit - self.used[key] for key, limit in zip(keys, limits))
+        return [1, remaining, 0, 0]
+
+
+class FakeRedis:
+    """Minimal client exposing register_script"""
+
+    def __init__(self, script):
+        self.script = script
+
+    def register_script(self, source):
+        return self.script
+
+
+class BrokenScript:
+    async def __call__(self, keys, args):
+        raise ConnectionError("redis down")
+
+
+class TestRateLimiter:
+    """Tests for the process-local limiter"""
+
+    def test_minute_limit(self):
+        """Test requests beyond the per-minute limit are rejected"""
+        limiter = RateLimiter(requests_per_minute=3, requests_per_hour=100)
+        results = [limiter.check_rate_limit("ip:1")[0] for _ in range(4)]
+        assert results == [True, True, True, False]
+
+
+class TestDistributedRateLimiter:
+    """Tests for the Redis-backed limiter's local lease fast path"""
+
+    def test_lease_serves_prefetched_requests_locally(self):
+        """Test one Redis call covers `prefetch` requests"""
+        script = FakeScript()
+        limiter = DistributedRateLimiter(FakeRedis(script), 60, 1000, prefetch=5)
+
+        async def run():
+            return [(await limiter.acquire("ip:1"))[0] for _ in range(10)]
+
+        assert asyncio.run(run()) == [True] * 10
+        assert script.calls == [5, 5]
+
+    def test_falls_back_to_single_request_near_limit(self):
+        """Test a client with less headroom than a lease can still proceed"""
+        script = FakeScript()
+        limiter = DistributedRateLimiter(FakeRedis(script), 3, 1000, prefetch=5)
+
+        async def run():
+            return [await limiter.acquire("ip:1") for _ in range(4)]
+
+        results = asyncio.run(run())
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert results[-1][1]["retry_after"] == 2
+
+    def test_redis_failure_uses_local_limiter(self):
+        """Test the limiter keeps working when Redis is unreachable"""
+        limiter = DistributedRateLimiter(FakeRedis(BrokenScript()), 2, 1000)
+
+        async def run():
+            return [(await limiter.acquire("ip:1"))[0] for _ in range(3)]
+
+        assert asyncio.run(run()) == [True, True, False]
@@ -0,0 +1,198 @@
+"""
+Unit tests for the incremental skill demand index
+"""
+
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.skill_demand_index import SkillDemandIndex
+
+SKILLS = ["Python", "SQL", "AWS", "Leadership", "Nursing", "Excel"]
+INDUSTRIES = ["Technology", "Healthcare", "Finance"]
+LOCATIONS = ["Dubai", "Abu Dhabi"]
+
+
+def random_postings(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"job-{i}",
+            "industry": rng.choice(INDUSTRIES),
+            "location": rng.choice(LOCATIONS),
+            "employment_type": rng.choice(["full_time", "contract"]),
+            "required_skills": rng.sample(SKILLS, 2),
+            "preferred_skills": rng.sample(SKILLS, 1)
+        }
+        for i in range(count)
+    ]
+
+
+async def batches(jobs, size=10):
+    for i in range(0, len(jobs), size):
+        yield jobs[i:i + size]
+
+
+class TestSkillDemandIndex:
+    """Tests for the in-process rollups"""
+    
+    def test_rollups_match_full_recount(self):
+        """Test incremental counts equal a Counter over the active postings"""
+        jobs = random_postings(200)
+        index = SkillDemandIndex()
+        
+        async def run():
+            await index.rebuild(batches(jobs))
+            for job in jobs[:50]:
+                await index.remove_posting(job)
+            return (
+                await index.top("required", None, industry="Technology", location="Dubai"),
+                await index.job_count(industry="Technology"),
+                await index.top("location", None)
+            )
+        
+        required, tech_jobs, locations = asyncio.run(run())
+        active = jobs[50:]
+        
+        expected = Counter(
+            skill for job in active
+            if job["industry"] == "Technology" and job["location"] == "Dubai"
+            for skill in job["required_skills"]
+        )
+        assert dict(required) == dict(expected)
+        assert tech_jobs == sum(1 for job in active if job["industry"] == "Technology")
+        assert dict(locations) == dict(Counter(job["location"] for job in active))
+    
+    def test_add_and_remove_are_idempotent(self):
+        """Test repeated events do not double count"""
+        job = random_postings(1)[0]
+        index = SkillDemandIndex()
+        
+        async def run():
+            assert await index.add_posting(job)
+            assert not await index.add_posting(job)
+            after_add = await index.job_count()
+            assert await index.remove_posting(job)
+            assert not await index.remove_posting(job)
+            return after_add, await index.job_count(), await index.top("skills", 10)
+        
+        assert asyncio.run(run()) == (1, 0, [])
+    
+    def test_status_change(self):
+        """Test closing a posting through update_posting removes it"""
+        job = random_postings(1)[0]
+        index = SkillDemandIndex()
+        
+        async def run():
+            await index.update_posting(None, {**job, "status": "active"})
+            await index.update_posting({**job, "status": "active"}, {**job, "status": "closed"})
+            return await index.job_count()
+        
+        assert asyncio.run(run()) == 0
+    
+    def test_reconcile_once_per_interval(self):
+        """Test reconcile recounts, then skips until the interval passes"""
+        jobs = random_postings(30)
+        index = SkillDemandIndex()
+        
+        async def run():
+            first = await index.reconcile(lambda: batches(jobs), interval=3600)
+            second = await index.reconcile(lambda: batches(jobs[:5]), interval=3600)
+            return first, second, await index.is_built(), await index.job_count()
+        
+        assert asyncio.run(run()) == (True, False, True, 30)
+
+
+class TestSkillDemandIndexRedis:
+    """Tests for the Redis rollups"""
+    
+    def test_rebuild_replaces_rollups(self):
+        """Test a rebuild swaps in fresh counts and leaves no staging keys"""
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        index = SkillDemandIndex(redis)
+        jobs = random_postings(40)
+        
+        async def run():
+            await index.rebuild(batches(jobs))
+            # A scope that disappears must not survive the next rebuild
+            await index.add_posting({**jobs[0], "id": "extra", "industry": "Retail"})
+            await index.rebuild(batches(jobs[10:]))
+            return (
+                await index.top("location", None),
+                await index.job_count(industry="Retail"),
+                await index.is_built(),
+                [key async for key in redis.scan_iter(match="noor:demand:rebuild:*")]
+            )
+        
+        locations, retail_jobs, built, staging = asyncio.run(run())
+        assert dict(locations) == dict(Counter(job["location"] for job in jobs[10:]))
+        assert retail_jobs == 0
+        assert built
+        assert staging == []
+    
+    def test_failed_rebuild_keeps_rollups(self):
+        """Test an error while counting leaves the live rollups untouched"""
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        index = SkillDemandIndex(redis)
+        jobs = random_postings(20)
+        
+        async def failing():
+            yield jobs[:5]
+            raise RuntimeError("database went away")
+        
+        async def run():
+            await index.rebuild(batches(jobs))
+            with pytest.raises(RuntimeError):
+                await index.rebuild(failing())
+            return (
+                await index.job_count(),
+                [key async for key in redis.scan_iter(match="noor:demand:rebuild:*")]
+            )
+        
+        assert asyncio.run(run()) == (20, [])
+    
+    def test_batched_updates_match_single(self):
+        """Test add_postings counts a batch like one add_posting per job"""
+        fakeredis = pytest.importorskip("fakeredis")
+        jobs = random_postings(60)
+        
+        async def rollups(add):
+            index = SkillDemandIndex(fakeredis.FakeAsyncRedis(decode_responses=True))
+            await add(index)
+            # Closing a third must subtract through the same path
+            for job in jobs[:20]:
+                await index.remove_posting(job)
+            return await index.top("skills", None, industry="Finance"), await index.job_count(location="Dubai")
+        
+        async def one_by_one(index):
+            for job in jobs:
+                await index.add_posting(job)
+        
+        async def batched(index):
+            assert await index.add_postings(jobs) == 60
+            assert await index.add_postings(jobs[:10]) == 0
+        
+        assert asyncio.run(rollups(one_by_one)) == asyncio.run(rollups(batched))
+    
+    def test_rebuild_lock_and_reconcile_marker(self):
+        """Test only one process rebuilds while the lock or marker is held"""
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        first, second = SkillDemandIndex(redis), SkillDemandIndex(redis)
+        jobs = random_postings(10)
+        
+        async def run():
+            await redis.set(first._lock_key, "other-worker")
+            locked = await first.try_rebuild(batches(jobs))
+            await redis.delete(first._lock_key)
+            
+            reconciled = [
+                await index.reconcile(lambda: batches(jobs), interval=60) for index in (first, second)
+            ]
+            return locked, reconciled, await redis.exists(first._lock_key), await second.job_count()
+        
+        assert asyncio.run(run()) == (False, [True, False], 0, 10)
@@ -0,0 +1,146 @@
+# Micro-Batched Inference Benchmark
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Concurrent clients each request embeddings one sample at a time, served
+# three ways:
+#   inline   - model called inside the coroutine (the previous handlers)
+#   thread   - one model call per request on a worker thread
+#   batched  - MicroBatcher (inference.py) on the same worker thread
+# Reports throughput, p50/p99 request latency and the worst event-loop stall.
+#
+# The default model is a NumPy stand-in with FaceNet's output size (two dense
+# layers, float32), so the benchmark runs on any CPU without downloading
+# weights. --model facenet uses InceptionResnetV1 on random 160x160 crops when
+# torch and facenet-pytorch are installed.
+#
+# Usage (from biometric-identity/):
+#     python -m benchmarks.inference_batching --clients 64 --requests 20
+#     python -m benchmarks.inference_batching --model facenet --clients 32 --requests 5
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference import MicroBatcher
+
+
+class DenseEmbeddingModel:
+    """Two dense layers mapping a flattened face crop to a 512-dim embedding"""
+
+    def __init__(self, input_dim: int = 8192, hidden_dim: int = 2048, output_dim: int = 512, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.w1 = rng.standard_normal((input_dim, hidden_dim), dtype=np.float32) / np.sqrt(input_dim)
+        self.w2 = rng.standard_normal((hidden_dim, output_dim), dtype=np.float32) / np.sqrt(hidden_dim)
+        self.input_dim = input_dim
+
+    def sample(self, rng) -> np.ndarray:
+        return rng.standard_normal(self.input_dim, dtype=np.float32)
+
+    def extract_embeddings(self, samples):
+        hidden = np.maximum(np.stack(samples) @ self.w1, 0)
+        embeddings = hidden @ self.w2
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return [(embedding, 0.85) for embedding in embeddings]
+
+
+class FaceNetModel:
+    """InceptionResnetV1 on pre-cropped faces (skips MTCNN detection)"""
+
+    def __init__(self):
+        import torch
+        from facenet_pytorch import InceptionResnetV1
+        self.torch = torch
+        self.resnet = InceptionResnetV1(pretrained=None).eval()
+
+    def sample(self, rng):
+        return self.torch.from_numpy(rng.standard_normal((3, 160, 160), dtype=np.float32))
+
+    def extract_embeddings(self, samples):
+        with self.torch.no_grad():
+            embeddings = self.resnet(self.torch.stack(samples)).numpy()
+        return [(embedding, 0.85) for embedding in embeddings]
+
+
+async def watch_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(mode: str, model, args) -> dict:
+    executor = ThreadPoolExecutor(max_workers=1)
+    batcher = MicroBatcher(
+        "benchmark", model.extract_embeddings,
+        max_batch_size=args.batch_size, max_wait_ms=args.wait_ms, executor=executor
+    )
+    loop = asyncio.get_running_loop()
+
+    async def infer(sample):
+        if mode == "inline":
+            return model.extract_embeddings([sample])[0]
+        if mode == "thread":
+            return (await loop.run_in_executor(executor, model.extract_embeddings, [sample]))[0]
+        return await batcher.submit(sample)
+
+    latencies = []
+
+    async def client(seed):
+        rng = np.random.default_rng(seed)
+        for _ in range(args.requests):
+            sample = model.sample(rng)
+            start = time.perf_counter()
+            await infer(sample)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(watch_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    await batcher.close()
+    executor.shutdown()
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "lag": lag,
+        "batch": batcher.average_batch_size if mode == "batched" else 1.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batched inference benchmark")
+    parser.add_argument("--model", choices=["dense", "facenet"], default="dense")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = FaceNetModel() if args.model == "facenet" else DenseEmbeddingModel()
+    print(f"model={args.model} clients={args.clients} requests/client={args.requests} "
+          f"max_batch={args.batch_size} max_wait={args.wait_ms} ms")
+    for mode in ("inline", "thread", "batched"):
+        result = asyncio.run(run(mode, model, args))
+        print(
+            f"  {mode:<8} {result['throughput']:8.0f} req/s  p50 {result['p50'] * 1000:7.1f} ms  "
+            f"p99 {result['p99'] * 1000:7.1f} ms  loop stall {result['lag'] * 1000:6.1f} ms  "
+            f"avg batch {result['batch']:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Biometric Preprocessing Load Benchmark
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Concurrent clients send base64-encoded photos through the verify handler's
+# preprocessing (main.decode_biometric_data + main.check_sample: decode,
+# quality assessment, liveness detection), run three ways:
+#   inline   - decode and checks inside the coroutine
+#   thread   - decode on the loop, checks on the inference server's
+#              MicroBatcher threads (the handlers before the process pool)
+#   process  - BiometricPreprocessor: decode and checks in worker processes,
+#              sample handed over in shared memory
+# Reports throughput, p50/p99 request latency and event-loop lag (how late a
+# 5 ms timer fires), which is what every other request on the worker waits.
+#
+# Requires OpenCV (QualityAssessor decodes the JPEG).
+#
+# Usage (from biometric-identity/):
+#     python -m benchmarks.preprocessing_load --clients 8 --requests 8 --megapixels 12
+
+import argparse
+import asyncio
+import base64
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+import main
+from inference import MicroBatcher, run_each
+from preprocessing import BiometricPreprocessor
+from sample_checks import LivenessDetector, QualityAssessor
+
+
+class InlineChecks:
+    """Inference-server check methods, called on the event loop"""
+
+    def __init__(self):
+        self.quality = QualityAssessor()
+        self.liveness = LivenessDetector()
+
+    async def assess_image_quality(self, data):
+        return self.quality.assess_image_quality(data)
+
+    async def check_facial_liveness(self, data):
+        return self.liveness.check_facial_liveness(data)
+
+    async def close(self):
+        pass
+
+
+class ThreadChecks(InlineChecks):
+    """Inference-server check methods on MicroBatcher threads, as in BiometricInferenceServer"""
+
+    def __init__(self):
+        super().__init__()
+        self.batchers = {
+            "image_quality": MicroBatcher("image_quality", run_each(self.quality.assess_image_quality)),
+            "face_liveness": MicroBatcher("face_liveness", run_each(self.liveness.check_facial_liveness)),
+        }
+
+    async def assess_image_quality(self, data):
+        return await self.batchers["image_quality"].submit(data)
+
+    async def check_facial_liveness(self, data):
+        return await self.batchers["face_liveness"].submit(data)
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+
+def make_photo(megapixels: float, seed: int = 0) -> bytes:
+    """JPEG with smooth gradients plus sensor-like noise (realistic file size)"""
+    rng = np.random.default_rng(seed)
+    height = int((megapixels * 1e6 * 3 / 4) ** 0.5)
+    width = height * 4 // 3
+    y, x = np.mgrid[0:height, 0:width]
+    base = (x / width * 180 + y / height * 60).astype(np.float32)
+    image = np.stack([base, base * 0.8 + 30, 255 - base], axis=-1)
+    image += rng.normal(0, 6, image.shape).astype(np.float32)
+    _, encoded = cv2.imencode(".jpg", np.clip(image, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+async def watch_loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(mode: str, payload: str, args) -> dict:
+    if mode == "process":
+        main.preprocessor = BiometricPreprocessor(workers=args.workers, load_checks=True)
+        main.inference_server = None
+        # Start the workers (spawn + OpenCV import) before measuring
+        (await main.decode_biometric_data(base64.b64encode(b"warmup").decode())).close()
+    else:
+        main.preprocessor = None
+        main.inference_server = InlineChecks() if mode == "inline" else ThreadChecks()
+
+    latencies = []
+    rejected = 0
+
+    async def client():
+        nonlocal rejected
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            sample = await main.decode_biometric_data(payload)
+            try:
+                quality, liveness = await main.check_sample(sample, main.BiometricModality.FACIAL)
+                sample.read()
+            finally:
+                sample.close()
+            rejected += not quality.meets_standards
+            latencies.append(time.perf_counter() - start)
+
+    lags = []
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(watch_loop_lag(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    if main.preprocessor is not None:
+        main.preprocessor.close()
+    if main.inference_server is not None:
+        await main.inference_server.close()
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "lag_p50": statistics.median(lags),
+        "lag_p99": lags[int(len(lags) * 0.99) - 1],
+        "lag_max": lags[-1],
+        "rejected": rejected
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description="Biometric preprocessing load benchmark")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=8, help="Requests per client")
+    parser.add_argument("--megapixels", type=float, default=12.0)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    photo = make_photo(args.megapixels)
+    payload = base64.b64encode(photo).decode("ascii")
+    print(f"clients={args.clients} requests/client={args.requests} photo={args.megapixels:.0f} MP "
+          f"({len(photo) / 1e6:.1f} MB jpeg, {len(payload) / 1e6:.1f} MB base64) workers={args.workers}")
+    for mode in ("inline", "thread", "process"):
+        result = asyncio.run(run(mode, payload, args))
+        print(
+            f"  {mode:<8} {result['throughput']:6.1f} req/s  p50 {result['p50'] * 1000:7.1f} ms  "
+            f"p99 {result['p99'] * 1000:7.1f} ms  loop lag p50 {result['lag_p50'] * 1000:6.1f} ms  "
+            f"p99 {result['lag_p99'] * 1000:6.1f} ms  max {result['lag_max'] * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main_()
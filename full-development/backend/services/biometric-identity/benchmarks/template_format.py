@@ -0,0 +1,124 @@
+# Biometric Template Format Benchmark
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Compares the legacy layout (Fernet token, base64-encoded into Pinecone
+# metadata, zero vector) with template_store records (AES-256-GCM, float32 /
+# float16 / int8) on:
+#   size      bytes stored per template
+#   decode    decrypt + decode time per template
+#   accuracy  similarity change against float32, and accept/reject flips at
+#             the facial threshold, for genuine probes near the threshold
+#   verify    cold verify_identity (cache invalidated) with 20 templates:
+#             legacy reads from a SimulatedIndex (--rtt-ms per call),
+#             template records from a SQLite file
+#
+# Usage (from biometric-identity/):
+#     python -m benchmarks.template_format --rtt-ms 10
+
+import argparse
+import base64
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.verification_latency import enroll_legacy, make_store, measure
+from pinecone_client import generate_user_encryption_key
+from template_store import SQLiteTemplateStore, TemplateConfig, decode_template, encode_template
+from verification import similarity_scores
+
+ENCODINGS = ["float32", "float16", "int8"]
+FACIAL_THRESHOLD = 0.95
+
+
+def unit_vectors(rng, count: int, dimension: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def per_call_us(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Biometric template format benchmark")
+    parser.add_argument("--rtt-ms", type=float, default=10.0, help="Simulated Pinecone round trip")
+    parser.add_argument("--templates", type=int, default=20, help="Templates per user for the verify benchmark")
+    parser.add_argument("--verifications", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    user_key = generate_user_encryption_key("user-0", b"benchmark-master-key")
+    store = make_store(0)
+
+    print("size and decode time per template")
+    for dimension in (512, 256):
+        embedding = unit_vectors(rng, 1, dimension)[0]
+        token = store.encrypt_embedding(embedding, user_key)
+        legacy = base64.b64encode(token).decode('utf-8')
+        decode_us = per_call_us(
+            lambda: store.decrypt_embedding(base64.b64decode(legacy), user_key, dimension), 2000
+        )
+        print(f"  dim={dimension}  legacy   {len(legacy):5d} bytes ({len(legacy) / embedding.nbytes:.2f}x raw)  "
+              f"decode {decode_us:6.1f} us")
+        for encoding in ENCODINGS:
+            record = encode_template(embedding, "user-0:facial:s0", user_key, encoding)
+            decode_us = per_call_us(lambda: decode_template(record, "user-0:facial:s0", user_key), 2000)
+            print(f"  dim={dimension}  {encoding:<8} {len(record):5d} bytes ({len(record) / embedding.nbytes:.2f}x raw)  "
+                  f"decode {decode_us:6.1f} us")
+
+    print(f"\naccuracy vs float32 (genuine probes near similarity {FACIAL_THRESHOLD})")
+    templates = unit_vectors(rng, 2000, 512)
+    # Noise scaled so probe distances straddle the threshold distance
+    threshold_distance = 1 / FACIAL_THRESHOLD - 1
+    noise = rng.standard_normal(templates.shape).astype(np.float32)
+    noise *= (threshold_distance * rng.uniform(0.7, 1.3, (len(templates), 1)) /
+              np.linalg.norm(noise, axis=1, keepdims=True)).astype(np.float32)
+    probes = templates + noise
+    exact = np.array([similarity_scores(p, t[None])[1][0] for p, t in zip(probes, templates)])
+    for encoding in ENCODINGS[1:]:
+        decoded = np.stack([
+            decode_template(encode_template(t, "id", None, encoding), "id") for t in templates
+        ])
+        approx = np.array([similarity_scores(p, t[None])[1][0] for p, t in zip(probes, decoded)])
+        drift = np.abs(approx - exact)
+        flips = int(np.sum((approx >= FACIAL_THRESHOLD) != (exact >= FACIAL_THRESHOLD)))
+        print(f"  {encoding:<8} mean |dsim| {drift.mean():.2e}  max {drift.max():.2e}  "
+              f"decision flips {flips}/{len(templates)}")
+
+    print(f"\ncold verify_identity, {args.templates} facial templates, rtt={args.rtt_ms:.0f} ms")
+    probe = unit_vectors(rng, 1, 512)[0] * 0.01
+    samples = [probe + rng.standard_normal(512).astype(np.float32) * 0.001 for _ in range(args.templates)]
+
+    legacy_store = make_store(args.rtt_ms / 1000)
+    for i, sample in enumerate(samples):
+        enroll_legacy(legacy_store, "user-0", sample, "facial", f"s{i}", user_key)
+
+    def cold(s):
+        s.verifier.invalidate("user-0")
+        s.verify_identity("user-0", probe, "facial", user_key=user_key)
+
+    print(f"  {'legacy':<8} {measure(lambda: cold(legacy_store), args.verifications)}")
+    legacy_store.verifier.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for encoding in ENCODINGS:
+            TemplateConfig.ENCODING = encoding
+            record_store = make_store(args.rtt_ms / 1000)
+            record_store.templates = SQLiteTemplateStore(os.path.join(directory, f"{encoding}.db"))
+            for i, sample in enumerate(samples):
+                record_store.store_embedding("user-0", sample, "facial", {"enrollment_id": f"s{i}"}, user_key=user_key)
+            verified, _, details = record_store.verify_identity("user-0", probe, "facial", user_key=user_key)
+            assert verified and details["template_count"] == args.templates, details
+            print(f"  {encoding:<8} {measure(lambda: cold(record_store), args.verifications)}  "
+                  f"pinecone calls {record_store.index.calls}")
+            record_store.verifier.close()
+            record_store.templates.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Biometric Verification Latency Benchmark
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Verification latency with 1, 5 and 20 enrolled templates per user:
+#   per-template  one fetch + Fernet decrypt + distance per template (the
+#                 previous verify_identity, extended to every sample)
+#   engine cold   BiometricVectorStore.verify_identity with an empty cache:
+#                 one filtered query, decrypt (thread pool from 8 templates),
+#                 one vectorized scoring call
+#   engine warm   the same with the user's templates cached
+# plus face + voice multimodal verification through verify_multimodal.
+#
+# Templates are enrolled in the Pinecone layout (base64 Fernet tokens on
+# zero vectors) and read through the template store's legacy fallback; a
+# SimulatedIndex stands in for Pinecone: every call costs --rtt-ms.
+# benchmarks/template_format.py compares this with template store records.
+#
+# Usage (from biometric-identity/):
+#     python -m benchmarks.verification_latency --rtt-ms 10 --verifications 200
+
+import argparse
+import base64
+import statistics
+import time
+
+import numpy as np
+
+from pinecone_client import BiometricVectorStore, generate_user_encryption_key
+from template_store import SQLiteTemplateStore
+from verification import BiometricVerificationEngine
+
+FACIAL_DIM = 512
+VOICE_DIM = 256
+
+
+class Match:
+    def __init__(self, vector_id, values, metadata):
+        self.id = vector_id
+        self.values = values
+        self.metadata = metadata
+        self.score = 0.0
+
+
+class Response:
+    def __init__(self, matches=None, vectors=None):
+        self.matches = matches or []
+        self.vectors = vectors or {}
+
+
+class SimulatedIndex:
+    """pinecone.Index stand-in; each call sleeps for one round trip"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.records = {}
+        self.calls = 0
+
+    def _round_trip(self):
+        self.calls += 1
+        time.sleep(self.rtt)
+
+    def upsert(self, vectors, namespace=None):
+        for vector_id, values, metadata in vectors:
+            self.records[vector_id] = Match(vector_id, values, dict(metadata))
+
+    def fetch(self, ids, namespace=None):
+        self._round_trip()
+        return Response(vectors={i: self.records[i] for i in ids if i in self.records})
+
+    def query(self, vector, filter, top_k, include_metadata=False, include_values=False, namespace=None):
+        self._round_trip()
+        modalities = set(filter["modality"]["$in"])
+        matches = [
+            Match(r.id, r.values if include_values else None, r.metadata)
+            for r in self.records.values()
+            if r.metadata["user_id"] == filter["user_id"] and r.metadata["modality"] in modalities
+        ]
+        return Response(matches=matches[:top_k])
+
+    def delete(self, ids, namespace=None):
+        self._round_trip()
+        for vector_id in ids:
+            self.records.pop(vector_id, None)
+
+
+def make_store(rtt: float) -> BiometricVectorStore:
+    # Skip pinecone.init(); everything else is the production class
+    store = BiometricVectorStore.__new__(BiometricVectorStore)
+    store.index_name = "benchmark"
+    store.index = SimulatedIndex(rtt)
+    store.dimension = 768
+    store.templates = SQLiteTemplateStore(":memory:")
+    store.verifier = BiometricVerificationEngine(store)
+    return store
+
+
+def enroll_legacy(store, user_id, embedding, modality, enrollment_id, user_key) -> str:
+    """Pinecone-only enrollment as done before the template store"""
+    vector_id = f"{user_id}:{modality}:{enrollment_id}"
+    encrypted = store.encrypt_embedding(np.asarray(embedding, dtype=np.float32), user_key)
+    metadata = {
+        'encrypted': True,
+        'encrypted_data': base64.b64encode(encrypted).decode('utf-8'),
+        'user_id': user_id,
+        'modality': modality,
+        'enrollment_date': '',
+        'dimension': len(embedding)
+    }
+    store.index.upsert(vectors=[(vector_id, [0.0] * len(embedding), metadata)])
+    return vector_id
+
+
+def per_template_verify(store, user_id, query, modality, vector_ids, user_key, threshold=0.95):
+    """Previous verify_identity body, once per enrolled template"""
+    best = 0.0
+    for vector_id in vector_ids:
+        enrolled = store.index.fetch(ids=[vector_id]).vectors[vector_id]
+        encrypted = base64.b64decode(enrolled.metadata['encrypted_data'])
+        embedding = store.decrypt_embedding(encrypted, user_key, enrolled.metadata['dimension'])
+        distance = np.linalg.norm(query - embedding)
+        best = max(best, 1.0 / (1.0 + distance))
+    return best >= threshold, best
+
+
+def measure(fn, runs: int) -> str:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return f"p50 {statistics.median(latencies):7.2f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1]:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Biometric verification latency benchmark")
+    parser.add_argument("--rtt-ms", type=float, default=10.0, help="Simulated vector store round trip")
+    parser.add_argument("--verifications", type=int, default=200)
+    parser.add_argument("--templates", type=int, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    master_key = b"benchmark-master-key"
+    store = make_store(args.rtt_ms / 1000)
+    print(f"rtt={args.rtt_ms:.0f} ms verifications={args.verifications}")
+
+    for count in args.templates:
+        user_id = f"user-{count}"
+        user_key = generate_user_encryption_key(user_id, master_key)
+        face = rng.standard_normal(FACIAL_DIM).astype(np.float32) * 0.01
+        voice = rng.standard_normal(VOICE_DIM).astype(np.float32) * 0.01
+        face_ids = []
+        for i in range(count):
+            sample = face + rng.standard_normal(FACIAL_DIM).astype(np.float32) * 0.001
+            face_ids.append(enroll_legacy(store, user_id, sample, "facial", f"s{i}", user_key))
+            enroll_legacy(
+                store, user_id, voice + rng.standard_normal(VOICE_DIM).astype(np.float32) * 0.001, "voice",
+                f"s{i}", user_key
+            )
+
+        def per_template():
+            per_template_verify(store, user_id, face, "facial", face_ids, user_key)
+
+        def cold():
+            store.verifier.invalidate(user_id)
+            store.verify_identity(user_id, face, "facial", user_key=user_key)
+
+        def warm():
+            store.verify_identity(user_id, face, "facial", user_key=user_key)
+
+        def multimodal_cold():
+            store.verifier.invalidate(user_id)
+            store.verify_multimodal(user_id, face, voice, user_key=user_key)
+
+        def multimodal_warm():
+            store.verify_multimodal(user_id, face, voice, user_key=user_key)
+
+        verified, score, details = store.verify_identity(user_id, face, "facial", user_key=user_key)
+        assert verified and details["template_count"] == count, details
+
+        print(f"\n{count} template(s) per modality")
+        print(f"  {'per-template':<18} {measure(per_template, args.verifications)}")
+        print(f"  {'engine cold':<18} {measure(cold, args.verifications)}")
+        print(f"  {'engine warm':<18} {measure(warm, args.verifications)}")
+        print(f"  {'multimodal cold':<18} {measure(multimodal_cold, args.verifications)}")
+        print(f"  {'multimodal warm':<18} {measure(multimodal_warm, args.verifications)}")
+
+    cache = store.verifier.cache
+    print(f"\ncache hits={cache.hits} misses={cache.misses}")
+    store.verifier.close()
+
+
+if __name__ == "__main__":
+    main()
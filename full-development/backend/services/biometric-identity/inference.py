@@ -0,0 +1,217 @@
+# Micro-Batched Inference
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Request handlers submit one sample and await its result; a MicroBatcher per
+# model collects concurrent submissions for up to max_wait_ms or
+# max_batch_size items, runs one batched call on a dedicated worker thread
+# (PyTorch and OpenCV release the GIL while they compute) and resolves each
+# request's future. The event loop never runs model code.
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class InferenceConfig:
+    """Micro-batching configuration"""
+
+    MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+    MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+    # Batches of one model computing at once; each already uses all cores
+    MAX_INFLIGHT_BATCHES = int(os.getenv("INFERENCE_MAX_INFLIGHT_BATCHES", "1"))
+    # Requests waiting per model before submit() pushes back on callers
+    MAX_QUEUE_SIZE = int(os.getenv("INFERENCE_MAX_QUEUE_SIZE", "1024"))
+
+# =============================================================================
+# MICRO-BATCHER
+# =============================================================================
+
+class MicroBatcher:
+    """
+    Collects single requests into batches for one batch function.
+
+    batch_fn(items) runs on the batcher's executor and must return one entry
+    per item, in order; an entry that is an Exception is raised to that
+    item's caller only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = InferenceConfig.MAX_BATCH_SIZE,
+        max_wait_ms: float = InferenceConfig.MAX_WAIT_MS,
+        max_inflight_batches: int = InferenceConfig.MAX_INFLIGHT_BATCHES,
+        max_queue_size: int = InferenceConfig.MAX_QUEUE_SIZE,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_inflight_batches = max_inflight_batches
+        self.max_queue_size = max_queue_size
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_inflight_batches, thread_name_prefix=f"inference-{name}"
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        # Counters for /metrics and the benchmark
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.max_inflight_batches)
+        self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def submit(self, item: Any) -> Any:
+        """Run one item as part of the next batch and return its result"""
+        if self._collector is None or self._collector.done():
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot first, so requests arriving while all
+            # slots are busy join the next batch instead of queuing behind it
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain whatever else is already waiting, up to the batch limit
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = loop.create_task(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            items = [item for item, _ in batch]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self.executor, self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                logger.error(f"Inference batch {self.name} ({len(items)} items) failed: {e}")
+                results = [e] * len(items)
+
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, *self._inflight, return_exceptions=True)
+            self._collector = None
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+
+def run_each(fn: Callable[[Any], Any]) -> Callable[[List[Any]], List[Any]]:
+    """Batch function for models without a batched form: call fn per item"""
+
+    def batch_fn(items: List[Any]) -> List[Any]:
+        results = []
+        for item in items:
+            try:
+                results.append(fn(item))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    return batch_fn
+
+# =============================================================================
+# BIOMETRIC INFERENCE SERVER
+# =============================================================================
+
+class BiometricInferenceServer:
+    """
+    Micro-batched access to every biometric model of a BiometricModelManager.
+    Embedding models batch their forward passes; liveness and quality checks
+    have no batched form yet and run item by item on their own thread, which
+    still keeps them off the event loop.
+    """
+
+    def __init__(self, manager, max_batch_size: int = InferenceConfig.MAX_BATCH_SIZE,
+                 max_wait_ms: float = InferenceConfig.MAX_WAIT_MS):
+        facial = manager.get_facial_model()
+        voice = manager.get_voice_model()
+        liveness = manager.get_liveness_detector()
+        quality = manager.get_quality_assessor()
+
+        def batcher(name, batch_fn):
+            return MicroBatcher(name, batch_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+        self.batchers = {
+            "face_embedding": batcher("face_embedding", facial.extract_embeddings),
+            "voice_embedding": batcher("voice_embedding", voice.extract_embeddings),
+            "face_liveness": batcher("face_liveness", run_each(liveness.check_facial_liveness)),
+            "voice_liveness": batcher("voice_liveness", run_each(liveness.check_voice_liveness)),
+            "image_quality": batcher("image_quality", run_each(quality.assess_image_quality)),
+            "audio_quality": batcher("audio_quality", run_each(quality.assess_audio_quality)),
+        }
+
+    async def extract_facial_embedding(self, image_bytes: bytes):
+        return await self.batchers["face_embedding"].submit(image_bytes)
+
+    async def extract_voice_embedding(self, audio_bytes: bytes):
+        return await self.batchers["voice_embedding"].submit(audio_bytes)
+
+    async def check_facial_liveness(self, image_bytes: bytes):
+        return await self.batchers["face_liveness"].submit(image_bytes)
+
+    async def check_voice_liveness(self, audio_bytes: bytes):
+        return await self.batchers["voice_liveness"].submit(audio_bytes)
+
+    async def assess_image_quality(self, image_bytes: bytes):
+        return await self.batchers["image_quality"].submit(image_bytes)
+
+    async def assess_audio_quality(self, audio_bytes: bytes):
+        return await self.batchers["audio_quality"].submit(audio_bytes)
+
+    def stats(self) -> dict:
+        return {
+            name: {"batches": b.batches, "items": b.items, "average_batch_size": round(b.average_batch_size, 2)}
+            for name, b in self.batchers.items()
+        }
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
@@ -0,0 +1,201 @@
+# Background Jobs
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Verification side effects (audit log, statistics, Kafka events, security
+# events) are queued on a Redis stream so /api/v1/verify returns without
+# waiting on them, and run by a separate worker process:
+#
+#     python jobs.py
+#
+# Wire format and semantics match the platform job queue
+# (backend/app/core/job_queue.py): entries are {id, topic, payload, attempts},
+# read in batches through a consumer group, retried with exponential backoff
+# via a delay sorted set and dead-lettered after MAX_ATTEMPTS.
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from redis.exceptions import ResponseError, WatchError
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class JobConfig:
+    """Job queue configuration"""
+
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    STREAM = os.getenv("BIOMETRIC_JOB_STREAM", "noor:biometric:jobs")
+    GROUP = "biometric-workers"
+    BATCH_SIZE = int(os.getenv("BIOMETRIC_JOB_BATCH_SIZE", "100"))
+    MAX_ATTEMPTS = int(os.getenv("BIOMETRIC_JOB_MAX_ATTEMPTS", "5"))
+    RETRY_BACKOFF_SECONDS = 2.0
+    MAX_RETRY_DELAY_SECONDS = 300.0
+    CLAIM_IDLE_MS = 60000  # reclaim entries left pending by a crashed worker
+    STREAM_MAXLEN = 100000
+
+# =============================================================================
+# JOB QUEUE
+# =============================================================================
+
+class JobQueue:
+    """
+    At-least-once job queue on a Redis stream.
+    Handlers must tolerate running a job twice; the job id is stable across
+    retries.
+    """
+
+    def __init__(self, client: redis.Redis, stream: str = JobConfig.STREAM, consumer: Optional[str] = None):
+        self.redis = client
+        self.stream = stream
+        self.group = JobConfig.GROUP
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.delayed_key = f"{stream}:delayed"
+        self.dead_letter_stream = f"{stream}:dead"
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def register(self, topic: str, handler: JobHandler):
+        self.handlers[topic] = handler
+
+    async def enqueue_many(self, jobs: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Add (topic, payload) jobs in one round trip"""
+        ids = []
+        pipe = self.redis.pipeline(transaction=False)
+        for topic, payload in jobs:
+            job_id = uuid.uuid4().hex
+            ids.append(job_id)
+            fields = {"id": job_id, "topic": topic, "payload": json.dumps(payload, default=str), "attempts": 0}
+            pipe.xadd(self.stream, fields, maxlen=JobConfig.STREAM_MAXLEN, approximate=True)
+        if ids:
+            await pipe.execute()
+        return ids
+
+    async def ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run_once(self, batch_size: int = JobConfig.BATCH_SIZE, block_ms: int = 1000) -> Dict[str, int]:
+        """Process one batch of due retries, reclaimed or new entries"""
+        await self._promote_due_retries(batch_size)
+
+        claimed = await self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, JobConfig.CLAIM_IDLE_MS, start_id="0-0", count=batch_size
+        )
+        entries = [entry for entry in claimed[1] if entry[1]]
+        if not entries:
+            response = await self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=batch_size, block=block_ms or None
+            )
+            entries = response[0][1] if response else []
+
+        return await self._process(entries)
+
+    async def run(self, stop: asyncio.Event):
+        await self.ensure_group()
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job batch failed: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _promote_due_retries(self, limit: int):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.delayed_key)
+                due = await pipe.zrangebyscore(self.delayed_key, 0, time.time(), start=0, num=limit)
+                if not due:
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.zrem(self.delayed_key, *due)
+                for member in due:
+                    pipe.xadd(self.stream, json.loads(member), maxlen=JobConfig.STREAM_MAXLEN, approximate=True)
+                await pipe.execute()
+            except WatchError:
+                pass
+
+    async def _process(self, entries) -> Dict[str, int]:
+        counts = {"succeeded": 0, "retried": 0, "dead_lettered": 0}
+        if not entries:
+            return counts
+
+        errors = await asyncio.gather(*(self._run_handler(fields) for _, fields in entries))
+
+        pipe = self.redis.pipeline(transaction=True)
+        for (_, fields), error in zip(entries, errors):
+            if error is None:
+                counts["succeeded"] += 1
+                continue
+            attempts = int(fields.get("attempts", 0)) + 1
+            if attempts >= JobConfig.MAX_ATTEMPTS:
+                counts["dead_lettered"] += 1
+                logger.error(f"Job {fields.get('id')} ({fields.get('topic')}) dead-lettered: {error}")
+                pipe.xadd(self.dead_letter_stream, {**fields, "attempts": attempts, "error": error, "failed_at": time.time()})
+            else:
+                counts["retried"] += 1
+                delay = min(JobConfig.MAX_RETRY_DELAY_SECONDS, JobConfig.RETRY_BACKOFF_SECONDS ** attempts)
+                retry = json.dumps({**fields, "attempts": attempts, "error": error}, sort_keys=True)
+                pipe.zadd(self.delayed_key, {retry: time.time() + delay})
+        pipe.xack(self.stream, self.group, *(entry_id for entry_id, _ in entries))
+        await pipe.execute()
+        return counts
+
+    async def _run_handler(self, fields: Dict[str, str]) -> Optional[str]:
+        handler = self.handlers.get(fields.get("topic"))
+        if handler is None:
+            return f"No handler for topic {fields.get('topic')!r}"
+        try:
+            await handler(json.loads(fields["payload"]))
+        except Exception as e:
+            logger.warning(f"Job {fields.get('id')} ({fields.get('topic')}) failed: {e}")
+            return str(e) or type(e).__name__
+        return None
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+async def run_worker(stop: asyncio.Event):
+    """Process verification side effects until stop is set"""
+    from main import JOB_HANDLERS
+
+    client = redis.from_url(JobConfig.REDIS_URL or "redis://localhost:6379/0", decode_responses=True)
+    queue = JobQueue(client)
+    for topic, handler in JOB_HANDLERS.items():
+        queue.register(topic, handler)
+
+    logger.info(f"Biometric job worker {queue.consumer} consuming {queue.stream}")
+    try:
+        await queue.run(stop)
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    import signal
+
+    logging.basicConfig(level=logging.INFO)
+    loop = asyncio.new_event_loop()
+    stop_event = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    try:
+        loop.run_until_complete(run_worker(stop_event))
+    finally:
+        loop.close()
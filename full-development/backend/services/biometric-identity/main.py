@@ -10,9 +10,16 @@ from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
+import asyncio
 import logging
 import base64
 import hashlib
+import os
+
+import redis.asyncio as redis
+
+from jobs import JobConfig, JobQueue
+from preprocessing import InlineSample, Sample, get_preprocessor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -121,6 +128,10 @@ class BiometricConfig:
     MIN_IMAGE_QUALITY = 0.70
     MIN_AUDIO_QUALITY = 0.65
 
+    # Model serving (FaceNet, SpeechBrain) through the micro-batching
+    # inference server; disabled = mock results for development
+    ML_MODELS_ENABLED = os.getenv("BIOMETRIC_ML_MODELS_ENABLED", "false").lower() == "true"
+
 # =============================================================================
 # PYDANTIC MODELS
 # =============================================================================
@@ -276,6 +287,54 @@ async def require_biometric_admin(user: Dict[str, Any] = Depends(verify_token))
 # HELPER FUNCTIONS
 # =============================================================================
 
+# Micro-batched model access (inference.py); None until models are loaded
+inference_server = None
+
+# Process pool for decode, quality and liveness (preprocessing.py); None
+# with BIOMETRIC_PREPROCESS_WORKERS=0
+preprocessor = None
+
+async def decode_biometric_data(encoded: str) -> Sample:
+    """Base64-decode a sample off the event loop (inline without a preprocessor)"""
+    if preprocessor is not None:
+        return await preprocessor.decode_base64(encoded)
+    return InlineSample(base64.b64decode(encoded))
+
+def load_biometric_data(data: bytes) -> Sample:
+    """Wrap raw sample bytes for the preprocessing workers"""
+    if preprocessor is not None:
+        return preprocessor.load(data)
+    return InlineSample(data)
+
+# Sample checks by name (sample_checks.py) -> BiometricInferenceServer method
+INFERENCE_SERVER_CHECKS = {
+    "image_quality": "assess_image_quality",
+    "audio_quality": "assess_audio_quality",
+    "face_liveness": "check_facial_liveness",
+    "voice_liveness": "check_voice_liveness"
+}
+
+async def run_sample_check(check: str, sample: Sample) -> Optional[Tuple]:
+    """
+    Run a sample check in the preprocessing workers (or, without them, on the
+    inference server's threads). Returns None when models are not loaded.
+    """
+    if preprocessor is not None and preprocessor.load_checks:
+        return await preprocessor.check(check, sample)
+    if inference_server is not None:
+        return await getattr(inference_server, INFERENCE_SERVER_CHECKS[check])(sample.read())
+    return None
+
+async def check_sample(
+    sample: Sample,
+    modality: BiometricModality
+) -> Tuple[QualityAssessment, LivenessCheck]:
+    """Quality assessment and liveness detection, run in parallel"""
+    return await asyncio.gather(
+        assess_quality(sample, modality),
+        perform_liveness_detection(sample, modality)
+    )
+
 def generate_session_token() -> str:
     """Generate secure session token for enrollment"""
     return base64.urlsafe_b64encode(uuid.uuid4().bytes).decode('utf-8').rstrip('=')
@@ -290,9 +349,11 @@ async def extract_facial_embedding(image_data: bytes) -> Tuple[List[float], floa
     Extract FaceNet embedding from facial image.
     Returns: (embedding, quality_score)
     """
-    # TODO: Implement actual FaceNet inference
-    # This would use a pre-trained FaceNet model
-    # For now, return mock data
+    if inference_server is not None:
+        embedding, quality_score = await inference_server.extract_facial_embedding(image_data)
+        return embedding.tolist(), quality_score
+
+    # Mock data when models are not loaded
     import random
     embedding = [random.random() for _ in range(BiometricConfig.FACIAL_EMBEDDING_DIM)]
     quality_score = 0.85
@@ -303,20 +364,35 @@ async def extract_voice_embedding(audio_data: bytes) -> Tuple[List[float], float
     Extract SpeechBrain embedding from voice audio.
     Returns: (embedding, quality_score)
     """
-    # TODO: Implement actual SpeechBrain inference
-    # This would use a pre-trained speaker recognition model
+    if inference_server is not None:
+        embedding, quality_score = await inference_server.extract_voice_embedding(audio_data)
+        return embedding.tolist(), quality_score
+
+    # Mock data when models are not loaded
     import random
     embedding = [random.random() for _ in range(BiometricConfig.VOICE_EMBEDDING_DIM)]
     quality_score = 0.82
     return embedding, quality_score
 
-async def perform_liveness_detection(biometric_data: bytes, modality: BiometricModality) -> LivenessCheck:
+async def perform_liveness_detection(sample: Sample, modality: BiometricModality) -> LivenessCheck:
     """
     Perform liveness detection to prevent spoofing attacks.
     """
     # TODO: Implement actual liveness detection
     # Facial: Blink detection, texture analysis, 3D depth analysis
     # Voice: Voice activity detection, anti-replay detection
+    check = "voice_liveness" if modality == BiometricModality.VOICE else "face_liveness"
+    result = await run_sample_check(check, sample)
+    if result is not None:
+        is_live, confidence = result
+        live = is_live and confidence >= BiometricConfig.LIVENESS_CONFIDENCE_THRESHOLD
+        return LivenessCheck(
+            result=LivenessResult.LIVE if live else LivenessResult.SPOOF,
+            confidence=confidence,
+            anti_spoof_score=confidence,
+            challenge_passed=is_live,
+            challenge_type="passive"
+        )
 
     return LivenessCheck(
         result=LivenessResult.LIVE,
@@ -326,13 +402,26 @@ async def perform_liveness_detection(biometric_data: bytes, modality: BiometricM
         challenge_type="blink"
     )
 
-async def assess_quality(biometric_data: bytes, modality: BiometricModality) -> QualityAssessment:
+async def assess_quality(sample: Sample, modality: BiometricModality) -> QualityAssessment:
     """
     Assess quality of biometric sample.
     """
     # TODO: Implement actual quality assessment
     # Facial: Resolution, lighting, pose, occlusion
     # Voice: SNR, duration, clarity
+    if modality == BiometricModality.VOICE:
+        check, minimum = "audio_quality", BiometricConfig.MIN_AUDIO_QUALITY
+    else:
+        check, minimum = "image_quality", BiometricConfig.MIN_IMAGE_QUALITY
+    result = await run_sample_check(check, sample)
+    if result is not None:
+        score, issues, recommendations = result
+        return QualityAssessment(
+            overall_quality=score,
+            meets_standards=score >= minimum,
+            issues=issues,
+            recommendations=recommendations
+        )
 
     return QualityAssessment(
         overall_quality=0.85,
@@ -425,21 +514,27 @@ async def submit_biometric_sample(
     # TODO: Fetch enrollment session from Redis
 
     # Read biometric data
-    biometric_data = await biometric_file.read()
+    try:
+        sample = load_biometric_data(await biometric_file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
     # TODO: Determine modality from enrollment session
     modality = BiometricModality.FACIAL  # Mock
 
-    # Quality assessment
-    quality = await assess_quality(biometric_data, modality)
+    # Quality assessment and liveness detection, in parallel off the event loop
+    try:
+        quality, liveness = await check_sample(sample, modality)
+        biometric_data = sample.read()
+    finally:
+        sample.close()
+
     if not quality.meets_standards:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Biometric quality insufficient: {', '.join(quality.issues)}"
         )
 
-    # Liveness detection
-    liveness = await perform_liveness_detection(biometric_data, modality)
     if liveness.result == LivenessResult.SPOOF:
         logger.warning(f"Spoofing detected in enrollment {enrollment_id}")
         # TODO: Publish security alert
@@ -513,12 +608,17 @@ async def verify_biometric(
 
     # Decode biometric data
     try:
-        biometric_data = base64.b64decode(request.biometric_data)
+        sample = await decode_biometric_data(request.biometric_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid biometric data encoding")
 
-    # Quality check
-    quality = await assess_quality(biometric_data, request.modality)
+    # Quality check and liveness detection, in parallel off the event loop
+    try:
+        quality, liveness = await check_sample(sample, request.modality)
+        biometric_data = sample.read()
+    finally:
+        sample.close()
+
     if not quality.meets_standards:
         return VerificationResponse(
             verification_id=verification_id,
@@ -531,11 +631,11 @@ async def verify_biometric(
             security_flags={"reason": "quality_check_failed"}
         )
 
-    # Liveness detection
-    liveness = await perform_liveness_detection(biometric_data, request.modality)
     if liveness.result != LivenessResult.LIVE:
         logger.warning(f"Liveness check failed for user {request.user_id}")
-        background_tasks.add_task(log_security_event, request.user_id, "liveness_failure")
+        await enqueue_jobs(background_tasks, [
+            (SECURITY_EVENT_TOPIC, {"user_id": request.user_id, "event_type": "liveness_failure"})
+        ])
 
         return VerificationResponse(
             verification_id=verification_id,
@@ -577,7 +677,9 @@ async def verify_biometric(
 
     if fraud.is_suspicious:
         logger.warning(f"Suspicious verification attempt detected for user {request.user_id}")
-        background_tasks.add_task(log_security_event, request.user_id, "suspicious_verification")
+        await enqueue_jobs(background_tasks, [
+            (SECURITY_EVENT_TOPIC, {"user_id": request.user_id, "event_type": "suspicious_verification"})
+        ])
 
         result = VerificationResult.SUSPICIOUS
         action = fraud.recommended_action
@@ -601,10 +703,13 @@ async def verify_biometric(
         action_taken=action
     )
 
-    # Background tasks
-    background_tasks.add_task(save_verification_log, request.user_id, response)
-    background_tasks.add_task(update_statistics, request.user_id, verified)
-    background_tasks.add_task(publish_verification_event, response)
+    # Side effects run in the job worker; one round trip to queue them
+    verification = response.model_dump(mode="json")
+    await enqueue_jobs(background_tasks, [
+        (VERIFICATION_LOG_TOPIC, verification),
+        (STATISTICS_TOPIC, {"user_id": request.user_id, "verified": verified}),
+        (VERIFICATION_EVENT_TOPIC, verification)
+    ])
 
     return response
 
@@ -663,29 +768,56 @@ async def get_security_alerts(
     return []
 
 # =============================================================================
-# BACKGROUND TASK FUNCTIONS
+# BACKGROUND JOBS
 # =============================================================================
 
-async def save_verification_log(user_id: str, response: VerificationResponse):
+VERIFICATION_LOG_TOPIC = "biometric.verification_log"
+STATISTICS_TOPIC = "biometric.statistics"
+VERIFICATION_EVENT_TOPIC = "biometric.verification_event"
+SECURITY_EVENT_TOPIC = "biometric.security_event"
+
+# Redis job queue (see jobs.py); None runs jobs as BackgroundTasks instead
+job_queue: Optional[JobQueue] = None
+
+async def enqueue_jobs(background_tasks: BackgroundTasks, jobs: List[Tuple[str, Dict[str, Any]]]):
+    """Queue (topic, payload) jobs for the worker, or run them after the response when Redis is unset or down"""
+    if job_queue is not None:
+        try:
+            await job_queue.enqueue_many(jobs)
+            return
+        except redis.RedisError as e:
+            # Jobs queued before the error run twice; handlers already tolerate that (jobs.py)
+            logger.error(f"Job queue unavailable, running {len(jobs)} job(s) in process: {e}")
+    for topic, payload in jobs:
+        background_tasks.add_task(JOB_HANDLERS[topic], payload)
+
+async def save_verification_log(verification: Dict[str, Any]):
     """Save verification attempt to audit log"""
-    # TODO: Save to PostgreSQL audit table
-    logger.info(f"Saved verification log for user {user_id}: {response.result}")
+    # TODO: Save to PostgreSQL audit table (upsert on verification_id)
+    logger.info(f"Saved verification log for user {verification['user_id']}: {verification['result']}")
 
-async def update_statistics(user_id: str, verified: bool):
+async def update_statistics(payload: Dict[str, Any]):
     """Update user verification statistics"""
     # TODO: Increment counters in PostgreSQL
-    logger.info(f"Updated statistics for user {user_id}")
+    logger.info(f"Updated statistics for user {payload['user_id']}")
 
-async def publish_verification_event(response: VerificationResponse):
+async def publish_verification_event(verification: Dict[str, Any]):
     """Publish verification event to Kafka"""
     # TODO: Publish to noor.biometric.verification.succeeded/failed topic
-    logger.info(f"Published verification event: {response.verification_id}")
+    logger.info(f"Published verification event: {verification['verification_id']}")
 
-async def log_security_event(user_id: str, event_type: str):
+async def log_security_event(payload: Dict[str, Any]):
     """Log security event for monitoring"""
     # TODO: Save to security_events collection in MongoDB
     # TODO: Send alert if critical
-    logger.warning(f"Security event logged: {event_type} for user {user_id}")
+    logger.warning(f"Security event logged: {payload['event_type']} for user {payload['user_id']}")
+
+JOB_HANDLERS = {
+    VERIFICATION_LOG_TOPIC: save_verification_log,
+    STATISTICS_TOPIC: update_statistics,
+    VERIFICATION_EVENT_TOPIC: publish_verification_event,
+    SECURITY_EVENT_TOPIC: log_security_event
+}
 
 # =============================================================================
 # HEALTH CHECK
@@ -720,17 +852,30 @@ async def readiness_check():
 @app.on_event("startup")
 async def startup_event():
     """Initialize on startup"""
+    global job_queue, inference_server, preprocessor
     logger.info("Biometric Identity Service (SECURITY CRITICAL) starting up...")
+    if JobConfig.REDIS_URL:
+        job_queue = JobQueue(redis.from_url(JobConfig.REDIS_URL, decode_responses=True))
     # TODO: Initialize Pinecone client
     # TODO: Initialize PostgreSQL connection
     # TODO: Initialize MongoDB connection
     # TODO: Initialize Kafka producer
-    # TODO: Load ML models (FaceNet, SpeechBrain)
+    if BiometricConfig.ML_MODELS_ENABLED:
+        from ml_models import get_inference_server
+        inference_server = get_inference_server()
+    # Sample checks need OpenCV; with mock models only decoding uses the pool
+    preprocessor = get_preprocessor(load_checks=BiometricConfig.ML_MODELS_ENABLED)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Biometric Identity Service shutting down...")
+    if job_queue is not None:
+        await job_queue.redis.close()
+    if inference_server is not None:
+        await inference_server.close()
+    if preprocessor is not None:
+        preprocessor.close()
     # TODO: Close database connections
     # TODO: Close Kafka producer
     # TODO: Unload ML models
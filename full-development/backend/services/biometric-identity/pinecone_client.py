@@ -9,6 +9,15 @@ from cryptography.fernet import Fernet
 import base64
 import os
 
+from template_store import (
+    FORMAT_VERSION,
+    TemplateConfig,
+    TemplateStore,
+    encode_template,
+    open_template_store,
+)
+from verification import BiometricVerificationEngine, VerificationConfig
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -25,7 +34,8 @@ class BiometricVectorStore:
         self,
         api_key: str,
         environment: str,
-        index_name: str = "noor-biometric-embeddings"
+        index_name: str = "noor-biometric-embeddings",
+        template_store: Optional[TemplateStore] = None
     ):
         """
         Initialize Pinecone client.
@@ -34,6 +44,7 @@ class BiometricVectorStore:
             api_key: Pinecone API key
             environment: Pinecone environment (e.g., "us-west1-gcp")
             index_name: Name of the Pinecone index
+            template_store: Store for template records (default from BIOMETRIC_TEMPLATE_STORE)
         """
         self.index_name = index_name
 
@@ -55,6 +66,9 @@ class BiometricVectorStore:
             logger.info(f"Created index: {index_name}")
 
         self.index = pinecone.Index(index_name)
+        self.dimension = 768
+        self.templates = template_store or open_template_store()
+        self.verifier = BiometricVerificationEngine(self)
 
         logger.info("Pinecone client initialized successfully")
 
@@ -116,7 +130,12 @@ class BiometricVectorStore:
         user_key: Optional[bytes] = None
     ) -> str:
         """
-        Store biometric embedding in Pinecone.
+        Store biometric embedding.
+
+        The template record (float16/int8, AES-GCM encrypted with the user
+        key) goes to the template store. Only unencrypted embeddings are
+        also upserted to Pinecone, as real vectors, so ANN search over the
+        index is not diluted by zero vectors.
 
         Args:
             user_id: User UUID
@@ -133,41 +152,34 @@ class BiometricVectorStore:
             # Generate vector ID
             vector_id = f"{user_id}:{modality}:{metadata.get('enrollment_id', 'default')}"
 
-            # Prepare embedding
-            if encrypt:
-                if user_key is None:
-                    raise ValueError("user_key required for encryption")
-
-                # Encrypt embedding
-                encrypted = self.encrypt_embedding(embedding, user_key)
+            if encrypt and user_key is None:
+                raise ValueError("user_key required for encryption")
 
-                # Store encrypted flag and encrypted data in metadata
-                metadata['encrypted'] = True
-                metadata['encrypted_data'] = base64.b64encode(encrypted).decode('utf-8')
-
-                # Use zero vector in Pinecone (actual embedding is in encrypted_data)
-                # This prevents Pinecone from learning anything from the embeddings
-                embedding_to_store = np.zeros(len(embedding))
-            else:
-                embedding_to_store = embedding
-                metadata['encrypted'] = False
-
-            # Add metadata
-            metadata.update({
-                'user_id': user_id,
-                'modality': modality,
-                'enrollment_date': metadata.get('enrollment_date', ''),
-                'dimension': len(embedding)
-            })
-
-            # Upsert to Pinecone
-            self.index.upsert(
-                vectors=[
-                    (vector_id, embedding_to_store.tolist(), metadata)
-                ]
+            record = encode_template(
+                embedding, vector_id, user_key if encrypt else None, TemplateConfig.ENCODING
+            )
+            self.templates.put(vector_id, user_id, modality, record, metadata.get('enrollment_date'))
+
+            if not encrypt:
+                metadata.update({
+                    'encrypted': False,
+                    'user_id': user_id,
+                    'modality': modality,
+                    'enrollment_date': metadata.get('enrollment_date', ''),
+                    'dimension': len(embedding)
+                })
+                self.index.upsert(
+                    vectors=[
+                        (vector_id, np.asarray(embedding, dtype=np.float32).tolist(), metadata)
+                    ]
+                )
+
+            self.verifier.invalidate(user_id)
+
+            logger.info(
+                f"Stored embedding for user {user_id}, modality {modality}, encrypted={encrypt}, "
+                f"{len(record)} bytes"
             )
-
-            logger.info(f"Stored embedding for user {user_id}, modality {modality}, encrypted={encrypt}")
 
             return vector_id
 
@@ -175,16 +187,116 @@ class BiometricVectorStore:
             logger.error(f"Failed to store embedding: {e}")
             raise
 
+    def fetch_user_templates(
+        self,
+        user_id: str,
+        modalities: List[str]
+    ) -> List[Tuple[str, Dict[str, Any], Any]]:
+        """
+        Fetch every enrolled template of a user in one query.
+
+        Templates come from the template store. With LEGACY_FALLBACK,
+        modalities that have none there are looked up in Pinecone, where
+        templates enrolled before the template store live.
+
+        Args:
+            user_id: User UUID
+            modalities: Modalities to include
+
+        Returns:
+            List of (vector_id, metadata, record bytes | legacy values | None)
+        """
+        templates = self.templates.get_user_templates(user_id, modalities)
+
+        if TemplateConfig.LEGACY_FALLBACK:
+            found = {metadata['modality'] for _, metadata, _ in templates}
+            missing = [modality for modality in modalities if modality not in found]
+            if missing:
+                templates += self._fetch_pinecone_templates(user_id, missing)
+
+        return templates
+
+    def _fetch_pinecone_templates(
+        self,
+        user_id: str,
+        modalities: List[str]
+    ) -> List[Tuple[str, Dict[str, Any], Optional[List[float]]]]:
+        """
+        Fetch a user's vectors from Pinecone in one round trip.
+
+        Legacy encrypted templates are stored against zero vectors, so a
+        metadata filtered query returns all of them. Values are only fetched
+        (in a second call) for unencrypted templates.
+
+        Returns:
+            List of (vector_id, metadata, values or None)
+        """
+        response = self.index.query(
+            vector=[0.0] * self.dimension,
+            filter={"user_id": user_id, "modality": {"$in": list(modalities)}},
+            top_k=VerificationConfig.MAX_TEMPLATES_PER_USER,
+            include_metadata=True
+        )
+
+        templates = [(match.id, match.metadata, None) for match in response.matches]
+
+        plain_ids = [vector_id for vector_id, metadata, _ in templates if not metadata.get('encrypted', False)]
+        if plain_ids:
+            vectors = self.index.fetch(ids=plain_ids).vectors
+            templates = [
+                (vector_id, metadata, vectors[vector_id].values if vector_id in vectors else values)
+                for vector_id, metadata, values in templates
+                if metadata.get('encrypted', False) or vector_id in vectors
+            ]
+
+        return templates
+
+    def migrate_legacy_templates(self, user_id: str, user_key: Optional[bytes] = None) -> int:
+        """
+        Rewrite a user's Pinecone-stored templates as template records.
+
+        Encrypted legacy vectors (zero vectors carrying a base64 Fernet token)
+        are deleted from Pinecone once written; unencrypted ones stay, since
+        their values are real vectors.
+
+        Args:
+            user_id: User UUID
+            user_key: User-specific key (required for encrypted templates)
+
+        Returns:
+            Number of templates migrated
+        """
+        legacy = self._fetch_pinecone_templates(user_id, ['facial', 'voice', 'multimodal'])
+        migrated_ids = []
+
+        for record in legacy:
+            vector_id, metadata, _ = record
+            encrypted = metadata.get('encrypted', False)
+            embedding = self.verifier.decode(record, user_key)
+            template = encode_template(embedding, vector_id, user_key if encrypted else None, TemplateConfig.ENCODING)
+            self.templates.put(vector_id, user_id, metadata['modality'], template, metadata.get('enrollment_date'))
+            if encrypted:
+                migrated_ids.append(vector_id)
+
+        if migrated_ids:
+            self.index.delete(ids=migrated_ids)
+        self.verifier.invalidate(user_id)
+
+        logger.info(f"Migrated {len(legacy)} templates for user {user_id} to format v{FORMAT_VERSION}")
+
+        return len(legacy)
+
     def verify_identity(
         self,
         user_id: str,
         query_embedding: np.ndarray,
         modality: str,
         user_key: Optional[bytes] = None,
-        threshold: float = 0.95
+        threshold: float = 0.95,
+        fusion: str = "max"
     ) -> Tuple[bool, float, Dict[str, Any]]:
         """
-        Verify user identity using biometric embedding.
+        Verify user identity against all enrolled samples of a modality.
 
         Args:
             user_id: User UUID to verify against
@@ -192,69 +304,81 @@ class BiometricVectorStore:
             modality: Biometric modality
             user_key: User-specific decryption key
             threshold: Similarity threshold for verification (0.0 to 1.0)
+            fusion: Combines per-sample similarities, "max" or "mean"
 
         Returns:
             (verified, confidence_score, match_metadata)
         """
         try:
-            # Query Pinecone for user's enrolled embeddings
-            # Note: Since we store zero vectors when encrypted, we need to
-            # fetch the metadata and decrypt locally
-
-            # Fetch all embeddings for this user and modality
-            query_filter = {
-                "user_id": user_id,
-                "modality": modality
-            }
-
-            # In production, would use metadata filtering
-            # For now, fetch by ID pattern
-            vector_ids = [f"{user_id}:{modality}:default"]  # Simplified
-
-            fetch_response = self.index.fetch(ids=vector_ids)
-
-            if not fetch_response.vectors:
-                logger.warning(f"No enrolled embeddings found for user {user_id}, modality {modality}")
+            verified, similarity, details = self.verifier.verify(
+                user_id, {modality: query_embedding}, user_key=user_key, threshold=threshold, fusion=fusion
+            )
+            if not details.get("modalities"):
                 return False, 0.0, {}
 
-            # Get the enrolled embedding
-            enrolled_vector = fetch_response.vectors[vector_ids[0]]
-            enrolled_metadata = enrolled_vector.metadata
+            best = details["modalities"][modality]
+            match_metadata = {
+                'vector_id': best['vector_id'],
+                'enrollment_date': best['enrollment_date'],
+                'distance': best['distance'],
+                'similarity': similarity,
+                'max_similarity': best['max_similarity'],
+                'mean_similarity': best['mean_similarity'],
+                'template_count': best['template_count'],
+                'fusion': fusion,
+                'threshold': threshold
+            }
 
-            # Check if encrypted
-            if enrolled_metadata.get('encrypted', False):
-                if user_key is None:
-                    raise ValueError("user_key required to decrypt embedding")
+            logger.info(f"Verification result for user {user_id}: verified={verified}, similarity={similarity:.4f}")
 
-                # Decrypt the stored embedding
-                encrypted_data = base64.b64decode(enrolled_metadata['encrypted_data'])
-                dimension = enrolled_metadata['dimension']
-                enrolled_embedding = self.decrypt_embedding(encrypted_data, user_key, dimension)
-            else:
-                enrolled_embedding = np.array(enrolled_vector.values)
+            return verified, similarity, match_metadata
 
-            # Calculate similarity using Euclidean distance
-            distance = np.linalg.norm(query_embedding - enrolled_embedding)
+        except Exception as e:
+            logger.error(f"Failed to verify identity: {e}")
+            return False, 0.0, {"error": str(e)}
 
-            # Convert Euclidean distance to similarity score (0 to 1)
-            # Lower distance = higher similarity
-            # Using inverse distance with normalization
-            similarity = 1.0 / (1.0 + distance)
+    def verify_multimodal(
+        self,
+        user_id: str,
+        facial_embedding: np.ndarray,
+        voice_embedding: np.ndarray,
+        user_key: Optional[bytes] = None,
+        threshold: float = 0.93,
+        fusion: str = "max",
+        modality_fusion: str = "mean",
+        modality_weights: Optional[Dict[str, float]] = None
+    ) -> Tuple[bool, float, Dict[str, Any]]:
+        """
+        Verify face and voice together; both modalities' templates are
+        loaded in one round trip and their scores fused.
 
-            # Verify against threshold
-            verified = similarity >= threshold
+        Args:
+            user_id: User UUID to verify against
+            facial_embedding: Facial probe embedding
+            voice_embedding: Voice probe embedding
+            user_key: User-specific decryption key
+            threshold: Threshold for the fused score
+            fusion: Combines per-sample similarities, "max" or "mean"
+            modality_fusion: Combines face and voice, "mean" (weighted) or "max"
+            modality_weights: e.g. {"facial": 0.6, "voice": 0.4}
 
-            match_metadata = {
-                'vector_id': vector_ids[0],
-                'enrollment_date': enrolled_metadata.get('enrollment_date'),
-                'distance': float(distance),
-                'similarity': float(similarity),
-                'threshold': threshold
-            }
+        Returns:
+            (verified, fused_score, match_metadata)
+        """
+        try:
+            verified, score, details = self.verifier.verify(
+                user_id,
+                {"facial": facial_embedding, "voice": voice_embedding},
+                user_key=user_key,
+                threshold=threshold,
+                fusion=fusion,
+                modality_fusion=modality_fusion,
+                modality_weights=modality_weights
+            )
 
-            logger.info(f"Verification result for user {user_id}: verified={verified}, similarity={similarity:.4f}")
+            logger.info(f"Multimodal verification for user {user_id}: verified={verified}, score={score:.4f}")
 
-            return verified, float(similarity), match_metadata
+            return verified, score, details
 
         except Exception as e:
             logger.error(f"Failed to verify identity: {e}")
@@ -277,21 +401,23 @@ class BiometricVectorStore:
                 filter_dict = {"user_id": user_id}
                 logger.info(f"Deleting all biometric embeddings for user {user_id}")
 
-            # Delete from Pinecone using metadata filter
-            # Note: Pinecone's delete with filter is in preview
-            # In production, may need to fetch IDs first then delete
-
-            # Simplified: delete by ID pattern
-            vector_ids_to_delete = []
             modalities = [modality] if modality else ['facial', 'voice', 'multimodal']
+            deleted = self.templates.delete_user(user_id, modalities)
 
-            for mod in modalities:
-                vector_ids_to_delete.append(f"{user_id}:{mod}:default")
+            # Delete from Pinecone by ID (delete with filter is in preview):
+            # unencrypted vectors and legacy templates, whatever LEGACY_FALLBACK says
+            vector_ids_to_delete = [
+                vector_id for vector_id, _, _ in self._fetch_pinecone_templates(user_id, modalities)
+            ]
 
             if vector_ids_to_delete:
                 self.index.delete(ids=vector_ids_to_delete)
+            self.verifier.invalidate(user_id)
 
-            logger.info(f"Deleted {len(vector_ids_to_delete)} embeddings for user {user_id}")
+            logger.info(
+                f"Deleted {deleted} template records and {len(vector_ids_to_delete)} "
+                f"Pinecone vectors for user {user_id}"
+            )
 
         except Exception as e:
             logger.error(f"Failed to delete embeddings: {e}")
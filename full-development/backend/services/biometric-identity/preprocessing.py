@@ -0,0 +1,209 @@
+# Biometric Sample Preprocessing
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# CPU-bound request work (base64 decode, image decode, quality assessment,
+# liveness detection) runs in a process pool instead of on the event loop.
+# Samples reach the workers through shared memory: the request handler
+# copies the payload into a SharedMemory block once and workers attach to it
+# by name, so multi-megabyte images are never pickled through the pool's
+# pipes. Quality and liveness of one sample run in parallel on two workers.
+
+import asyncio
+import binascii
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class PreprocessConfig:
+    """Preprocessing worker pool configuration"""
+
+    # Worker processes; 0 keeps preprocessing in the request handler.
+    # os.cpu_count() is the node's, not the pod's limit, so set this per deployment
+    WORKERS = int(os.getenv("BIOMETRIC_PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Largest decoded sample accepted (bounds shared memory per request)
+    MAX_SAMPLE_BYTES = int(os.getenv("BIOMETRIC_MAX_SAMPLE_BYTES", str(16 * 1024 * 1024)))
+
+# =============================================================================
+# SAMPLES
+# =============================================================================
+
+class SharedSample:
+    """A sample in a shared memory block, owned (and unlinked) by one request"""
+
+    def __init__(self, capacity: int):
+        # Zero-sized blocks are not allowed
+        self._shm = shared_memory.SharedMemory(create=True, size=max(capacity, 1))
+        self.name = self._shm.name
+        self.size = 0
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SharedSample":
+        sample = cls(len(data))
+        sample._shm.buf[:len(data)] = data
+        sample.size = len(data)
+        return sample
+
+    def read(self) -> bytes:
+        return bytes(self._shm.buf[:self.size])
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class InlineSample:
+    """A sample held in process memory, when no worker pool is running"""
+
+    name = None
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.size = len(data)
+
+    def read(self) -> bytes:
+        return self.data
+
+    def close(self):
+        pass
+
+
+Sample = Union[SharedSample, InlineSample]
+
+# =============================================================================
+# WORKER PROCESS
+# =============================================================================
+
+_checks = {}
+
+
+def _init_worker(load_checks: bool):
+    if load_checks:
+        from sample_checks import LivenessDetector, QualityAssessor
+
+        liveness = LivenessDetector()
+        quality = QualityAssessor()
+        _checks.update({
+            "image_quality": quality.assess_image_quality,
+            "audio_quality": quality.assess_audio_quality,
+            "face_liveness": liveness.check_facial_liveness,
+            "voice_liveness": liveness.check_voice_liveness,
+        })
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Workers share the parent's resource tracker, so attaching does not
+    # add a second registration; the request handler unlinks the block
+    return shared_memory.SharedMemory(name=name)
+
+
+def _decode_base64(source: str, source_size: int, target: str) -> int:
+    source_shm, target_shm = _attach(source), _attach(target)
+    try:
+        with source_shm.buf[:source_size] as encoded:
+            decoded = binascii.a2b_base64(encoded)
+        target_shm.buf[:len(decoded)] = decoded
+        return len(decoded)
+    finally:
+        source_shm.close()
+        target_shm.close()
+
+
+def _run_check(check: str, name: str, size: int) -> Any:
+    shm = _attach(name)
+    try:
+        with shm.buf[:size] as view:
+            data = bytes(view)
+    finally:
+        shm.close()
+    return _checks[check](data)
+
+# =============================================================================
+# PREPROCESSOR
+# =============================================================================
+
+class BiometricPreprocessor:
+    """
+    Process pool for sample decoding and checks.
+
+    Checks are named after the sample_checks methods: "image_quality",
+    "audio_quality", "face_liveness" and "voice_liveness". Without
+    load_checks (no OpenCV, mock models) only decoding runs in the pool.
+    """
+
+    def __init__(self, workers: int = PreprocessConfig.WORKERS, load_checks: bool = True,
+                 max_sample_bytes: int = PreprocessConfig.MAX_SAMPLE_BYTES):
+        self.load_checks = load_checks
+        self.max_sample_bytes = max_sample_bytes
+        # spawn: forking a process that already runs threads (uvicorn, the
+        # inference batchers, the decrypt pool) can deadlock the child
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(load_checks,)
+        )
+
+    async def decode_base64(self, encoded: str) -> SharedSample:
+        """
+        Decode a base64 payload in a worker.
+
+        Raises:
+            ValueError: Not ASCII, not valid base64, or larger than max_sample_bytes
+        """
+        data = encoded.encode("ascii")
+        capacity = len(data) * 3 // 4 + 3
+        if capacity > self.max_sample_bytes:
+            raise ValueError(f"Biometric sample exceeds {self.max_sample_bytes} bytes")
+
+        source = SharedSample.from_bytes(data)
+        del data
+        target = SharedSample(capacity)
+        try:
+            target.size = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _decode_base64, source.name, source.size, target.name
+            )
+        except BaseException:
+            target.close()
+            raise
+        finally:
+            source.close()
+        return target
+
+    def load(self, data: bytes) -> SharedSample:
+        """Put raw sample bytes (e.g. an upload) into shared memory"""
+        if len(data) > self.max_sample_bytes:
+            raise ValueError(f"Biometric sample exceeds {self.max_sample_bytes} bytes")
+        return SharedSample.from_bytes(data)
+
+    async def check(self, check: str, sample: SharedSample) -> Tuple:
+        """Run one sample check in a worker"""
+        if not self.load_checks:
+            raise RuntimeError("Preprocessor started without sample checks")
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, _run_check, check, sample.name, sample.size
+        )
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_preprocessor: Optional[BiometricPreprocessor] = None
+
+
+def get_preprocessor(load_checks: bool = True) -> Optional[BiometricPreprocessor]:
+    """Get the global preprocessor (None when BIOMETRIC_PREPROCESS_WORKERS=0)"""
+    global _preprocessor
+    if _preprocessor is None and PreprocessConfig.WORKERS > 0:
+        _preprocessor = BiometricPreprocessor(load_checks=load_checks)
+    return _preprocessor
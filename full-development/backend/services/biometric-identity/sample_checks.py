@@ -0,0 +1,162 @@
+# Biometric Sample Checks
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Liveness detection and quality assessment. Kept apart from ml_models so the
+# preprocessing worker processes (preprocessing.py) import OpenCV only, not
+# PyTorch and the embedding models.
+
+import cv2
+import numpy as np
+from typing import Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# LIVENESS DETECTION
+# =============================================================================
+
+class LivenessDetector:
+    """
+    Liveness detection to prevent spoofing attacks.
+    """
+
+    def __init__(self):
+        logger.info("Initializing liveness detector")
+        # TODO: Load liveness detection model
+        # Could use MediaPipe, FaceX-Zoo, or custom model
+
+    def check_facial_liveness(self, image_bytes: bytes) -> Tuple[bool, float]:
+        """
+        Check if facial image is from a live person.
+
+        Returns:
+            (is_live, confidence_score)
+        """
+        # TODO: Implement actual liveness detection:
+        # - Texture analysis (detect print/screen)
+        # - 3D depth analysis
+        # - Motion detection (blink, smile)
+        # - Reflection detection
+        # - Color histogram analysis
+
+        # Mock implementation
+        is_live = True
+        confidence = 0.95
+
+        logger.info(f"Facial liveness check: live={is_live}, confidence={confidence:.2f}")
+
+        return is_live, confidence
+
+    def check_voice_liveness(self, audio_bytes: bytes) -> Tuple[bool, float]:
+        """
+        Check if voice audio is from a live person.
+
+        Returns:
+            (is_live, confidence_score)
+        """
+        # TODO: Implement voice liveness detection:
+        # - Voice activity detection
+        # - Anti-replay detection
+        # - Acoustic feature analysis
+        # - Background noise analysis
+
+        # Mock implementation
+        is_live = True
+        confidence = 0.92
+
+        logger.info(f"Voice liveness check: live={is_live}, confidence={confidence:.2f}")
+
+        return is_live, confidence
+
+
+# =============================================================================
+# QUALITY ASSESSMENT
+# =============================================================================
+
+class QualityAssessor:
+    """
+    Assess quality of biometric samples.
+    """
+
+    def __init__(self):
+        logger.info("Initializing quality assessor")
+
+    def assess_image_quality(self, image_bytes: bytes) -> Tuple[float, list, list]:
+        """
+        Assess quality of facial image.
+
+        Returns:
+            (quality_score, issues, recommendations)
+        """
+        issues = []
+        recommendations = []
+
+        try:
+            # Convert to OpenCV format
+            image = cv2.imdecode(
+                np.frombuffer(image_bytes, np.uint8),
+                cv2.IMREAD_COLOR
+            )
+
+            # Check resolution
+            height, width = image.shape[:2]
+            if width < 640 or height < 480:
+                issues.append("Low resolution")
+                recommendations.append("Use higher resolution camera (min 640x480)")
+
+            # Check brightness
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            brightness = np.mean(gray)
+            if brightness < 50:
+                issues.append("Too dark")
+                recommendations.append("Improve lighting")
+            elif brightness > 200:
+                issues.append("Too bright")
+                recommendations.append("Reduce lighting or avoid direct light")
+
+            # Check sharpness (Laplacian variance)
+            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+            if laplacian_var < 100:
+                issues.append("Blurry image")
+                recommendations.append("Hold camera steady and ensure focus")
+
+            # Calculate overall quality score
+            quality_score = 1.0
+
+            if issues:
+                quality_score -= len(issues) * 0.15
+
+            quality_score = max(0.0, min(1.0, quality_score))
+
+            logger.info(f"Image quality assessment: score={quality_score:.2f}, issues={len(issues)}")
+
+            return quality_score, issues, recommendations
+
+        except Exception as e:
+            logger.error(f"Failed to assess image quality: {e}")
+            return 0.0, ["Failed to process image"], ["Try again with a clear image"]
+
+    def assess_audio_quality(self, audio_bytes: bytes) -> Tuple[float, list, list]:
+        """
+        Assess quality of voice audio.
+
+        Returns:
+            (quality_score, issues, recommendations)
+        """
+        issues = []
+        recommendations = []
+
+        # TODO: Implement audio quality assessment:
+        # - SNR (Signal-to-Noise Ratio)
+        # - Duration check
+        # - Sample rate check
+        # - Clipping detection
+        # - Silence detection
+
+        # Mock implementation
+        quality_score = 0.85
+
+        logger.info(f"Audio quality assessment: score={quality_score:.2f}")
+
+        return quality_score, issues, recommendations
@@ -0,0 +1,365 @@
+# Biometric Template Store
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# Compact, versioned binary records for enrolled biometric templates,
+# stored as raw bytes in SQLite (local) or a Postgres bytea column instead
+# of base64 Fernet tokens in Pinecone metadata. A record is
+#
+#   header      8 bytes   magic "NT", format version, encoding, flags, dimension
+#   nonce      12 bytes   random per record (encrypted records only)
+#   payload               float16 / int8 (+ float32 scale) / float32 values,
+#                         AES-256-GCM ciphertext + 16 byte tag when encrypted
+#
+# The header and the vector id are authenticated as associated data, so a
+# record cannot be edited, downgraded to another encoding, or replayed
+# under another user's vector id. The format version lets readers migrate.
+
+import functools
+import logging
+import os
+import sqlite3
+import struct
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class TemplateConfig:
+    """Template storage settings"""
+
+    # "sqlite" (local file, development only) or "postgres" (bytea column)
+    BACKEND = os.getenv("BIOMETRIC_TEMPLATE_STORE", "sqlite")
+    ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+    SQLITE_PATH = os.getenv("BIOMETRIC_TEMPLATE_SQLITE_PATH", "./biometric_templates.db")
+    DATABASE_URL = os.getenv("BIOMETRIC_TEMPLATE_DATABASE_URL", "")
+    POSTGRES_POOL_SIZE = int(os.getenv("BIOMETRIC_TEMPLATE_POSTGRES_POOL_SIZE", "8"))
+    # "float16" (default), "int8" (half the size, coarser) or "float32"
+    ENCODING = os.getenv("BIOMETRIC_TEMPLATE_ENCODING", "float16")
+    # Also read templates enrolled before the template store (base64 Fernet
+    # tokens in Pinecone metadata); disable once migrate_legacy_templates ran
+    LEGACY_FALLBACK = os.getenv("BIOMETRIC_TEMPLATE_LEGACY_FALLBACK", "true").lower() == "true"
+
+# =============================================================================
+# BINARY FORMAT
+# =============================================================================
+
+MAGIC = b"NT"
+FORMAT_VERSION = 1
+
+ENCODING_FLOAT32 = 0
+ENCODING_FLOAT16 = 1
+ENCODING_INT8 = 2
+ENCODINGS = {"float32": ENCODING_FLOAT32, "float16": ENCODING_FLOAT16, "int8": ENCODING_INT8}
+
+FLAG_ENCRYPTED = 0x01
+
+# magic, version, encoding, flags, (pad), dimension
+_HEADER = struct.Struct("<2sBBBxH")
+_SCALE = struct.Struct("<f")
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+_KEY_INFO = b"noor-biometric-template-v1"
+
+
+class TemplateFormatError(ValueError):
+    """Raised for records that are malformed, unsupported or fail authentication"""
+
+
+def derive_template_key(user_key: bytes) -> bytes:
+    """AES-256 key for templates, derived (HKDF-SHA256) from the user's key"""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_KEY_INFO).derive(user_key)
+
+
+@functools.lru_cache(maxsize=256)
+def _cipher(user_key: bytes) -> AESGCM:
+    # HKDF costs more than decrypting a template; a verification decodes
+    # all of a user's templates with the same key
+    return AESGCM(derive_template_key(user_key))
+
+
+def _encode_values(embedding: np.ndarray, encoding: int) -> bytes:
+    if encoding == ENCODING_FLOAT16:
+        return embedding.astype("<f2").tobytes()
+    if encoding == ENCODING_INT8:
+        # Symmetric per-template scale; the largest component maps to +-127
+        peak = float(np.abs(embedding).max())
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(embedding / scale), -127, 127).astype(np.int8)
+        return _SCALE.pack(scale) + quantized.tobytes()
+    return embedding.astype("<f4").tobytes()
+
+
+def _decode_values(payload: bytes, encoding: int, dimension: int) -> np.ndarray:
+    if encoding == ENCODING_FLOAT16:
+        values = np.frombuffer(payload, dtype="<f2", count=dimension)
+    elif encoding == ENCODING_INT8:
+        (scale,) = _SCALE.unpack_from(payload)
+        return np.frombuffer(payload, dtype=np.int8, count=dimension, offset=_SCALE.size) * np.float32(scale)
+    elif encoding == ENCODING_FLOAT32:
+        values = np.frombuffer(payload, dtype="<f4", count=dimension)
+    else:
+        raise TemplateFormatError(f"Unknown template encoding: {encoding}")
+    return values.astype(np.float32)
+
+
+def encode_template(
+    embedding: np.ndarray,
+    vector_id: str,
+    user_key: Optional[bytes] = None,
+    encoding: str = TemplateConfig.ENCODING
+) -> bytes:
+    """
+    Serialize an embedding into a template record.
+
+    Args:
+        embedding: 1-D embedding
+        vector_id: Id the record is stored under (bound into the record)
+        user_key: User-specific key; None stores the values unencrypted
+        encoding: "float16", "int8" or "float32"
+
+    Returns:
+        Record bytes
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown template encoding: {encoding}")
+    embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    flags = FLAG_ENCRYPTED if user_key is not None else 0
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, ENCODINGS[encoding], flags, embedding.shape[0])
+    payload = _encode_values(embedding, ENCODINGS[encoding])
+
+    if user_key is None:
+        return header + payload
+
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = _cipher(user_key).encrypt(nonce, payload, header + vector_id.encode("utf-8"))
+    return header + nonce + ciphertext
+
+
+def template_version(record: bytes) -> int:
+    """Format version of a record (0 if it is not a template record)"""
+    if len(record) < _HEADER.size or bytes(record[:2]) != MAGIC:
+        return 0
+    return record[2]
+
+
+def decode_template(record: bytes, vector_id: str, user_key: Optional[bytes] = None) -> np.ndarray:
+    """
+    Decrypt and decode a template record into a float32 embedding.
+
+    Raises:
+        TemplateFormatError: Unknown version or encoding, truncated record,
+            wrong key, or a record stored under a different vector id
+    """
+    record = bytes(record)
+    version = template_version(record)
+    if version != FORMAT_VERSION:
+        raise TemplateFormatError(f"Unsupported template format version {version} for {vector_id}")
+    _, _, encoding, flags, dimension = _HEADER.unpack_from(record)
+    header, body = record[:_HEADER.size], record[_HEADER.size:]
+
+    if flags & FLAG_ENCRYPTED:
+        if user_key is None:
+            raise ValueError("user_key required to decrypt embedding")
+        if len(body) < NONCE_SIZE + TAG_SIZE:
+            raise TemplateFormatError(f"Truncated template record for {vector_id}")
+        try:
+            body = _cipher(user_key).decrypt(
+                body[:NONCE_SIZE], body[NONCE_SIZE:], header + vector_id.encode("utf-8")
+            )
+        except Exception as e:
+            raise TemplateFormatError(f"Template record for {vector_id} failed authentication") from e
+
+    try:
+        return _decode_values(body, encoding, dimension)
+    except (ValueError, struct.error) as e:
+        raise TemplateFormatError(f"Truncated template record for {vector_id}") from e
+
+# =============================================================================
+# STORAGE
+# =============================================================================
+
+# (vector_id, metadata, record) as consumed by BiometricVerificationEngine
+TemplateRow = Tuple[str, Dict[str, Any], bytes]
+
+
+class TemplateStore(ABC):
+    """
+    Template records keyed by vector id and indexed by (user_id, modality).
+
+    Subclasses provide _execute() for their driver; the SQL is shared.
+    """
+
+    placeholder = "?"
+    blob_type = "BLOB"
+
+    @abstractmethod
+    def _execute(self, sql: str, params: Sequence[Any] = (), fetch: bool = False) -> List[Tuple]:
+        """Run one statement; return its rows when fetch is set"""
+
+    def create_schema(self):
+        self._execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS biometric_templates (
+                vector_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                modality TEXT NOT NULL,
+                format_version SMALLINT NOT NULL,
+                enrollment_date TEXT,
+                template {self.blob_type} NOT NULL
+            )
+            """
+        )
+        self._execute(
+            "CREATE INDEX IF NOT EXISTS idx_biometric_templates_user "
+            "ON biometric_templates (user_id, modality)"
+        )
+
+    def put(self, vector_id: str, user_id: str, modality: str, record: bytes,
+            enrollment_date: Optional[str] = None):
+        """Insert or replace one template record"""
+        p = self.placeholder
+        self._execute(
+            f"""
+            INSERT INTO biometric_templates
+                (vector_id, user_id, modality, format_version, enrollment_date, template)
+            VALUES ({p}, {p}, {p}, {p}, {p}, {p})
+            ON CONFLICT (vector_id) DO UPDATE SET
+                user_id = excluded.user_id,
+                modality = excluded.modality,
+                format_version = excluded.format_version,
+                enrollment_date = excluded.enrollment_date,
+                template = excluded.template
+            """,
+            (vector_id, user_id, modality, template_version(record), enrollment_date or "", self._blob(record))
+        )
+
+    def get_user_templates(self, user_id: str, modalities: Sequence[str]) -> List[TemplateRow]:
+        """Every template of a user for the given modalities, in one query"""
+        if not modalities:
+            return []
+        p = self.placeholder
+        rows = self._execute(
+            f"""
+            SELECT vector_id, modality, format_version, enrollment_date, template
+            FROM biometric_templates
+            WHERE user_id = {p} AND modality IN ({", ".join([p] * len(modalities))})
+            ORDER BY vector_id
+            """,
+            (user_id, *modalities),
+            fetch=True
+        )
+        return [
+            (
+                vector_id,
+                {
+                    "user_id": user_id,
+                    "modality": modality,
+                    "format_version": format_version,
+                    "enrollment_date": enrollment_date,
+                },
+                bytes(template)
+            )
+            for vector_id, modality, format_version, enrollment_date, template in rows
+        ]
+
+    def delete_user(self, user_id: str, modalities: Optional[Sequence[str]] = None) -> int:
+        """Delete a user's templates (all modalities when None); returns the count"""
+        p = self.placeholder
+        if modalities:
+            sql = (f"DELETE FROM biometric_templates WHERE user_id = {p} "
+                   f"AND modality IN ({', '.join([p] * len(modalities))}) RETURNING vector_id")
+            params = (user_id, *modalities)
+        else:
+            sql = f"DELETE FROM biometric_templates WHERE user_id = {p} RETURNING vector_id"
+            params = (user_id,)
+        return len(self._execute(sql, params, fetch=True))
+
+    def _blob(self, record: bytes) -> Any:
+        return record
+
+    def close(self):
+        pass
+
+
+class SQLiteTemplateStore(TemplateStore):
+    """Local template store in one SQLite file (":memory:" for tests and benchmarks)"""
+
+    def __init__(self, path: str = TemplateConfig.SQLITE_PATH):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self.create_schema()
+
+    def _execute(self, sql: str, params: Sequence[Any] = (), fetch: bool = False) -> List[Tuple]:
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            return cursor.fetchall() if fetch else []
+
+    def close(self):
+        self._connection.close()
+
+
+class PostgresTemplateStore(TemplateStore):
+    """Template store in a Postgres table with a bytea column (psycopg2 pool)"""
+
+    placeholder = "%s"
+    blob_type = "BYTEA"
+
+    def __init__(self, dsn: str = TemplateConfig.DATABASE_URL,
+                 pool_size: int = TemplateConfig.POSTGRES_POOL_SIZE):
+        import psycopg2
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self._binary = psycopg2.Binary
+        self._pool = ThreadedConnectionPool(1, pool_size, dsn)
+        self.create_schema()
+
+    def _execute(self, sql: str, params: Sequence[Any] = (), fetch: bool = False) -> List[Tuple]:
+        connection = self._pool.getconn()
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall() if fetch else []
+        finally:
+            self._pool.putconn(connection)
+
+    def _blob(self, record: bytes) -> Any:
+        return self._binary(record)
+
+    def close(self):
+        self._pool.closeall()
+
+
+def open_template_store(backend: Optional[str] = None) -> TemplateStore:
+    """
+    Template store for the configured backend ("sqlite" or "postgres").
+
+    Raises:
+        RuntimeError: SQLite outside development; the file is local to one
+            pod, so replicas would not see each other's enrollments and a
+            restart would lose them
+    """
+    backend = backend or TemplateConfig.BACKEND
+    if backend == "sqlite":
+        if TemplateConfig.ENVIRONMENT != "development":
+            raise RuntimeError(
+                f"SQLite template store is for development only (ENVIRONMENT={TemplateConfig.ENVIRONMENT}); "
+                "set BIOMETRIC_TEMPLATE_STORE=postgres and BIOMETRIC_TEMPLATE_DATABASE_URL"
+            )
+        return SQLiteTemplateStore()
+    if backend == "postgres":
+        return PostgresTemplateStore()
+    raise ValueError(f"Unknown template store backend: {backend}")
@@ -0,0 +1,334 @@
+# Biometric Verification Engine
+# NOOR Platform v7.1 - Biometric Identity Service
+#
+# 1:N verification of a probe against every template a user has enrolled:
+# all of a user's templates (every sample, face and voice) arrive in one
+# vector store call, are decrypted on a thread pool, and are scored with a
+# single NumPy operation per modality. Scores are fused across samples
+# (max or mean) and across modalities. Decrypted templates are kept for a
+# short TTL in an LRU whose buffers are mlock()ed (never swapped to disk)
+# and zeroed on eviction.
+
+import base64
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from template_store import decode_template
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class VerificationConfig:
+    """Template loading, caching and fusion settings"""
+
+    # Upper bound on templates returned for one user (all modalities)
+    MAX_TEMPLATES_PER_USER = int(os.getenv("BIOMETRIC_MAX_TEMPLATES_PER_USER", "100"))
+    # Decrypted templates live this long; store/delete invalidate sooner
+    TEMPLATE_CACHE_TTL_SECONDS = float(os.getenv("BIOMETRIC_TEMPLATE_CACHE_TTL_SECONDS", "60"))
+    TEMPLATE_CACHE_MAX_ENTRIES = int(os.getenv("BIOMETRIC_TEMPLATE_CACHE_MAX_ENTRIES", "2048"))
+    DECRYPT_WORKERS = int(os.getenv("BIOMETRIC_DECRYPT_WORKERS", "4"))
+    # Fewer templates than this are decrypted inline (pool overhead dominates)
+    PARALLEL_DECRYPT_MIN = int(os.getenv("BIOMETRIC_PARALLEL_DECRYPT_MIN", "8"))
+
+# =============================================================================
+# MEMORY LOCKING
+# =============================================================================
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None and sys.platform != "win32":
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        except OSError:
+            _libc = False
+    return _libc or None
+
+
+def lock_memory(array: np.ndarray) -> bool:
+    """mlock() an array's pages; False when not permitted (RLIMIT_MEMLOCK)"""
+    libc = _get_libc()
+    if libc is None or array.nbytes == 0:
+        return False
+    return libc.mlock(ctypes.c_void_p(array.ctypes.data), ctypes.c_size_t(array.nbytes)) == 0
+
+
+def unlock_memory(array: np.ndarray):
+    libc = _get_libc()
+    if libc is not None and array.nbytes:
+        libc.munlock(ctypes.c_void_p(array.ctypes.data), ctypes.c_size_t(array.nbytes))
+
+# =============================================================================
+# TEMPLATE CACHE
+# =============================================================================
+
+@dataclass
+class TemplateSet:
+    """All enrolled templates of one user and modality, one row per sample"""
+    modality: str
+    vector_ids: List[str]
+    embeddings: np.ndarray
+    enrollment_dates: List[Optional[str]] = field(default_factory=list)
+    locked: bool = False
+
+    def wipe(self):
+        self.embeddings.fill(0)
+        if self.locked:
+            unlock_memory(self.embeddings)
+            self.locked = False
+
+
+class TemplateCache:
+    """
+    TTL + LRU cache of decrypted TemplateSets.
+
+    Keys include a fingerprint of the user key that decrypted the templates,
+    so a caller presenting a different key never gets a cache hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VerificationConfig.TEMPLATE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = VerificationConfig.TEMPLATE_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, TemplateSet]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user_id: str, modality: str, user_key: Optional[bytes]) -> Tuple[str, str, str]:
+        fingerprint = hashlib.sha256(user_key).hexdigest()[:16] if user_key else ""
+        return user_id, modality, fingerprint
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[TemplateSet]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, templates = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                templates.wipe()
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return templates
+
+    def put(self, key: Tuple[str, str, str], templates: TemplateSet):
+        templates.locked = lock_memory(templates.embeddings)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, templates)
+            evicted = [previous[1]] if previous else []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1][1])
+        for old in evicted:
+            old.wipe()
+
+    def invalidate(self, user_id: str):
+        """Drop every cached modality of a user (after enrollment or deletion)"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == user_id]
+            evicted = [self._entries.pop(key)[1] for key in keys]
+        for templates in evicted:
+            templates.wipe()
+
+    def clear(self):
+        with self._lock:
+            evicted = [templates for _, templates in self._entries.values()]
+            self._entries.clear()
+        for templates in evicted:
+            templates.wipe()
+
+# =============================================================================
+# VERIFICATION ENGINE
+# =============================================================================
+
+def similarity_scores(query: np.ndarray, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Euclidean distances from query to every row, and 1 / (1 + distance)"""
+    distances = np.linalg.norm(embeddings - query.astype(np.float32, copy=False), axis=1)
+    return distances, 1.0 / (1.0 + distances)
+
+
+def fuse(scores: Sequence[float], method: str, weights: Optional[Sequence[float]] = None) -> float:
+    """Combine scores by "max" or (weighted) "mean" """
+    scores = np.asarray(scores, dtype=np.float64)
+    if method == "max":
+        return float(scores.max())
+    if method == "mean":
+        return float(np.average(scores, weights=weights))
+    raise ValueError(f"Unknown fusion method: {method}")
+
+
+class BiometricVerificationEngine:
+    """
+    Loads, caches and scores a user's enrolled templates.
+
+    The store must provide fetch_user_templates(user_id, modalities), returning
+    (vector_id, metadata, payload) for every template in one round trip, and
+    decrypt_embedding(encrypted, user_key, dimension) for legacy records.
+    The payload is a template_store record (bytes), or the vector values
+    (None for legacy encrypted records, whose data is in the metadata).
+    """
+
+    def __init__(
+        self,
+        store,
+        cache: Optional[TemplateCache] = None,
+        max_workers: int = VerificationConfig.DECRYPT_WORKERS,
+        parallel_decrypt_min: int = VerificationConfig.PARALLEL_DECRYPT_MIN
+    ):
+        self.store = store
+        self.cache = cache or TemplateCache()
+        self.parallel_decrypt_min = parallel_decrypt_min
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="template-decrypt")
+
+    def decode(self, record: Tuple[str, Dict[str, Any], Any], user_key: Optional[bytes]) -> np.ndarray:
+        """Embedding of one fetched template, decrypted with the user's key"""
+        vector_id, metadata, values = record
+        if isinstance(values, (bytes, bytearray, memoryview)):
+            return decode_template(values, vector_id, user_key)
+        if metadata.get("encrypted", False):
+            if user_key is None:
+                raise ValueError("user_key required to decrypt embedding")
+            encrypted = base64.b64decode(metadata["encrypted_data"])
+            return self.store.decrypt_embedding(encrypted, user_key, int(metadata["dimension"]))
+        return np.asarray(values, dtype=np.float32)
+
+    def _build(self, modality: str, records: List[Tuple[str, Dict[str, Any], Any]],
+               user_key: Optional[bytes]) -> TemplateSet:
+        if len(records) >= self.parallel_decrypt_min:
+            rows = list(self._executor.map(lambda record: self.decode(record, user_key), records))
+        else:
+            rows = [self.decode(record, user_key) for record in records]
+
+        # One contiguous buffer per set: a single mlock and a single wipe
+        embeddings = np.empty((len(rows), len(rows[0])), dtype=np.float32)
+        for i, row in enumerate(rows):
+            embeddings[i] = row
+
+        return TemplateSet(
+            modality=modality,
+            vector_ids=[vector_id for vector_id, _, _ in records],
+            embeddings=embeddings,
+            enrollment_dates=[metadata.get("enrollment_date") for _, metadata, _ in records]
+        )
+
+    def load_templates(self, user_id: str, modalities: Sequence[str],
+                       user_key: Optional[bytes] = None) -> Dict[str, TemplateSet]:
+        """Templates per modality, from the cache or one store round trip"""
+        loaded: Dict[str, TemplateSet] = {}
+        missing = []
+        for modality in modalities:
+            templates = self.cache.get(TemplateCache.key(user_id, modality, user_key))
+            if templates is not None:
+                loaded[modality] = templates
+            else:
+                missing.append(modality)
+
+        if missing:
+            by_modality: Dict[str, List[Tuple[str, Dict[str, Any], Any]]] = {}
+            for record in self.store.fetch_user_templates(user_id, missing):
+                by_modality.setdefault(record[1].get("modality"), []).append(record)
+            for modality in missing:
+                if by_modality.get(modality):
+                    templates = self._build(modality, by_modality[modality], user_key)
+                    self.cache.put(TemplateCache.key(user_id, modality, user_key), templates)
+                    loaded[modality] = templates
+
+        return loaded
+
+    def _score_modality(self, query: np.ndarray, templates: TemplateSet, fusion: str) -> Dict[str, Any]:
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != templates.embeddings.shape[1]:
+            raise ValueError(
+                f"{templates.modality} probe has dimension {query.shape[0]}, "
+                f"templates have {templates.embeddings.shape[1]}"
+            )
+        distances, similarities = similarity_scores(query, templates.embeddings)
+        best = int(np.argmax(similarities))
+        return {
+            "score": fuse(similarities, fusion),
+            "max_similarity": float(similarities[best]),
+            "mean_similarity": float(similarities.mean()),
+            "vector_id": templates.vector_ids[best],
+            "enrollment_date": templates.enrollment_dates[best] if templates.enrollment_dates else None,
+            "distance": float(distances[best]),
+            "template_count": len(templates.vector_ids),
+        }
+
+    def verify(
+        self,
+        user_id: str,
+        probes: Dict[str, np.ndarray],
+        user_key: Optional[bytes] = None,
+        threshold: float = 0.95,
+        fusion: str = "max",
+        modality_fusion: str = "mean",
+        modality_weights: Optional[Dict[str, float]] = None
+    ) -> Tuple[bool, float, Dict[str, Any]]:
+        """
+        Verify probes ({modality: embedding}) against all enrolled templates.
+
+        Args:
+            fusion: Combines one modality's samples, "max" or "mean"
+            modality_fusion: Combines modalities, "mean" (weighted) or "max"
+            modality_weights: Weights for the "mean" modality fusion
+
+        Returns:
+            (verified, fused_score, match_metadata); a modality with no
+            enrolled templates fails the verification.
+        """
+        templates = self.load_templates(user_id, list(probes), user_key)
+        missing = [modality for modality in probes if modality not in templates]
+        if missing:
+            logger.warning(f"No enrolled templates for user {user_id}, modality {', '.join(missing)}")
+            return False, 0.0, {"missing_modalities": missing}
+
+        per_modality = {
+            modality: self._score_modality(probe, templates[modality], fusion)
+            for modality, probe in probes.items()
+        }
+        weights = None
+        if modality_weights:
+            weights = [modality_weights.get(modality, 1.0) for modality in per_modality]
+        score = fuse([result["score"] for result in per_modality.values()], modality_fusion, weights)
+        verified = score >= threshold
+
+        match_metadata = {
+            "modalities": per_modality,
+            "fusion": fusion,
+            "modality_fusion": modality_fusion,
+            "similarity": score,
+            "threshold": threshold,
+        }
+        return verified, score, match_metadata
+
+    def invalidate(self, user_id: str):
+        self.cache.invalidate(user_id)
+
+    def close(self):
+        self.cache.clear()
+        self._executor.shutdown(wait=False)
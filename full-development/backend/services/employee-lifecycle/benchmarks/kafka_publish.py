@@ -0,0 +1,203 @@
+# Kafka Publishing Benchmark
+# NOOR Platform v7.1 - Employee Lifecycle Service
+#
+# Compares the previous inline publish loop (json.dumps, produce, poll(0) per
+# event; BufferError fails the publish) with KafkaEventProducer.publish_many
+# (background poll thread, delivery futures, waiting for queue room).
+# Reports throughput, dropped messages and the worst event-loop stall.
+#
+# By default a MockProducer stands in for librdkafka: produce() appends to a
+# bounded local queue and each message is acknowledged `--ack-latency` seconds
+# later, like a broker round trip. Pass --bootstrap-servers to use a real
+# broker instead.
+#
+# Usage (from employee-lifecycle/):
+#     python -m benchmarks.kafka_publish --events 200000
+#     python -m benchmarks.kafka_publish --bootstrap-servers localhost:9092 --compression zstd
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+for name in ("POSTGRES_PASSWORD", "MONGODB_PASSWORD", "JWT_SECRET_KEY"):
+    os.environ.setdefault(name, "benchmark")
+
+from kafka_producer import JSONEventSerializer, KafkaEventProducer, MsgpackEventSerializer  # noqa: E402
+
+TOPIC = "noor.benchmark.events"
+
+
+class MockMessage:
+    def __init__(self, topic, offset):
+        self._topic = topic
+        self._offset = offset
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+
+class MockProducer:
+    """confluent_kafka.Producer stand-in with a bounded queue and delayed acks"""
+
+    def __init__(self, queue_max_messages: int, ack_latency: float):
+        self.queue_max_messages = queue_max_messages
+        self.ack_latency = ack_latency
+        self.pending = collections.deque()
+        self.lock = threading.Condition()
+        self.offset = 0
+        self.bytes = 0
+
+    def produce(self, topic, key=None, value=None, headers=None, on_delivery=None, callback=None):
+        with self.lock:
+            if len(self.pending) >= self.queue_max_messages:
+                raise BufferError("Local: Queue full")
+            self.pending.append((time.monotonic() + self.ack_latency, topic, on_delivery or callback))
+            self.bytes += len(value)
+            if len(self.pending) == 1:
+                self.lock.notify()
+
+    def poll(self, timeout=0.0):
+        deadline = time.monotonic() + (timeout or 0)
+        delivered = []
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.pending and self.pending[0][0] <= now:
+                    _, topic, callback = self.pending.popleft()
+                    self.offset += 1
+                    delivered.append((topic, self.offset, callback))
+                if delivered or now >= deadline:
+                    break
+                wait = deadline - now
+                if self.pending:
+                    wait = min(wait, self.pending[0][0] - now)
+                self.lock.wait(wait)
+        for topic, offset, callback in delivered:
+            if callback:
+                callback(None, MockMessage(topic, offset))
+        return len(delivered)
+
+    def flush(self, timeout=None):
+        deadline = time.monotonic() + (timeout if timeout is not None else 3600)
+        while self.pending and time.monotonic() < deadline:
+            self.poll(0.01)
+        return len(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
+
+
+def build_events(count: int):
+    for i in range(count):
+        yield {
+            'event_type': 'ROLE_CHANGED',
+            'employee_id': f'emp-{i}',
+            'user_id': f'user-{i}',
+            'previous_role_id': 'role-analyst',
+            'new_role_id': 'role-senior-analyst',
+            'effective_date': '2026-01-01',
+            'change_type': 'PROMOTION'
+        }
+
+
+async def watch_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Largest delay beyond `interval` seen by a ticking task"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def inline_publish(producer, events) -> int:
+    """The previous publish_event body, once per event"""
+    dropped = 0
+    for event_data in events:
+        event_data['event_id'] = str(uuid.uuid4())
+        event_data['timestamp'] = int(datetime.utcnow().timestamp() * 1000)
+        event_data['metadata'] = {'source_service': 'employee-lifecycle', 'correlation_id': None}
+        value = json.dumps(event_data).encode('utf-8')
+        try:
+            producer.produce(topic=TOPIC, key=event_data['employee_id'].encode('utf-8'), value=value,
+                             headers=[], callback=lambda err, msg: None)
+        except BufferError:
+            dropped += 1
+        producer.poll(0)
+    return dropped
+
+
+async def run(mode: str, args, producer) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(watch_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    dropped = 0
+
+    if mode == "inline":
+        dropped = await inline_publish(producer, build_events(args.events))
+        remaining = await asyncio.get_running_loop().run_in_executor(None, producer.flush, 60)
+    else:
+        serializer = MsgpackEventSerializer() if args.serialization == "msgpack" else JSONEventSerializer()
+        kafka = KafkaEventProducer(producer=producer, serializer=serializer)
+        futures = await kafka.publish_many(TOPIC, build_events(args.events), key_field='employee_id')
+        for future in futures:
+            await future
+        remaining = 0
+        kafka.close()
+
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    return {"elapsed": elapsed, "dropped": dropped + remaining, "lag": lag}
+
+
+def make_producer(args):
+    if args.bootstrap_servers:
+        from confluent_kafka import Producer
+        return Producer({
+            'bootstrap.servers': args.bootstrap_servers,
+            'compression.type': args.compression,
+            'linger.ms': 10,
+            'batch.size': 131072,
+            'queue.buffering.max.messages': args.queue_max_messages,
+            'acks': 'all',
+            'enable.idempotence': True,
+        })
+    return MockProducer(args.queue_max_messages, args.ack_latency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kafka publishing benchmark")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--queue-max-messages", type=int, default=100000)
+    parser.add_argument("--ack-latency", type=float, default=0.02, help="Mock broker round trip (seconds)")
+    parser.add_argument("--serialization", choices=["json", "msgpack"], default="json")
+    parser.add_argument("--bootstrap-servers", default=None)
+    parser.add_argument("--compression", default="zstd")
+    args = parser.parse_args()
+
+    target = args.bootstrap_servers or f"mock producer ({args.ack_latency * 1000:.0f} ms acks)"
+    print(f"events={args.events} queue={args.queue_max_messages} target={target}")
+    for mode in ("inline", "publish_many"):
+        result = asyncio.run(run(mode, args, make_producer(args)))
+        print(
+            f"  {mode:<13} {result['elapsed']:7.2f} s  {args.events / result['elapsed']:9.0f} events/s  "
+            f"dropped {result['dropped']:7d}  worst loop stall {result['lag'] * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
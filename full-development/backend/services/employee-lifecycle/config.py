@@ -42,7 +42,13 @@ class Settings(BaseSettings):
     # Kafka Configuration
     KAFKA_BOOTSTRAP_SERVERS: str = "kafka.noor-messaging.svc.cluster.local:9092"
     KAFKA_SCHEMA_REGISTRY_URL: str = "http://schema-registry.noor-messaging.svc.cluster.local:8081"
-    KAFKA_PRODUCER_COMPRESSION: str = "lz4"
+    KAFKA_PRODUCER_COMPRESSION: str = "lz4"  # lz4, zstd, snappy, gzip or none
+    KAFKA_PRODUCER_LINGER_MS: int = 10
+    KAFKA_PRODUCER_BATCH_SIZE: int = 131072
+    KAFKA_PRODUCER_QUEUE_MAX_MESSAGES: int = 100000
+    KAFKA_PRODUCE_TIMEOUT_SECONDS: float = 30.0  # max wait for room in a full producer queue
+    KAFKA_SERIALIZATION: str = "json"  # json (orjson when installed), msgpack or avro
+    KAFKA_AVRO_SCHEMA_DIR: str = "/app/schemas"  # <topic>.avsc files for avro serialization
 
     # JWT Authentication
     JWT_SECRET_KEY: str  # Required, no default
@@ -1,53 +1,251 @@
 # Kafka Producer Module
 # NOOR Platform v7.1 - Employee Lifecycle Service
 
-from confluent_kafka import Producer
-from confluent_kafka.serialization import SerializationContext, MessageField
-from confluent_kafka.schema_registry import SchemaRegistryClient
-from confluent_kafka.schema_registry.avro import AvroSerializer
+from confluent_kafka import KafkaError, KafkaException, Producer
+import asyncio
+import collections
+import functools
 import json
 import logging
-from typing import Dict, Any
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
 from datetime import datetime
 import uuid
 
 from config import get_settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# =============================================================================
+# SERIALIZERS
+# =============================================================================
+
+class JSONEventSerializer:
+    """JSON values, via orjson when it is installed"""
+
+    content_type = "application/json"
+
+    def serialize(self, topic: str, event_data: Dict[str, Any]) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(event_data, default=str)
+        return json.dumps(event_data, default=str, separators=(",", ":")).encode("utf-8")
+
+
+class MsgpackEventSerializer:
+    """MessagePack values; smaller and faster to decode than JSON"""
+
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._packb = msgpack.packb
+
+    def serialize(self, topic: str, event_data: Dict[str, Any]) -> bytes:
+        return self._packb(event_data, default=str, use_bin_type=True)
+
+
+class AvroEventSerializer:
+    """
+    Confluent Schema Registry Avro values.
+    Each topic needs a schema file named <topic>.avsc in schema_dir.
+    """
+
+    content_type = "application/vnd.confluent.avro"
+
+    def __init__(self, schema_registry_url: str, schema_dir: str):
+        from confluent_kafka.schema_registry import SchemaRegistryClient
+        self.schema_registry_client = SchemaRegistryClient({'url': schema_registry_url})
+        self.schema_dir = schema_dir
+        self._serializers: Dict[str, Any] = {}
+
+    def _serializer(self, topic: str):
+        serializer = self._serializers.get(topic)
+        if serializer is None:
+            from confluent_kafka.schema_registry.avro import AvroSerializer
+            path = os.path.join(self.schema_dir, f"{topic}.avsc")
+            if not os.path.exists(path):
+                raise ValueError(f"No Avro schema for topic {topic} ({path})")
+            with open(path) as f:
+                serializer = AvroSerializer(self.schema_registry_client, f.read())
+            self._serializers[topic] = serializer
+        return serializer
+
+    def serialize(self, topic: str, event_data: Dict[str, Any]) -> bytes:
+        from confluent_kafka.serialization import MessageField, SerializationContext
+        return self._serializer(topic)(event_data, SerializationContext(topic, MessageField.VALUE))
+
+
+def create_event_serializer(kind: str):
+    """Serializer for KAFKA_SERIALIZATION"""
+    if kind == "json":
+        return JSONEventSerializer()
+    if kind == "msgpack":
+        return MsgpackEventSerializer()
+    if kind == "avro":
+        return AvroEventSerializer(settings.KAFKA_SCHEMA_REGISTRY_URL, settings.KAFKA_AVRO_SCHEMA_DIR)
+    raise ValueError(f"Unknown Kafka serialization: {kind}")
+
 # =============================================================================
 # KAFKA PRODUCER CONFIGURATION
 # =============================================================================
 
+class KafkaDeliveryError(Exception):
+    """A message the broker did not acknowledge"""
+
+    def __init__(self, error: KafkaError, topic: str):
+        super().__init__(f"Delivery to {topic} failed: {error}")
+        self.error = error
+        self.topic = topic
+
+
 class KafkaEventProducer:
-    """Kafka event producer for publishing domain events"""
+    """
+    Kafka event producer for publishing domain events.
 
-    def __init__(self):
+    produce() only appends to librdkafka's local queue; a background thread
+    polls for delivery reports and resolves the asyncio future returned for
+    each message, so publishing never blocks the event loop. When the local
+    queue is full the publisher waits for room (up to
+    KAFKA_PRODUCE_TIMEOUT_SECONDS) instead of failing.
+    """
+
+    def __init__(self, producer: Optional[Producer] = None, serializer=None):
         self.producer_config = {
             'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
             'compression.type': settings.KAFKA_PRODUCER_COMPRESSION,
-            'linger.ms': 10,  # Batch messages for up to 10ms
-            'batch.size': 32768,  # 32KB batch size
+            'linger.ms': settings.KAFKA_PRODUCER_LINGER_MS,  # Batch messages for up to linger.ms
+            'batch.size': settings.KAFKA_PRODUCER_BATCH_SIZE,
+            'queue.buffering.max.messages': settings.KAFKA_PRODUCER_QUEUE_MAX_MESSAGES,
             'acks': 'all',  # Wait for all replicas
             'retries': 3,
             'max.in.flight.requests.per.connection': 5,
             'enable.idempotence': True,  # Exactly-once semantics
         }
 
-        self.producer = Producer(self.producer_config)
-        self.schema_registry_client = SchemaRegistryClient({
-            'url': settings.KAFKA_SCHEMA_REGISTRY_URL
-        })
+        self.producer = producer if producer is not None else Producer(self.producer_config)
+        self.serializer = serializer if serializer is not None else create_event_serializer(settings.KAFKA_SERIALIZATION)
+        self.produce_timeout = settings.KAFKA_PRODUCE_TIMEOUT_SECONDS
 
-        logger.info("Kafka producer initialized")
+        self._closing = threading.Event()
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_lock = threading.Lock()
+        self._reports: collections.deque = collections.deque()
+
+        logger.info(
+            f"Kafka producer initialized ({settings.KAFKA_PRODUCER_COMPRESSION} compression, "
+            f"{self.serializer.content_type})"
+        )
 
-    def delivery_report(self, err, msg):
-        """Callback for message delivery reports"""
+    # -------------------------------------------------------------------------
+    # Delivery reports
+    # -------------------------------------------------------------------------
+
+    def _ensure_poll_thread(self):
+        if self._poll_thread is not None:
+            return
+        with self._poll_lock:
+            if self._poll_thread is None:
+                self._closing.clear()
+                self._poll_thread = threading.Thread(
+                    target=self._poll_loop, name="kafka-producer-poll", daemon=True
+                )
+                self._poll_thread.start()
+
+    def _poll_loop(self):
+        while not self._closing.is_set():
+            self.producer.poll(0.1)
+            self._dispatch_reports()
+
+    def _on_delivery(self, future: asyncio.Future, err, msg):
+        """Delivery report callback; runs on whichever thread polled"""
         if err is not None:
             logger.error(f'Message delivery failed: {err}')
+            self._reports.append((future, KafkaDeliveryError(err, msg.topic()), None))
         else:
-            logger.debug(f'Message delivered to {msg.topic()} [{msg.partition()}]')
+            self._reports.append((future, None, {
+                'topic': msg.topic(),
+                'partition': msg.partition(),
+                'offset': msg.offset()
+            }))
+
+    def _dispatch_reports(self):
+        """Hand collected reports to their event loops, one wakeup per loop per poll"""
+        if not self._reports:
+            return
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        while self._reports:
+            report = self._reports.popleft()
+            by_loop.setdefault(report[0].get_loop(), []).append(report)
+        for loop, reports in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_resolve_reports, loop, reports)
+            except RuntimeError:
+                pass  # event loop already closed
+
+    # -------------------------------------------------------------------------
+    # Publishing
+    # -------------------------------------------------------------------------
+
+    def _prepare(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Generate event ID if not present
+        if 'event_id' not in event_data:
+            event_data['event_id'] = str(uuid.uuid4())
+
+        # Add timestamp if not present
+        if 'timestamp' not in event_data:
+            event_data['timestamp'] = int(datetime.utcnow().timestamp() * 1000)
+
+        # Add metadata if not present
+        if 'metadata' not in event_data:
+            event_data['metadata'] = {
+                'source_service': settings.SERVICE_NAME,
+                'correlation_id': None
+            }
+        return event_data
+
+    def _headers(self, headers: Optional[Dict[str, str]]) -> List[tuple]:
+        kafka_headers = [('content-type', self.serializer.content_type.encode('utf-8'))]
+        if headers:
+            kafka_headers.extend((k, v.encode('utf-8')) for k, v in headers.items())
+        return kafka_headers
+
+    def _produce_nowait(self, topic: str, key: str, value: bytes, headers: List[tuple], future: asyncio.Future) -> bool:
+        """Append one message to the local queue; False when it is full"""
+        try:
+            self.producer.produce(
+                topic=topic,
+                key=key.encode('utf-8'),
+                value=value,
+                headers=headers,
+                on_delivery=functools.partial(self._on_delivery, future)
+            )
+            return True
+        except BufferError:
+            return False
+
+    async def _produce(self, topic: str, key: str, value: bytes, headers: List[tuple]) -> asyncio.Future:
+        """Append one message, waiting while the local queue is full"""
+        future = _delivery_future(asyncio.get_running_loop())
+        if self._produce_nowait(topic, key, value, headers, future):
+            return future
+
+        # Local queue full: let the poll thread drain delivery reports
+        deadline = time.monotonic() + self.produce_timeout
+        delay = 0.001
+        while not self._produce_nowait(topic, key, value, headers, future):
+            if time.monotonic() >= deadline:
+                raise KafkaException(KafkaError(KafkaError._QUEUE_FULL))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return future
 
     async def publish_event(
         self,
@@ -55,74 +253,135 @@ class KafkaEventProducer:
         event_data: Dict[str, Any],
         key: str = None,
         headers: Dict[str, str] = None
-    ):
+    ) -> asyncio.Future:
         """
         Publish event to Kafka topic
 
         Args:
             topic: Kafka topic name
-            event_data: Event payload (will be serialized to JSON)
-            key: Message key for partitioning (default: random UUID)
+            event_data: Event payload (serialized with KAFKA_SERIALIZATION)
+            key: Message key for partitioning (default: event_id)
             headers: Additional message headers
+
+        Returns:
+            Future resolving to {topic, partition, offset} once the broker
+            acknowledges the message, or raising KafkaDeliveryError. Awaiting
+            it is optional: failed deliveries are logged either way, and an
+            unawaited failure is not reported again when the future is
+            garbage collected.
         """
+        self._ensure_poll_thread()
         try:
-            # Generate event ID if not present
-            if 'event_id' not in event_data:
-                event_data['event_id'] = str(uuid.uuid4())
-
-            # Add timestamp if not present
-            if 'timestamp' not in event_data:
-                event_data['timestamp'] = int(datetime.utcnow().timestamp() * 1000)
-
-            # Add metadata if not present
-            if 'metadata' not in event_data:
-                event_data['metadata'] = {
-                    'source_service': settings.SERVICE_NAME,
-                    'correlation_id': None
-                }
-
-            # Serialize to JSON
-            value = json.dumps(event_data).encode('utf-8')
+            event_data = self._prepare(event_data)
+            value = self.serializer.serialize(topic, event_data)
 
             # Use event_id as key if not provided
             if key is None:
-                key = event_data.get('event_id', str(uuid.uuid4()))
-
-            # Convert headers to list of tuples
-            kafka_headers = []
-            if headers:
-                kafka_headers = [(k, v.encode('utf-8')) for k, v in headers.items()]
-
-            # Publish to Kafka
-            self.producer.produce(
-                topic=topic,
-                key=key.encode('utf-8'),
-                value=value,
-                headers=kafka_headers,
-                callback=self.delivery_report
-            )
-
-            # Trigger message delivery
-            self.producer.poll(0)
+                key = event_data['event_id']
 
+            future = await self._produce(topic, key, value, self._headers(headers))
             logger.info(f"Published event to {topic}: {event_data.get('event_type', 'UNKNOWN')}")
+            return future
 
         except Exception as e:
             logger.error(f"Failed to publish event to {topic}: {e}")
             raise
 
-    def flush(self, timeout: float = 10.0):
+    async def publish_many(
+        self,
+        topic: str,
+        events: Iterable[Dict[str, Any]],
+        key_field: Optional[str] = None,
+        headers: Dict[str, str] = None
+    ) -> List[asyncio.Future]:
+        """
+        Publish a batch of events to one topic
+
+        librdkafka groups them into compressed batches of up to batch.size.
+        Control returns to the event loop every 500 events, so a large batch
+        does not stall other requests.
+
+        Args:
+            topic: Kafka topic name
+            events: Event payloads
+            key_field: Event field used as message key (default: event_id)
+            headers: Headers added to every message
+
+        Returns:
+            One delivery future per event, in order
+        """
+        self._ensure_poll_thread()
+        loop = asyncio.get_running_loop()
+        kafka_headers = self._headers(headers)
+        futures = []
+        for i, event_data in enumerate(events):
+            event_data = self._prepare(event_data)
+            key = event_data.get(key_field) if key_field else None
+            key = str(key) if key is not None else event_data['event_id']
+            value = self.serializer.serialize(topic, event_data)
+            future = _delivery_future(loop)
+            if not self._produce_nowait(topic, key, value, kafka_headers, future):
+                future = await self._produce(topic, key, value, kafka_headers)
+            futures.append(future)
+            if i % 500 == 499:
+                await asyncio.sleep(0)
+
+        logger.info(f"Published {len(futures)} events to {topic}")
+        return futures
+
+    async def flush_async(self, timeout: float = 10.0) -> int:
+        """Flush pending messages without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.flush, timeout)
+
+    def flush(self, timeout: float = 10.0) -> int:
         """Flush pending messages"""
         remaining = self.producer.flush(timeout)
+        self._dispatch_reports()
         if remaining > 0:
             logger.warning(f"{remaining} messages were not delivered")
+        return remaining
 
     def close(self):
         """Close producer connection"""
         self.flush()
+        self._closing.set()
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
         logger.info("Kafka producer closed")
 
 
+# Futures resolved per event loop callback; larger report batches yield in between
+RESOLVE_CHUNK_SIZE = 2000
+
+
+def _delivery_future(loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+    """Future for one delivery report, safe to drop unawaited"""
+    future = loop.create_future()
+    future.add_done_callback(_retrieve_exception)
+    return future
+
+
+def _retrieve_exception(future: asyncio.Future):
+    # _on_delivery already logged the failure; retrieving it here stops
+    # asyncio logging "Future exception was never retrieved" for callers
+    # that fire and forget. Awaiting the future still raises.
+    if not future.cancelled():
+        future.exception()
+
+
+def _resolve_reports(loop: asyncio.AbstractEventLoop, reports: list):
+    for future, error, result in reports[:RESOLVE_CHUNK_SIZE]:
+        if future.done():
+            continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    if len(reports) > RESOLVE_CHUNK_SIZE:
+        loop.call_soon(_resolve_reports, loop, reports[RESOLVE_CHUNK_SIZE:])
+
+
 # =============================================================================
 # DOMAIN EVENT PUBLISHERS
 # =============================================================================
@@ -153,7 +412,7 @@ class EmploymentEventPublisher:
             'employment_type': employment_type
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.users.employment.hired',
             event_data=event_data,
             key=employee_id
@@ -177,7 +436,7 @@ class EmploymentEventPublisher:
             'reason': reason
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.users.employment.terminated',
             event_data=event_data,
             key=employee_id
@@ -203,7 +462,7 @@ class EmploymentEventPublisher:
             'change_type': change_type
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.users.role.changed',
             event_data=event_data,
             key=employee_id
@@ -230,7 +489,7 @@ class OnboardingEventPublisher:
             'expected_completion_date': expected_completion_date
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.onboarding.started',
             event_data=event_data,
             key=employee_id
@@ -252,7 +511,7 @@ class OnboardingEventPublisher:
             'duration_days': duration_days
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.onboarding.completed',
             event_data=event_data,
             key=employee_id
@@ -285,7 +544,7 @@ class PerformanceEventPublisher:
             'review_period_end': review_period_end
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.performance.review.created',
             event_data=event_data,
             key=employee_id
@@ -305,7 +564,7 @@ class PerformanceEventPublisher:
             'acknowledged_at': acknowledged_at
         }
 
-        await self.producer.publish_event(
+        return await self.producer.publish_event(
             topic='noor.performance.review.acknowledged',
             event_data=event_data,
             key=employee_id
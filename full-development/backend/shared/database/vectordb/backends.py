@@ -0,0 +1,156 @@
+"""
+NOOR Platform - Vector Index Backends
+Version: 7.1.0
+
+The vector DB classes talk to an index through the Pinecone Index interface
+(upsert, query, fetch, delete, describe_index_stats). open_index() returns
+either a remote Pinecone index or a LocalVectorIndex, selected by the
+VECTOR_BACKEND environment variable ("pinecone" or "local").
+"""
+
+import atexit
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .pinecone_config import INDEX_CONFIGS, initialize_pinecone, pinecone
+
+# "pinecone" (remote, default) or "local" (memory-mapped files, no network)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+VECTOR_LOCAL_DIR = os.getenv("VECTOR_LOCAL_DIR", "./vector_data")
+VECTOR_LOCAL_DTYPE = os.getenv("VECTOR_LOCAL_DTYPE", "float32")  # or "float16"
+
+
+@dataclass
+class QueryMatch:
+    """One match of a query, shaped like a Pinecone ScoredVector."""
+    id: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
+    values: Optional[List[float]] = None
+
+
+@dataclass
+class QueryResponse:
+    """Matches of a query, best first."""
+    matches: List[QueryMatch] = field(default_factory=list)
+
+
+@dataclass
+class FetchedVector:
+    """A stored vector returned by fetch()."""
+    id: str
+    values: List[float]
+    metadata: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class FetchResponse:
+    """Vectors returned by fetch(), keyed by id (missing ids are absent)."""
+    vectors: Dict[str, FetchedVector] = field(default_factory=dict)
+
+
+class VectorIndex(ABC):
+    """
+    Index interface used by vector_operations.
+
+    pinecone.Index provides the same methods and response attributes, so
+    either backend can be passed wherever an index is expected.
+    """
+
+    # Whether upsert() takes NumPy rows as values (pinecone.Index needs lists)
+    accepts_arrays = False
+
+    @abstractmethod
+    def upsert(self, vectors: List[Any], namespace: Optional[str] = None) -> Dict[str, int]:
+        """Insert or replace (id, values[, metadata]) tuples or dicts."""
+
+    @abstractmethod
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: Optional[str] = None
+    ) -> QueryResponse:
+        """Return the top_k nearest vectors matching the metadata filter."""
+
+    @abstractmethod
+    def fetch(self, ids: List[str], namespace: Optional[str] = None) -> FetchResponse:
+        """Return stored vectors by id."""
+
+    @abstractmethod
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> Dict:
+        """Delete vectors by id, by metadata filter, or all of them."""
+
+    @abstractmethod
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Vector count and dimension."""
+
+
+_local_indexes: Dict[str, VectorIndex] = {}
+_local_indexes_lock = threading.Lock()
+
+
+def open_index(index_name: str, backend: Optional[str] = None) -> VectorIndex:
+    """
+    Open a vector index on the configured backend.
+
+    Args:
+        index_name: One of the IndexName values
+        backend: "pinecone" or "local" (defaults to VECTOR_BACKEND)
+
+    Returns:
+        A pinecone.Index or a LocalVectorIndex. Local indexes are opened once
+        per process and shared, since they hold their data in memory maps.
+        Each index directory has a single writer: a second process opening
+        it (e.g. another uvicorn worker) gets IndexLockedError. Local
+        indexes are compacted and closed by close_local_indexes(), which
+        also runs at interpreter exit.
+    """
+    backend = backend or VECTOR_BACKEND
+
+    if backend == "pinecone":
+        initialize_pinecone()
+        return pinecone.Index(index_name)
+
+    if backend == "local":
+        from .local_index import LocalVectorIndex
+
+        if index_name not in INDEX_CONFIGS:
+            raise ValueError(f"Unknown vector index: {index_name}")
+
+        with _local_indexes_lock:
+            if index_name not in _local_indexes:
+                config = INDEX_CONFIGS[index_name]
+                _local_indexes[index_name] = LocalVectorIndex(
+                    path=os.path.join(VECTOR_LOCAL_DIR, index_name),
+                    dimension=config.dimension,
+                    metric=config.metric.value,
+                    dtype=VECTOR_LOCAL_DTYPE
+                )
+            return _local_indexes[index_name]
+
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+def close_local_indexes():
+    """Compact the journals of the local indexes opened by this process and release their locks."""
+    with _local_indexes_lock:
+        indexes = list(_local_indexes.values())
+        _local_indexes.clear()
+    for index in indexes:
+        index.close()
+
+
+atexit.register(close_local_indexes)
@@ -0,0 +1,148 @@
+"""
+NOOR Platform - Local Vector Index Benchmark
+Version: 7.1.0
+
+Recall@k and query latency of LocalVectorIndex against NumPy brute force,
+for synthetic 768-dim stand-ins of the job and user skill indexes
+(clustered, cosine, with location / experience metadata).
+
+For each index and stored precision it reports:
+    brute force    matrix-vector product over all rows (ground truth)
+    exact          LocalVectorIndex.query(exact=True)
+    ivf nprobe=N   IVF search scanning N lists
+    filtered       location + range filter (~6% of rows) and a location-only
+                   filter (10%), local index vs masked brute force
+plus build time and the time to reopen the persisted index.
+
+Usage (from backend/shared/database/):
+    python -m vectordb.benchmarks.ann_recall --rows 50000 --queries 200
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from vectordb.local_index import LocalVectorIndex
+
+DIMENSION = 768
+LOCATIONS = ["Dubai", "Abu Dhabi", "Sharjah", "Ajman", "Ras Al Khaimah",
+             "Fujairah", "Umm Al Quwain", "Al Ain", "Remote", "Riyadh"]
+BATCH_SIZE = 1000
+SEEDS = {"job": 1, "user": 2}
+
+
+def make_corpus(rows: int, queries: int, clusters: int, spread: float, seed: int):
+    """Clustered unit vectors; queries come from the same clusters but are not indexed."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSION)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows + queries)
+    data = centers[labels] + spread * rng.standard_normal((rows + queries, DIMENSION)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    metadata = [
+        {"location": LOCATIONS[i % len(LOCATIONS)], "years_experience": int(rng.integers(0, 25))}
+        for i in range(rows)
+    ]
+    return data[:rows], data[rows:], metadata
+
+
+def brute_force(data: np.ndarray, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    scores = data @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def percentiles(latencies: List[float]) -> str:
+    ms = np.asarray(latencies) * 1000
+    return f"p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms"
+
+
+def run_queries(index: LocalVectorIndex, queries: np.ndarray, k: int, truth: List[np.ndarray],
+                filter: Optional[Dict] = None, exact: bool = False) -> str:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = index.query(query, top_k=k, filter=filter, exact=exact)
+        latencies.append(time.perf_counter() - start)
+        found = {int(match.id) for match in result.matches}
+        hits += len(found & set(expected.tolist()))
+    recall = hits / sum(len(expected) for expected in truth)
+    return f"recall@{k} {recall:.3f}  {percentiles(latencies)}"
+
+
+def benchmark(name: str, args, dtype: str):
+    data, queries, metadata = make_corpus(args.rows, args.queries, args.clusters, args.spread, seed=SEEDS[name])
+    k = args.top_k
+    path = tempfile.mkdtemp(prefix=f"noor-{name}-")
+    try:
+        start = time.perf_counter()
+        index = LocalVectorIndex(path, dimension=DIMENSION, metric="cosine", dtype=dtype)
+        for offset in range(0, args.rows, BATCH_SIZE):
+            index.upsert([
+                (str(i), data[i], metadata[i]) for i in range(offset, min(offset + BATCH_SIZE, args.rows))
+            ])
+        index.train()
+        index.close()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = LocalVectorIndex(path, dimension=DIMENSION)
+        reopen = time.perf_counter() - start
+
+        print(f"\n{name} index: {args.rows} x {DIMENSION} {dtype}, {len(index._lists)} IVF lists "
+              f"(build {build:.1f} s, reopen {reopen * 1000:.0f} ms)")
+
+        latencies, truth = [], []
+        for query in queries:
+            start = time.perf_counter()
+            truth.append(brute_force(data, query, k))
+            latencies.append(time.perf_counter() - start)
+        print(f"  {'brute force':<16} recall@{k} 1.000  {percentiles(latencies)}")
+        print(f"  {'exact':<16} {run_queries(index, queries, k, truth, exact=True)}")
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            print(f"  {f'ivf nprobe={nprobe}':<16} {run_queries(index, queries, k, truth)}")
+
+        location = np.array([m["location"] for m in metadata]) == "Dubai"
+        experience = np.array([m["years_experience"] for m in metadata]) >= 10
+        index.nprobe = args.nprobe[len(args.nprobe) // 2]
+        for label, filter, mask in (
+            ("location", {"location": "Dubai"}, location),
+            ("location+years", {"location": "Dubai", "years_experience": {"$gte": 10}}, location & experience),
+        ):
+            latencies, filtered_truth = [], []
+            for query in queries:
+                start = time.perf_counter()
+                filtered_truth.append(brute_force(data, query, k, mask))
+                latencies.append(time.perf_counter() - start)
+            print(f"  filter {label} ({mask.sum()} rows pass, nprobe={index.nprobe})")
+            print(f"    {'brute force':<14} recall@{k} 1.000  {percentiles(latencies)}")
+            print(f"    {'local index':<14} {run_queries(index, queries, k, filtered_truth, filter=filter)}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vector index recall/latency benchmark")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=500, help="Synthetic topic clusters")
+    parser.add_argument("--spread", type=float, default=1.5, help="Within-cluster noise relative to cluster centers")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--dtype", choices=["float32", "float16", "both"], default="both")
+    args = parser.parse_args()
+
+    dtypes = ["float32", "float16"] if args.dtype == "both" else [args.dtype]
+    for name in ("job", "user"):
+        for dtype in dtypes:
+            benchmark(name, args, dtype)
+
+
+if __name__ == "__main__":
+    main()
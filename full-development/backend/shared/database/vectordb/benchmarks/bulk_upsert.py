@@ -0,0 +1,147 @@
+"""
+NOOR Platform - Bulk Upsert Benchmark
+Version: 7.1.0
+
+Compares the previous batch_upsert loop (100 vectors per request, one
+request at a time, values converted with tolist()) with BulkUpserter
+(byte-bounded batches, concurrent requests, retries) against a simulated
+remote index: each request costs a round trip plus transfer time for its
+JSON payload at a per-connection bandwidth, and a fraction of requests
+fail transiently.
+
+Records are generated lazily, or streamed from a Parquet file written
+first with --parquet (requires pyarrow).
+
+Usage (from backend/shared/database/):
+    python -m vectordb.benchmarks.bulk_upsert --vectors 20000
+    python -m vectordb.benchmarks.bulk_upsert --vectors 20000 --parquet /tmp/profiles.parquet
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+
+import numpy as np
+
+from vectordb.bulk_loader import BYTES_PER_VALUE, BulkUpserter, read_parquet_records
+from vectordb.vector_operations import VectorRecord
+
+DIMENSION = 768
+
+
+class SimulatedRemoteIndex:
+    """Index stand-in with round-trip latency, bandwidth and transient errors"""
+
+    def __init__(self, rtt: float, bandwidth: float, failure_rate: float, seed: int = 0):
+        self.rtt = rtt
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.ids = set()
+        self.requests = 0
+
+    def upsert(self, vectors, namespace=None):
+        # Approximate JSON size of what the REST client would send
+        payload = sum(len(v[1]) * BYTES_PER_VALUE + len(json.dumps(v[2])) for v in vectors)
+        time.sleep(self.rtt + payload / self.bandwidth)
+        with self.lock:
+            self.requests += 1
+            if self.random.random() < self.failure_rate:
+                raise ConnectionError("503 Service Unavailable")
+            self.ids.update(v[0] for v in vectors)
+        return {"upserted_count": len(vectors)}
+
+
+def generate_records(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        yield VectorRecord(
+            id=f"user-{i}",
+            values=rng.standard_normal(DIMENSION).astype(np.float32),
+            metadata={"role": "analyst", "years_experience": i % 30, "location": "Dubai"}
+        )
+
+
+def sequential_upsert(index, records, batch_size: int = 100) -> int:
+    """The previous batch_upsert body (minus print), for a list of records"""
+    total = 0
+    for i in range(0, len(records), batch_size):
+        batch = records[i:i + batch_size]
+        vectors = [(r.id, r.values.tolist(), r.metadata) for r in batch]
+        for attempt in range(3):
+            try:
+                index.upsert(vectors=vectors)
+                break
+            except ConnectionError:
+                if attempt == 2:
+                    raise
+        total += len(batch)
+    return total
+
+
+def write_parquet(path: str, count: int):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    records = generate_records(count)
+    for start in range(0, count, 4096):
+        chunk = [next(records) for _ in range(min(4096, count - start))]
+        table = pa.table({
+            "id": [r.id for r in chunk],
+            "values": pa.FixedSizeListArray.from_arrays(
+                pa.array(np.concatenate([r.values for r in chunk])), DIMENSION
+            ),
+            "role": [r.metadata["role"] for r in chunk],
+            "years_experience": [r.metadata["years_experience"] for r in chunk],
+            "location": [r.metadata["location"] for r in chunk],
+        })
+        writer = writer or pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk upsert benchmark")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--rtt-ms", type=float, default=40.0, help="Simulated request round trip")
+    parser.add_argument("--bandwidth-mbps", type=float, default=200.0, help="Simulated per-connection upload bandwidth")
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--in-flight", type=int, default=8)
+    parser.add_argument("--parquet", default=None, help="Write records to this Parquet file and stream them back")
+    args = parser.parse_args()
+
+    def make_index():
+        return SimulatedRemoteIndex(args.rtt_ms / 1000, args.bandwidth_mbps * 1e6 / 8, args.failure_rate)
+
+    print(f"vectors={args.vectors} dim={DIMENSION} rtt={args.rtt_ms:.0f} ms "
+          f"bandwidth={args.bandwidth_mbps:.0f} Mbit/s failures={args.failure_rate:.0%}")
+
+    index = make_index()
+    start = time.perf_counter()
+    records = list(generate_records(args.vectors))
+    upserted = sequential_upsert(index, records)
+    elapsed = time.perf_counter() - start
+    print(f"  sequential x100  {elapsed:7.2f} s  {upserted / elapsed:8.0f} vectors/s  "
+          f"{index.requests} requests")
+    del records
+
+    if args.parquet:
+        write_parquet(args.parquet, args.vectors)
+        source, label = read_parquet_records(args.parquet), "pipelined parquet"
+    else:
+        source, label = generate_records(args.vectors), "pipelined"
+
+    index = make_index()
+    loader = BulkUpserter(index, max_in_flight=args.in_flight, backoff_seconds=0.05)
+    stats = loader.run(source)
+    print(f"  {label:<16} {stats.elapsed:7.2f} s  {stats.vectors_per_second:8.0f} vectors/s  "
+          f"{index.requests} requests, {stats.retries} retries, {len(stats.failed_ids)} failed, "
+          f"{len(index.ids)} stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+NOOR Platform - Vector Bulk Loader
+Version: 7.1.0
+
+Pipelined bulk upserts for reindexing whole corpora:
+- records are consumed lazily from any iterable (a generator, or
+  read_parquet_records() for Parquet exports), so memory holds only the
+  batches in flight
+- batches are cut by payload bytes as well as vector count, staying under
+  Pinecone's request size limit whatever the metadata size
+- up to max_in_flight batches are sent concurrently from a thread pool
+- failed batches are retried with jittered exponential backoff (upserts are
+  keyed by id, so a retried batch is idempotent); a batch rejected as too
+  large is split in half and the byte budget lowered for later batches
+- BulkLoadStats counts vectors, batches, bytes, retries and failures, and
+  progress is logged at a fixed interval
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Pinecone limits: 1000 vectors and 2 MB per upsert request
+MAX_BATCH_VECTORS = 1000
+MAX_BATCH_BYTES = 2 * 1024 * 1024
+
+# JSON-encoded float64 ("-0.012345678901234567,") as sent by the REST client
+BYTES_PER_VALUE = 22
+
+Record = Tuple[str, Any, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class BulkLoadStats:
+    """Throughput counters for one bulk load."""
+    vectors: int = 0
+    batches: int = 0
+    bytes: int = 0
+    retries: int = 0
+    splits: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.vectors / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "vectors": self.vectors,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "splits": self.splits,
+            "failed": len(self.failed_ids),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "vectors_per_second": round(self.vectors_per_second, 1),
+            "megabytes_per_second": round(self.megabytes_per_second, 2),
+        }
+
+
+class BatchTooLargeError(Exception):
+    """Raised by an index when an upsert request exceeds its size limit."""
+
+
+class BulkUpsertError(Exception):
+    """Raised by batch_upsert when vectors are still failing after retries."""
+
+    def __init__(self, index_name: str, stats: BulkLoadStats):
+        self.index_name = index_name
+        self.stats = stats
+        self.failed_ids = stats.failed_ids
+        super().__init__(
+            f"{len(stats.failed_ids)} vectors were not upserted into {index_name} "
+            f"({stats.vectors} succeeded)"
+        )
+
+
+def _is_too_large(error: Exception) -> bool:
+    if isinstance(error, BatchTooLargeError):
+        return True
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    message = str(error).lower()
+    return status == 413 or "too large" in message or "exceeds the maximum" in message
+
+
+def _as_record(item: Any) -> Record:
+    """Accept VectorRecord objects, (id, values[, metadata]) tuples or dicts."""
+    if hasattr(item, "id") and hasattr(item, "values"):
+        return item.id, item.values, item.metadata
+    if isinstance(item, dict):
+        return item["id"], item["values"], item.get("metadata")
+    if len(item) == 2:
+        return item[0], item[1], None
+    return item[0], item[1], item[2]
+
+
+class BulkUpserter:
+    """
+    Streams records into an index with concurrent, size-bounded batches.
+
+    Usage:
+        loader = BulkUpserter(open_index(IndexName.USER_PROFILE_EMBEDDINGS.value))
+        stats = loader.run(read_parquet_records("profiles.parquet"))
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        max_batch_vectors: int = MAX_BATCH_VECTORS,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        progress_interval: float = 10.0,
+        on_progress: Optional[Callable[[BulkLoadStats], None]] = None
+    ):
+        """
+        Args:
+            index: A pinecone.Index or LocalVectorIndex
+            max_batch_vectors: Vector count cap per request
+            max_batch_bytes: Estimated payload cap per request
+            max_in_flight: Batches being sent concurrently
+            max_retries: Retries per batch before its ids are reported failed
+            backoff_seconds: First retry delay (doubled per attempt, jittered)
+            max_backoff_seconds: Retry delay cap
+            progress_interval: Seconds between progress log lines
+            on_progress: Called with the stats after every completed batch
+        """
+        self.index = index
+        self.max_batch_vectors = max_batch_vectors
+        self.max_batch_bytes = max_batch_bytes
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        # The local index takes NumPy rows directly; the REST client needs lists
+        self.accepts_arrays = getattr(index, "accepts_arrays", False)
+
+        self.stats = BulkLoadStats()
+        self._lock = threading.Lock()
+        self._last_progress = 0.0
+
+    def _payload_bytes(self, record: Record) -> int:
+        vector_id, values, metadata = record
+        size = len(vector_id) + len(values) * BYTES_PER_VALUE + 32
+        if metadata:
+            size += len(json.dumps(metadata, default=str))
+        return size
+
+    def _batches(self, records: Iterable[Any]) -> Iterator[Tuple[List[Record], int]]:
+        """Cut the record stream into batches under both the count and byte caps."""
+        batch: List[Record] = []
+        batch_bytes = 0
+        for item in records:
+            record = _as_record(item)
+            size = self._payload_bytes(record)
+            if batch and (len(batch) >= self.max_batch_vectors or batch_bytes + size > self.max_batch_bytes):
+                yield batch, batch_bytes
+                batch, batch_bytes = [], 0
+            batch.append(record)
+            batch_bytes += size
+        if batch:
+            yield batch, batch_bytes
+
+    def _wire(self, batch: List[Record]) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        if self.accepts_arrays:
+            return [(vector_id, values, metadata or {}) for vector_id, values, metadata in batch]
+        return [
+            (vector_id, values.tolist() if isinstance(values, np.ndarray) else list(values), metadata or {})
+            for vector_id, values, metadata in batch
+        ]
+
+    def _send(self, batch: List[Record], batch_bytes: int):
+        """Upsert one batch, retrying and splitting as needed (runs on a pool thread)."""
+        attempt = 0
+        while True:
+            try:
+                self.index.upsert(vectors=self._wire(batch))
+                break
+            except Exception as e:
+                if _is_too_large(e) and len(batch) > 1:
+                    with self._lock:
+                        self.stats.splits += 1
+                        # Later batches start from the size that was rejected, halved
+                        self.max_batch_bytes = min(self.max_batch_bytes, max(batch_bytes // 2, 1))
+                    half = len(batch) // 2
+                    self._send(batch[:half], batch_bytes // 2)
+                    self._send(batch[half:], batch_bytes - batch_bytes // 2)
+                    return
+                if attempt >= self.max_retries:
+                    logger.error(f"Upsert of {len(batch)} vectors failed after {attempt + 1} attempts: {e}")
+                    with self._lock:
+                        self.stats.failed_ids.extend(vector_id for vector_id, _, _ in batch)
+                    return
+                delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+                logger.warning(f"Upsert of {len(batch)} vectors failed ({e}); retrying in {delay:.1f}s")
+                with self._lock:
+                    self.stats.retries += 1
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+
+        with self._lock:
+            self.stats.vectors += len(batch)
+            self.stats.batches += 1
+            self.stats.bytes += batch_bytes
+
+    def _report(self, force: bool = False):
+        if self.on_progress:
+            self.on_progress(self.stats)
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            stats = self.stats
+            logger.info(
+                f"Upserted {stats.vectors} vectors in {stats.batches} batches "
+                f"({stats.vectors_per_second:.0f} vectors/s, {stats.retries} retries, "
+                f"{len(stats.failed_ids)} failed)"
+            )
+
+    def run(self, records: Iterable[Any]) -> BulkLoadStats:
+        """
+        Upsert every record, keeping at most max_in_flight batches pending.
+
+        Returns:
+            The load's stats; ids of batches that exhausted their retries are
+            in stats.failed_ids (rerun with just those records to finish).
+        """
+        self.stats = BulkLoadStats()
+        self._last_progress = time.monotonic()
+        in_flight: Set[Future] = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="vector-upsert") as pool:
+            try:
+                for batch, batch_bytes in self._batches(records):
+                    if len(in_flight) >= self.max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                            self._report()
+                    in_flight.add(pool.submit(self._send, batch, batch_bytes))
+
+                for future in in_flight:
+                    future.result()
+                    self._report()
+            finally:
+                self.stats.finished_at = time.monotonic()
+
+        self._report(force=True)
+        return self.stats
+
+
+def read_parquet_records(
+    path: str,
+    id_column: str = "id",
+    values_column: str = "values",
+    metadata_columns: Optional[Sequence[str]] = None,
+    batch_rows: int = 4096
+) -> Iterator[Record]:
+    """
+    Stream (id, values, metadata) records from a Parquet file.
+
+    Row groups are read batch_rows at a time, so the file never has to fit
+    in memory. values_column holds a list/fixed-size-list of floats;
+    metadata_columns defaults to every other column.
+
+    Requires pyarrow.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("read_parquet_records requires pyarrow (pip install pyarrow)") from e
+
+    parquet_file = pq.ParquetFile(path)
+    if metadata_columns is None:
+        metadata_columns = [
+            name for name in parquet_file.schema_arrow.names if name not in (id_column, values_column)
+        ]
+    columns = [id_column, values_column, *metadata_columns]
+
+    for record_batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+        ids = record_batch.column(id_column).to_pylist()
+        values_array = record_batch.column(values_column)
+        # Flat float buffer reshaped to (rows, dim) without per-row Python lists
+        values = values_array.flatten().to_numpy(zero_copy_only=False).reshape(len(ids), -1)
+        metadata = {name: record_batch.column(name).to_pylist() for name in metadata_columns}
+        for row, vector_id in enumerate(ids):
+            yield (
+                str(vector_id),
+                values[row],
+                {name: column[row] for name, column in metadata.items() if column[row] is not None}
+            )
@@ -0,0 +1,772 @@
+"""
+NOOR Platform - Local Vector Index
+Version: 7.1.0
+
+In-process alternative to a Pinecone index for air-gapped and test
+environments, and for services that want matches without a network
+round trip. Same upsert/query/fetch/delete interface (see backends.py).
+
+Storage, one directory per index:
+    vectors.bin      float32 or float16 rows, memory-mapped and written in place
+    assignments.bin  int32 IVF list of each row (-1 until the index is trained)
+    centroids.npy    IVF coarse centroids
+    index.json       ids, metadata and settings as of the last compaction
+    journal.jsonl    upserts and deletes since then, replayed on open
+    journal.old      journal being compacted (replayed first if present)
+    LOCK             flock held by the process that has the index open
+
+The journal is compacted into index.json in a background thread once it
+reaches compact_entries entries or compact_bytes bytes, and on save() and
+close(). An index directory has a single writer: opening it takes an
+exclusive flock, so a second process (another uvicorn worker, say) gets
+IndexLockedError instead of both appending rows at the same offsets.
+
+Search is IVF (inverted file): k-means centroids partition the rows, and a
+query ranks the rows of its nprobe nearest lists exactly. Metadata filters
+are evaluated before the vector search against posting sets and numeric
+columns; a filter that leaves few rows is answered by an exact scan of
+those rows.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-writer use is on the caller
+    fcntl = None
+
+from .backends import FetchedVector, FetchResponse, QueryMatch, QueryResponse, VectorIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+JOURNAL_FILE = "journal.jsonl"
+COMPACTING_JOURNAL_FILE = "journal.old"
+LOCK_FILE = "LOCK"
+VECTORS_FILE = "vectors.bin"
+ASSIGNMENTS_FILE = "assignments.bin"
+CENTROIDS_FILE = "centroids.npy"
+
+# Rows scored per block, bounding the float32 working copy of a float16 index
+SCORE_BLOCK_ROWS = 2048
+
+RANGE_OPERATORS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+class IndexLockedError(RuntimeError):
+    """Raised when another process already has the index directory open."""
+
+
+def _posting_key(value: Any) -> Any:
+    """Keep True and 1 apart in posting sets (they hash equal)."""
+    return ("bool", value) if isinstance(value, bool) else value
+
+
+def _copy_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Metadata is indexed on write, so callers never share the stored dict."""
+    return {name: list(value) if isinstance(value, list) else value for name, value in (metadata or {}).items()}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class LocalVectorIndex(VectorIndex):
+    """
+    Memory-mapped vector index with IVF search and metadata pre-filtering.
+
+    Scores follow Pinecone: cosine and dotproduct return similarities (higher
+    is closer); euclidean returns squared distances (lower is closer).
+    Cosine indexes store unit-normalized vectors, so fetch() returns the
+    normalized values.
+    """
+
+    accepts_arrays = True
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        metric: str = "cosine",
+        dtype: str = "float32",
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_threshold: int = 4096,
+        exact_threshold: int = 2048,
+        initial_capacity: int = 1024,
+        compact_entries: int = 10000,
+        compact_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Open the index at path, creating it if needed.
+
+        Args:
+            path: Directory holding the index files
+            dimension: Vector dimension
+            metric: "cosine", "dotproduct" or "euclidean"
+            dtype: Stored precision, "float32" or "float16" (half the memory)
+            nlist: IVF lists (defaults to sqrt of the row count at training)
+            nprobe: Lists scanned per query
+            train_threshold: Rows before the IVF index is first trained;
+                smaller indexes are always searched exactly
+            exact_threshold: Filtered row counts at or below this are
+                searched exactly instead of through IVF lists
+            initial_capacity: Rows allocated in a new vectors file
+            compact_entries: Journal entries that trigger a background compaction
+            compact_bytes: Journal size that triggers a background compaction
+
+        Raises:
+            IndexLockedError: Another process has the index open
+        """
+        if metric not in ("cosine", "dotproduct", "euclidean"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        self.path = path
+        self.dimension = dimension
+        self.metric = metric
+        self.dtype = np.dtype(dtype)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.exact_threshold = exact_threshold
+        self.compact_entries = compact_entries
+        self.compact_bytes = compact_bytes
+
+        self._lock = threading.RLock()
+        # Held for a whole compaction, which finishes outside _lock
+        self._compacting = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._journal_entries = 0
+        self._journal_bytes = 0
+        self._lock_file = None
+        self._closed = False
+        self._size = 0
+        self._capacity = 0
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._pending: Dict[int, List[int]] = {}
+        self._trained_size = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._acquire_directory()
+        try:
+            self._load(initial_capacity)
+        except BaseException:
+            self._release_directory()
+            raise
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _acquire_directory(self):
+        if fcntl is None:
+            return
+        self._lock_file = open(self._file(LOCK_FILE), "a")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise IndexLockedError(
+                f"Vector index at {self.path} is open in another process; local indexes have a "
+                "single writer (run one worker per VECTOR_LOCAL_DIR or use the pinecone backend)"
+            )
+
+    def _release_directory(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _map(self, name: str, dtype: np.dtype, shape: Tuple[int, ...], fill: Optional[int] = None) -> np.memmap:
+        """Memory-map a file, growing it to hold shape (new space gets fill)."""
+        path = self._file(name)
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        existing = os.path.getsize(path) if os.path.exists(path) else 0
+        if existing < nbytes:
+            with open(path, "ab") as f:
+                f.truncate(nbytes)
+        array = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        if fill is not None and existing < nbytes:
+            array.reshape(-1)[existing // np.dtype(dtype).itemsize:] = fill
+        return array
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2)
+        if self._capacity:
+            self._vectors.flush()
+            self._assignments.flush()
+        self._vectors = self._map(VECTORS_FILE, self.dtype, (capacity, self.dimension))
+        self._assignments = self._map(ASSIGNMENTS_FILE, np.int32, (capacity,), fill=-1)
+        self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        for name, column in self._numeric.items():
+            self._numeric[name] = np.concatenate([column, np.full(capacity - len(column), np.nan)])
+        self._capacity = capacity
+
+    def _load(self, initial_capacity: int):
+        state = None
+        if os.path.exists(self._file(INDEX_FILE)):
+            with open(self._file(INDEX_FILE)) as f:
+                state = json.load(f)
+            if state["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Index at {self.path} has dimension {state['dimension']}, expected {self.dimension}"
+                )
+            self.metric = state["metric"]
+            self.dtype = np.dtype(state["dtype"])
+            self._trained_size = state.get("trained_size", 0)
+
+        journal = list(self._read_journal(COMPACTING_JOURNAL_FILE)) + list(self._read_journal(JOURNAL_FILE))
+        saved = len(state["ids"]) if state else 0
+        journal_rows = [row for entry in journal if entry["op"] == "upsert" for _, row, _ in entry["records"]]
+        size = max([saved] + [row + 1 for row in journal_rows])
+        self._ensure_capacity(max(size, state["capacity"] if state else initial_capacity))
+        self._size = size
+        self._ids = [None] * size
+        self._metadata = [None] * size
+
+        if state:
+            for row, (vector_id, metadata) in enumerate(zip(state["ids"], state["metadata"])):
+                if vector_id is not None:
+                    self._set_record(row, vector_id, metadata)
+        for entry in journal:
+            self._apply(entry)
+
+        if os.path.exists(self._file(CENTROIDS_FILE)):
+            self._centroids = np.load(self._file(CENTROIDS_FILE))
+            self._rebuild_lists()
+            # Rows journaled after their assignment was lost
+            unassigned = np.flatnonzero(self._live[:size] & (self._assignments[:size] < 0))
+            if len(unassigned):
+                self._assign(unassigned)
+
+        if state is None or journal:
+            # Record dimension, metric and dtype before any vectors are
+            # written, and start from an empty journal
+            self.save()
+
+    def _read_journal(self, name: str) -> Iterable[Dict[str, Any]]:
+        if not os.path.exists(self._file(name)):
+            return
+        with open(self._file(name)) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final write; everything before it is intact
+                    return
+
+    def _journal(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with open(self._file(JOURNAL_FILE), "a") as f:
+            f.write(line)
+        self._journal_entries += 1
+        self._journal_bytes += len(line)
+        if self._journal_entries >= self.compact_entries or self._journal_bytes >= self.compact_bytes:
+            self._compact_in_background()
+
+    def _apply(self, entry: Dict[str, Any]):
+        if entry["op"] == "upsert":
+            for vector_id, row, metadata in entry["records"]:
+                self._set_record(row, vector_id, metadata)
+        elif entry["op"] == "delete":
+            for vector_id in entry["ids"]:
+                self._clear_record(vector_id)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """
+        Capture ids and metadata for index.json and start a new journal.
+
+        Caller holds _lock and _compacting. The current journal moves to
+        journal.old, which stays until the snapshot is written, so a crash
+        mid-compaction replays it on open. Stored metadata dicts are
+        replaced rather than mutated, so shallow copies stay consistent.
+        """
+        self._vectors.flush()
+        self._assignments.flush()
+        journal = self._file(JOURNAL_FILE)
+        compacting = self._file(COMPACTING_JOURNAL_FILE)
+        if os.path.exists(journal):
+            if os.path.exists(compacting):
+                # A failed compaction left entries behind; keep them in order
+                with open(journal) as src, open(compacting, "a") as dst:
+                    dst.write(src.read())
+                os.remove(journal)
+            else:
+                os.replace(journal, compacting)
+        self._journal_entries = 0
+        self._journal_bytes = 0
+        return {
+            "dimension": self.dimension,
+            "metric": self.metric,
+            "dtype": self.dtype.name,
+            "capacity": self._capacity,
+            "trained_size": self._trained_size,
+            "ids": self._ids[:self._size],
+            "metadata": self._metadata[:self._size],
+        }
+
+    def _write_snapshot(self, state: Dict[str, Any]):
+        tmp_path = self._file(INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._file(INDEX_FILE))
+        if os.path.exists(self._file(COMPACTING_JOURNAL_FILE)):
+            os.remove(self._file(COMPACTING_JOURNAL_FILE))
+
+    def _compact_in_background(self):
+        # Caller holds _lock; skip if a compaction is already running
+        if not self._compacting.acquire(blocking=False):
+            return
+        try:
+            state = self._snapshot()
+        except BaseException:
+            self._compacting.release()
+            raise
+        self._compaction = threading.Thread(
+            target=self._finish_compaction, args=(state,), name=f"compact-{os.path.basename(self.path)}", daemon=True
+        )
+        self._compaction.start()
+
+    def _finish_compaction(self, state: Dict[str, Any]):
+        try:
+            self._write_snapshot(state)
+        except Exception:
+            # journal.old is kept and folded into the next compaction
+            logger.exception(f"Compacting vector index {self.path} failed")
+        finally:
+            self._compacting.release()
+
+    def save(self):
+        """
+        Flush vectors to disk and compact ids and metadata into index.json,
+        emptying the journal. Waits for a background compaction first.
+        """
+        with self._compacting:
+            with self._lock:
+                self._write_snapshot(self._snapshot())
+
+    def close(self):
+        """Compact and release the directory lock (the index is unusable afterwards)."""
+        if self._closed:
+            return
+        self.save()
+        self._release_directory()
+        self._closed = True
+
+    # ------------------------------------------------------------------
+    # Records and metadata postings
+    # ------------------------------------------------------------------
+
+    def _set_record(self, row: int, vector_id: str, metadata: Optional[Dict[str, Any]]):
+        if self._metadata[row]:
+            self._unindex_metadata(row)
+        self._ids[row] = vector_id
+        self._rows[vector_id] = row
+        self._metadata[row] = _copy_metadata(metadata)
+        self._live[row] = True
+
+        for name, value in self._metadata[row].items():
+            postings = self._postings.setdefault(name, {})
+            for item in (value if isinstance(value, list) else [value]):
+                postings.setdefault(_posting_key(item), set()).add(row)
+            if _is_number(value):
+                if name not in self._numeric:
+                    self._numeric[name] = np.full(self._capacity, np.nan)
+                self._numeric[name][row] = value
+
+    def _unindex_metadata(self, row: int):
+        for name, value in self._metadata[row].items():
+            postings = self._postings[name]
+            for item in (value if isinstance(value, list) else [value]):
+                key = _posting_key(item)
+                postings[key].discard(row)
+                if not postings[key]:
+                    del postings[key]
+            if name in self._numeric:
+                self._numeric[name][row] = np.nan
+
+    def _clear_record(self, vector_id: str) -> bool:
+        row = self._rows.pop(vector_id, None)
+        if row is None:
+            return False
+        self._unindex_metadata(row)
+        self._ids[row] = None
+        self._metadata[row] = None
+        self._live[row] = False
+        return True
+
+    @staticmethod
+    def _parse_item(item: Any) -> Tuple[str, Any, Optional[Dict[str, Any]]]:
+        if isinstance(item, dict):
+            return item["id"], item["values"], item.get("metadata")
+        if len(item) == 2:
+            return item[0], item[1], None
+        return item[0], item[1], item[2]
+
+    # ------------------------------------------------------------------
+    # Index interface
+    # ------------------------------------------------------------------
+
+    def upsert(self, vectors: List[Any], namespace: Optional[str] = None) -> Dict[str, int]:
+        items = [self._parse_item(item) for item in vectors]
+        if not items:
+            return {"upserted_count": 0}
+
+        values = np.asarray([item[1] for item in items], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got shape {values.shape}")
+        if self.metric == "cosine":
+            values = self._normalize(values)
+
+        with self._lock:
+            rows = []
+            for vector_id, _, _ in items:
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(None)
+                    self._metadata.append(None)
+                    self._rows[vector_id] = row
+                rows.append(row)
+
+            self._ensure_capacity(self._size)
+            row_array = np.asarray(rows)
+            self._vectors[row_array] = values.astype(self.dtype)
+
+            records = []
+            for (vector_id, _, metadata), row in zip(items, rows):
+                self._set_record(row, vector_id, metadata)
+                records.append([vector_id, row, metadata or {}])
+            self._journal({"op": "upsert", "records": records})
+
+            if self._centroids is not None:
+                self._assign(np.unique(row_array))
+            self._maybe_train()
+
+        return {"upserted_count": len(items)}
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None) -> FetchResponse:
+        with self._lock:
+            found = [(vector_id, self._rows[vector_id]) for vector_id in ids if vector_id in self._rows]
+            return FetchResponse(vectors={
+                vector_id: FetchedVector(
+                    id=vector_id,
+                    values=self._vectors[row].astype(np.float32).tolist(),
+                    metadata=_copy_metadata(self._metadata[row])
+                )
+                for vector_id, row in found
+            })
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> Dict:
+        with self._lock:
+            if delete_all:
+                ids = list(self._rows)
+            elif filter:
+                ids = [self._ids[row] for row in np.flatnonzero(self._filter_mask(filter))]
+            deleted = [vector_id for vector_id in (ids or []) if self._clear_record(vector_id)]
+            if deleted:
+                self._journal({"op": "delete", "ids": deleted})
+        return {}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        count = len(self._rows)
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": count,
+            "index_fullness": 0.0,
+            "namespaces": {"": {"vector_count": count}},
+        }
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: Optional[str] = None,
+        exact: bool = False
+    ) -> QueryResponse:
+        """
+        Return the top_k nearest vectors matching the metadata filter.
+
+        exact=True skips the IVF lists and scores every matching row.
+        """
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Expected a vector of dimension {self.dimension}, got {query.shape[0]}")
+        if self.metric == "cosine":
+            query = self._normalize(query[None, :])[0]
+
+        with self._lock:
+            mask = self._filter_mask(filter)
+            allowed = int(np.count_nonzero(mask))
+            if allowed == 0 or top_k <= 0:
+                return QueryResponse()
+            if exact or self._use_exact(allowed):
+                candidates = np.flatnonzero(mask)
+            else:
+                candidates = self._probe(query, mask, allowed, top_k)
+
+            scores = self._score(query, candidates)
+            top_k = min(top_k, len(candidates))
+            ranking = -scores if self.metric != "euclidean" else scores
+            best = np.argpartition(ranking, top_k - 1)[:top_k]
+            best = best[np.argsort(ranking[best], kind="stable")]
+
+            return QueryResponse(matches=[
+                QueryMatch(
+                    id=self._ids[candidates[i]],
+                    score=float(scores[i]),
+                    metadata=_copy_metadata(self._metadata[candidates[i]]) if include_metadata else None,
+                    values=self._vectors[candidates[i]].astype(np.float32).tolist() if include_values else None
+                )
+                for i in best
+            ])
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(values: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        return values / np.maximum(norms, 1e-12)
+
+    def _score(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Similarity (or squared distance for euclidean) of query to rows."""
+        scores = np.empty(len(rows), dtype=np.float32)
+        contiguous = len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows)
+        for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, len(rows))
+            if contiguous:
+                block = self._vectors[rows[start]:rows[start] + (end - start)]
+            else:
+                block = self._vectors[rows[start:end]]
+            block = np.asarray(block, dtype=np.float32)
+            if self.metric == "euclidean":
+                distances = np.einsum("ij,ij->i", block, block) - 2 * (block @ query) + query @ query
+                scores[start:end] = np.maximum(distances, 0)
+            else:
+                scores[start:end] = block @ query
+        return scores
+
+    def _filter_mask(self, filter: Optional[Dict]) -> np.ndarray:
+        live = self._live[:self._size]
+        if not filter:
+            return live.copy()
+        return live & self._evaluate(filter)
+
+    def _evaluate(self, filter: Dict) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        for key, condition in filter.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._evaluate(clause)
+            elif key == "$or":
+                matched = np.zeros(self._size, dtype=bool)
+                for clause in condition:
+                    matched |= self._evaluate(clause)
+                mask &= matched
+            else:
+                mask &= self._evaluate_field(key, condition)
+        return mask
+
+    def _evaluate_field(self, name: str, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(self._size, dtype=bool)
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                mask &= self._posting_mask(name, [operand])
+            elif operator == "$ne":
+                mask &= ~self._posting_mask(name, [operand])
+            elif operator == "$in":
+                mask &= self._posting_mask(name, operand)
+            elif operator == "$nin":
+                mask &= ~self._posting_mask(name, operand)
+            elif operator == "$exists":
+                present = self._posting_mask(name, None)
+                mask &= present if operand else ~present
+            elif operator in RANGE_OPERATORS:
+                column = self._numeric.get(name)
+                if column is None:
+                    return np.zeros(self._size, dtype=bool)
+                with np.errstate(invalid="ignore"):
+                    mask &= RANGE_OPERATORS[operator](column[:self._size], operand)
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+    def _posting_mask(self, name: str, values: Optional[List[Any]]) -> np.ndarray:
+        """Rows whose field equals (or, for lists, contains) any of values; None means any value."""
+        mask = np.zeros(self._size, dtype=bool)
+        postings = self._postings.get(name, {})
+        keys = postings.keys() if values is None else [_posting_key(value) for value in values]
+        for key in keys:
+            rows = postings.get(key)
+            if rows:
+                mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        return mask
+
+    def _centroid_order(self, query: np.ndarray) -> np.ndarray:
+        if self.metric == "euclidean":
+            distances = np.einsum("ij,ij->i", self._centroids, self._centroids) - 2 * (self._centroids @ query)
+            return np.argsort(distances)
+        return np.argsort(-(self._centroids @ query))
+
+    def _use_exact(self, allowed: int) -> bool:
+        if self._centroids is None or allowed <= self.exact_threshold:
+            return True
+        # Scoring the filtered rows directly costs no more than probing would
+        return allowed <= self.nprobe * len(self._rows) / len(self._lists)
+
+    def _probe(self, query: np.ndarray, mask: np.ndarray, allowed: int, top_k: int) -> np.ndarray:
+        """Candidate rows from the nearest lists, widening until top_k pass the filter."""
+        order = self._centroid_order(query)
+        # A filter passing 1 row in n leaves ~1/n of each list; probe n times as many
+        nprobe = min(math.ceil(self.nprobe * len(self._rows) / allowed), len(order))
+        while True:
+            rows = np.concatenate([self._list_rows(list_id) for list_id in order[:nprobe]])
+            rows = rows[mask[rows]]
+            if len(rows) >= top_k or nprobe >= len(order):
+                return rows
+            nprobe = min(nprobe * 2, len(order))
+
+    # ------------------------------------------------------------------
+    # IVF training
+    # ------------------------------------------------------------------
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        pending = self._pending.pop(list_id, None)
+        if pending:
+            self._lists[list_id] = np.concatenate([self._lists[list_id], np.asarray(pending, dtype=np.int64)])
+        return self._lists[list_id]
+
+    def _nearest_centroids(self, rows: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+            block = np.asarray(self._vectors[rows[start:start + SCORE_BLOCK_ROWS]], dtype=np.float32)
+            assignments[start:start + len(block)] = _nearest(block, self._centroids, self.metric)
+        return assignments
+
+    def _assign(self, rows: np.ndarray):
+        previous = np.asarray(self._assignments[rows])
+        assignments = self._nearest_centroids(rows)
+        self._assignments[rows] = assignments
+        for row, old, new in zip(rows.tolist(), previous.tolist(), assignments.tolist()):
+            if old == new:
+                continue
+            if old >= 0:
+                # Re-upserted row moved lists; lists never hold a row twice
+                members = self._list_rows(old)
+                self._lists[old] = members[members != row]
+            self._pending.setdefault(new, []).append(row)
+
+    def _rebuild_lists(self):
+        rows = np.flatnonzero(self._live[:self._size] & (self._assignments[:self._size] >= 0))
+        assignments = np.asarray(self._assignments[rows])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [rows[order[bounds[i]:bounds[i + 1]]] for i in range(len(self._centroids))]
+        self._pending = {}
+
+    def _maybe_train(self):
+        live = len(self._rows)
+        if self._centroids is None and live >= self.train_threshold:
+            self.train()
+        elif self._centroids is not None and live > 4 * self._trained_size:
+            # Lists sized for a much smaller index get long; repartition
+            self.train()
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: Optional[int] = None):
+        """
+        (Re)build the IVF partition with k-means over a sample of the rows.
+
+        Called automatically when the index first reaches train_threshold
+        rows and again whenever it has grown fourfold since.
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._live[:self._size])
+            if len(rows) == 0:
+                return
+            nlist = min(nlist or self.nlist or max(1, int(math.sqrt(len(rows)))), len(rows))
+            sample_size = min(sample_size or nlist * 64, len(rows))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(rows, sample_size, replace=False))
+            data = np.asarray(self._vectors[sample], dtype=np.float32)
+
+            self._centroids = _kmeans(data, nlist, iterations, self.metric, rng)
+            self._assignments[:self._size] = -1
+            self._assignments[rows] = self._nearest_centroids(rows)
+            self._rebuild_lists()
+            self._trained_size = len(rows)
+
+            tmp_path = self._file(CENTROIDS_FILE + ".tmp.npy")
+            np.save(tmp_path, self._centroids)
+            os.replace(tmp_path, self._file(CENTROIDS_FILE))
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray, metric: str) -> np.ndarray:
+    if metric == "cosine":
+        return np.argmax(data @ centroids.T, axis=1)
+    # Squared L2 without the per-row constant; dotproduct indexes partition by L2 too
+    distances = np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2 * (data @ centroids.T)
+    return np.argmin(distances, axis=1)
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, metric: str, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means (spherical for cosine); empty clusters are re-seeded."""
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.concatenate([
+            _nearest(data[start:start + SCORE_BLOCK_ROWS], centroids, metric)
+            for start in range(0, len(data), SCORE_BLOCK_ROWS)
+        ])
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=k)
+        occupied = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[occupied]
+        centroids[occupied] = np.add.reduceat(data[order], starts, axis=0) / counts[occupied, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        if metric == "cosine":
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
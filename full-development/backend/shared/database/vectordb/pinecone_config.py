@@ -14,7 +14,10 @@ from enum import Enum
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
-import pinecone
+try:
+    import pinecone
+except ImportError:  # Only the local backend is available (VECTOR_BACKEND=local)
+    pinecone = None
 
 
 class IndexName(str, Enum):
@@ -217,6 +220,19 @@ USER_PROFILE_INDEX_CONFIG = IndexConfig(
 )
 
 
+# All indexes, by name
+INDEX_CONFIGS: Dict[str, IndexConfig] = {
+    config.name: config
+    for config in (
+        BIOMETRIC_INDEX_CONFIG,
+        JOB_SKILL_INDEX_CONFIG,
+        USER_SKILL_INDEX_CONFIG,
+        LEARNING_CONTENT_INDEX_CONFIG,
+        USER_PROFILE_INDEX_CONFIG,
+    )
+}
+
+
 # ============================================================================
 # PINECONE CLIENT INITIALIZATION
 # ============================================================================
@@ -235,6 +251,9 @@ def initialize_pinecone(
     api_key = api_key or os.getenv("PINECONE_API_KEY")
     environment = environment or os.getenv("PINECONE_ENVIRONMENT", "us-west1-gcp")
 
+    if pinecone is None:
+        raise ImportError("pinecone-client is not installed; set VECTOR_BACKEND=local to use the local index")
+
     if not api_key:
         raise ValueError("PINECONE_API_KEY environment variable not set")
 
@@ -281,13 +300,7 @@ def create_all_indexes(delete_if_exists: bool = False) -> None:
     """Create all NOOR platform vector indexes."""
     initialize_pinecone()
 
-    configs = [
-        BIOMETRIC_INDEX_CONFIG,
-        JOB_SKILL_INDEX_CONFIG,
-        USER_SKILL_INDEX_CONFIG,
-        LEARNING_CONTENT_INDEX_CONFIG,
-        USER_PROFILE_INDEX_CONFIG,
-    ]
+    configs = list(INDEX_CONFIGS.values())
 
     for config in configs:
         try:
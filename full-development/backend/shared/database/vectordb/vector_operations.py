@@ -3,21 +3,28 @@ NOOR Platform - Vector Database Operations
 Version: 7.1.0
 
 Helper functions for vector operations: upsert, query, delete, update.
+
+Each class opens its indexes through backends.open_index, so they run
+against Pinecone or the local memory-mapped index (VECTOR_BACKEND=local).
 """
 
-from typing import List, Dict, Optional, Tuple, Any
+import logging
+from typing import List, Dict, Iterable, Optional, Tuple, Any, Union
 from dataclasses import dataclass
 import numpy as np
-import pinecone
 
-from .pinecone_config import IndexName, initialize_pinecone, BIOMETRIC_THRESHOLDS
+from .backends import open_index
+from .bulk_loader import MAX_BATCH_BYTES, MAX_BATCH_VECTORS, BulkUpserter, BulkUpsertError
+from .pinecone_config import IndexName, BIOMETRIC_THRESHOLDS
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class VectorRecord:
     """Represents a vector record to be upserted."""
     id: str
-    values: List[float]
+    values: Union[List[float], np.ndarray]
     metadata: Dict[str, Any]
 
 
@@ -36,9 +43,8 @@ class QueryResult:
 class BiometricVectorDB:
     """Operations for biometric embeddings (L1 Personal Zone)."""
 
-    def __init__(self):
-        initialize_pinecone()
-        self.index = pinecone.Index(IndexName.BIOMETRIC_EMBEDDINGS.value)
+    def __init__(self, backend: Optional[str] = None):
+        self.index = open_index(IndexName.BIOMETRIC_EMBEDDINGS.value, backend)
 
     def enroll_biometric(
         self,
@@ -173,10 +179,9 @@ class BiometricVectorDB:
 class JobMatchingVectorDB:
     """Operations for job/skill semantic matching."""
 
-    def __init__(self):
-        initialize_pinecone()
-        self.job_index = pinecone.Index(IndexName.JOB_SKILL_EMBEDDINGS.value)
-        self.user_index = pinecone.Index(IndexName.USER_SKILL_EMBEDDINGS.value)
+    def __init__(self, backend: Optional[str] = None):
+        self.job_index = open_index(IndexName.JOB_SKILL_EMBEDDINGS.value, backend)
+        self.user_index = open_index(IndexName.USER_SKILL_EMBEDDINGS.value, backend)
 
     def add_job_posting(
         self,
@@ -310,9 +315,8 @@ class JobMatchingVectorDB:
 class LearningContentVectorDB:
     """Operations for learning content recommendations."""
 
-    def __init__(self):
-        initialize_pinecone()
-        self.index = pinecone.Index(IndexName.LEARNING_CONTENT_EMBEDDINGS.value)
+    def __init__(self, backend: Optional[str] = None):
+        self.index = open_index(IndexName.LEARNING_CONTENT_EMBEDDINGS.value, backend)
 
     def add_learning_content(
         self,
@@ -419,9 +423,8 @@ class LearningContentVectorDB:
 class UserDiscoveryVectorDB:
     """Operations for finding similar users (mentoring, networking)."""
 
-    def __init__(self):
-        initialize_pinecone()
-        self.index = pinecone.Index(IndexName.USER_PROFILE_EMBEDDINGS.value)
+    def __init__(self, backend: Optional[str] = None):
+        self.index = open_index(IndexName.USER_PROFILE_EMBEDDINGS.value, backend)
 
     def update_user_profile(
         self,
@@ -515,32 +518,41 @@ class UserDiscoveryVectorDB:
 
 def batch_upsert(
     index_name: str,
-    records: List[VectorRecord],
-    batch_size: int = 100
+    records: Iterable[VectorRecord],
+    batch_size: int = MAX_BATCH_VECTORS,
+    backend: Optional[str] = None,
+    max_in_flight: int = 8,
+    max_batch_bytes: int = MAX_BATCH_BYTES
 ) -> int:
     """
-    Upsert vectors in batches for efficiency.
+    Upsert vectors with concurrent, size-bounded batches.
 
     Args:
         index_name: Index to upsert into
-        records: List of vector records
-        batch_size: Number of vectors per batch
+        records: Vector records; any iterable, consumed lazily (a generator
+            or bulk_loader.read_parquet_records() for Parquet exports)
+        batch_size: Maximum vectors per batch
+        backend: "pinecone" or "local" (defaults to VECTOR_BACKEND)
+        max_in_flight: Batches sent concurrently
+        max_batch_bytes: Estimated payload cap per batch
 
     Returns:
-        Total number of vectors upserted
+        Total number of vectors upserted (see BulkUpserter for full stats)
+
+    Raises:
+        BulkUpsertError: Some vectors still failed after retries; its
+            failed_ids and stats say which, and how many succeeded
     """
-    initialize_pinecone()
-    index = pinecone.Index(index_name)
-
-    total_upserted = 0
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        vectors = [(r.id, r.values, r.metadata) for r in batch]
-        index.upsert(vectors=vectors)
-        total_upserted += len(batch)
-        print(f"Upserted batch {i // batch_size + 1}: {len(batch)} vectors")
-
-    return total_upserted
+    loader = BulkUpserter(
+        open_index(index_name, backend),
+        max_batch_vectors=batch_size,
+        max_batch_bytes=max_batch_bytes,
+        max_in_flight=max_in_flight
+    )
+    stats = loader.run(records)
+    if stats.failed_ids:
+        raise BulkUpsertError(index_name, stats)
+    return stats.vectors
 
 
 # ============================================================================